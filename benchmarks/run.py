@@ -0,0 +1,297 @@
+"""
+Offline benchmarks for the planner tick and the store/dashboard hot paths.
+
+Runs against tools/fake_ha.py and a throw-away config dir (PV_MINING_CONFIG_DIR),
+so nothing touches /config or a real Home Assistant. Per benchmark it records
+wall time per op plus HA requests and YAML parses per op, and writes everything
+to one JSON file that can be compared against an earlier run:
+
+    python benchmarks/run.py                       # -> benchmarks/results/<ts>.json
+    python benchmarks/run.py --filter plan --repeat 50 --miners 1,10
+    python benchmarks/run.py --compare benchmarks/results/old.json
+"""
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import glob
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+ADDON_DIR = ROOT / "bitcoin_pv_mining"
+DEFAULT_CONFIG = ADDON_DIR / "config" / "pv_mining_addon"
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+MINER_COUNTS = (1, 10, 50, 200)
+HOUSE_LOAD_KW = 0.6
+VIEWPORT_W = 1400
+
+sys.path.insert(0, str(ROOT / "tools"))
+from fake_ha import FakeHA  # noqa: E402
+
+
+# ----------------------------------------------------------------------------------
+# Umgebung: Temp-Config + Fake-HA müssen stehen, bevor services.* importiert wird
+# ----------------------------------------------------------------------------------
+class _YamlCounter:
+    def __init__(self):
+        import yaml
+
+        self.calls = 0
+        self._orig = yaml.safe_load
+
+        def counted(*args, **kwargs):
+            self.calls += 1
+            return self._orig(*args, **kwargs)
+
+        yaml.safe_load = counted
+
+
+def _seed_config_dir(base: Path) -> Path:
+    cfg = base / "pv_mining_addon"
+    cfg.mkdir(parents=True, exist_ok=True)
+    for src in glob.glob(str(DEFAULT_CONFIG / "*.yaml")):
+        if not src.endswith(".local.yaml"):
+            shutil.copy(src, cfg)
+    return cfg
+
+
+def _setup(tmp: Path, ha_latency_s: float = 0.0) -> tuple[FakeHA, _YamlCounter, Path]:
+    fake = FakeHA(latency_s=ha_latency_s).start()
+    os.environ.update(fake.proxy_env())
+    os.environ["PV_MINING_CONFIG_DIR"] = str(tmp)
+    cfg = _seed_config_dir(tmp)
+    counter = _YamlCounter()
+    sys.path.insert(0, str(ADDON_DIR))
+    return fake, counter, cfg
+
+
+def _write_yaml(path: Path, data: dict) -> None:
+    import yaml
+
+    path.write_text(yaml.safe_dump(data, sort_keys=False), encoding="utf-8")
+
+
+def _scenario(fake: FakeHA, cfg: Path, n_miners: int) -> list[str]:
+    """N Auto-Miner (1–2.5 kW) an Fake-Switches; PV reicht für gut die Hälfte."""
+    from services import settings_store
+
+    miners = []
+    total_kw = 0.0
+    for i in range(n_miners):
+        ent = f"switch.bench_miner_{i}"
+        kw = 1.0 + 0.5 * (i % 4)
+        total_kw += kw
+        miners.append({
+            "id": f"bench_{n_miners}_{i}",
+            "name": f"Bench {i}",
+            "enabled": True,
+            "mode": "auto",
+            "state_entity": ent,
+            "state_timeout_s": 10,
+            "hashrate_ths": 100.0,
+            "power_kw": kw,
+            "require_cooling": False,
+            "action_on_entity": ent,
+            "action_off_entity": ent,
+            "created_at": 0,
+        })
+        fake.set_state(ent, "off")
+    _write_yaml(cfg / "miners.local.yaml", {"miners": {"list": miners}})
+
+    pv_kw = round(total_kw * 0.55 + HOUSE_LOAD_KW, 2)
+    fake.set_state("sensor.bench_pv", pv_kw, {"unit_of_measurement": "kW"})
+    fake.set_state("sensor.bench_grid_import", 0.0, {"unit_of_measurement": "kW"})
+    fake.set_state("sensor.bench_grid_feed_in", round(pv_kw - HOUSE_LOAD_KW, 2), {"unit_of_measurement": "kW"})
+    _write_yaml(cfg / "sensors.local.yaml", {"mapping": {
+        "pv_production": "sensor.bench_pv",
+        "grid_consumption": "sensor.bench_grid_import",
+        "grid_feed_in": "sensor.bench_grid_feed_in",
+    }})
+    settings_store.invalidate_cache()
+    return [m["id"] for m in miners]
+
+
+# ----------------------------------------------------------------------------------
+# Messung
+# ----------------------------------------------------------------------------------
+def _measure(fn, fake: FakeHA, counter: _YamlCounter, repeat: int, warmup: int, budget_s: float) -> dict:
+    # Budget: langsame Fälle (viele Miner) laufen mindestens einmal, aber nicht repeat-mal
+    t_start = time.perf_counter()
+    for _ in range(warmup):
+        fn()
+        if time.perf_counter() - t_start > budget_s:
+            break
+    times = []
+    req0, yaml0 = fake.request_count(), counter.calls
+    t_start = time.perf_counter()
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - t0) * 1000.0)
+        if time.perf_counter() - t_start > budget_s:
+            break
+    ops = len(times)
+    times.sort()
+    p95 = times[min(len(times) - 1, int(round(0.95 * (len(times) - 1))))]
+    return {
+        "ops": ops,
+        "ms_min": round(times[0], 3),
+        "ms_median": round(statistics.median(times), 3),
+        "ms_mean": round(statistics.fmean(times), 3),
+        "ms_p95": round(p95, 3),
+        "ha_requests_per_op": round((fake.request_count() - req0) / ops, 2),
+        "yaml_parses_per_op": round((counter.calls - yaml0) / ops, 2),
+    }
+
+
+class _CaptureApp:
+    """Steht für dash.Dash in register_callbacks(); merkt sich die Callbacks nach Name."""
+
+    def __init__(self):
+        self.callbacks = {}
+
+    def callback(self, *_args, **_kwargs):
+        def deco(fn):
+            self.callbacks[fn.__name__] = fn
+            return fn
+        return deco
+
+    def clientside_callback(self, *_args, **_kwargs):
+        pass
+
+
+def _benchmarks(fake: FakeHA, cfg: Path, miner_counts):
+    """Yields (name, setup, fn); setup läuft vor warmup/Messung."""
+    from services import power_planner, miners_store, cooling_store, settings_store, license
+    from services.consumers import miner as miner_consumer
+    import ui_dashboard
+
+    # Premium an: sonst plant der Tick nur den Free-Miner und alle weiteren enden bei "premium required"
+    license.is_premium_enabled = miner_consumer.is_premium_enabled = lambda: True
+    quiet = lambda _msg: None  # noqa: E731
+
+    for n in miner_counts:
+        def setup(n=n):
+            _scenario(fake, cfg, n)
+
+        def tick():
+            power_planner.plan_and_allocate_auto(apply=True, dry_run=False, log=False, logger=quiet)
+
+        yield f"plan_tick[{n}]", setup, tick
+
+    yield "list_miners[50]", lambda: _scenario(fake, cfg, 50), miners_store.list_miners
+    yield "get_cooling", None, cooling_store.get_cooling
+    yield "settings_get_var", None, lambda: settings_store.get_var("surplus_guard_w", 100.0)
+
+    app = _CaptureApp()
+    ui_dashboard.register_callbacks(app)
+    collect_frame = app.callbacks["collect_frame"]
+    update_sankey = app.callbacks["update_sankey"]
+    frame = {}
+
+    def dash_setup():
+        _scenario(fake, cfg, 10)
+        frame.update(collect_frame(0))
+
+    yield "dashboard_collect_frame[10]", dash_setup, lambda: collect_frame(0)
+    yield "dashboard_update_sankey[10]", dash_setup, lambda: update_sankey(frame, VIEWPORT_W)
+
+
+def _git_rev() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, timeout=10).stdout.strip()
+    except Exception:
+        return ""
+
+
+def run(repeat: int, warmup: int, name_filter: str, budget_s: float = 30.0, miner_counts=MINER_COUNTS,
+        ha_latency_s: float = 0.0) -> dict:
+    tmp = Path(tempfile.mkdtemp(prefix="pv_mining_bench_"))
+    fake, counter, cfg = _setup(tmp, ha_latency_s)
+    results = {}
+    try:
+        for name, setup, fn in _benchmarks(fake, cfg, miner_counts):
+            if name_filter and name_filter not in name:
+                continue
+            if setup:
+                setup()
+            results[name] = _measure(fn, fake, counter, repeat, warmup, budget_s)
+            r = results[name]
+            print(f"{name:32s} median {r['ms_median']:9.3f} ms  p95 {r['ms_p95']:9.3f} ms  "
+                  f"ha {r['ha_requests_per_op']:7.2f}/op  yaml {r['yaml_parses_per_op']:6.2f}/op", flush=True)
+    finally:
+        fake.stop()
+        shutil.rmtree(tmp, ignore_errors=True)
+    return {
+        "meta": {
+            "timestamp": dt.datetime.now().isoformat(timespec="seconds"),
+            "git_rev": _git_rev(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": repeat,
+            "warmup": warmup,
+            "budget_s": budget_s,
+            "ha_latency_s": ha_latency_s,
+        },
+        "results": results,
+    }
+
+
+def compare(old: dict, new: dict) -> None:
+    print(f"\ncompare {old.get('meta', {}).get('git_rev', '?')} -> {new.get('meta', {}).get('git_rev', '?')}")
+    for name, cur in new.get("results", {}).items():
+        prev = (old.get("results") or {}).get(name)
+        if not prev:
+            print(f"{name:32s} (new)")
+            continue
+        parts = []
+        for key in ("ms_median", "ha_requests_per_op", "yaml_parses_per_op"):
+            a, b = float(prev.get(key) or 0.0), float(cur.get(key) or 0.0)
+            pct = f"{(b - a) / a * 100.0:+.1f}%" if a else "n/a"
+            parts.append(f"{key} {a:g} -> {b:g} ({pct})")
+        print(f"{name:32s} " + "  ".join(parts))
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="PV mining offline benchmarks")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--budget-s", type=float, default=30.0,
+                        help="stop warmup/measurement of one benchmark after this many seconds (min. 1 op)")
+    parser.add_argument("--miners", default=",".join(str(n) for n in MINER_COUNTS),
+                        help="miner counts for plan_tick, comma separated")
+    parser.add_argument("--ha-latency-ms", type=float, default=0.0,
+                        help="per-request latency of the fake Home Assistant")
+    parser.add_argument("--filter", default="", help="only benchmarks whose name contains this")
+    parser.add_argument("--out", default="", help="result JSON (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--compare", default="", help="earlier result JSON to diff against")
+    args = parser.parse_args(argv)
+
+    counts = tuple(int(x) for x in args.miners.split(",") if x.strip())
+    report = run(max(1, args.repeat), max(0, args.warmup), args.filter, max(0.0, args.budget_s), counts,
+                 max(0.0, args.ha_latency_ms) / 1000.0)
+
+    out = Path(args.out) if args.out else RESULTS_DIR / f"{time.strftime('%Y%m%d-%H%M%S')}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"wrote {out}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            compare(json.load(f), report)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
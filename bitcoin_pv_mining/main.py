@@ -1,42 +1,46 @@
+import time
+_BOOT_T0 = time.perf_counter()
+
 import os
 import requests
 import dash
 import flask
 import urllib.parse
-import time
 import json
 import threading
+import importlib
+import signal
+import sys
+
+
+def _boot_phase(name: str) -> None:
+    print(f"[startup] {name} +{time.perf_counter() - _BOOT_T0:.3f}s", flush=True)
+
 
 from dash import html, dcc, no_update
 from dash.dependencies import Input, Output, State
 
 
 from flask import request, redirect, send_file, Response, jsonify
-from ui_dashboard import layout as dashboard_layout, register_callbacks
 
 from services.btc_api import update_btc_data_periodically
 from services.license import set_token, verify_license, start_heartbeat_loop, is_premium_enabled, issue_token_and_enable, has_valid_token_cached
-from services.utils import get_addon_version, load_state, save_state, update_state, iso_now, load_yaml
+from services.utils import get_addon_version, load_state, save_state, update_state, iso_now, load_yaml, ADDON_CONFIG_DIR
 from services.power_planner import plan_and_allocate_auto
 from services.settings_store import get_var as settings_get, is_orchestrator_enabled
 from services.disclaimer_consent import get_consent_status, save_user_consent
+from services import modbus_source
+from services import fast_loop
+from services import safety_watchdog
+from services import miner_api
 from urllib.parse import urlparse, parse_qs
 
-#from ui_pages.sensors import layout as sensors_layout, register_callbacks as reg_sensors
-from ui_pages.miners import layout as miners_layout, register_callbacks as reg_miners
-#from ui_pages.electricity import layout as electricity_layout, register_callbacks as reg_electricity
-from ui_pages.battery import layout as battery_layout, register_callbacks as reg_battery
-from ui_pages.wallbox import layout as wallbox_layout, register_callbacks as reg_wallbox
-from ui_pages.heater import layout as heater_layout, register_callbacks as reg_heater
-from ui_pages.settings import layout as settings_layout, register_callbacks as reg_settings
-from ui_pages.dev import layout as dev_layout, register_callbacks as reg_dev
+# Seitenmodule (und damit plotly) werden im Hintergrund geladen, siehe _load_pages()
 from ui_pages.common import footer_license, page_wrap, ui_background_color, _readme_urls, _license_url, _disclaimer_urls
 
-# beim Start
-verify_license()
-start_heartbeat_loop(addon_version=get_addon_version())
+_boot_phase("imports")
 
-CONFIG_DIR = "/config/pv_mining_addon"
+CONFIG_DIR = ADDON_CONFIG_DIR
 CONFIG_PATH = os.path.join(CONFIG_DIR, "pv_mining_local_config.yaml")
 LICENSE_BASE_URL = os.getenv("LICENSE_BASE_URL", "https://license.bitcoinsolution.at")
 PLANNER_TICK_LOCK = threading.Lock()
@@ -89,13 +93,6 @@ CONSENT_TEXTS = {
     },
 }
 
-from ui_pages.settings import (
-    _prio_available_items as prio_available_items,
-    _load_prio_ids as prio_load_ids,
-    _prio_merge_with_stored as prio_merge,
-)
-
-
 def _consent_lang(value) -> str:
     return "de" if str(value or "de").lower().startswith("de") else "en"
 
@@ -337,11 +334,11 @@ if ICON_SOURCE_PATH and not os.path.exists(ICON_TARGET_PATH):
 update_btc_data_periodically(CONFIG_PATH)
 server = flask.Flask(__name__)
 
-def get_ingress_prefix():
+def _fetch_ingress_prefix(timeout: float = 5) -> str | None:
     token = os.getenv("SUPERVISOR_TOKEN")
     headers = {"Authorization": f"Bearer {token}"} if token else {}
     try:
-        r = requests.get("http://supervisor/addons/self/info", headers=headers, timeout=5)
+        r = requests.get("http://supervisor/addons/self/info", headers=headers, timeout=timeout)
         if r.status_code == 200:
             ingress_url = r.json()["data"]["ingress_url"]  # volle URL
             p = urlparse(ingress_url).path or "/"
@@ -353,12 +350,46 @@ def get_ingress_prefix():
             print(f"[WARN] Supervisor answer: {r.status_code}")
     except Exception as e:
         print(f"[ERROR] Supervisor API error: {e}")
+    return None
+
+
+def _store_ingress_prefix(p: str) -> None:
+    def _mut(st: dict):
+        st["ingress_prefix"] = p
+    update_state(_mut)
+
+
+def get_ingress_prefix():
+    """
+    Ingress-Prefix ändert sich pro Installation nicht -> zuletzt bekannten Wert
+    aus state.json nehmen; nur ohne Cache wird der Supervisor synchron gefragt.
+    """
+    cached = str((load_state() or {}).get("ingress_prefix") or "")
+    if cached:
+        return cached
+    if not os.getenv("SUPERVISOR_TOKEN"):
+        return "/"
+    p = _fetch_ingress_prefix()
+    if p:
+        _store_ingress_prefix(p)
+        return p
     return "/"
 
 
+def _refresh_ingress_prefix(current: str) -> None:
+    if not os.getenv("SUPERVISOR_TOKEN"):
+        return
+    p = _fetch_ingress_prefix()
+    if not p or p == current:
+        return
+    _store_ingress_prefix(p)
+    print(f"[WARN] Ingress prefix changed {current} -> {p}; active after restart", flush=True)
+
+
 prefix = get_ingress_prefix()
 if not prefix.endswith("/"):
     prefix += "/"
+_boot_phase(f"ingress prefix ({prefix})")
 
 IS_INGRESS = prefix.startswith("/api/hassio_ingress/")
 print(f"[INFO] IS_INGRESS={IS_INGRESS} prefix={prefix}")
@@ -378,13 +409,6 @@ app = dash.Dash(
     serve_locally=True,
 )
 
-try:
-    _initial_prio = prio_merge(prio_load_ids(), prio_available_items())
-    print("[prio:init] initial order:", _initial_prio, flush=True)
-except Exception as e:
-    print("[prio:init] failed to compute initial order:", e, flush=True)
-    _initial_prio = []
-
 # Zusätzliche (idempotente) Route, falls Dashs interner Assets-Handler am Proxy scheitert
 from flask import send_from_directory
 
@@ -1009,40 +1033,91 @@ def render_tab(tab, premium_data, consent_state):
         return html.Div()
     enabled = bool((premium_data or {}).get("enabled"))
     if tab == "dashboard":
-        return dashboard_layout()
+        return _page_layout("dashboard")
     #if tab == "sensors":
     #    return sensors_layout()
     if tab == "miners":
         # ⬇️ früher: return miners_layout() if enabled else premium_upsell()
-        return miners_layout()  # Miners-Tab ist immer sichtbar (Miner 2+ werden innen gegated)
+        return _page_layout("miners")  # Miners-Tab ist immer sichtbar (Miner 2+ werden innen gegated)
     #if tab == "electricity":
     #    return electricity_layout()
     if tab == "battery":
-        return battery_layout() if SHOW_BATTERY_TAB else dashboard_layout()
+        return _page_layout("battery") if SHOW_BATTERY_TAB else _page_layout("dashboard")
     if tab == "heater":
-        return heater_layout()
+        return _page_layout("heater")
     if tab == "wallbox":
-        return wallbox_layout() if SHOW_WALLBOX_TAB else dashboard_layout()
+        return _page_layout("wallbox") if SHOW_WALLBOX_TAB else _page_layout("dashboard")
     if tab == "settings":
-        return settings_layout()
+        return _page_layout("settings")
     if tab == "dev":
-        return dev_layout() if _show_dev_tab() else dashboard_layout()
-    return dashboard_layout()
-
-
-register_callbacks(app)     # Dashboard
-#reg_sensors(app)            # Sensors
-#reg_electricity(app)        # electricity
-reg_miners(app)             # miners
-reg_battery(app)            # battery
-reg_heater(app)             # heater
-reg_wallbox(app)            # wallbox
-reg_settings(app)           # settings
-if _show_dev_tab():
-    try:
-        reg_dev(app)
-    except Exception as e:
-        print(f"[dev] register error: {e}", flush=True)
+        return _page_layout("dev") if _show_dev_tab() else _page_layout("dashboard")
+    return _page_layout("dashboard")
+
+
+# ----------------------------------------------------------------------------------
+# Seitenmodule: werden nach dem Start in einem Hintergrund-Thread importiert und
+# registriert. Dash braucht alle Callbacks, bevor der Browser _dash-dependencies
+# holt – bis dahin beantwortet _startup_gate() Seitenaufrufe mit einer kleinen
+# "startet…"-Seite, statt den Port blockiert zu lassen.
+# ----------------------------------------------------------------------------------
+PAGE_MODULES = (
+    ("dashboard", "ui_dashboard"),
+    #("sensors", "ui_pages.sensors"),
+    ("miners", "ui_pages.miners"),
+    #("electricity", "ui_pages.electricity"),
+    ("battery", "ui_pages.battery"),
+    ("heater", "ui_pages.heater"),
+    ("wallbox", "ui_pages.wallbox"),
+    ("settings", "ui_pages.settings"),
+    ("dev", "ui_pages.dev"),
+)
+PAGES_WAIT_S = 60.0
+_PAGES_READY = threading.Event()
+_PAGE_LAYOUTS = {}
+
+
+def _load_pages() -> None:
+    for tab, module_name in PAGE_MODULES:
+        t0 = time.perf_counter()
+        try:
+            mod = importlib.import_module(module_name)
+            _PAGE_LAYOUTS[tab] = mod.layout
+            if tab != "dev" or _show_dev_tab():
+                mod.register_callbacks(app)
+        except Exception as e:
+            print(f"[startup] page '{tab}' load error: {e}", flush=True)
+            continue
+        print(f"[startup] page '{tab}' loaded in {time.perf_counter() - t0:.3f}s", flush=True)
+    _PAGES_READY.set()
+    _boot_phase("pages ready")
+
+
+def _page_layout(tab: str):
+    if not _PAGES_READY.wait(timeout=PAGES_WAIT_S):
+        return html.Div("Loading …")
+    layout_fn = _PAGE_LAYOUTS.get(tab) or _PAGE_LAYOUTS.get("dashboard")
+    return layout_fn() if layout_fn else html.Div()
+
+
+_STARTING_HTML = (
+    "<!DOCTYPE html><html><head><meta charset='utf-8'><meta http-equiv='refresh' content='1'>"
+    "<title>PV Mining</title></head><body style='background:#0b1220;color:#e6edf7;font-family:sans-serif'>"
+    "<p style='margin:40px'>PV Mining add-on is starting …</p></body></html>"
+)
+
+
+def _startup_gate():
+    if _PAGES_READY.is_set():
+        return None
+    if request.method == "GET" and "_dash-" not in request.path and request.accept_mimetypes.accept_html:
+        return Response(_STARTING_HTML, status=200, mimetype="text/html", headers={"Cache-Control": "no-store"})
+    # Dash-Endpunkte und übrige Routen warten, bis alle Callbacks registriert sind
+    _PAGES_READY.wait(timeout=PAGES_WAIT_S)
+    return None
+
+
+# muss vor Dashs eigenem _setup_server laufen
+server.before_request_funcs.setdefault(None, []).insert(0, _startup_gate)
 
 
 app.index_string = '''
@@ -1416,71 +1491,78 @@ app.index_string = '''
 </html>
 '''
 
-app.layout = page_wrap([
-    dcc.Store(id="active-tab", data="dashboard"),
-    dcc.Store(id="premium-enabled", data={"enabled": is_premium_enabled()}),
-    dcc.Store(id="consent-state", data=get_consent_status(), storage_type="local"),
-    dcc.Store(id="prio-order", storage_type="local"),
-    dcc.Store(id="flash-visible-until", data=0),
-    dcc.Interval(id="flash-poll", interval=2000, n_intervals=0),
-    dcc.Location(id="url", refresh=False),
-    # html.Div(id="flash-area", style={"margin":"8px 0"}),
-    html.Div(
-        id="flash-area",
-        style={
-            "margin": "0",                         # keine top-margin (verhindert weißen Balken)
-            "padding": "8px 0",                    # optischer Abstand statt margin
-            "backgroundColor": "transparent",
-            "zIndex": 10,
-        },
-    ),
-    _first_run_modal(),
+def _serve_layout():
+    # pro Seitenaufruf einmal auswerten (nicht beim Import)
+    consent = get_consent_status()
+    consent_required = bool(consent.get("required"))
+    return page_wrap([
+        dcc.Store(id="active-tab", data="dashboard"),
+        dcc.Store(id="premium-enabled", data={"enabled": is_premium_enabled()}),
+        dcc.Store(id="consent-state", data=consent, storage_type="local"),
+        dcc.Store(id="prio-order", storage_type="local"),
+        dcc.Store(id="flash-visible-until", data=0),
+        dcc.Interval(id="flash-poll", interval=2000, n_intervals=0),
+        dcc.Location(id="url", refresh=False),
+        # html.Div(id="flash-area", style={"margin":"8px 0"}),
+        html.Div(
+            id="flash-area",
+            style={
+                "margin": "0",                         # keine top-margin (verhindert weißen Balken)
+                "padding": "8px 0",                    # optischer Abstand statt margin
+                "backgroundColor": "transparent",
+                "zIndex": 10,
+            },
+        ),
+        _first_run_modal(),
 
 
-    # NEU: globaler Engine-Timer (unabhängig vom Tab)
-    dcc.Interval(id="planner-engine", interval=15_000, n_intervals=0),  # alle 15s
-    html.Div(id="planner-heartbeat", style={"display": "none"}),        # Dummy-Output
+        # NEU: globaler Engine-Timer (unabhängig vom Tab)
+        dcc.Interval(id="planner-engine", interval=15_000, n_intervals=0),  # alle 15s
+        html.Div(id="planner-heartbeat", style={"display": "none"}),        # Dummy-Output
 
-    html.Div([
-        # html.Img(src=f"{prefix}config-icon", className="header-icon"),
-        html.A(
-            html.Img(
-                src=f"{prefix}config-icon",
-                className="header-icon",
-                alt="BitcoinSolution.at"
+        html.Div([
+            # html.Img(src=f"{prefix}config-icon", className="header-icon"),
+            html.A(
+                html.Img(
+                    src=f"{prefix}config-icon",
+                    className="header-icon",
+                    alt="BitcoinSolution.at"
+                ),
+                href="https://www.bitcoinsolution.at",
+                target="_blank",
+                rel="noopener noreferrer",
+                id="brand-link",
+                style={"display": "block"}
             ),
-            href="https://www.bitcoinsolution.at",
-            target="_blank",
-            rel="noopener noreferrer",
-            id="brand-link",
-            style={"display": "block"}
+
+            # zentrierte Tab-Gruppe
+            html.Div([
+                html.Button("Dashboard", id="btn-dashboard", n_clicks=0, className="custom-tab custom-tab-selected", **{"data-tab": "dashboard"}),
+                #html.Button("Sensors", id="btn-sensors", n_clicks=0, className="custom-tab", **{"data-tab": "sensors"}),
+                html.Button("Consumers", id="btn-miners", n_clicks=0, className="custom-tab", **{"data-tab": "miners"}),
+                #html.Button("Electricity", id="btn-electricity", n_clicks=0, className="custom-tab", **{"data-tab": "electricity"}),
+                html.Button("Battery", id="btn-battery", n_clicks=0, className="custom-tab", **{"data-tab": "battery"}),
+                html.Button("Water Heater", id="btn-heater", n_clicks=0, className="custom-tab", **{"data-tab": "heater"}),
+                html.Button("Wall-Box", id="btn-wallbox", n_clicks=0, className="custom-tab", **{"data-tab": "wallbox"}),
+                html.Button("Settings", id="btn-settings", n_clicks=0, className="custom-tab", **{"data-tab": "settings"}),
+                html.Button("Dev", id="btn-dev", n_clicks=0, className="custom-tab", style=({} if SHOW_DEV_TAB else {"display": "none"})),
+            ], className="tab-group"),
+
+            # Premium ganz rechts
+            html.Button("Activate Premium", id="btn-premium",
+                        n_clicks=0, className="custom-tab premium-btn premium-right"),
+        ], id="tab-buttons", className="header-bar",
+            style=_tab_buttons_style(consent_required)),
+
+        html.Div(
+            id="tabs-content",
+            className="content-area",
+            style=_tabs_content_style(consent_required),
         ),
+    ])
 
-        # zentrierte Tab-Gruppe
-        html.Div([
-            html.Button("Dashboard", id="btn-dashboard", n_clicks=0, className="custom-tab custom-tab-selected", **{"data-tab": "dashboard"}),
-            #html.Button("Sensors", id="btn-sensors", n_clicks=0, className="custom-tab", **{"data-tab": "sensors"}),
-            html.Button("Consumers", id="btn-miners", n_clicks=0, className="custom-tab", **{"data-tab": "miners"}),
-            #html.Button("Electricity", id="btn-electricity", n_clicks=0, className="custom-tab", **{"data-tab": "electricity"}),
-            html.Button("Battery", id="btn-battery", n_clicks=0, className="custom-tab", **{"data-tab": "battery"}),
-            html.Button("Water Heater", id="btn-heater", n_clicks=0, className="custom-tab", **{"data-tab": "heater"}),
-            html.Button("Wall-Box", id="btn-wallbox", n_clicks=0, className="custom-tab", **{"data-tab": "wallbox"}),
-            html.Button("Settings", id="btn-settings", n_clicks=0, className="custom-tab", **{"data-tab": "settings"}),
-            html.Button("Dev", id="btn-dev", n_clicks=0, className="custom-tab", style=({} if SHOW_DEV_TAB else {"display": "none"})),
-        ], className="tab-group"),
-
-        # Premium ganz rechts
-        html.Button("Activate Premium", id="btn-premium",
-                    n_clicks=0, className="custom-tab premium-btn premium-right"),
-    ], id="tab-buttons", className="header-bar",
-        style=_tab_buttons_style(bool(get_consent_status().get("required")))),
-
-    html.Div(
-        id="tabs-content",
-        className="content-area",
-        style=_tabs_content_style(bool(get_consent_status().get("required"))),
-    ),
-])
+
+app.layout = _serve_layout
 
 @app.callback(
     Output("consent-state", "data", allow_duplicate=True),
@@ -1692,6 +1774,63 @@ def _global_engine_tick(n, _consent_state, premium_data):
         PLANNER_TICK_LOCK.release()
 
 
+def _startup_background() -> None:
+    """Netzwerk-Checks nach dem Start; bis dahin gelten die Werte aus state.json."""
+    # Schutzfunktionen zuerst: ein langsamer Lizenzserver darf Netz-Deckel und
+    # Kühlungsüberwachung beim Boot nicht verzögern
+    try:
+        modbus_source.start_from_settings()
+    except Exception as e:
+        print(f"[startup] modbus source error: {e}", flush=True)
+
+    try:
+        safety_watchdog.start_from_settings()
+    except Exception as e:
+        print(f"[startup] safety watchdog error: {e}", flush=True)
+
+    t0 = time.perf_counter()
+    try:
+        verify_license()
+    except Exception as e:
+        print(f"[startup] verify_license error: {e}", flush=True)
+    start_heartbeat_loop(addon_version=get_addon_version())
+    print(f"[startup] license verify done in {time.perf_counter() - t0:.3f}s", flush=True)
+
+    try:
+        fast_loop.start_from_settings()
+    except Exception as e:
+        print(f"[startup] fast loop error: {e}", flush=True)
+
+    try:
+        miner_api.start_from_settings()
+    except Exception as e:
+        print(f"[startup] miner api error: {e}", flush=True)
+
+    t0 = time.perf_counter()
+    _refresh_ingress_prefix(prefix)
+    print(f"[startup] ingress prefix check done in {time.perf_counter() - t0:.3f}s", flush=True)
+
+    if not _PAGES_READY.wait(timeout=PAGES_WAIT_S):
+        return
+    try:
+        from ui_pages.settings import (
+            _prio_available_items as prio_available_items,
+            _load_prio_ids as prio_load_ids,
+            _prio_merge_with_stored as prio_merge,
+        )
+        initial_prio = prio_merge(prio_load_ids(), prio_available_items())
+        print("[prio:init] initial order:", initial_prio, flush=True)
+    except Exception as e:
+        print("[prio:init] failed to compute initial order:", e, flush=True)
+
+
+threading.Thread(target=_load_pages, name="startup-pages", daemon=True).start()
+threading.Thread(target=_startup_background, name="startup-net", daemon=True).start()
+_boot_phase("app ready")
+
+
 if __name__ == "__main__":
+    # Add-on-Stopp (SIGTERM) als normales Beenden behandeln, damit atexit (runtime_db.close) läuft
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
     print("[main.py] Starting Dash on 0.0.0.0:21000")
     app.run(host="0.0.0.0", port=21000, debug=False, use_reloader=False)
@@ -1,4 +1,5 @@
 #!/usr/bin/env bash
 
 echo "[run.sh] starting Bitcoin PV-mining dashboard ..."
-python3 -u /app/main.py
+# exec: SIGTERM beim Stoppen des Add-ons geht direkt an Python (atexit-Handler laufen)
+exec python3 -u /app/main.py
@@ -1,8 +1,8 @@
 # services/battery_store.py
 import os, yaml
-from .utils import load_yaml, save_yaml
+from .utils import load_yaml, save_yaml, ADDON_CONFIG_DIR
 
-CONFIG_DIR = "/config/pv_mining_addon"
+CONFIG_DIR = ADDON_CONFIG_DIR
 BASE_FILE  = os.path.join(CONFIG_DIR, "battery.yaml")
 LOCAL_FILE = os.path.join(CONFIG_DIR, "battery.local.yaml")
 RUNTIME_FILE = os.path.join(CONFIG_DIR, "battery.runtime.yaml")
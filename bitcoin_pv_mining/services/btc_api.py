@@ -1,10 +1,9 @@
 import os
-import threading
-import time
 import yaml
 import requests
+from services.utils import ADDON_CONFIG_DIR
 
-CONFIG_DIR = "/config/pv_mining_addon"
+CONFIG_DIR = ADDON_CONFIG_DIR
 CONFIG_PATH = os.path.join(CONFIG_DIR, "pv_mining_local_config.yaml")
 
 INTERVALS_MINUTES = {
@@ -21,13 +20,6 @@ API_URLS = {
     "mempool_space": "https://mempool.space/api/v1/mining/hashrate/3d"
 }
 
-LAST_UPDATE = {
-    "coingecko": 0,
-    "coinbase": 0,
-    "blockchain_info": 0,
-    "mempool_space": 0
-}
-
 def load_config(CONFIG_PATH):
     try:
         with open(CONFIG_PATH, "r", encoding="utf-8") as f:
@@ -60,52 +52,12 @@ def convert_mempool_space_hashrate_to_th(raw_hs):
         return None
 
 def update_btc_data_periodically(CONFIG_PATH):
-    def updater():
-        while True:
-            config = load_config(CONFIG_PATH)
-            if not isinstance(config, dict):
-                config = {}
-            entities = config.get("entities", {})
-            if not isinstance(entities, dict):
-                entities = {}
-            now = time.time()
-            updated = False
-
-            if now - LAST_UPDATE["coingecko"] >= INTERVALS_MINUTES["coingecko"] * 60:
-                price = get_btc_price_from_coingecko()
-                if price is not None:
-                    entities["sensor_btc_price"] = price
-                    LAST_UPDATE["coingecko"] = now
-                    updated = True
-
-            elif now - LAST_UPDATE["coinbase"] >= INTERVALS_MINUTES["coinbase"] * 60:
-                price = get_btc_price_from_coinbase()
-                if price is not None:
-                    entities["sensor_btc_price"] = price
-                    LAST_UPDATE["coinbase"] = now
-                    updated = True
-
-            if now - LAST_UPDATE["blockchain_info"] >= INTERVALS_MINUTES["blockchain_info"] * 60:
-                hashrate = get_btc_hashrate_from_blockchain_info()
-                if hashrate is not None:
-                    entities["sensor_btc_hashrate"] = convert_blockchain_info_hashrate_to_th(hashrate)
-                    LAST_UPDATE["blockchain_info"] = now
-                    updated = True
-
-            elif now - LAST_UPDATE["mempool_space"] >= INTERVALS_MINUTES["mempool_space"] * 60:
-                hashrate = get_btc_hashrate_from_mempool_space()
-                if hashrate is not None:
-                    entities["sensor_btc_hashrate"] = convert_mempool_space_hashrate_to_th(hashrate)
-                    LAST_UPDATE["mempool_space"] = now
-                    updated = True
-
-            if updated:
-                save_entities(CONFIG_PATH, entities)
-                # print("[BTC] Updated BTC info:", entities)
-
-            time.sleep(30)
-
-    threading.Thread(target=updater, daemon=True).start()
+    """
+    Startet den Market-Data-Fetcher (services.market_data): Quellen parallel,
+    Median über alle frischen Werte, Snapshot im Speicher, YAML nur gelegentlich.
+    """
+    from services import market_data
+    return market_data.start(CONFIG_PATH)
 
 def get_btc_price_from_coingecko():
     try:
@@ -1,11 +1,12 @@
 # services/btc_metrics.py
 import os
-from services.utils import load_yaml
+from services.utils import load_yaml, ADDON_CONFIG_DIR
 from services.ha_sensors import get_sensor_value
-from services.settings_store import get_var as set_get, set_vars as set_set
+from services.settings_store import get_var as set_get
 from services.forex import usd_to_eur_rate
+from services import market_data
 
-CONFIG_DIR = "/config/pv_mining_addon"
+CONFIG_DIR = ADDON_CONFIG_DIR
 MAIN_CFG = os.path.join(CONFIG_DIR, "pv_mining_local_config.yaml")
 
 def _to_float(x, default=0.0):
@@ -18,22 +19,14 @@ def _resolve_entity_or_number(val):
         return _to_float(get_sensor_value(val), 0.0)
     return _to_float(val, 0.0)
 
-def get_live_btc_price_eur(fallback=0.0) -> float:
+def _market_value(kind: str, entity_key: str):
+    """Frischer Wert aus dem Market-Data-Snapshot, sonst der persistierte Eintrag."""
+    v = market_data.get_fresh(kind)
+    if v is not None:
+        return v
     cfg = load_yaml(MAIN_CFG, {}) or {}
     ents = cfg.get("entities", {}) or {}
-    raw = ents.get("sensor_btc_price")
-    price = _resolve_entity_or_number(raw)
-
-    # Währung aus Settings (Default: EUR)
-    cur = str(set_get("btc_price_currency", "EUR") or "EUR").upper()
-    if cur == "USD":
-        fx = usd_to_eur_rate(fallback=_to_float(set_get("fx_usd_to_eur", 0.93), 0.93))
-        price *= fx
-        # optional: letzten guten Kurs persistieren
-        if fx > 0:
-            set_set(fx_usd_to_eur=fx)
-
-    return price if price > 0 else _to_float(fallback, 0.0)
+    return ents.get(entity_key)
 
 def _normalize_network_hashrate_to_ths(v: float) -> float:
     """
@@ -51,9 +44,7 @@ def _normalize_network_hashrate_to_ths(v: float) -> float:
     return v        # schon TH/s
 
 def get_live_network_hashrate_ths(fallback=0.0) -> float:
-    cfg = load_yaml(MAIN_CFG, {}) or {}
-    ents = cfg.get("entities", {}) or {}
-    raw = ents.get("sensor_btc_hashrate")
+    raw = _market_value(market_data.HASHRATE, "sensor_btc_hashrate")
     v = _resolve_entity_or_number(raw)
     v_ths = _normalize_network_hashrate_to_ths(v)
     if v_ths > 0: return v_ths
@@ -65,15 +56,14 @@ def sats_per_th_per_hour(block_reward_btc: float, network_hashrate_ths: float) -
     return _to_float(block_reward_btc, 0.0) * 6.0 * 1e8 / network_hashrate_ths
 
 def get_live_btc_price_eur(fallback=0.0) -> float:
-    cfg = load_yaml(MAIN_CFG, {}) or {}
-    ents = cfg.get("entities", {}) or {}
-    raw = ents.get("sensor_btc_price")
+    raw = _market_value(market_data.PRICE, "sensor_btc_price")
     price = _resolve_entity_or_number(raw)
 
     # Währung aus Settings lesen (Default EUR)
     cur = str(set_get("btc_price_currency", "EUR") or "EUR").upper()
     if cur == "USD":
-        fx = _to_float(set_get("fx_usd_to_eur", 0.93), 0.93)
+        # gecachter Kurs (Runtime-Store), Refresh läuft im Hintergrund
+        fx = usd_to_eur_rate(fallback=_to_float(set_get("fx_usd_to_eur", 0.93), 0.93))
         price = price * fx
 
     return price if price > 0 else _to_float(fallback, 0.0)
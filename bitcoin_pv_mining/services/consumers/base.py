@@ -7,7 +7,7 @@ from dataclasses import dataclass
 from typing import Optional
 
 
-@dataclass
+@dataclass(slots=True)
 class Desire:
     """Wunsch eines Verbrauchers fuer die naechste Planungsrunde."""
 
@@ -19,22 +19,51 @@ class Desire:
     reason: str = ""
 
 
-@dataclass
+@dataclass(slots=True)
 class Ctx:
-    """Planungskontext fuer Energiesituation und oekonomische Parameter."""
+    """
+    Planungskontext eines Ticks. Nur Attributzugriff: plan_and_allocate setzt
+    die Planner-Fakten vor dem ersten compute_desire(), Consumer lesen sie direkt.
+    """
 
     ts: float = 0.0
     pv_kw: float = 0.0
     grid_kw: float = 0.0
     feedin_kw: float = 0.0
+
+    # Ökonomie-Snapshot
     grid_price_eur_kwh: float = 0.0
     pv_cost_eur_kwh: float = 0.0
     fee_down_eur_kwh: float = 0.0
     fee_up_eur_kwh: float = 0.0
+    grid_cost_eur_kwh: Optional[float] = None   # Preis + fee_down; None = (noch) unbekannt
     btc_price_eur: float = 0.0
     network_hashrate_ths: float = 0.0
     block_reward_btc: float = 3.125
     tax_percent: float = 0.0
+
+    # Überschuss / Guard
+    pv_kw_raw: float = 0.0
+    surplus_raw_kw: float = 0.0
+    guard_kw: float = 0.0
+    surplus_measured_kw: float = 0.0
+    surplus_effective_kw: float = 0.0
+
+    # PV-Ramp-Up
+    pv_ramp_bonus_kw: float = 0.0
+    pv_ramp_probe_offset_kw: float = 0.0
+    pv_ramp_candidate_kw: float = 0.0
+
+    # Batterie
+    battery_discharge_kw: float = 0.0
+    battery_support_kw: float = 0.0
+    battery_block: bool = False
+
+    # Netzbezugs-Cap
+    grid_import_measured_kw: float = 0.0
+    grid_import_cap_kw: float = 0.0
+    grid_import_emergency_off: bool = False
+
     _surplus_kw_override: Optional[float] = None
 
     @property
@@ -75,6 +104,16 @@ class BaseConsumer(ABC):
     def apply_allocation(self, ctx: Ctx, alloc_kw: float) -> None:
         raise NotImplementedError
 
+    # Lebenszyklus – Instanzen leben über Ticks hinweg (siehe registry.py)
+    def on_config_changed(self) -> None:
+        """Eine Konfigurationsdatei hat sich geändert; gecachte Config/Entity-IDs verwerfen."""
+
+    def on_tick_start(self, ctx: Ctx) -> None:
+        """Vor der ersten Verwendung in einem Planner-Tick."""
+
+    def on_tick_end(self, ctx: Ctx) -> None:
+        """Nach dem letzten apply_allocation() eines Ticks."""
+
     def __repr__(self) -> str:
         return f"<{self.__class__.__name__} id={self.id!r} label={self.label!r}>"
 
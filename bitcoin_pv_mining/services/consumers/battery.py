@@ -20,19 +20,6 @@ def _num(x, d=0.0):
         return d
 
 
-def _ctx_num(ctx: Ctx | dict | None, name: str, default=None):
-    try:
-        val = getattr(ctx, name)
-        return default if val is None else float(val)
-    except Exception:
-        pass
-    try:
-        val = ctx.get(name, default)
-        return default if val is None else float(val)
-    except Exception:
-        return default
-
-
 def _entity_str(key: str) -> str:
     return str(bat_get(key, "") or "").strip()
 
@@ -459,10 +446,10 @@ class BatteryConsumer(BaseConsumer):
 
     def compute_desire(self, ctx: Ctx) -> Desire:
         soc = self._read_soc()
-        grid_c = _ctx_num(ctx, "grid_cost_eur_kwh", None)
+        grid_c = ctx.grid_cost_eur_kwh
         target = self._effective_target_soc(grid_c)
         max_kw = self._max_charge_kw()
-        surplus = max(0.0, _ctx_num(ctx, "surplus_kw", 0.0) or 0.0)
+        surplus = max(0.0, ctx.surplus_kw)
         allow_grid_charge = bool(bat_get("allow_grid_charge", False)) or self._neg_control_enabled()
 
         if max_kw <= 0:
@@ -482,7 +469,7 @@ class BatteryConsumer(BaseConsumer):
     def apply_allocation(self, ctx: Ctx, alloc_kw: float) -> None:
         now_ts = time.time()
         state = get_override_state()
-        grid_cost = _ctx_num(ctx, "grid_cost_eur_kwh", None)
+        grid_cost = ctx.grid_cost_eur_kwh
         control_enabled = self._neg_control_enabled()
 
         if state.get("status") == "restore_failed" and not _retry_blocked(state, now_ts):
@@ -13,19 +13,6 @@ from services.ha_entities import call_action
 from services.settings_store import get_var as set_get
 from services.miners_store import list_miners
 
-_last_cmd: str | None = None
-_last_cmd_ts: float = 0.0
-
-
-def _can_send(cmd: str, now_ts: float, cooldown_s: float) -> bool:
-    global _last_cmd, _last_cmd_ts
-    if _last_cmd == cmd and (now_ts - _last_cmd_ts) < cooldown_s:
-        return False
-    _last_cmd = cmd
-    _last_cmd_ts = now_ts
-    return True
-
-
 def _truthy(x, default=False) -> bool:
     if x is None:
         return default
@@ -90,6 +77,19 @@ class CoolingConsumer(BaseConsumer):
     id = "cooling"
     label = "Cooling circuit"
 
+    def __init__(self) -> None:
+        super().__init__()
+        # Entprellung: gleicher Befehl nicht öfter als alle cooldown_s
+        self._last_cmd: str | None = None
+        self._last_cmd_ts: float = 0.0
+
+    def _can_send(self, cmd: str, now_ts: float, cooldown_s: float) -> bool:
+        if self._last_cmd == cmd and (now_ts - self._last_cmd_ts) < cooldown_s:
+            return False
+        self._last_cmd = cmd
+        self._last_cmd_ts = now_ts
+        return True
+
     def compute_desire(self, ctx: Ctx) -> Desire:
         feature = bool(set_get("cooling_feature_enabled", False))
         if not feature:
@@ -196,7 +196,7 @@ class CoolingConsumer(BaseConsumer):
             if should_on and not running and not pending_on:
                 if phase == "start_failed" and bool(c.get("on")):
                     return
-                if on_ent and _can_send("on", now_ts, cooldown):
+                if on_ent and self._can_send("on", now_ts, cooldown):
                     call_action(on_ent, True)
                 timeout_s = _state_timeout_s(c)
                 set_cooling(
@@ -212,7 +212,7 @@ class CoolingConsumer(BaseConsumer):
             elif (not should_on) and (running or pending_on or pending_off or phase == "stop_failed"):
                 if phase == "stop_failed" and not bool(c.get("on")):
                     return
-                if off_ent and _can_send("off", now_ts, cooldown):
+                if off_ent and self._can_send("off", now_ts, cooldown):
                     call_action(off_ent, False)
                 timeout_s = _state_timeout_s(c)
                 set_cooling(
@@ -15,9 +15,6 @@ except Exception:
     def effective_entity_key(entity_id, _mock_key):
         return (entity_id or "").strip()
 
-# simple cooldown memory for kick
-_last_kick_ts: float = 0.0
-
 def _num(x, d=None):
     try:
         if x in (None, ""):
@@ -33,14 +30,6 @@ def _log(msg: str):
         pass
 
 
-def _ctx_num(ctx: Ctx | dict | None, key: str, default: float = 0.0) -> float:
-    try:
-        if isinstance(ctx, dict):
-            return _num(ctx.get(key), default)
-        return _num(getattr(ctx, key, default), default)
-    except Exception:
-        return default
-
 def _ha_headers():
     tok = os.getenv("SUPERVISOR_TOKEN", "")
     h = {"Content-Type": "application/json"}
@@ -77,7 +66,21 @@ class HeaterConsumer(BaseConsumer):
     id  = "heater"
     cid = "heater"
 
+    def __init__(self) -> None:
+        super().__init__()
+        self._cfg: Optional[tuple] = None   # bis zur nächsten Config-Änderung gültig
+        self._last_kick_ts: float = 0.0     # Cooldown für den Zero-Export-Kick
+        self._last_pct: Optional[int] = None  # zuletzt geschriebener Prozentwert
+
+    def on_config_changed(self) -> None:
+        self._cfg = None
+
     def _read_cfg(self):
+        if self._cfg is None:
+            self._cfg = self._load_cfg()
+        return self._cfg
+
+    def _load_cfg(self):
         enabled = bool(heat_get("enabled", False))
         auto    = not bool(heat_get("manual_override", False))  # override=True => manual
         max_kw  = _num(heat_get("max_power_heater", 0.0), 0.0)
@@ -133,7 +136,7 @@ class HeaterConsumer(BaseConsumer):
                 pct_now = _num(get_sensor_value(pct_sensor_id), 0.0) if pct_sensor_id else 0.0
             except Exception:
                 pct_now = 0.0
-            enough_cooldown = (time.time() - _last_kick_ts) > float(cooldown or 0)
+            enough_cooldown = (time.time() - self._last_kick_ts) > float(cooldown or 0)
 
             # Kick if our command is effectively low OR we just switched to auto
             if (pct_now is None or pct_now < 5.0) and enough_cooldown:
@@ -149,12 +152,14 @@ class HeaterConsumer(BaseConsumer):
             return
 
         base_kw = max(0.0, float(kw or 0.0))
-        probe_kw = max(0.0, _ctx_num(ctx, "pv_ramp_probe_offset_kw", 0.0))
-        battery_block = bool(_ctx_num(ctx, "battery_block", 0.0))
-        battery_discharge_kw = max(0.0, _ctx_num(ctx, "battery_support_kw", _ctx_num(ctx, "battery_discharge_kw", 0.0)))
+        probe_kw = max(0.0, ctx.pv_ramp_probe_offset_kw)
+        battery_block = ctx.battery_block
+        battery_discharge_kw = max(0.0, ctx.battery_support_kw)
         final_kw = max(0.0, min(float(max_kw), base_kw + probe_kw))
         pct = max(0.0, min(100.0, (final_kw / float(max_kw)) * 100.0))
         ok = _set_percent_entity(pct_tgt, round(pct))
+        if ok:
+            self._last_pct = round(pct)
         reason_suffix = ""
         if battery_block and final_kw <= 1e-9:
             reason_suffix = f" | cut back due to battery discharge ({battery_discharge_kw:.3f} kW)"
@@ -165,5 +170,17 @@ class HeaterConsumer(BaseConsumer):
 
         # start cooldown once we actually commanded >= ~5%
         if ok and pct >= 5.0:
-            global _last_kick_ts
-            _last_kick_ts = time.time()
+            self._last_kick_ts = time.time()
+
+    def apply_fast(self, kw: float) -> bool:
+        """Trim from the fast loop; writes only if the rounded percent changes."""
+        enabled, auto, max_kw, _t_target, _t_sens, pct_tgt = self._read_cfg()
+        if not enabled or not auto or not pct_tgt or not max_kw or max_kw <= 0.0:
+            return False
+        pct = round(max(0.0, min(100.0, (max(0.0, float(kw)) / float(max_kw)) * 100.0)))
+        if pct == self._last_pct:
+            return False
+        if not _set_percent_entity(pct_tgt, pct):
+            return False
+        self._last_pct = pct
+        return True
@@ -1,6 +1,8 @@
 # services/consumers/miner.py
 from __future__ import annotations
 
+import math
+import threading
 import time
 from typing import Optional
 
@@ -9,11 +11,12 @@ from services.consumers.base import BaseConsumer, Desire, Ctx
 from services.cooling_store import get_cooling, set_cooling
 from services.electricity_store import current_price as elec_price
 from services.electricity_store import get_var as elec_get
-from services.ha_entities import call_action
+from services.ha_entities import call_action, set_numeric_entity
 from services.ha_sensors import get_sensor_value
 from services.license import is_premium_enabled
-from services.miners_store import list_miners, request_miner_state
-from services.settings_store import get_var as set_get
+from services.miner_api import effective_rating
+from services.miners_store import list_miners, request_miner_state, update_miner
+from services.settings_store import get_var as set_get, get_many as set_get_many
 
 
 def _truthy(x, default=False) -> bool:
@@ -72,14 +75,16 @@ def _pv_cost_per_kwh() -> float:
 
 
 def _on_fraction_for_miner(miner_id: str, default: float = 0.95) -> float:
-    for key in (
+    keys = (
         f"miner.{miner_id}.on_fraction",
         "miner.on_fraction",
         "miner_on_fraction",
         "discrete_on_fraction",
-    ):
+    )
+    values = set_get_many(keys)
+    for key in keys:
         try:
-            value = set_get(key, None)
+            value = values.get(key)
             if value is None or str(value).strip() == "":
                 continue
             frac = float(value)
@@ -101,6 +106,18 @@ def _cooling_required(m: dict) -> bool:
     return any(_truthy(flag) for flag in flags)
 
 
+def variable_power_range(m: dict) -> Optional[tuple[float, float, float]]:
+    """(min_kw, max_kw, step_kw) für Miner mit power_mode "variable", sonst None."""
+    if str(m.get("power_mode") or "fixed").strip().lower() != "variable":
+        return None
+    max_kw = _num(m.get("max_kw"), 0.0) or _num(m.get("power_kw"), 0.0)
+    min_kw = _num(m.get("min_kw"), 0.0)
+    if min_kw <= 0.0 or max_kw < min_kw:
+        return None
+    step_kw = max(0.01, _num(m.get("step_kw"), 0.1) or 0.1)
+    return min_kw, max_kw, step_kw
+
+
 def _cooling_power_kw() -> float:
     try:
         c = get_cooling() or {}
@@ -278,16 +295,58 @@ def _request_cooling_off_if_idle(now_ts: float) -> tuple[bool, str]:
         return False, f"cooling off request failed: {e}"
 
 
-def _miner_record(miner_id: str) -> Optional[dict]:
-    for miner in (list_miners() or []):
+def _miner_record(miner_id: str, miners: Optional[list] = None) -> Optional[dict]:
+    for miner in (list_miners() if miners is None else miners) or []:
         if miner.get("id") == miner_id:
             return miner
     return None
 
 
+# Ein list_miners()-Abzug pro Planner-Tick, geteilt von allen MinerConsumer-Instanzen
+_TICK_LOCK = threading.Lock()
+_TICK_KEY: Optional[tuple] = None
+_TICK_MINERS: list = []
+
+
+def _tick_miners(ctx: Ctx) -> list:
+    global _TICK_KEY, _TICK_MINERS
+    key = (id(ctx), ctx.ts)
+    with _TICK_LOCK:
+        if _TICK_KEY != key:
+            _TICK_MINERS = list_miners() or []
+            _TICK_KEY = key
+        return _TICK_MINERS
+
+
+def _drop_tick_miners() -> None:
+    global _TICK_KEY, _TICK_MINERS
+    with _TICK_LOCK:
+        _TICK_KEY = None
+        _TICK_MINERS = []
+
+
 class MinerConsumer(BaseConsumer):
     def __init__(self, miner_id: Optional[str] = None) -> None:
+        super().__init__()
         self.miner_id = miner_id or ""
+        self._tick_records: Optional[list] = None
+        self._target_kw: Optional[float] = None   # zuletzt geschriebenes Leistungsziel
+        self._target_ts = 0.0
+
+    def on_tick_start(self, ctx: Ctx) -> None:
+        self._tick_records = _tick_miners(ctx)
+
+    def on_tick_end(self, ctx: Ctx) -> None:
+        self._tick_records = None
+        _drop_tick_miners()
+
+    def _record(self) -> Optional[dict]:
+        return _miner_record(self.miner_id, self._tick_records)
+
+    def _free_miner_id(self) -> Optional[str]:
+        if self._tick_records is None:
+            return _free_miner_id()
+        return self._tick_records[0].get("id") if self._tick_records else None
 
     @property
     def id(self) -> str:
@@ -299,19 +358,19 @@ class MinerConsumer(BaseConsumer):
         if isinstance(custom, str) and custom.strip():
             return custom.strip()
 
-        record = _miner_record(self.miner_id) or {}
+        record = self._record() or {}
         name = record.get("name")
         if bool(record.get("is_miner", True)):
             return f"Miner {name or self.miner_id or '?'}"
         return f"Consumer {name or self.miner_id or '?'}"
 
     def compute_desire(self, ctx: Ctx) -> Desire:
-        record = _miner_record(self.miner_id)
+        record = self._record()
         if not record:
             return Desire(False, 0.0, 0.0, reason="not found")
 
         if not is_premium_enabled():
-            free_id = _free_miner_id()
+            free_id = self._free_miner_id()
             if record.get("id") != free_id:
                 return Desire(False, 0.0, 0.0, reason="premium required")
 
@@ -323,13 +382,18 @@ class MinerConsumer(BaseConsumer):
             return Desire(False, 0.0, 0.0, reason="manual mode")
 
         is_miner = bool(record.get("is_miner", True))
-        ths = _num(record.get("hashrate_ths"), 0.0)
-        pkw = _num(record.get("power_kw"), 0.0)
+        ths, pkw = effective_rating(record)       # Miner-API-Messwerte, sonst nominal
         is_on_now = bool(record.get("effective_on", record.get("on")))
 
         if pkw <= 0.0 or (is_miner and ths <= 0.0):
             return Desire(False, 0.0, 0.0, reason="no hashrate/power")
 
+        # Variable Leistung: Rentabilität am Einschaltpunkt min_kw (J/TH als konstant angenommen)
+        var = variable_power_range(record)
+        if var:
+            ths = ths * var[0] / pkw
+            pkw = var[0]
+
         need_cool = _cooling_required(record)
         cool_on = _cooling_running_now()
         if need_cool and not _cooling_auto_available():
@@ -362,10 +426,10 @@ class MinerConsumer(BaseConsumer):
             reason = "negative grid price"
             if need_cool and not cooling_effective:
                 reason = f"{reason} | cooling bundled"
-            return Desire(True, 0.0, delta_kw, exact_kw=delta_kw, reason=reason)
+            return self._on_desire(delta_kw, reason, var)
 
         pv_cost = _pv_cost_per_kwh()
-        pv_share = min(1.0, max(0.0, _num(ctx.get("surplus_kw", 0.0) if isinstance(ctx, dict) else getattr(ctx, "surplus_kw", 0.0), 0.0) / max(delta_kw, 1e-9)))
+        pv_share = min(1.0, max(0.0, ctx.surplus_kw / max(delta_kw, 1e-9)))
         grid_share = max(0.0, 1.0 - pv_share)
         blended_eur_per_kwh = pv_share * pv_cost + grid_share * eff_grid_cost
 
@@ -379,7 +443,7 @@ class MinerConsumer(BaseConsumer):
             reason = "pv_only_ok"
             if need_cool and not cooling_effective:
                 reason = f"{reason} | cooling bundled"
-            return Desire(True, 0.0, delta_kw, exact_kw=delta_kw, reason=reason)
+            return self._on_desire(delta_kw, reason, var)
 
         if not is_miner:
             return Desire(False, 0.0, 0.0, reason="consumer: positive grid share")
@@ -391,23 +455,62 @@ class MinerConsumer(BaseConsumer):
             reason = f"keep on (delta={profit:.2f} EUR/h)"
             if need_cool and not cooling_effective:
                 reason = f"{reason} | cooling bundled"
-            return Desire(True, 0.0, delta_kw, exact_kw=delta_kw, reason=reason)
+            return self._on_desire(delta_kw, reason, var)
 
         if profit >= on_margin:
             reason = f"profitable (delta={profit:.2f} EUR/h >= on_margin)"
             if need_cool and not cooling_effective:
                 reason = f"{reason} | cooling bundled"
-            return Desire(True, 0.0, delta_kw, exact_kw=delta_kw, reason=reason)
+            return self._on_desire(delta_kw, reason, var)
         return Desire(False, 0.0, 0.0, reason=f"not profitable (delta={profit:.2f} EUR/h < on_margin)")
 
+    @staticmethod
+    def _on_desire(delta_kw: float, reason: str, var: Optional[tuple]) -> Desire:
+        if not var:
+            return Desire(True, 0.0, delta_kw, exact_kw=delta_kw, reason=reason)
+        # min..max statt exact: der Planner verteilt stufenlos ab dem Einschaltpunkt
+        min_kw, max_kw, _step = var
+        return Desire(True, delta_kw, delta_kw + (max_kw - min_kw), reason=f"{reason} | variable {min_kw:.2f}-{max_kw:.2f} kW")
+
+    def _push_power_target(self, record: dict, kw: float, *, force: bool = False) -> None:
+        """
+        Schreibt das Leistungsziel (W). Absenken sofort (sonst Netzbezug), Anheben nur
+        bei Änderung > step_kw und höchstens alle miner_power_target_min_interval_s.
+        """
+        var = variable_power_range(record)
+        entity = str(record.get("power_target_entity") or "").strip()
+        if not var or not entity:
+            return
+        min_kw, max_kw, step_kw = var
+        # auf das Stufenraster ab min_kw abrunden: nie mehr als zugeteilt
+        kw = max(min_kw, min(max_kw, kw))
+        kw = min(max_kw, min_kw + math.floor((kw - min_kw) / step_kw + 1e-9) * step_kw)
+        now_ts = time.time()
+        last = self._target_kw
+        if last is None and _num(record.get("power_target_kw"), 0.0) > 0.0:
+            last = _num(record.get("power_target_kw"), 0.0)    # nach Neustart aus dem Runtime-Store
+        if not force and last is not None and kw >= last - 1e-9:
+            if kw - last <= step_kw + 1e-9:
+                return
+            min_interval = _num(set_get("miner_power_target_min_interval_s", 60.0), 60.0)
+            if now_ts - self._target_ts < min_interval:
+                return
+        ok = set_numeric_entity(entity, round(kw * 1000.0))
+        print(f"[miner {self.miner_id}] power target {entity} -> {kw:.2f} kW ok={ok}", flush=True)
+        if ok:
+            self._target_kw = kw
+            self._target_ts = now_ts
+            # persistiert: ohne API-Telemetrie zählt der Planner den Miner mit diesem Wert
+            update_miner(self.miner_id, power_target_kw=kw)
+
     def apply_allocation(self, ctx: Ctx, alloc_kw: float) -> None:
-        record = _miner_record(self.miner_id)
+        record = self._record()
         if not record:
             print(f"[miner {self.miner_id}] apply skipped: not found", flush=True)
             return
 
         if not is_premium_enabled():
-            free_id = _free_miner_id()
+            free_id = self._free_miner_id()
             if record.get("id") != free_id:
                 print(f"[miner {self.miner_id}] premium required - skipping apply", flush=True)
                 return
@@ -416,13 +519,10 @@ class MinerConsumer(BaseConsumer):
         if mode != "auto":
             return
 
-        pkw = _num(record.get("power_kw"), 0.0)
+        _ths, pkw = effective_rating(record)
         prev_on = bool(record.get("effective_on", record.get("on")))
         need_cool = _cooling_required(record)
-        force_off_due_to_grid = _truthy(
-            ctx.get("grid_import_emergency_off", False) if isinstance(ctx, dict) else getattr(ctx, "grid_import_emergency_off", False),
-            False,
-        )
+        force_off_due_to_grid = ctx.grid_import_emergency_off
 
         # Safety-critical emergency brake:
         # a running cooling-dependent miner must shut down immediately if cooling is lost.
@@ -448,8 +548,13 @@ class MinerConsumer(BaseConsumer):
                 print(f"[miner {self.miner_id}] EMERGENCY OFF error: {e}", flush=True)
             return
 
+        var = variable_power_range(record)
+        bundled_cool_kw = _cooling_power_kw() if (need_cool and not _cooling_effective_on()) else 0.0
         frac = _on_fraction_for_miner(self.miner_id, default=0.95)
-        should_on = pkw > 0.0 and alloc_kw >= frac * pkw
+        if var:
+            should_on = alloc_kw - bundled_cool_kw + 1e-6 >= var[0]
+        else:
+            should_on = pkw > 0.0 and alloc_kw >= frac * pkw
         if force_off_due_to_grid:
             should_on = False
         print(f"[miner {self.miner_id}] on_fraction={frac:.2f} alloc={alloc_kw:.3f} pkw={pkw:.3f}", flush=True)
@@ -466,6 +571,9 @@ class MinerConsumer(BaseConsumer):
                 should_on = False
 
         try:
+            if should_on and var:
+                # Beim Einschalten sofort, danach nur gedrosselt nachführen
+                self._push_power_target(record, alloc_kw - bundled_cool_kw, force=not prev_on)
             if should_on and not prev_on:
                 ok, reason = request_miner_state(self.miner_id, True, now_ts=time.time(), enforce_runtime=True)
                 print(f"[miner {self.miner_id}] apply ~{alloc_kw:.2f} kW (ON) ok={ok} reason={reason}", flush=True)
@@ -0,0 +1,78 @@
+import sys
+import unittest
+from unittest.mock import patch
+
+from bitcoin_pv_mining.services.consumers import registry
+
+
+class VariablePowerMinerTests(unittest.TestCase):
+    def setUp(self):
+        # über das Modul patchen, das registry tatsächlich geladen hat
+        self.mod = sys.modules[registry.MinerConsumer.__module__]
+        self.now = 1000.0
+        self.writes = []
+        self.persisted = {}
+
+        def _set(entity_id, value):
+            self.writes.append((entity_id, value))
+            return True
+
+        for p in (
+            patch.object(self.mod, "set_numeric_entity", _set),
+            patch.object(self.mod, "update_miner", lambda mid, **kw: self.persisted.update(kw)),
+            patch.object(self.mod, "set_get", lambda k, d=None: {"miner_power_target_min_interval_s": 60}.get(k, d)),
+            patch.object(self.mod.time, "time", lambda: self.now),
+        ):
+            p.start()
+            self.addCleanup(p.stop)
+        self.record = {
+            "id": "m1", "power_kw": 3.5, "power_mode": "variable",
+            "min_kw": 2.0, "max_kw": 3.5, "step_kw": 0.25, "power_target_entity": "number.m1_power_limit",
+        }
+        self.miner = registry.MinerConsumer("m1")
+
+    def test_variable_range(self):
+        self.assertEqual(self.mod.variable_power_range(self.record), (2.0, 3.5, 0.25))
+        self.assertIsNone(self.mod.variable_power_range({**self.record, "power_mode": "fixed"}))
+        self.assertIsNone(self.mod.variable_power_range({**self.record, "min_kw": 0}))
+        self.assertEqual(self.mod.variable_power_range({**self.record, "max_kw": 0})[1], 3.5)
+
+    def test_on_desire_spans_min_to_max(self):
+        d = self.miner._on_desire(2.0, "profitable", (2.0, 3.5, 0.25))
+        self.assertEqual((d.min_kw, d.max_kw, d.exact_kw), (2.0, 3.5, None))
+        d = self.miner._on_desire(3.0, "profitable", None)
+        self.assertEqual(d.exact_kw, 3.0)
+
+    def test_increases_are_stepped_and_rate_limited(self):
+        self.miner._push_power_target(self.record, 2.4, force=True)
+        self.assertEqual(self.writes, [("number.m1_power_limit", 2250)])   # abgerundet aufs Raster
+
+        self.now += 70
+        self.miner._push_power_target(self.record, 2.6)                     # nur eine Stufe -> nichts
+        self.assertEqual(len(self.writes), 1)
+
+        self.miner._push_power_target(self.record, 3.0)
+        self.now += 10
+        self.miner._push_power_target(self.record, 3.5)                     # zu früh
+        self.assertEqual(self.writes[1:], [("number.m1_power_limit", 3000)])
+
+        self.now += 60
+        self.miner._push_power_target(self.record, 3.5)
+        self.assertEqual(self.writes[-1], ("number.m1_power_limit", 3500))
+
+    def test_reductions_are_written_immediately(self):
+        self.miner._push_power_target(self.record, 3.0, force=True)
+        self.now += 1
+        self.miner._push_power_target(self.record, 2.8)                     # eine Stufe runter
+        self.now += 1
+        self.miner._push_power_target(self.record, 2.1)
+        self.assertEqual([w for _e, w in self.writes], [3000, 2750, 2000])
+        self.assertEqual(self.persisted, {"power_target_kw": 2.0})
+
+    def test_last_target_survives_restart(self):
+        record = {**self.record, "power_target_kw": 2.5}
+        self.miner._push_power_target(record, 2.6)                          # gleiche Stufe -> nichts
+        self.assertEqual(self.writes, [])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,10 +1,37 @@
-# services/consumers/registry.py (Ausschnitt)
+# services/consumers/registry.py
+"""
+Consumer instances keyed by id.
+
+get_consumer_for_id() is the plain factory. The planner goes through
+get_consumer(), which keeps one long-lived instance per id so consumers can
+hold warm state (cooldowns, resolved entity ids, config) between ticks.
+refresh() stats the config files once per tick; on a change every instance
+gets on_config_changed(), new miners are added and removed ones dropped.
+"""
+from __future__ import annotations
+
+import os
+import threading
+from typing import Dict, Optional
+
+from services.consumers.base import BaseConsumer
 from services.consumers.house import HouseLoadConsumer
 from services.consumers.battery import BatteryConsumer
 from services.consumers.cooling import CoolingConsumer
 from services.consumers.heater import HeaterConsumer
 from services.consumers.wallbox import WallboxConsumer
 from services.consumers.miner import MinerConsumer
+from services.miners_store import miner_ids
+from services.utils import ADDON_CONFIG_DIR
+
+CONFIG_DIR = ADDON_CONFIG_DIR
+# Änderungen an diesen Dateien (Default + .local) lösen on_config_changed() aus
+CONFIG_FILES = ("settings", "miners", "heater", "wallbox", "wallbox_store", "battery", "cooling", "sensors", "electricity")
+
+_LOCK = threading.RLock()
+_INSTANCES: Dict[str, BaseConsumer] = {}
+_CONFIG_VERSION = None
+
 
 def get_consumer_for_id(cid: str):
     if cid == "house":
@@ -21,3 +48,65 @@ def get_consumer_for_id(cid: str):
         mid = cid.split(":", 1)[1]
         return MinerConsumer(mid)
     return None
+
+
+def _file_version(path: str):
+    try:
+        st = os.stat(path)
+        return (st.st_mtime_ns, st.st_size)
+    except OSError:
+        return None
+
+
+def _config_version() -> tuple:
+    return tuple(
+        _file_version(os.path.join(CONFIG_DIR, f"{name}{suffix}.yaml"))
+        for name in CONFIG_FILES
+        for suffix in ("", ".local")
+    )
+
+
+def get_consumer(cid: str) -> Optional[BaseConsumer]:
+    with _LOCK:
+        cons = _INSTANCES.get(cid)
+        if cons is None:
+            cons = get_consumer_for_id(cid)
+            if cons is not None:
+                _INSTANCES[cid] = cons
+        return cons
+
+
+def refresh(force: bool = False) -> bool:
+    """Syncs instances with the config; True if something changed."""
+    global _CONFIG_VERSION
+    version = _config_version()
+    with _LOCK:
+        if not force and version == _CONFIG_VERSION:
+            return False
+        _CONFIG_VERSION = version
+        known = {f"miner:{mid}" for mid in miner_ids()}
+        for cid in list(_INSTANCES):
+            if cid.startswith("miner:") and cid not in known:
+                del _INSTANCES[cid]
+        for cid in known:
+            if cid not in _INSTANCES:
+                _INSTANCES[cid] = get_consumer_for_id(cid)
+        notify = list(_INSTANCES.values())
+    for cons in notify:
+        try:
+            cons.on_config_changed()
+        except Exception as e:
+            print(f"[registry] on_config_changed({cons.id}) failed: {e}", flush=True)
+    return True
+
+
+def instances() -> Dict[str, BaseConsumer]:
+    with _LOCK:
+        return dict(_INSTANCES)
+
+
+def reset() -> None:
+    global _CONFIG_VERSION
+    with _LOCK:
+        _INSTANCES.clear()
+        _CONFIG_VERSION = None
@@ -0,0 +1,77 @@
+import os
+import sys
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+from bitcoin_pv_mining.services.consumers import registry
+from bitcoin_pv_mining.services.consumers.base import Ctx
+
+
+class ConsumerRegistryTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.miners = ["a", "b"]
+        for p in (
+            patch.object(registry, "CONFIG_DIR", self.tmp.name),
+            patch.object(registry, "miner_ids", lambda: list(self.miners)),
+        ):
+            p.start()
+            self.addCleanup(p.stop)
+        registry.reset()
+        self.addCleanup(registry.reset)
+
+    def _touch(self, name: str) -> None:
+        path = os.path.join(self.tmp.name, name)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write("#\n")
+        st = os.stat(path)
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+    def test_instances_are_reused_across_ticks(self):
+        self.assertTrue(registry.refresh())
+        heater = registry.get_consumer("heater")
+        self.assertIs(registry.get_consumer("heater"), heater)
+        self.assertIs(registry.get_consumer("miner:a"), registry.instances()["miner:a"])
+        self.assertIsNone(registry.get_consumer("nope"))
+        self.assertFalse(registry.refresh())
+        self.assertIs(registry.get_consumer("heater"), heater)
+
+    def test_config_change_notifies_and_syncs_miners(self):
+        registry.refresh()
+        heater = registry.get_consumer("heater")
+        heater._cfg = ("cached",)
+        miner_a = registry.get_consumer("miner:a")
+
+        self.miners = ["a", "c"]
+        self.assertFalse(registry.refresh())     # Dateien unverändert -> nichts tun
+        self._touch("miners.local.yaml")
+        self.assertTrue(registry.refresh())
+
+        self.assertIsNone(heater._cfg)
+        self.assertEqual(sorted(k for k in registry.instances() if k.startswith("miner:")), ["miner:a", "miner:c"])
+        self.assertIs(registry.get_consumer("miner:a"), miner_a)
+
+    def test_miner_tick_snapshot_is_shared_and_dropped(self):
+        ctx = Ctx(ts=time.time())
+        records = [{"id": "a", "name": "A"}, {"id": "b", "name": "B"}]
+        # über das Modul patchen, das registry tatsächlich geladen hat
+        miner_mod = sys.modules[registry.MinerConsumer.__module__]
+        with patch.object(miner_mod, "list_miners", return_value=records) as lm:
+            a, b = registry.get_consumer("miner:a"), registry.get_consumer("miner:b")
+            a.on_tick_start(ctx)
+            b.on_tick_start(ctx)
+            self.assertEqual(a._record()["name"], "A")
+            self.assertEqual(b._record()["name"], "B")
+            self.assertEqual(b._free_miner_id(), "a")
+            self.assertEqual(lm.call_count, 1)
+            a.on_tick_end(ctx)
+            b.on_tick_end(ctx)
+            a.on_tick_start(ctx)
+            self.assertEqual(lm.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
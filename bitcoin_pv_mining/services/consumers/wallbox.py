@@ -1,8 +1,247 @@
+# services/consumers/wallbox.py
+"""
+PV-geführtes Laden: die zugeteilte Leistung wird in einen Ladestrom in 1-A-Schritten
+(min_current_a..max_current_a) umgerechnet und über current_entity geschrieben.
+Bei 3-phasigen Boxen mit phase_switch_entity wird zwischen 1p und 3p umgeschaltet
+(Hysterese + Mindestabstand zwischen zwei Umschaltungen). Umgeschaltet wird nur bei
+pausierter Ladung: erst stoppen, im nächsten Tick umschalten und neu starten.
+Stopp über action_off_entity, ohne diese per 0 A auf current_entity.
+"""
 from __future__ import annotations
 
+import math
+import time
+from typing import Optional
+
 from services.consumers.base import BaseConsumer, Desire, Ctx
+from services.ha_entities import call_action, is_on_like, set_numeric_entity
+from services.ha_sensors import get_sensor_value
+from services.wallbox_store import get_var as wb_get
+try:
+    from services.dev_mock import (
+        effective_entity_key, DEV_WALLBOX_CONNECTED, DEV_WALLBOX_POWER,
+        DEV_WALLBOX_SESSION_ENERGY, DEV_WALLBOX_READY,
+    )
+except Exception:
+    DEV_WALLBOX_CONNECTED = "mock:wallbox_connected"
+    DEV_WALLBOX_POWER = "mock:wallbox_power"
+    DEV_WALLBOX_SESSION_ENERGY = "mock:wallbox_session_energy"
+    DEV_WALLBOX_READY = "mock:wallbox_ready"
+
+    def effective_entity_key(entity_id, _mock_key):
+        return (entity_id or "").strip()
+
+VOLTAGE_V = 230.0
+
+
+def _num(x, d=None):
+    try:
+        if x in (None, ""):
+            return d
+        return float(x)
+    except Exception:
+        return d
+
+
+def _log(msg: str):
+    try:
+        print(msg, flush=True)
+    except Exception:
+        pass
+
+
+def phase_kw(amps: float, phases: int) -> float:
+    return float(amps) * int(phases) * VOLTAGE_V / 1000.0
+
+
+def amps_for_kw(kw: float, phases: int) -> int:
+    """Ganzzahliger Ladestrom, der kw nicht überschreitet (abgerundet)."""
+    return int(math.floor(max(0.0, float(kw)) * 1000.0 / (VOLTAGE_V * int(phases)) + 1e-9))
+
 
 class WallboxConsumer(BaseConsumer):
+    """Charges the EV from PV surplus by modulating the charge current."""
     id = "wallbox"; label = "Wallbox"
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._cfg: Optional[dict] = None
+        self._amps: Optional[int] = None       # zuletzt geschriebener Strom (None = unbekannt)
+        self._phases: Optional[int] = None     # aktive Phasen (None = unbekannt)
+        self._phase_ts: float = 0.0            # letzte Umschaltung 1p/3p
+        self._charging: bool = False           # Start-Aktion ausgelöst
+        self.actual_kw: Optional[float] = None # Rückmeldung aus power_entity
+
+    def on_config_changed(self) -> None:
+        self._cfg = None
+
+    def _read_cfg(self) -> dict:
+        if self._cfg is None:
+            self._cfg = self._load_cfg()
+        return self._cfg
+
+    def _load_cfg(self) -> dict:
+        phases = 1 if int(_num(wb_get("phases", 3), 3) or 3) == 1 else 3
+        min_a = max(1, int(_num(wb_get("min_current_a", 6), 6) or 6))
+        max_a = max(min_a, int(_num(wb_get("max_current_a", 16), 16) or 16))
+        switch_id = str(wb_get("phase_switch_entity", "") or "").strip()
+        return {
+            "enabled": bool(wb_get("enabled", False)),
+            "auto": str(wb_get("mode", "manual")).lower().startswith("auto"),
+            "phases": phases,
+            "switchable": phases == 3 and bool(switch_id),
+            "min_a": min_a,
+            "max_a": max_a,
+            "max_charge_kw": _num(wb_get("max_charge_kw", 0.0), 0.0) or 0.0,
+            "min_surplus_kw": max(0.0, _num(wb_get("min_surplus_kw", 0.0), 0.0) or 0.0),
+            "target_kwh": _num(wb_get("target_energy_kwh", 0.0), 0.0) or 0.0,
+            "hyst_kw": max(0.0, _num(wb_get("phase_switch_hysteresis_kw", 0.5), 0.5) or 0.0),
+            "switch_interval_s": max(0.0, _num(wb_get("phase_switch_min_interval_s", 300), 300) or 0.0),
+            "current_entity": str(wb_get("current_entity", "") or "").strip(),
+            "phase_switch_entity": switch_id,
+            "action_on": str(wb_get("action_on_entity", "") or "").strip(),
+            "action_off": str(wb_get("action_off_entity", "") or "").strip(),
+            "connected": effective_entity_key(wb_get("connected_entity", ""), DEV_WALLBOX_CONNECTED),
+            "ready": effective_entity_key(wb_get("ready_entity", ""), DEV_WALLBOX_READY),
+            "power": effective_entity_key(wb_get("power_entity", ""), DEV_WALLBOX_POWER),
+            "energy": effective_entity_key(wb_get("energy_session_entity", ""), DEV_WALLBOX_SESSION_ENERGY),
+        }
+
+    def _bounds_kw(self, cfg: dict) -> tuple:
+        min_ph = 1 if cfg["switchable"] else cfg["phases"]
+        min_kw = phase_kw(cfg["min_a"], min_ph)
+        max_kw = phase_kw(cfg["max_a"], cfg["phases"])
+        if cfg["max_charge_kw"] > 0.0:
+            max_kw = min(max_kw, cfg["max_charge_kw"])
+        return min_kw, max(min_kw, max_kw)
+
+    def _read_actual_kw(self, cfg: dict) -> Optional[float]:
+        if not cfg["power"]:
+            return None
+        kw = _num(get_sensor_value(cfg["power"]), None)
+        self.actual_kw = None if kw is None else max(0.0, kw)
+        return self.actual_kw
+
     def compute_desire(self, ctx: Ctx) -> Desire:
-        return Desire(False, 0.0, 0.0, reason="not configured")
\ No newline at end of file
+        cfg = self._read_cfg()
+        if not cfg["enabled"]:
+            return Desire(False, 0.0, 0.0, reason="disabled")
+        if not cfg["auto"]:
+            return Desire(False, 0.0, 0.0, reason="manual mode")
+        if not cfg["current_entity"]:
+            return Desire(False, 0.0, 0.0, reason="not configured")
+        if cfg["connected"] and not is_on_like(get_sensor_value(cfg["connected"])):
+            self._charging = False
+            return Desire(False, 0.0, 0.0, reason="not connected")
+        if cfg["target_kwh"] > 0.0 and cfg["energy"]:
+            energy = _num(get_sensor_value(cfg["energy"]), None)
+            if energy is not None and energy >= cfg["target_kwh"]:
+                return Desire(False, 0.0, 0.0, reason=f"target reached ({energy:.1f} kWh)")
+
+        min_kw, max_kw = self._bounds_kw(cfg)
+        actual = self._read_actual_kw(cfg)
+        reason = f"charge {min_kw:.2f}..{max_kw:.2f} kW"
+        if self._charging:
+            # Fahrzeug nimmt weniger ab als kommandiert (Akku fast voll) -> Rest freigeben
+            if actual is not None and self._amps and self._phases:
+                commanded = phase_kw(self._amps, self._phases)
+                step = phase_kw(1, self._phases)
+                if actual + step < commanded:
+                    max_kw = max(min_kw, min(max_kw, actual + step))
+                    reason += f" | vehicle-limited ({actual:.2f} kW)"
+        else:
+            # Start erst ab Mindest-Überschuss; laufend reicht der 6-A-Minimalwert
+            min_kw = min(max_kw, max(min_kw, cfg["min_surplus_kw"]))
+        return Desire(True, min_kw, max_kw, reason=reason)
+
+    def _choose_phases(self, cfg: dict, kw: float, now: float) -> int:
+        if not cfg["switchable"]:
+            return cfg["phases"]
+        current = self._phases or 1
+        min_3p = phase_kw(cfg["min_a"], 3)
+        if current == 3:
+            want = 3 if kw + 1e-9 >= min_3p else 1
+        else:
+            want = 3 if kw + 1e-9 >= min_3p + cfg["hyst_kw"] else 1
+        if want != current and self._phases is not None and (now - self._phase_ts) < cfg["switch_interval_s"]:
+            if current == 3 and kw + 1e-9 < min_3p:
+                return 1    # 3p ist unterhalb 6 A x 3 nicht haltbar
+            return current
+        return want
+
+    def _set_phases(self, cfg: dict, phases: int, now: float) -> bool:
+        if phases == self._phases:
+            return True
+        eid = cfg["phase_switch_entity"]
+        if eid.split(".", 1)[0] in ("input_number", "number"):
+            ok = set_numeric_entity(eid, phases)
+        else:
+            ok = call_action(eid, phases == 3)
+        if ok:
+            self._phases = phases
+            self._phase_ts = now
+            self._amps = None   # Strom nach Umschaltung neu schreiben
+        return ok
+
+    def _stop(self, cfg: dict) -> None:
+        if cfg["action_off"]:
+            if self._charging:
+                call_action(cfg["action_off"], False)
+        elif self._amps != 0:
+            # ohne Stopp-Aktion pausiert 0 A die Ladung (sonst lädt das Fahrzeug mit dem alten Strom weiter)
+            if set_numeric_entity(cfg["current_entity"], 0):
+                self._amps = 0
+            else:
+                _log("[wallbox] stop failed: could not write 0 A")
+        self._charging = False
+
+    def apply_allocation(self, ctx: Ctx, kw: float) -> None:
+        cfg = self._read_cfg()
+        if not cfg["enabled"] or not cfg["auto"] or not cfg["current_entity"]:
+            return
+        kw = max(0.0, float(kw or 0.0))
+        now = time.time()
+        if self._phases is None and not cfg["switchable"]:
+            self._phases = cfg["phases"]
+
+        phases = self._choose_phases(cfg, kw, now)
+        amps = amps_for_kw(kw, phases)
+        if amps < cfg["min_a"]:
+            self._stop(cfg)
+            _log(f"[wallbox] alloc={kw:.3f} kW below {cfg['min_a']} A -> stop")
+            return
+        amps = min(amps, cfg["max_a"])
+
+        if cfg["switchable"] and self._charging and phases != self._phases:
+            # nicht unter Last umschalten: erst Ladung pausieren, Umschaltung im nächsten Tick
+            self._stop(cfg)
+            _log(f"[wallbox] pause charging before switching {self._phases}p -> {phases}p")
+            return
+        if cfg["switchable"] and not self._set_phases(cfg, phases, now):
+            _log(f"[wallbox] phase switch to {phases}p failed")
+            return
+        if amps != self._amps:
+            if not set_numeric_entity(cfg["current_entity"], amps):
+                return
+            self._amps = amps
+        if not self._charging:
+            if cfg["action_on"]:
+                call_action(cfg["action_on"], True)
+            self._charging = True
+        _log(
+            f"[wallbox] alloc={kw:.3f} kW -> {amps} A x {phases}p = {phase_kw(amps, phases):.2f} kW "
+            f"actual={self.actual_kw if self.actual_kw is not None else 'n/a'}"
+        )
+
+    def apply_fast(self, kw: float) -> bool:
+        """Trim from the fast loop: current only, no phase switch or start/stop."""
+        cfg = self._read_cfg()
+        if not self._charging or not self._phases or not cfg["current_entity"]:
+            return False
+        amps = min(cfg["max_a"], max(cfg["min_a"], amps_for_kw(kw, self._phases)))
+        if amps == self._amps:
+            return False
+        if not set_numeric_entity(cfg["current_entity"], amps):
+            return False
+        self._amps = amps
+        return True
@@ -0,0 +1,110 @@
+import sys
+import time
+import unittest
+from unittest.mock import patch
+
+from bitcoin_pv_mining.services.consumers import registry
+from bitcoin_pv_mining.services.consumers.base import Ctx
+
+
+class WallboxConsumerTests(unittest.TestCase):
+    def setUp(self):
+        self.cfg = {
+            "enabled": True,
+            "mode": "auto",
+            "phases": 3,
+            "max_current_a": 16,
+            "max_charge_kw": 11.0,
+            "min_surplus_kw": 2.0,
+            "current_entity": "number.wb_current",
+            "phase_switch_entity": "switch.wb_3p",
+            "connected_entity": "binary_sensor.ev_connected",
+            "power_entity": "sensor.wb_power",
+        }
+        self.states = {"binary_sensor.ev_connected": "on", "sensor.wb_power": 0.0}
+        self.writes = []
+        self.actions = []
+        # über das Modul patchen, das registry tatsächlich geladen hat
+        mod = sys.modules[registry.WallboxConsumer.__module__]
+        for p in (
+            patch.object(mod, "wb_get", lambda k, d=None: self.cfg.get(k, d)),
+            patch.object(mod, "effective_entity_key", lambda eid, _mock: (eid or "").strip()),
+            patch.object(mod, "get_sensor_value", lambda eid: self.states.get(eid)),
+            patch.object(mod, "set_numeric_entity", lambda eid, v: self.writes.append((eid, v)) or True),
+            patch.object(mod, "call_action", lambda eid, on: self.actions.append((eid, on)) or True),
+        ):
+            p.start()
+            self.addCleanup(p.stop)
+        self.wb = registry.WallboxConsumer()
+        self.ctx = Ctx(ts=time.time())
+
+    def test_desire_bounds_and_start_threshold(self):
+        de = self.wb.compute_desire(self.ctx)
+        self.assertTrue(de.wants)
+        self.assertAlmostEqual(de.min_kw, 2.0)           # min_surplus_kw vor dem Start
+        self.assertAlmostEqual(de.max_kw, 11.0)
+
+        self.wb.apply_allocation(self.ctx, 2.0)
+        de = self.wb.compute_desire(self.ctx)
+        self.assertAlmostEqual(de.min_kw, 1.38)          # 6 A x 1p sobald geladen wird
+
+        self.states["binary_sensor.ev_connected"] = "off"
+        self.assertFalse(self.wb.compute_desire(self.ctx).wants)
+
+    def test_current_is_written_only_on_change(self):
+        self.wb.apply_allocation(self.ctx, 2.0)           # 8.7 A -> 8 A, 1p
+        self.wb.apply_allocation(self.ctx, 2.2)           # 9.56 A -> 9 A
+        self.wb.apply_allocation(self.ctx, 2.25)          # weiterhin 9 A
+        self.assertEqual(self.writes, [("number.wb_current", 8), ("number.wb_current", 9)])
+        self.assertEqual(self.actions, [("switch.wb_3p", False)])
+
+        self.wb.apply_allocation(self.ctx, 1.0)           # < 6 A ohne Stopp-Aktion -> 0 A
+        self.assertEqual(self.writes[-1], ("number.wb_current", 0))
+        self.assertFalse(self.wb._charging)
+        self.wb.apply_allocation(self.ctx, 0.0)
+        self.assertEqual(len(self.writes), 3)
+
+        self.wb.apply_allocation(self.ctx, 2.0)           # Neustart schreibt den Strom wieder
+        self.assertEqual(self.writes[-1], ("number.wb_current", 8))
+
+    def test_stop_uses_action_when_configured(self):
+        self.cfg["action_off_entity"] = "switch.wb_charge"
+        self.wb.apply_allocation(self.ctx, 2.0)
+        self.wb.apply_allocation(self.ctx, 1.0)
+        self.assertEqual(self.actions[-1], ("switch.wb_charge", False))
+        self.assertEqual(self.writes, [("number.wb_current", 8)])
+
+    def test_phase_switching_uses_hysteresis_and_dwell_time(self):
+        self.cfg["phase_switch_min_interval_s"] = 0
+        self.wb.apply_allocation(self.ctx, 3.5)           # 1p, 15 A
+        self.wb.apply_allocation(self.ctx, 4.3)           # >= 4.14 kW, aber < 4.64 -> bleibt 1p, 16 A
+        self.assertEqual(self.wb._phases, 1)
+        self.assertEqual(self.wb._amps, 16)
+        self.wb.apply_allocation(self.ctx, 5.0)           # erst pausieren, nicht unter Last umschalten
+        self.assertEqual((self.wb._phases, self.wb._amps), (1, 0))
+        self.assertFalse(self.wb._charging)
+        self.wb.apply_allocation(self.ctx, 5.0)           # nächster Tick: 3p, 7 A
+        self.assertEqual((self.wb._phases, self.wb._amps), (3, 7))
+        self.wb.apply_allocation(self.ctx, 4.3)           # im Band: bleibt 3p, 6 A
+        self.assertEqual((self.wb._phases, self.wb._amps), (3, 6))
+
+        self.wb.on_config_changed()
+        self.cfg["phase_switch_min_interval_s"] = 3600
+        self.wb.apply_allocation(self.ctx, 4.0)           # 3p nicht haltbar -> pausieren, dann 1p
+        self.wb.apply_allocation(self.ctx, 4.0)
+        self.assertEqual((self.wb._phases, self.wb._amps), (1, 16))
+        self.wb.apply_allocation(self.ctx, 8.0)           # Mindestabstand -> bleibt 1p
+        self.assertEqual((self.wb._phases, self.wb._amps), (1, 16))
+
+    def test_vehicle_limited_power_releases_allocation(self):
+        self.cfg["phase_switch_entity"] = ""
+        self.wb.apply_allocation(self.ctx, 11.0)          # 16 A x 3p
+        self.states["sensor.wb_power"] = 5.0
+        de = self.wb.compute_desire(self.ctx)
+        self.assertAlmostEqual(de.max_kw, 5.0 + 0.69)
+        self.assertAlmostEqual(de.min_kw, 4.14)
+        self.assertEqual(self.wb.actual_kw, 5.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
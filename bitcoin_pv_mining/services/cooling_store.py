@@ -1,12 +1,29 @@
 # services/cooling_store.py
-import os, time
-from services.utils import load_yaml, save_yaml
+import os, time, threading
+from services.utils import load_yaml, save_yaml, ADDON_CONFIG_DIR
 from services.ha_entities import get_entity_state, is_on_like
+from services import runtime_store, runtime_db
 
-CONFIG_DIR = "/config/pv_mining_addon"
+CONFIG_DIR = ADDON_CONFIG_DIR
 COOL_DEF = os.path.join(CONFIG_DIR, "cooling.yaml")
 COOL_OVR = os.path.join(CONFIG_DIR, "cooling.local.yaml")
 
+RUNTIME_ID = "cooling"
+# Transition state lives in the runtime store, not in cooling.local.yaml.
+RUNTIME_KEYS = (
+    "on",
+    "pending_on",
+    "pending_off",
+    "confirm_deadline_ts",
+    "fail_deadline_ts",
+    "failed_phase",
+    "last_transition_ts",
+)
+# Derived on read, never persisted.
+_DERIVED_KEYS = ("startup_grace_until", "resolved_state_entity", "ha_on", "effective_on", "phase")
+
+_YAML_LOCK = threading.RLock()
+
 _DEFAULT = {
     "id": "cooling",
     "name": "Cooling circuit",
@@ -79,11 +96,23 @@ def _state_timeout_s(c: dict | None = None, default: int = 60) -> int:
         return default
 
 
+def _runtime_fields(data: dict) -> dict:
+    rt = runtime_store.get_device(RUNTIME_ID)
+    if not rt:
+        # Migration: older cooling.local.yaml files still carry the runtime keys.
+        seed = {k: data.get(k, _DEFAULT[k]) for k in RUNTIME_KEYS}
+        if "confirm_deadline_ts" not in data and "startup_grace_until" in data:
+            seed["confirm_deadline_ts"] = data.get("startup_grace_until")
+        rt = runtime_store.update_device(RUNTIME_ID, **seed)
+    return {k: rt[k] for k in RUNTIME_KEYS if k in rt}
+
+
 def get_cooling() -> dict:
     base = load_yaml(COOL_DEF, {}) or {}
     ovr = load_yaml(COOL_OVR, {}) or {}
     data = _merge(base.get("cooling", {}), ovr.get("cooling", {}))
     out = _merge(_DEFAULT, data)
+    out.update(_runtime_fields(out))
     out["state_timeout_s"] = _state_timeout_s(out, _DEFAULT["state_timeout_s"])
 
     desired_on = bool(out.get("on"))
@@ -168,18 +197,46 @@ def get_cooling() -> dict:
 
 
 def set_cooling(**changes):
-    cur = get_cooling()
     changes = dict(changes or {})
     if "startup_grace_until" in changes and "confirm_deadline_ts" not in changes:
         changes["confirm_deadline_ts"] = changes.get("startup_grace_until")
     if "ready_timeout_s" in changes and "state_timeout_s" not in changes:
         changes["state_timeout_s"] = changes.get("ready_timeout_s")
-    cur.update({k: v for k, v in changes.items() if v is not None})
-    cur["state_timeout_s"] = _state_timeout_s(cur, _DEFAULT["state_timeout_s"])
-    cur.pop("ready_entity", None)
-    cur.pop("ready_timeout_s", None)
-    cur.pop("resolved_state_entity", None)
-    cur.pop("ha_on", None)
-    cur.pop("effective_on", None)
-    cur.pop("phase", None)
-    save_yaml(COOL_OVR, {"cooling": cur})
+    changes = {k: v for k, v in changes.items() if v is not None}
+    runtime = {k: v for k, v in changes.items() if k in RUNTIME_KEYS}
+    config = {
+        k: v for k, v in changes.items()
+        if k not in RUNTIME_KEYS and k not in _DERIVED_KEYS and k not in ("ready_entity", "ready_timeout_s")
+    }
+
+    if runtime:
+        if not runtime_store.has_device(RUNTIME_ID):
+            get_cooling()
+        prev_on = runtime_store.get_device(RUNTIME_ID).get("on")
+        runtime_store.update_device(RUNTIME_ID, **runtime)
+        if "on" in runtime and prev_on is not None and bool(prev_on) != bool(runtime["on"]):
+            runtime_db.record_transition(
+                RUNTIME_ID,
+                bool(runtime["on"]),
+                ts=runtime.get("last_transition_ts"),
+            )
+    if not config:
+        return
+
+    # YAML is only rewritten for real configuration edits.
+    with _YAML_LOCK:
+        ovr = load_yaml(COOL_OVR, {}) or {}
+        cur = dict(ovr.get("cooling") or {})
+        if "state_timeout_s" in config:
+            config["state_timeout_s"] = _state_timeout_s(config, _DEFAULT["state_timeout_s"])
+        dirty = any(cur.get(k) != v for k, v in config.items())
+        for k in RUNTIME_KEYS + _DERIVED_KEYS + ("ready_entity", "ready_timeout_s"):
+            if k in cur:
+                cur.pop(k)
+                dirty = True
+        if not dirty:
+            return
+        if not runtime_store.has_device(RUNTIME_ID):
+            get_cooling()
+        cur.update(config)
+        save_yaml(COOL_OVR, {"cooling": cur})
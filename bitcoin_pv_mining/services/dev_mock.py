@@ -1,12 +1,13 @@
 import os
+import threading
 
-from services.settings_store import get_var as set_get, set_vars as set_set
+from services.settings_store import get_var as set_get, set_vars as set_set, index_version as set_index_version
 from services.battery_store import get_var as bat_get
 from services.wallbox_store import get_var as wb_get
 from services.heater_store import resolve_entity_id as heat_resolve
-from services.utils import load_yaml
+from services.utils import load_yaml, ADDON_CONFIG_DIR
 
-CONFIG_DIR = "/config/pv_mining_addon"
+CONFIG_DIR = ADDON_CONFIG_DIR
 MAIN_CFG = os.path.join(CONFIG_DIR, "pv_mining_local_config.yaml")
 SENS_DEF = os.path.join(CONFIG_DIR, "sensors.yaml")
 SENS_OVR = os.path.join(CONFIG_DIR, "sensors.local.yaml")
@@ -66,13 +67,48 @@ def _parse_mock_value(raw):
         return s
 
 
+# In-memory copy of dev.mock_enabled / dev.mock_values, stamped with the
+# settings index version. Values are pre-parsed once per version.
+_CACHE_LOCK = threading.Lock()
+_CACHE_VERSION = None
+_CACHE_ENABLED = False
+_CACHE_RAW: dict = {}
+_CACHE_PARSED: dict = {}
+
+
+def _refresh() -> None:
+    global _CACHE_VERSION, _CACHE_ENABLED, _CACHE_RAW, _CACHE_PARSED
+    version = set_index_version()
+    if version == _CACHE_VERSION:
+        return
+    with _CACHE_LOCK:
+        enabled = bool(set_get(MOCK_ENABLED_KEY, False))
+        raw = set_get(MOCK_VALUES_KEY, {})
+        raw = raw if isinstance(raw, dict) else {}
+        parsed = {}
+        for key, value in raw.items():
+            value = _parse_mock_value(value)
+            if value is not None:
+                parsed[key] = value
+        _CACHE_RAW = raw
+        _CACHE_PARSED = parsed
+        _CACHE_ENABLED = enabled
+        _CACHE_VERSION = version
+
+
+def invalidate_cache() -> None:
+    global _CACHE_VERSION
+    _CACHE_VERSION = None
+
+
 def is_enabled() -> bool:
-    return bool(set_get(MOCK_ENABLED_KEY, False))
+    _refresh()
+    return _CACHE_ENABLED
 
 
 def get_values() -> dict:
-    values = set_get(MOCK_VALUES_KEY, {})
-    return values if isinstance(values, dict) else {}
+    _refresh()
+    return dict(_CACHE_RAW)
 
 
 def set_config(enabled: bool, values: dict):
@@ -82,36 +118,34 @@ def set_config(enabled: bool, values: dict):
         if parsed is not None:
             cleaned[str(key)] = parsed
     set_set(**{MOCK_ENABLED_KEY: bool(enabled), MOCK_VALUES_KEY: cleaned})
+    invalidate_cache()
 
 
 def get_mock_sensor_value(entity_id: str):
     if not is_enabled() or not entity_id:
         return None
-    return _parse_mock_value(get_values().get(entity_id))
+    return _CACHE_PARSED.get(entity_id)
 
 
 def has_mock_value(key: str) -> bool:
     if not is_enabled() or not key:
         return False
-    return _parse_mock_value(get_values().get(key)) is not None
+    return key in _CACHE_PARSED
 
 
 def get_virtual_value(key: str, default=None):
     if not is_enabled():
         return default
-    value = _parse_mock_value(get_values().get(key))
-    return default if value is None else value
+    return _CACHE_PARSED.get(key, default)
 
 
 def effective_entity_key(entity_id: str | None, mock_key: str) -> str:
     entity_id = (entity_id or "").strip()
-    if has_mock_value(mock_key):
-        return mock_key
-    if entity_id:
+    if not is_enabled():
         return entity_id
-    if is_enabled():
+    if mock_key in _CACHE_PARSED:
         return mock_key
-    return entity_id
+    return entity_id or mock_key
 
 
 def _resolve_main_entity(key: str) -> str:
@@ -0,0 +1,97 @@
+# services/economic_order.py
+"""
+Optionale "economic"-Reihenfolge der Verbraucher (priority_order_mode).
+
+Statt der manuell sortierten Liste wird je Tick der Grenzwert jedes Verbrauchers
+in EUR/kWh bestimmt und absteigend sortiert:
+  - Miner:    Erlös nach Steuer je kWh (hashrate, Netz-Hashrate, Blockreward, BTC-Kurs)
+  - Heizstab: economic_heat_value_eur_kwh (z. B. vermiedener Gaspreis)
+  - Batterie: später vermiedener Netzbezug × Round-Trip-Wirkungsgrad
+              (oder fest: economic_battery_value_eur_kwh)
+  - Wallbox:  economic_wallbox_value_eur_kwh, sonst effektiver Netzpreis
+`house` bleibt vorn, `grid_feed`/`inflow` hinten; Gleichstand behält die manuelle
+Reihenfolge.
+"""
+from __future__ import annotations
+
+from typing import Dict, List, Optional, Tuple
+
+from services.btc_metrics import get_live_btc_price_eur, get_live_network_hashrate_ths, sats_per_th_per_hour
+from services.miner_api import effective_rating
+from services.miners_store import list_miners
+from services.settings_store import get_var as set_get
+
+HEAD = ("house",)
+TAIL = ("grid_feed", "inflow")
+
+
+def _num(x, d=0.0) -> float:
+    try:
+        if x in (None, ""):
+            return d
+        return float(x)
+    except (TypeError, ValueError):
+        return d
+
+
+def is_enabled() -> bool:
+    return str(set_get("priority_order_mode", "manual") or "manual").strip().lower() == "economic"
+
+
+def miner_value_eur_kwh(record: dict, *, btc_eur: float, net_ths: float, reward: float, tax_pct: float) -> float:
+    """Erlös nach Steuer je kWh für einen Miner-Datensatz (0.0 ohne Daten)."""
+    ths, pkw = effective_rating(record)
+    if pkw <= 0.0 or ths <= 0.0 or net_ths <= 0.0 or btc_eur <= 0.0:
+        return 0.0
+    revenue_eur_h = sats_per_th_per_hour(reward, net_ths) * ths * btc_eur / 1e8
+    return revenue_eur_h * (1.0 - max(0.0, min(tax_pct / 100.0, 1.0))) / pkw
+
+
+def marginal_values(order: List[str], grid_cost_eur_kwh: float) -> Dict[str, Tuple[float, str]]:
+    """cid -> (EUR/kWh, Herkunft) für alle sortierbaren Einträge in order."""
+    values: Dict[str, Tuple[float, str]] = {}
+    miners: Optional[Dict[str, dict]] = None
+    market: Optional[dict] = None
+    grid_cost = max(0.0, _num(grid_cost_eur_kwh, 0.0))
+
+    for cid in order:
+        if cid in HEAD or cid in TAIL:
+            continue
+        if cid.startswith("miner:"):
+            if miners is None:
+                miners = {str(m.get("id")): m for m in list_miners()}
+                market = {
+                    "btc_eur": get_live_btc_price_eur(fallback=_num(set_get("btc_price_eur", 0.0))),
+                    "net_ths": get_live_network_hashrate_ths(fallback=_num(set_get("network_hashrate_ths", 0.0))),
+                    "reward": _num(set_get("block_reward_btc", 3.125), 3.125),
+                    "tax_pct": _num(set_get("sell_tax_percent", 0.0), 0.0),
+                }
+            rec = miners.get(cid.split(":", 1)[1])
+            if rec is None:
+                continue
+            values[cid] = (miner_value_eur_kwh(rec, **market), "mining after tax")
+        elif cid == "heater":
+            values[cid] = (_num(set_get("economic_heat_value_eur_kwh", 0.10), 0.10), "heat value")
+        elif cid == "battery":
+            fixed = set_get("economic_battery_value_eur_kwh", None)
+            if fixed not in (None, ""):
+                values[cid] = (_num(fixed, 0.0), "battery value")
+            else:
+                eff = max(0.0, min(_num(set_get("economic_battery_roundtrip_eff", 0.9), 0.9), 1.0))
+                values[cid] = (grid_cost * eff, f"arbitrage {grid_cost:.3f}x{eff:.2f}")
+        elif cid == "wallbox":
+            fixed = set_get("economic_wallbox_value_eur_kwh", None)
+            if fixed not in (None, ""):
+                values[cid] = (_num(fixed, 0.0), "wallbox value")
+            else:
+                values[cid] = (grid_cost, "avoided grid charge")
+    return values
+
+
+def sort_order(order: List[str], values: Dict[str, Tuple[float, str]]) -> List[str]:
+    """Sortiert den Mittelteil nach Wert (absteigend); Einträge ohne Wert hinten, stabil."""
+    head = [cid for cid in order if cid in HEAD]
+    tail = [cid for cid in order if cid in TAIL]
+    middle = [cid for cid in order if cid not in HEAD and cid not in TAIL]
+    middle.sort(key=lambda cid: -values[cid][0] if cid in values else float("inf"))
+    return head + middle + tail
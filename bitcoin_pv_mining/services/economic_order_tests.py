@@ -0,0 +1,61 @@
+import unittest
+from unittest.mock import patch
+
+from bitcoin_pv_mining.services import economic_order
+
+
+class EconomicOrderTests(unittest.TestCase):
+    def setUp(self):
+        self.settings = {
+            "priority_order_mode": "economic",
+            "block_reward_btc": 3.125,
+            "sell_tax_percent": 25.0,
+            "economic_heat_value_eur_kwh": 0.12,
+            "economic_battery_roundtrip_eff": 0.9,
+        }
+        self.miners = [
+            {"id": "s19", "hashrate_ths": 95.0, "power_kw": 3.25},     # ~34 J/TH
+            {"id": "s21", "hashrate_ths": 200.0, "power_kw": 3.5},     # 17.5 J/TH
+        ]
+        for p in (
+            patch.object(economic_order, "set_get", lambda k, d=None: self.settings.get(k, d)),
+            patch.object(economic_order, "list_miners", lambda: [dict(m) for m in self.miners]),
+            patch.object(economic_order, "get_live_btc_price_eur", lambda fallback=0.0: 90000.0),
+            patch.object(economic_order, "get_live_network_hashrate_ths", lambda fallback=0.0: 8.0e8),
+        ):
+            p.start()
+            self.addCleanup(p.stop)
+
+    def test_miner_value_is_revenue_after_tax_per_kwh(self):
+        v = economic_order.miner_value_eur_kwh(
+            self.miners[1], btc_eur=90000.0, net_ths=8.0e8, reward=3.125, tax_pct=25.0)
+        revenue_h = 3.125 * 6.0 / 8.0e8 * 200.0 * 90000.0
+        self.assertAlmostEqual(v, revenue_h * 0.75 / 3.5)
+        self.assertEqual(economic_order.miner_value_eur_kwh(
+            {"hashrate_ths": 0, "power_kw": 3}, btc_eur=1, net_ths=1, reward=1, tax_pct=0), 0.0)
+
+    def test_order_sorted_by_value_with_house_first_and_grid_feed_last(self):
+        self.assertTrue(economic_order.is_enabled())
+        order = ["grid_feed", "heater", "miner:s19", "battery", "miner:s21", "wallbox", "house"]
+        values = economic_order.marginal_values(order, grid_cost_eur_kwh=0.30)
+        self.assertAlmostEqual(values["battery"][0], 0.27)
+        self.assertAlmostEqual(values["wallbox"][0], 0.30)
+        self.assertNotIn("house", values)
+        self.assertEqual(
+            economic_order.sort_order(order, values),
+            ["house", "wallbox", "battery", "heater", "miner:s21", "miner:s19", "grid_feed"],
+        )
+
+    def test_unknown_entries_keep_manual_order_at_the_end(self):
+        self.settings["economic_battery_value_eur_kwh"] = 0.01
+        order = ["house", "miner:gone", "battery", "heater", "custom"]
+        values = economic_order.marginal_values(order, grid_cost_eur_kwh=0.30)
+        self.assertEqual(values["battery"], (0.01, "battery value"))
+        self.assertEqual(
+            economic_order.sort_order(order, values),
+            ["house", "heater", "battery", "miner:gone", "custom"],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,6 @@
 # services/electricity_store.py
 import os
-from services.utils import load_yaml, save_yaml
+from services.utils import load_yaml, save_yaml, ADDON_CONFIG_DIR
 from services.ha_sensors import get_sensor_value
 try:
     from services.dev_mock import effective_entity_key, DEV_ELECTRICITY_PRICE
@@ -10,7 +10,7 @@ except Exception:
     def effective_entity_key(entity_id, _mock_key):
         return (entity_id or "").strip()
 
-CONFIG_DIR = "/config/pv_mining_addon"
+CONFIG_DIR = ADDON_CONFIG_DIR
 ELEC_DEF = os.path.join(CONFIG_DIR, "electricity.yaml")
 ELEC_OVR = os.path.join(CONFIG_DIR, "electricity.local.yaml")
 MAIN_CFG = os.path.join(CONFIG_DIR, "pv_mining_local_config.yaml")
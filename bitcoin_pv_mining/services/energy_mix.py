@@ -7,6 +7,7 @@ from services.ha_sensors import get_sensor_value
 from services.settings_store import get_var as set_get
 from services.battery_store import get_var as bat_get
 from services.sensor_mapping import resolve_sensor_id as resolve_runtime_sensor_id
+from services.modbus_source import get_value as modbus_get_value, storage_present as modbus_storage_present
 try:
     from services.dev_mock import (
         effective_entity_key,
@@ -61,13 +62,20 @@ def _battery_power_kw_from_config() -> Optional[float]:
     """
     try:
         p_ent = effective_entity_key((bat_get("power_entity", "") or "").strip(), DEV_BATTERY_POWER)
+        v_ent = effective_entity_key((bat_get("voltage_entity", "") or "").strip(), DEV_BATTERY_VOLTAGE)
+        i_ent = effective_entity_key((bat_get("current_entity", "") or "").strip(), DEV_BATTERY_CURRENT)
+        # Modbus nur, wenn wirklich eine Batterie da ist (gemappt oder Model 124 mit WChaMax > 0);
+        # Fronius meldet die StCha/StDisCha-Module auch ohne Speicher.
+        has_battery = bool(p_ent or (v_ent and i_ent)) or modbus_storage_present()
+        if has_battery and not p_ent.startswith("mock:"):
+            mb = modbus_get_value("battery_discharge")  # bereits ENTLADUNG > 0
+            if mb is not None:
+                return float(mb)
         if p_ent:
             p = _f(get_sensor_value(p_ent), None)
             if p is not None:
                 return -float(_kw(p))
 
-        v_ent = effective_entity_key((bat_get("voltage_entity", "") or "").strip(), DEV_BATTERY_VOLTAGE)
-        i_ent = effective_entity_key((bat_get("current_entity", "") or "").strip(), DEV_BATTERY_CURRENT)
         if v_ent and i_ent:
             v = _f(get_sensor_value(v_ent), None)
             i = _f(get_sensor_value(i_ent), None)
@@ -106,9 +114,10 @@ def _controllable_now_kw() -> float:
     # Miner (diskret)
     try:
         from services.miners_store import list_miners
+        from services.miner_api import effective_power_kw
         for m in (list_miners() or []):
             if bool(m.get("effective_on", m.get("on"))):
-                now_kw += _f(m.get("power_kw"), 0.0)
+                now_kw += effective_power_kw(m)   # gemessen, sonst nominal
     except Exception:
         pass
 
@@ -137,6 +146,16 @@ def read_energy_flows() -> Tuple[Optional[float], Optional[float], Optional[floa
 
     return pv, imp, feed, bat, surplus_direct
 
+def read_grid_net_kw() -> Optional[float]:
+    """Netto-Netzleistung in kW: >0 = Bezug, <0 = Einspeisung (None wenn nicht gemappt)."""
+    imp_id  = _map("grid_consumption")
+    feed_id = _map("grid_feed_in")
+    if not imp_id and not feed_id:
+        return None
+    imp  = max(_kw(_f(get_sensor_value(imp_id), 0.0)), 0.0) if imp_id else 0.0
+    feed = abs(_kw(_f(get_sensor_value(feed_id), 0.0))) if feed_id else 0.0
+    return imp - feed
+
 def surplus_strict_kw() -> Tuple[float, float, float, float, float]:
     """
     Liefert (surplus_raw, total_load, ctrl_now, base_load, pv)
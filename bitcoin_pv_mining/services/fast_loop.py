@@ -0,0 +1,247 @@
+# services/fast_loop.py
+"""
+Schnelle innere Regelschleife (1–2 s) für stufenlose Verbraucher (Heizstab, Wallbox).
+
+Der Planner vergibt alle 15 s ein Budget je Verbraucher (set_budgets). Innerhalb
+des Fensters [alloc - trim_kw, alloc + trim_kw] (begrenzt auf min/max des Desire)
+regelt ein PI-Regler auf den gemessenen Netzbezug/-export; Sollwert ist der vom
+Planner für den Tick eingeplante Netzbezug (grid_free / Import-Cap), sonst ein
+kleiner Export (target_export_kw). Anti-Windup per
+Conditional Integration, Ausgang rate-limitiert; geschrieben wird nur, wenn sich
+der gerundete Stellwert des Verbrauchers ändert (apply_fast()).
+"""
+from __future__ import annotations
+
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from services.consumers import registry as consumer_registry
+from services.energy_mix import read_grid_net_kw
+from services.settings_store import get_var as set_get
+
+BUDGET_TTL_S = 60.0   # ohne Planner-Tick kein Trimmen mehr
+
+
+def _num(x, d=0.0) -> float:
+    try:
+        if x in (None, ""):
+            return d
+        return float(x)
+    except (TypeError, ValueError):
+        return d
+
+
+def _truthy(x, default=False) -> bool:
+    if x is None:
+        return default
+    s = str(x).strip().lower()
+    if s in ("1", "true", "on", "yes", "y"):
+        return True
+    if s in ("0", "false", "off", "no", "n", ""):
+        return False
+    return default
+
+
+class PIController:
+    """PI mit Conditional-Integration-Anti-Windup und Rate-Limit auf dem Ausgang."""
+
+    def __init__(self, kp: float, ki: float, rate_kw_s: float):
+        self.kp = float(kp)
+        self.ki = float(ki)
+        self.rate_kw_s = max(0.0, float(rate_kw_s))
+        self.integral = 0.0
+        self.out: Optional[float] = None
+
+    def reset(self, out: Optional[float] = None) -> None:
+        self.integral = 0.0
+        if out is not None:
+            self.out = float(out)
+
+    def saturated(self, error: float, lo: float, hi: float) -> bool:
+        """True, wenn der Ausgang schon am Rand in Fehlerrichtung steht."""
+        if self.out is None:
+            return False
+        return (error > 0 and self.out >= hi - 1e-9) or (error < 0 and self.out <= lo + 1e-9)
+
+    def step(self, base: float, error: float, dt: float, lo: float, hi: float) -> float:
+        prev = base if self.out is None else self.out
+        p = self.kp * error
+        integral = self.integral + self.ki * error * dt
+        raw = base + p + integral
+        # nur integrieren, wenn der Ausgang dadurch nicht weiter in die Sättigung läuft
+        if not ((raw > hi and error > 0) or (raw < lo and error < 0)):
+            self.integral = integral
+        target = min(hi, max(lo, base + p + self.integral))
+        if self.rate_kw_s > 0.0:
+            max_step = self.rate_kw_s * max(dt, 0.0)
+            target = prev + min(max_step, max(-max_step, target - prev))
+        self.out = min(hi, max(lo, target))
+        return self.out
+
+
+class _Channel:
+    __slots__ = ("cid", "base_kw", "lo", "hi", "ts", "pi")
+
+    def __init__(self, cid: str, pi: PIController):
+        self.cid = cid
+        self.base_kw = 0.0
+        self.lo = 0.0
+        self.hi = 0.0
+        self.ts = 0.0
+        self.pi = pi
+
+
+class FastLoop:
+    def __init__(self, *, interval_s: float = 2.0, kp: float = 0.5, ki: float = 0.2,
+                 rate_kw_s: float = 0.5, trim_kw: float = 1.0, target_export_kw: float = 0.1,
+                 deadband_kw: float = 0.05):
+        self.interval_s = max(0.5, float(interval_s))
+        self.kp = kp
+        self.ki = ki
+        self.rate_kw_s = rate_kw_s
+        self.trim_kw = max(0.0, float(trim_kw))
+        self.target_export_kw = float(target_export_kw)
+        self.deadband_kw = max(0.0, float(deadband_kw))
+        self._channels: Dict[str, _Channel] = {}
+        self._order: List[str] = []
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._last_step: Optional[float] = None
+        self._planned_import_kw = 0.0
+        self.cycles = 0
+        self.writes = 0
+        self.last_error = ""
+
+    def set_budgets(self, budgets: Dict[str, Tuple[float, float, float]], now: Optional[float] = None,
+                    planned_import_kw: float = 0.0) -> None:
+        """
+        budgets: cid -> (alloc_kw, min_kw, max_kw) in Prioritätsreihenfolge; ersetzt alle bisherigen.
+        planned_import_kw: vom Planner bewusst eingeplanter Netzbezug (grid_draw) – Sollwert statt Export.
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            self._planned_import_kw = max(0.0, float(planned_import_kw or 0.0))
+            old = self._channels
+            self._channels = {}
+            self._order = []
+            for cid, (alloc, min_kw, max_kw) in budgets.items():
+                alloc = max(0.0, float(alloc))
+                if alloc <= 0.0:
+                    continue
+                ch = old.get(cid) or _Channel(cid, PIController(self.kp, self.ki, self.rate_kw_s))
+                ch.base_kw = alloc
+                ch.lo = max(max(0.0, float(min_kw)), alloc - self.trim_kw)
+                ch.hi = max(ch.lo, min(float(max_kw), alloc + self.trim_kw))
+                ch.ts = now
+                # Planner hat gerade alloc geschrieben -> dort weiterregeln
+                ch.pi.reset(alloc)
+                self._channels[cid] = ch
+                self._order.append(cid)
+            self._last_step = None
+
+    def budgets(self) -> Dict[str, Tuple[float, float, float]]:
+        with self._lock:
+            return {cid: (ch.base_kw, ch.lo, ch.hi) for cid, ch in self._channels.items()}
+
+    def step(self, grid_net_kw: Optional[float], now: Optional[float] = None) -> Dict[str, float]:
+        """
+        Ein Regelschritt. grid_net_kw > 0 = Bezug. Der Fehler geht an den ersten
+        Kanal, der sich in Fehlerrichtung noch bewegen kann; die übrigen halten.
+        """
+        now = time.time() if now is None else now
+        out: Dict[str, float] = {}
+        with self._lock:
+            dt = self.interval_s if self._last_step is None else max(0.0, now - self._last_step)
+            self._last_step = now
+            if grid_net_kw is None:
+                return out
+            if self._planned_import_kw > 0.0:
+                setpoint = self._planned_import_kw                   # eingeplanter Bezug ist kein Fehler
+            else:
+                setpoint = -self.target_export_kw
+            error = setpoint - float(grid_net_kw)                    # >0: mehr Last möglich
+            if abs(error) <= self.deadband_kw:
+                return out
+            for cid in list(self._order):
+                ch = self._channels[cid]
+                if (now - ch.ts) > BUDGET_TTL_S:
+                    continue
+                if ch.pi.saturated(error, ch.lo, ch.hi):
+                    continue
+                out[cid] = ch.pi.step(ch.base_kw, error, dt, ch.lo, ch.hi)
+                break
+        return out
+
+    def run_once(self) -> Dict[str, float]:
+        targets = self.step(read_grid_net_kw())
+        for cid, kw in targets.items():
+            cons = consumer_registry.get_consumer(cid)
+            apply_fast = getattr(cons, "apply_fast", None)
+            if apply_fast is None:
+                continue
+            if apply_fast(kw):
+                self.writes += 1
+        self.cycles += 1
+        return targets
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            started = time.monotonic()
+            try:
+                if self._channels:
+                    self.run_once()
+                self.last_error = ""
+            except Exception as e:
+                if str(e) != self.last_error:
+                    print(f"[fast_loop] step failed: {e}", flush=True)
+                self.last_error = str(e)
+            self._stop.wait(max(0.0, self.interval_s - (time.monotonic() - started)))
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="fast-loop", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+
+# ----------------------------------------------------------------------------------
+# Modul-Instanz (aus Settings konfiguriert)
+# ----------------------------------------------------------------------------------
+_LOOP: Optional[FastLoop] = None
+
+
+def is_enabled() -> bool:
+    return _truthy(set_get("fast_loop_enabled", False), False)
+
+
+def start_from_settings() -> Optional[FastLoop]:
+    """Starts the loop if fast_loop_enabled is set; no-op otherwise."""
+    global _LOOP
+    if _LOOP is not None or not is_enabled():
+        return _LOOP
+    _LOOP = FastLoop(
+        interval_s=_num(set_get("fast_loop_interval_s", 2.0), 2.0),
+        kp=_num(set_get("fast_loop_kp", 0.5), 0.5),
+        ki=_num(set_get("fast_loop_ki", 0.2), 0.2),
+        rate_kw_s=_num(set_get("fast_loop_rate_kw_s", 0.5), 0.5),
+        trim_kw=_num(set_get("fast_loop_trim_kw", 1.0), 1.0),
+        target_export_kw=_num(set_get("fast_loop_target_export_kw", 0.1), 0.1),
+        deadband_kw=_num(set_get("fast_loop_deadband_kw", 0.05), 0.05),
+    )
+    _LOOP.start()
+    print(f"[fast_loop] running every {_LOOP.interval_s:.1f}s", flush=True)
+    return _LOOP
+
+
+def set_budgets(budgets: Dict[str, Tuple[float, float, float]], planned_import_kw: float = 0.0) -> None:
+    """Vom Planner nach jedem Tick aufgerufen; ohne laufende Schleife ein No-op."""
+    if _LOOP is not None:
+        _LOOP.set_budgets(budgets, planned_import_kw=planned_import_kw)
@@ -0,0 +1,81 @@
+import unittest
+from unittest.mock import patch
+
+from bitcoin_pv_mining.services import fast_loop
+from bitcoin_pv_mining.services.fast_loop import FastLoop, PIController
+
+
+class PIControllerTests(unittest.TestCase):
+    def test_rate_limit_bounds_each_step(self):
+        pi = PIController(kp=1.0, ki=0.0, rate_kw_s=0.5)
+        pi.reset(2.0)
+        self.assertAlmostEqual(pi.step(2.0, error=3.0, dt=2.0, lo=0.0, hi=10.0), 3.0)
+        self.assertAlmostEqual(pi.step(2.0, error=3.0, dt=2.0, lo=0.0, hi=10.0), 4.0)
+        self.assertAlmostEqual(pi.step(2.0, error=3.0, dt=2.0, lo=0.0, hi=10.0), 5.0)
+
+    def test_integral_does_not_wind_up_at_the_limit(self):
+        pi = PIController(kp=0.0, ki=1.0, rate_kw_s=0.0)
+        pi.reset(1.0)
+        for _ in range(20):
+            out = pi.step(1.0, error=1.0, dt=1.0, lo=0.0, hi=3.0)
+        self.assertAlmostEqual(out, 3.0)
+        self.assertLessEqual(pi.integral, 2.0 + 1e-9)
+        # Vorzeichenwechsel wirkt sofort statt erst nach Abbau des Integrals
+        self.assertLess(pi.step(1.0, error=-0.5, dt=1.0, lo=0.0, hi=3.0), 3.0)
+
+
+class FastLoopTests(unittest.TestCase):
+    def _loop(self, now=100.0):
+        loop = FastLoop(interval_s=1.0, kp=0.5, ki=0.0, rate_kw_s=10.0, trim_kw=1.0,
+                        target_export_kw=0.0, deadband_kw=0.05)
+        loop.set_budgets({"heater": (2.0, 0.0, 3.0), "wallbox": (4.2, 4.14, 11.0)}, now=now)
+        return loop
+
+    def test_window_around_planner_allocation(self):
+        self.assertEqual(
+            self._loop().budgets(),
+            {"heater": (2.0, 1.0, 3.0), "wallbox": (4.2, 4.14, 5.2)},
+        )
+
+    def test_error_goes_to_first_unsaturated_channel(self):
+        loop = self._loop()
+        self.assertEqual(loop.step(-1.0, now=101.0), {"heater": 2.5})    # Export -> mehr Last
+        self.assertEqual(loop.step(0.02, now=102.0), {})                 # Totband
+        self.assertEqual(loop.step(-4.0, now=103.0), {"heater": 3.0})
+        out = loop.step(-4.0, now=104.0)                                 # Heizstab am Rand
+        self.assertEqual(list(out), ["wallbox"])
+        self.assertAlmostEqual(out["wallbox"], 5.2)
+        self.assertEqual(loop.step(-4.0, now=105.0), {})                 # beide gesättigt
+        self.assertEqual(list(loop.step(1.0, now=106.0)), ["heater"])   # Bezug -> zurück
+
+    def test_planned_grid_import_is_the_setpoint(self):
+        loop = FastLoop(interval_s=1.0, kp=0.5, ki=0.0, rate_kw_s=10.0, trim_kw=1.0,
+                        target_export_kw=0.1, deadband_kw=0.05)
+        loop.set_budgets({"heater": (3.0, 0.0, 3.0)}, now=100.0, planned_import_kw=2.0)   # grid_free
+        self.assertEqual(loop.step(2.0, now=101.0), {})                  # Bezug wie geplant -> halten
+        self.assertAlmostEqual(loop.step(3.0, now=102.0)["heater"], 2.5)  # Mehrbezug -> zurücknehmen
+
+    def test_stale_budget_is_ignored_and_writes_only_on_change(self):
+        loop = self._loop()
+        self.assertEqual(loop.step(-1.0, now=100.0 + fast_loop.BUDGET_TTL_S + 1), {})
+
+        class _Heater:
+            def __init__(self):
+                self.calls = []
+
+            def apply_fast(self, kw):
+                self.calls.append(kw)
+                return len(self.calls) == 1
+
+        heater = _Heater()
+        loop = self._loop(now=None)
+        with patch.object(fast_loop, "read_grid_net_kw", return_value=-1.0), \
+                patch.object(fast_loop.consumer_registry, "get_consumer", return_value=heater):
+            loop.run_once()
+            loop.run_once()
+        self.assertEqual(len(heater.calls), 2)
+        self.assertEqual(loop.writes, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,29 +1,90 @@
 # services/forex.py
-import time, requests
+"""
+USD→EUR rate. Rate + timestamp live in the runtime store (survive restarts);
+reads never touch the network – a background thread refreshes the rate once
+it is older than REFRESH_AFTER of the TTL.
+"""
+import threading
+import time
+
+import requests
+
+from services import runtime_store
 
-_CACHE = {"rate": None, "ts": 0}
 _DEFAULT_TTL = 60 * 60  # 1h cache
+# Ab diesem Anteil der TTL wird im Hintergrund nachgeladen
+REFRESH_AFTER = 0.8
+# Nach einem Fehlschlag frühestens wieder nach ...
+RETRY_AFTER_S = 5 * 60
+RUNTIME_ID = "forex:usd_eur"
 
-def usd_to_eur_rate(fallback=0.93, ttl=_DEFAULT_TTL) -> float:
-    """Holt USD→EUR von einer Free-API, cached 1h, fällt sauber zurück."""
-    now = time.time()
-    if _CACHE["rate"] and now - _CACHE["ts"] < ttl:
-        return _CACHE["rate"]
-
-    urls = [
-        "https://api.frankfurter.app/latest?from=USD&to=EUR",
-        "https://api.exchangerate.host/latest?base=USD&symbols=EUR",
-    ]
-    for url in urls:
+URLS = [
+    "https://api.frankfurter.app/latest?from=USD&to=EUR",
+    "https://api.exchangerate.host/latest?base=USD&symbols=EUR",
+]
+
+_REFRESH_LOCK = threading.Lock()
+_REFRESHING = False
+_LAST_ATTEMPT = 0.0
+
+
+def _fetch_rate():
+    for url in URLS:
         try:
             r = requests.get(url, timeout=5)
             if r.status_code == 200:
                 data = r.json() or {}
                 rate = float((data.get("rates", {}) or {}).get("EUR", 0)) or 0.0
                 if rate > 0:
-                    _CACHE.update(rate=rate, ts=now)
                     return rate
         except Exception as e:
             print(f"[forex] fetch failed: {url} -> {e}", flush=True)
+    return None
+
+
+def refresh_now():
+    """Synchronous fetch; stores rate + ts in the runtime store. Returns the rate or None."""
+    global _LAST_ATTEMPT
+    _LAST_ATTEMPT = time.time()
+    rate = _fetch_rate()
+    if rate:
+        runtime_store.update_device(RUNTIME_ID, rate=rate, ts=time.time())
+    return rate
+
 
-    return float(fallback or 0.93)
+def _refresh_in_background() -> None:
+    global _REFRESHING
+    with _REFRESH_LOCK:
+        if _REFRESHING or (time.time() - _LAST_ATTEMPT) < RETRY_AFTER_S:
+            return
+        _REFRESHING = True
+
+    def run():
+        global _REFRESHING
+        try:
+            refresh_now()
+        finally:
+            _REFRESHING = False
+
+    threading.Thread(target=run, name="forex-refresh", daemon=True).start()
+
+
+def get_cached_rate():
+    """(rate, ts) from the runtime store; (None, 0.0) if nothing is cached yet."""
+    entry = runtime_store.get_device(RUNTIME_ID)
+    try:
+        rate = float(entry.get("rate") or 0.0)
+    except (TypeError, ValueError):
+        rate = 0.0
+    return (rate, float(entry.get("ts") or 0.0)) if rate > 0 else (None, 0.0)
+
+
+def usd_to_eur_rate(fallback=0.93, ttl=_DEFAULT_TTL) -> float:
+    """Cached USD→EUR rate; never blocks on the network, falls back cleanly."""
+    rate, ts = get_cached_rate()
+    age = time.time() - ts
+    if rate is None or age >= ttl * REFRESH_AFTER:
+        _refresh_in_background()
+    if rate is None:
+        return float(fallback or 0.93)
+    return rate
@@ -0,0 +1,52 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+from bitcoin_pv_mining.services import forex
+
+# the store instance forex actually talks to
+runtime_store = forex.runtime_store
+
+
+class ForexCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        for name in ("SNAPSHOT_PATH", "JOURNAL_PATH"):
+            p = patch.object(runtime_store, name, os.path.join(self.tmp.name, name.lower()))
+            p.start()
+            self.addCleanup(p.stop)
+        runtime_store.reset_cache()
+        self.addCleanup(runtime_store.reset_cache)
+        p = patch.object(forex, "_LAST_ATTEMPT", 0.0)
+        p.start()
+        self.addCleanup(p.stop)
+
+    def test_read_never_fetches_synchronously(self):
+        with patch.object(forex, "_refresh_in_background") as bg, patch.object(forex, "_fetch_rate") as fetch:
+            self.assertEqual(forex.usd_to_eur_rate(fallback=0.9), 0.9)
+            bg.assert_called_once()
+            fetch.assert_not_called()
+
+    def test_fresh_cached_rate_is_used_without_refresh(self):
+        runtime_store.update_device(forex.RUNTIME_ID, rate=0.91, ts=time.time())
+        with patch.object(forex, "_refresh_in_background") as bg:
+            self.assertEqual(forex.usd_to_eur_rate(fallback=0.5), 0.91)
+            bg.assert_not_called()
+
+    def test_aging_rate_triggers_background_refresh_and_is_persisted(self):
+        runtime_store.update_device(forex.RUNTIME_ID, rate=0.91, ts=time.time() - 0.9 * 3600)
+        with patch.object(forex, "_fetch_rate", return_value=0.95):
+            self.assertEqual(forex.usd_to_eur_rate(), 0.91)
+            for _ in range(100):
+                if forex.get_cached_rate()[0] == 0.95:
+                    break
+                time.sleep(0.01)
+        runtime_store.reset_cache()
+        self.assertEqual(forex.get_cached_rate()[0], 0.95)
+
+
+if __name__ == "__main__":
+    unittest.main()
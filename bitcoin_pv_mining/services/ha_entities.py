@@ -4,6 +4,8 @@ from services.ha_sensors import list_entities_by_domain
 
 import os, time, requests
 from services.ha_sensors import list_entities_by_domain  # falls genutzt
+import threading
+from contextlib import contextmanager
 
 def _ha_base_and_headers():
     """
@@ -84,7 +86,95 @@ def list_actions() -> list[dict]:
 def list_entity_options(domains=("script", "switch")) -> list[dict]:
     return [{"label": ent, "value": ent} for ent in list_entities(domains)]
 
-def call_action(entity_id: str, turn_on: bool = True) -> bool:
+def _action_service(entity_id: str, turn_on: bool) -> tuple[str, str]:
+    """(domain, service) für call_action; unbekannte Domains laufen über homeassistant.*"""
+    domain = entity_id.split(".", 1)[0].lower()
+    if domain == "script":
+        service = "turn_on"
+    elif domain == "button":
+        service = "press"
+    elif domain in ("switch", "input_boolean", "light", "fan"):
+        service = "turn_on" if turn_on else "turn_off"
+    elif domain == "scene":
+        service = "turn_on"
+    else:
+        service = "turn_on" if turn_on else "turn_off"
+    if domain not in ("script", "button", "scene", "switch", "input_boolean", "light", "fan"):
+        domain = "homeassistant"
+    return domain, service
+
+
+# --- Bulk-Aktionen --------------------------------------------------------------
+# Innerhalb von batch_actions() werden call_action()-Aufrufe mit on_result gesammelt
+# und beim Verlassen je (domain, service) als EIN Service-Call mit entity_id-Liste
+# gesendet; on_result(ok) meldet das Ergebnis je Entity zurück. Jeder sofortige
+# Call (ohne on_result, set_numeric_entity) sendet vorher die Warteschlange, damit
+# die Reihenfolge erhalten bleibt (z. B. Miner aus -> danach Kühlung aus).
+# Mit defer_off=False (Planner-Tick) gehen AUS-Befehle sofort raus: Abschaltungen
+# (Netz-Notaus, Kühlungsausfall) dürfen nicht bis zum Tick-Ende warten.
+_BATCH = threading.local()
+
+
+class _ActionBatch:
+    def __init__(self, defer_off: bool = True):
+        self.defer_off = defer_off
+        self.groups: dict[tuple[str, str], dict[str, list]] = {}
+
+    def add(self, domain: str, service: str, entity_id: str, on_result) -> None:
+        # gleiche Entity mit Gegen-Service in derselben Runde: letzter Wunsch gewinnt
+        for (dom, srv), entities in self.groups.items():
+            if dom == domain and srv != service:
+                entities.pop(entity_id, None)
+        self.groups.setdefault((domain, service), {}).setdefault(entity_id, []).append(on_result)
+
+    def flush(self) -> int:
+        groups, self.groups = self.groups, {}
+        calls = 0
+        for (domain, service), entities in groups.items():
+            if not entities:
+                continue
+            ids = list(entities)
+            ok = _post_service(domain, service, {"entity_id": ids if len(ids) > 1 else ids[0]})
+            calls += 1
+            print(f"[ha_entities] call_actions -> {domain}.{service} {len(ids)} entities ok={ok}", flush=True)
+            for callbacks in entities.values():
+                for cb in callbacks:
+                    try:
+                        cb(ok)
+                    except Exception as e:
+                        print(f"[ha_entities] call_actions callback error: {e}", flush=True)
+        if calls:
+            time.sleep(0.2)
+        return calls
+
+
+def _flush_pending() -> None:
+    batch = getattr(_BATCH, "current", None)
+    if batch is not None and batch.groups:
+        batch.flush()
+
+
+@contextmanager
+def batch_actions(defer_off: bool = True):
+    """Groups deferrable call_action()s of this thread into one call per domain/service.
+
+    defer_off=False queues only turn-on requests; turn-off requests are sent at once.
+    Nested blocks share the outermost batch (and its defer_off).
+    """
+    outer = getattr(_BATCH, "current", None)
+    if outer is not None:
+        yield outer
+        return
+    batch = _ActionBatch(defer_off)
+    _BATCH.current = batch
+    try:
+        yield batch
+    finally:
+        _BATCH.current = None
+        batch.flush()
+
+
+def call_action(entity_id: str, turn_on: bool = True, *, on_result=None) -> bool:
     """
     Führt die passende Aktion für Scripts/Switches/Input-Boolean (& Button) aus.
     - script.X:      script.turn_on (OFF gibt es als Script; hier immer turn_on)
@@ -92,34 +182,42 @@ def call_action(entity_id: str, turn_on: bool = True) -> bool:
     - input_boolean: input_boolean.turn_on/off
     - button.X:      button.press
     - sonst:         homeassistant.turn_on/off
+    Mit on_result innerhalb von batch_actions() wird der Call gesammelt (Rückgabe True
+    = eingereiht); das echte Ergebnis kommt über on_result(ok).
     """
     if not entity_id or "." not in entity_id:
         print("[ha_entities] call_action: invalid entity_id", flush=True)
         return False
 
-    domain = entity_id.split(".", 1)[0].lower()
-    payload = {"entity_id": entity_id}
-
-    if domain == "script":
-        service = "turn_on"
-    elif domain == "button":
-        service = "press"
-    elif domain in ("switch", "input_boolean", "light", "fan"):
-        service = "turn_on" if turn_on else "turn_off"
-    elif domain == "scene":
-        service = "turn_on"
-    else:
-        service = "turn_on" if turn_on else "turn_off"
+    domain, service = _action_service(entity_id, turn_on)
+    batch = getattr(_BATCH, "current", None)
+    if batch is not None and on_result is not None and (turn_on or batch.defer_off):
+        batch.add(domain, service, entity_id, on_result)
+        return True
 
-    ok = _post_service(domain if domain in ("script", "button", "scene", "switch", "input_boolean", "light", "fan")
-                       else "homeassistant",
-                       service, payload)
+    _flush_pending()
+    ok = _post_service(domain, service, {"entity_id": entity_id})
 
     print(f"[ha_entities] call_action -> {domain}.{service} {entity_id} ok={ok}", flush=True)
     time.sleep(0.2)  # ganz kleines Pufferchen
+    if on_result is not None:
+        on_result(ok)
     return ok
 
 
+def call_actions(entity_ids, turn_on: bool = True) -> dict[str, bool]:
+    """Bulk-Variante von call_action: ein Service-Call je domain/service, Ergebnis je Entity."""
+    results: dict[str, bool] = {}
+    with batch_actions():
+        for eid in entity_ids or []:
+            if not eid or "." not in eid:
+                results[eid] = False
+                continue
+            results[eid] = True
+            call_action(eid, turn_on, on_result=lambda ok, eid=eid: results.__setitem__(eid, ok))
+    return results
+
+
 def set_numeric_entity(entity_id: str, value: float) -> bool:
     """
     Sets a numeric Home Assistant entity via the matching service.
@@ -142,6 +240,7 @@ def set_numeric_entity(entity_id: str, value: float) -> bool:
         print(f"[ha_entities] set_numeric_entity: invalid value for {entity_id}: {value!r}", flush=True)
         return False
 
+    _flush_pending()
     ok = _post_service(domain, "set_value", {"entity_id": entity_id, "value": num_value})
     print(f"[ha_entities] set_numeric_entity -> {entity_id}={num_value} ok={ok}", flush=True)
     time.sleep(0.2)
@@ -0,0 +1,124 @@
+import os
+import sys
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from bitcoin_pv_mining.services import ha_entities, ha_sensors, miners_store
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "tools"))
+from fake_ha import DROP, FakeHA, Trace, TraceStep  # noqa: E402
+
+
+class FakeHaIntegrationTests(unittest.TestCase):
+    def setUp(self):
+        self.fake = FakeHA({
+            "sensor.pv_power": 3.5,
+            "switch.miner_1": "off",
+            "switch.miner_2": "off",
+            "switch.miner_3": "off",
+            "input_boolean.cooling": "on",
+        }).start()
+        env = patch.dict(os.environ, self.fake.proxy_env())
+        env.start()
+        self.addCleanup(env.stop)
+        self.addCleanup(self.fake.stop)
+        # kein Dev-Mock aus einer lokalen Settings-Datei
+        mock = patch.object(ha_sensors, "get_mock_sensor_value", return_value=None)
+        mock.start()
+        self.addCleanup(mock.stop)
+
+    def test_states_and_service_calls_go_through_supervisor_urls(self):
+        self.assertEqual(ha_sensors.get_sensor_value("sensor.pv_power"), 3.5)
+        self.assertEqual(ha_sensors.get_sensor_value("switch.miner_1"), "off")
+
+        self.assertTrue(ha_entities.call_action("switch.miner_1", True))
+        self.assertEqual(ha_sensors.get_sensor_value("switch.miner_1"), "on")
+
+        calls = self.fake.calls("switch", "turn_on")
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(calls[0]["data"], {"entity_id": "switch.miner_1"})
+        self.assertEqual(self.fake.counts["GET /states/<id>"], 3)
+        self.assertEqual(self.fake.counts["POST /services/switch/turn_on"], 1)
+
+    def test_trace_steps_are_applied_in_order(self):
+        self.fake.load_trace(Trace([
+            TraceStep(10.0, {"sensor.pv_power": 5.0}),
+            TraceStep(0.0, {"sensor.pv_power": 1.0}),
+        ]))
+        self.assertEqual(self.fake.advance_to(0.0), 1)
+        self.assertEqual(ha_sensors.get_sensor_value("sensor.pv_power"), 1.0)
+        self.assertEqual(self.fake.advance_to(9.9), 0)
+        self.assertEqual(self.fake.advance_to(10.0), 1)
+        self.assertEqual(ha_sensors.get_sensor_value("sensor.pv_power"), 5.0)
+
+    def test_injected_failures_surface_as_unreadable_or_failed(self):
+        self.fake.fail("GET /states/<id>", 500, times=1)
+        self.assertIsNone(ha_sensors.get_sensor_value("sensor.pv_power"))
+        self.assertEqual(ha_sensors.get_sensor_value("sensor.pv_power"), 3.5)
+
+        self.fake.fail("POST /services/switch", DROP)
+        self.assertFalse(ha_entities.call_action("switch.miner_1", True))
+        self.assertEqual(self.fake.get_state("switch.miner_1")["state"], "off")
+        self.assertEqual(self.fake.calls(), [])
+
+    def test_bulk_actions_use_one_call_per_domain_and_service(self):
+        res = ha_entities.call_actions(
+            ["switch.miner_1", "switch.miner_2", "switch.miner_3", "input_boolean.cooling"], False
+        )
+        self.assertEqual(set(res.values()), {True})
+        self.assertEqual(self.fake.counts["POST /services/switch/turn_off"], 1)
+        self.assertEqual(self.fake.counts["POST /services/input_boolean/turn_off"], 1)
+        self.assertEqual(
+            self.fake.calls("switch", "turn_off")[0]["data"]["entity_id"],
+            ["switch.miner_1", "switch.miner_2", "switch.miner_3"],
+        )
+        self.assertEqual(self.fake.get_state("input_boolean.cooling")["state"], "off")
+
+    def test_immediate_call_flushes_pending_batch_first(self):
+        results = []
+        with ha_entities.batch_actions():
+            ha_entities.call_action("switch.miner_1", True, on_result=results.append)
+            ha_entities.call_action("switch.miner_2", True, on_result=results.append)
+            self.assertEqual(self.fake.calls(), [])
+            ha_entities.call_action("input_boolean.cooling", False)
+            self.assertEqual(results, [True, True])
+        self.assertEqual([c["domain"] for c in self.fake.calls()], ["switch", "input_boolean"])
+
+    def test_planner_batch_sends_turn_off_immediately(self):
+        results = []
+        with ha_entities.batch_actions(defer_off=False):
+            ha_entities.call_action("switch.miner_1", True, on_result=results.append)
+            ha_entities.call_action("switch.miner_2", False, on_result=results.append)
+            # Aus geht sofort raus (die wartende Einschaltung davor, Reihenfolge bleibt)
+            self.assertEqual([c["service"] for c in self.fake.calls()], ["turn_on", "turn_off"])
+            self.assertEqual(results, [True, True])
+            ha_entities.call_action("switch.miner_3", True, on_result=results.append)
+            self.assertEqual(len(self.fake.calls()), 2)
+        self.assertEqual(len(self.fake.calls()), 3)
+
+    def test_failed_bulk_call_is_fanned_back_to_each_miner(self):
+        records = [
+            {"id": f"m{i}", "on": True, "ha_on": None, "action_off_entity": f"switch.miner_{i}"}
+            for i in (1, 2, 3)
+        ]
+        updates, restores = [], []
+        self.fake.fail("POST /services/switch/turn_off", 500, times=1)
+        with patch.object(miners_store, "list_miners", return_value=records), \
+                patch.object(miners_store, "update_miner", lambda mid, **kw: updates.append((mid, kw))), \
+                patch.object(miners_store.runtime_store, "update_device",
+                             lambda dev, **kw: restores.append((dev, kw))), \
+                patch.object(miners_store.runtime_db, "record_transition") as transition:
+            res = miners_store.request_miners_state(["m1", "m2", "m3", "nope"], False, enforce_runtime=False)
+        self.assertEqual(res["nope"], (False, "not found"))
+        self.assertEqual({res[m] for m in ("m1", "m2", "m3")}, {(False, "action failed")})
+        self.assertEqual(self.fake.counts["POST /services/switch/turn_off"], 1)
+        # je Miner: Pending setzen, dann nach dem Fehlschlag direkt im runtime_store zurücknehmen
+        self.assertEqual([(mid, kw["on"]) for mid, kw in updates], [("m1", False), ("m2", False), ("m3", False)])
+        self.assertEqual([(dev, kw["on"]) for dev, kw in restores],
+                         [(miners_store._runtime_id(m), True) for m in ("m1", "m2", "m3")])
+        transition.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,14 +1,15 @@
 # services/ha_sensors.py
 import os
 import requests
-from .utils import load_yaml
+from .utils import load_yaml, ADDON_CONFIG_DIR
 try:
     from .dev_mock import get_mock_sensor_value
 except Exception:
     def get_mock_sensor_value(_entity_id):
         return None
+from .modbus_source import ENTITY_PREFIX as MODBUS_PREFIX, get_entity_value as get_modbus_value
 
-CONFIG_DIR = "/config/pv_mining_addon"
+CONFIG_DIR = ADDON_CONFIG_DIR
 
 def get_ha_token():
     return os.getenv("SUPERVISOR_TOKEN")
@@ -22,6 +23,8 @@ def get_sensor_value(entity_id):
     mock = get_mock_sensor_value(entity_id)
     if mock is not None:
         return mock
+    if entity_id and entity_id.startswith(MODBUS_PREFIX):
+        return get_modbus_value(entity_id)
 
     token = get_ha_token()
     if not token or not entity_id:
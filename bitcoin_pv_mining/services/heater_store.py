@@ -3,9 +3,9 @@ from __future__ import annotations
 import os
 
 from typing import Any, Optional
-from services.utils import load_yaml, save_yaml
+from services.utils import load_yaml, save_yaml, ADDON_CONFIG_DIR
 
-CONFIG_DIR = "/config/pv_mining_addon"
+CONFIG_DIR = ADDON_CONFIG_DIR
 HEAT_DEF   = os.path.join(CONFIG_DIR, "heater.yaml")
 HEAT_OVR   = os.path.join(CONFIG_DIR, "heater.local.yaml")
 MAIN_CFG   = os.path.join(CONFIG_DIR, "pv_mining_local_config.yaml")
@@ -0,0 +1,239 @@
+# services/market_data.py
+"""
+BTC market data (price, network hashrate) from several public APIs.
+
+Due sources are fetched concurrently; each source has its own interval and an
+exponential backoff after failures. Price and hashrate are the median over the
+last good value of every source that is not stale. The result is published as
+an in-memory snapshot; pv_mining_local_config.yaml is only rewritten every
+PERSIST_INTERVAL_S (so the values survive a restart).
+"""
+from __future__ import annotations
+
+import os
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+import requests
+import yaml
+
+from services.btc_api import API_URLS, INTERVALS_MINUTES
+from services.utils import ADDON_CONFIG_DIR
+
+CONFIG_DIR = ADDON_CONFIG_DIR
+CONFIG_PATH = os.path.join(CONFIG_DIR, "pv_mining_local_config.yaml")
+
+LOOP_SLEEP_S = 30
+REQUEST_TIMEOUT_S = 5
+# Werte älter als das fließen nicht mehr in den Median ein
+STALE_AFTER_S = 2 * 60 * 60
+BACKOFF_MAX_S = 60 * 60
+PERSIST_INTERVAL_S = 30 * 60
+
+PRICE = "price_usd"
+HASHRATE = "hashrate_ths"
+_ENTITY_KEYS = {PRICE: "sensor_btc_price", HASHRATE: "sensor_btc_hashrate"}
+
+
+@dataclass
+class Source:
+    name: str
+    kind: str                          # PRICE | HASHRATE
+    url: str
+    parse: Callable[[dict], Optional[float]]
+    interval_s: float
+
+
+@dataclass
+class _SourceState:
+    next_due: float = 0.0
+    failures: int = 0
+    value: Optional[float] = None
+    value_ts: float = 0.0
+    last_error: str = ""
+
+
+def _parse_coingecko(js: dict) -> Optional[float]:
+    return float(js["bitcoin"]["usd"])
+
+
+def _parse_coinbase(js: dict) -> Optional[float]:
+    return float(js["data"]["amount"])
+
+
+def _parse_blockchain_info(js: dict) -> Optional[float]:
+    raw = js.get("hash_rate")
+    return None if raw is None else float(raw) / 1e3       # GH/s -> TH/s
+
+
+def _parse_mempool_space(js: dict) -> Optional[float]:
+    raw = js.get("currentHashrate")
+    return float(raw) / 1e12 if raw else None               # H/s -> TH/s
+
+
+DEFAULT_SOURCES = [
+    Source("coingecko", PRICE, API_URLS["coingecko"], _parse_coingecko, INTERVALS_MINUTES["coingecko"] * 60),
+    Source("coinbase", PRICE, API_URLS["coinbase"], _parse_coinbase, INTERVALS_MINUTES["coinbase"] * 60),
+    Source("blockchain_info", HASHRATE, API_URLS["blockchain_info"], _parse_blockchain_info,
+           INTERVALS_MINUTES["blockchain_info"] * 60),
+    Source("mempool_space", HASHRATE, API_URLS["mempool_space"], _parse_mempool_space,
+           INTERVALS_MINUTES["mempool_space"] * 60),
+]
+
+
+class MarketDataFetcher:
+    def __init__(self, sources: List[Source], config_path: Optional[str] = CONFIG_PATH, *,
+                 timeout_s: float = REQUEST_TIMEOUT_S, persist_interval_s: float = PERSIST_INTERVAL_S):
+        self.sources = list(sources)
+        self.config_path = config_path
+        self.timeout_s = timeout_s
+        self.persist_interval_s = persist_interval_s
+        self._state: Dict[str, _SourceState] = {s.name: _SourceState() for s in self.sources}
+        self._snapshot: dict = {}
+        self._lock = threading.Lock()
+        self._last_persist = 0.0
+        self._pool = ThreadPoolExecutor(max_workers=max(1, len(self.sources)), thread_name_prefix="market-data")
+        self._thread: Optional[threading.Thread] = None
+
+    # ------------------------------------------------------------------
+    def _fetch(self, src: Source) -> float:
+        r = requests.get(src.url, timeout=self.timeout_s)
+        if r.status_code != 200:
+            raise RuntimeError(f"HTTP {r.status_code}")
+        value = src.parse(r.json() or {})
+        if value is None or value <= 0:
+            raise ValueError(f"invalid value {value!r}")
+        return round(float(value), 2)
+
+    def _on_result(self, src: Source, now: float, value: Optional[float], error: str) -> None:
+        st = self._state[src.name]
+        if error:
+            st.failures += 1
+            st.last_error = error
+            backoff = min(src.interval_s * (2 ** (st.failures - 1)), max(BACKOFF_MAX_S, src.interval_s))
+            st.next_due = now + backoff
+            print(f"[market_data] {src.name} failed ({error}); retry in {int(backoff)}s", flush=True)
+            return
+        st.failures = 0
+        st.last_error = ""
+        st.value = value
+        st.value_ts = now
+        st.next_due = now + src.interval_s
+
+    def _consensus(self, kind: str, now: float) -> tuple:
+        vals = []
+        ts = 0.0
+        used = {}
+        for src in self.sources:
+            st = self._state[src.name]
+            if src.kind != kind or st.value is None or (now - st.value_ts) > STALE_AFTER_S:
+                continue
+            vals.append(st.value)
+            used[src.name] = st.value
+            ts = max(ts, st.value_ts)
+        if not vals:
+            return None, 0.0, {}
+        return round(statistics.median(vals), 2), ts, used
+
+    def poll_once(self, now: Optional[float] = None) -> dict:
+        """Fetches all due sources in parallel and republishes the snapshot."""
+        now = time.time() if now is None else now
+        due = [s for s in self.sources if self._state[s.name].next_due <= now]
+        futures = {s.name: self._pool.submit(self._fetch, s) for s in due}
+        for src in due:
+            try:
+                value, error = futures[src.name].result(), ""
+            except Exception as e:
+                value, error = None, str(e) or e.__class__.__name__
+            self._on_result(src, now, value, error)
+
+        snap = {}
+        for kind in (PRICE, HASHRATE):
+            value, ts, used = self._consensus(kind, now)
+            if value is not None:
+                snap[kind] = value
+                snap[f"{kind}_ts"] = ts
+                snap[f"{kind}_sources"] = used
+        with self._lock:
+            prev = self._snapshot
+            merged = dict(prev)
+            merged.update(snap)
+            self._snapshot = merged
+
+        if due and snap and (not prev or (now - self._last_persist) >= self.persist_interval_s):
+            self.persist(now)
+        return dict(self._snapshot)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return dict(self._snapshot)
+
+    def persist(self, now: Optional[float] = None) -> None:
+        if not self.config_path:
+            return
+        snap = self.snapshot()
+        try:
+            try:
+                with open(self.config_path, "r", encoding="utf-8") as f:
+                    config = yaml.safe_load(f)
+            except FileNotFoundError:
+                config = None
+            config = config if isinstance(config, dict) else {}
+            entities = config.get("entities")
+            entities = entities if isinstance(entities, dict) else {}
+            for kind, ent_key in _ENTITY_KEYS.items():
+                if snap.get(kind) is not None:
+                    entities[ent_key] = snap[kind]
+            config["entities"] = entities
+            os.makedirs(os.path.dirname(self.config_path) or ".", exist_ok=True)
+            tmp = self.config_path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                yaml.safe_dump(config, f, allow_unicode=True, sort_keys=False)
+            os.replace(tmp, self.config_path)
+            self._last_persist = time.time() if now is None else now
+        except Exception as e:
+            print(f"[market_data] persist failed: {e}", flush=True)
+
+    # ------------------------------------------------------------------
+    def start(self, interval_s: float = LOOP_SLEEP_S) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+
+        def loop():
+            while True:
+                try:
+                    self.poll_once()
+                except Exception as e:
+                    print(f"[market_data] poll error: {e}", flush=True)
+                time.sleep(interval_s)
+
+        self._thread = threading.Thread(target=loop, name="market-data", daemon=True)
+        self._thread.start()
+
+
+_FETCHER: Optional[MarketDataFetcher] = None
+
+
+def start(config_path: str = CONFIG_PATH) -> MarketDataFetcher:
+    global _FETCHER
+    if _FETCHER is None:
+        _FETCHER = MarketDataFetcher(DEFAULT_SOURCES, config_path)
+    _FETCHER.start()
+    return _FETCHER
+
+
+def get_snapshot() -> dict:
+    """{price_usd, price_usd_ts, hashrate_ths, hashrate_ths_ts, ...}; empty before the first fetch."""
+    return _FETCHER.snapshot() if _FETCHER is not None else {}
+
+
+def get_fresh(kind: str, max_age_s: float = STALE_AFTER_S) -> Optional[float]:
+    snap = get_snapshot()
+    value = snap.get(kind)
+    if value is None or (time.time() - float(snap.get(f"{kind}_ts") or 0.0)) > max_age_s:
+        return None
+    return value
@@ -0,0 +1,103 @@
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import yaml
+
+from bitcoin_pv_mining.services import market_data
+
+
+class _StandIn(BaseHTTPRequestHandler):
+    routes = {}   # path -> (status, body, delay_s)
+
+    def do_GET(self):
+        status, body, delay = self.routes.get(self.path, (404, {}, 0.0))
+        if delay:
+            time.sleep(delay)
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *_args):
+        pass
+
+
+class MarketDataFetcherTests(unittest.TestCase):
+    def setUp(self):
+        _StandIn.routes = {}
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _StandIn)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.base = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.cfg = os.path.join(self.tmp.name, "pv_mining_local_config.yaml")
+
+    def _src(self, name, kind, parse, interval_s=300):
+        return market_data.Source(name, kind, f"{self.base}/{name}", parse, interval_s)
+
+    def test_concurrent_fetch_median_and_persist(self):
+        _StandIn.routes = {
+            "/a": (200, {"bitcoin": {"usd": 100.0}}, 0.4),
+            "/b": (200, {"data": {"amount": "110"}}, 0.4),
+            "/c": (200, {"bitcoin": {"usd": 300.0}}, 0.4),
+            "/h": (200, {"currentHashrate": 7e20}, 0.4),
+        }
+        fetcher = market_data.MarketDataFetcher([
+            self._src("a", market_data.PRICE, market_data._parse_coingecko),
+            self._src("b", market_data.PRICE, market_data._parse_coinbase),
+            self._src("c", market_data.PRICE, market_data._parse_coingecko),
+            self._src("h", market_data.HASHRATE, market_data._parse_mempool_space),
+        ], self.cfg)
+
+        t0 = time.monotonic()
+        snap = fetcher.poll_once(now=1000.0)
+        self.assertLess(time.monotonic() - t0, 1.2)
+
+        self.assertEqual(snap[market_data.PRICE], 110.0)
+        self.assertEqual(snap[market_data.HASHRATE], 7e8)
+        self.assertEqual(snap[f"{market_data.PRICE}_ts"], 1000.0)
+        with open(self.cfg, "r", encoding="utf-8") as f:
+            ents = yaml.safe_load(f)["entities"]
+        self.assertEqual(ents["sensor_btc_price"], 110.0)
+
+        # not due yet -> no HTTP, no rewrite
+        os.remove(self.cfg)
+        fetcher.poll_once(now=1010.0)
+        self.assertFalse(os.path.exists(self.cfg))
+
+    def test_failing_source_backs_off_and_is_excluded(self):
+        _StandIn.routes = {
+            "/a": (200, {"bitcoin": {"usd": 100.0}}, 0.0),
+            "/b": (500, {}, 0.0),
+        }
+        fetcher = market_data.MarketDataFetcher([
+            self._src("a", market_data.PRICE, market_data._parse_coingecko, 60),
+            self._src("b", market_data.PRICE, market_data._parse_coinbase, 60),
+        ], None)
+
+        snap = fetcher.poll_once(now=0.0)
+        self.assertEqual(snap[market_data.PRICE], 100.0)
+        self.assertEqual(snap[f"{market_data.PRICE}_sources"], {"a": 100.0})
+        self.assertEqual(fetcher._state["b"].next_due, 60.0)
+
+        fetcher.poll_once(now=60.0)
+        self.assertEqual(fetcher._state["b"].failures, 2)
+        self.assertEqual(fetcher._state["b"].next_due, 180.0)
+
+        _StandIn.routes["/b"] = (200, {"data": {"amount": "120"}}, 0.0)
+        snap = fetcher.poll_once(now=180.0)
+        self.assertEqual(fetcher._state["b"].failures, 0)
+        self.assertEqual(snap[market_data.PRICE], 110.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -6,7 +6,7 @@ from services.consumers.battery import force_restore_battery_normal_mode
 from services.cooling_store import get_cooling, set_cooling
 from services.ha_entities import call_action, set_numeric_entity
 from services.heater_store import resolve_entity_id as heat_resolve, set_vars as heat_set_vars
-from services.miners_store import list_miners, request_miner_state, update_miner
+from services.miners_store import list_miners, request_miners_state, update_miner
 from services.pv_ramp_up import reset_pv_ramp_up_state
 from services.wallbox_store import get_var as wb_get, set_vars as wb_set_vars
 
@@ -24,14 +24,9 @@ def _shutdown_miners(now_ts: float) -> tuple[bool, str]:
     if not miners:
         return True, "miners off"
 
-    errors: list[str] = []
-    for miner in miners:
-        mid = str(miner.get("id") or "").strip()
-        if not mid:
-            continue
-        ok, reason = request_miner_state(mid, False, now_ts=now_ts, enforce_runtime=False)
-        if not ok:
-            errors.append(f"{mid}: {reason}")
+    mids = [mid for mid in (str(m.get("id") or "").strip() for m in miners) if mid]
+    results = request_miners_state(mids, False, now_ts=now_ts, enforce_runtime=False)
+    errors = [f"{mid}: {reason}" for mid, (ok, reason) in results.items() if not ok]
 
     if errors:
         return False, f"miners partial: {'; '.join(errors)}"
@@ -111,15 +106,11 @@ def _arm_miners_auto(now_ts: float) -> tuple[bool, str]:
     if not miners:
         return True, "miners auto armed"
 
-    errors: list[str] = []
-    for miner in miners:
-        mid = str(miner.get("id") or "").strip()
-        if not mid:
-            continue
-        ok, reason = request_miner_state(mid, False, now_ts=now_ts, enforce_runtime=False)
+    mids = [mid for mid in (str(m.get("id") or "").strip() for m in miners) if mid]
+    results = request_miners_state(mids, False, now_ts=now_ts, enforce_runtime=False)
+    for mid in mids:
         update_miner(mid, mode="auto")
-        if not ok:
-            errors.append(f"{mid}: {reason}")
+    errors = [f"{mid}: {reason}" for mid, (ok, reason) in results.items() if not ok]
 
     if errors:
         return False, f"miners auto partial: {'; '.join(errors)}"
@@ -0,0 +1,370 @@
+# services/miner_api.py
+"""
+Telemetrie direkt von den Minern über deren lokale JSON-API (cgminer-Stil, Port 4028;
+Antminer, LuxOS, Braiins, Whatsminer sprechen alle einen Dialekt davon).
+
+Je Miner mit `api_host` (optional `api_port`) fragt der Poller summary/stats und –
+falls die Firmware das kann – power (LuxOS) bzw. tunerstatus (Braiins) ab:
+  power_kw, hashrate_ths, temp_max_c, uptime_s
+Die Abfragen laufen parallel (miner_api_max_workers) mit festem Socket-Timeout;
+nicht erreichbare Miner werden mit wachsendem Abstand (bis miner_api_backoff_max_s)
+erneut versucht, damit ein toter Host den Zyklus nicht jedes Mal ausbremst.
+
+Frische Messwerte ersetzen im Planner die nominellen power_kw/hashrate_ths
+(effective_rating / effective_power_kw). Liegt die gemessene Hashrate nach der
+Aufwärmzeit unter miner_api_underperf_ratio × nominal, wird der Miner markiert.
+"""
+from __future__ import annotations
+
+import json
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from services.miners_store import list_miner_configs
+from services.settings_store import get_var as set_get
+
+DEFAULT_PORT = 4028
+MAX_RESPONSE_BYTES = 1 << 20
+# Hashrate-Felder in Präferenzreihenfolge (gleitende Fenster vor Boot-Durchschnitt) -> Faktor auf TH/s
+HASHRATE_KEYS = (
+    ("MHS 1m", 1e-6), ("MHS 5m", 1e-6), ("GHS 5s", 1e-3), ("MHS 5s", 1e-6),
+    ("GHS av", 1e-3), ("MHS av", 1e-6),
+)
+POWER_COMMANDS = ("power", "tunerstatus")
+
+
+class MinerApiError(Exception):
+    pass
+
+
+def _num(x, d=None):
+    try:
+        if x in (None, ""):
+            return d
+        return float(x)
+    except (TypeError, ValueError):
+        return d
+
+
+def _truthy(x, default=False) -> bool:
+    if x is None:
+        return default
+    s = str(x).strip().lower()
+    if s in ("1", "true", "on", "yes", "y"):
+        return True
+    if s in ("0", "false", "off", "no", "n", ""):
+        return False
+    return default
+
+
+# ----------------------------------------------------------------------------------
+# Protokoll
+# ----------------------------------------------------------------------------------
+def query(host: str, port: int, command: str, timeout_s: float = 2.0) -> dict:
+    """Ein Kommando, eine Verbindung (der Miner schließt nach der Antwort)."""
+    try:
+        with socket.create_connection((host, int(port)), timeout=timeout_s) as sock:
+            sock.settimeout(timeout_s)
+            sock.sendall(json.dumps({"command": command}).encode("ascii"))
+            chunks, size = [], 0
+            while True:
+                chunk = sock.recv(65536)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+                size += len(chunk)
+                if chunk.endswith(b"\x00") or size > MAX_RESPONSE_BYTES:
+                    break
+    except OSError as e:
+        raise MinerApiError(f"{host}:{port} {command}: {e}") from e
+
+    raw = b"".join(chunks).rstrip(b"\x00").decode("utf-8", "replace").strip()
+    if not raw:
+        raise MinerApiError(f"{host}:{port} {command}: empty response")
+    try:
+        # manche cgminer-Builds liefern "}{" zwischen Objekten
+        data = json.loads(raw.replace("}{", "},{"))
+    except ValueError as e:
+        raise MinerApiError(f"{host}:{port} {command}: invalid JSON ({e})") from e
+    status = (data.get("STATUS") or [{}])[0] if isinstance(data, dict) else {}
+    if isinstance(status, dict) and str(status.get("STATUS", "S")).upper() in ("E", "F"):
+        raise MinerApiError(f"{host}:{port} {command}: {status.get('Msg') or 'error'}")
+    return data
+
+
+def _section(resp: dict, key: str) -> List[dict]:
+    items = resp.get(key) if isinstance(resp, dict) else None
+    return [x for x in (items or []) if isinstance(x, dict)]
+
+
+def parse_summary(resp: dict) -> dict:
+    out: dict = {}
+    summary = (_section(resp, "SUMMARY") or [{}])[0]
+    for key, factor in HASHRATE_KEYS:
+        v = _num(summary.get(key))
+        if v is not None:
+            out["hashrate_ths"] = v * factor
+            break
+    uptime = _num(summary.get("Elapsed"))
+    if uptime is not None:
+        out["uptime_s"] = uptime
+    watts = _num(summary.get("Power"))                      # Whatsminer
+    if watts is not None and watts > 0:
+        out["power_kw"] = watts / 1000.0
+    temp = _num(summary.get("Temperature"))
+    if temp is not None:
+        out["temp_max_c"] = temp
+    return out
+
+
+def parse_stats(resp: dict) -> dict:
+    out: dict = {}
+    temps = []
+    for entry in _section(resp, "STATS"):
+        for key, val in entry.items():
+            k = str(key).lower()
+            if k.startswith("temp") and not k.startswith("temp_num"):
+                v = _num(val)
+                if v is not None and 0.0 < v < 150.0:
+                    temps.append(v)
+        if "uptime_s" not in out and _num(entry.get("Elapsed")) is not None:
+            out["uptime_s"] = _num(entry.get("Elapsed"))
+    if temps:
+        out["temp_max_c"] = max(temps)
+    return out
+
+
+def parse_power(resp: dict) -> Optional[float]:
+    """kW aus LuxOS `power` oder Braiins `tunerstatus`."""
+    for entry in _section(resp, "POWER"):
+        w = _num(entry.get("Watts"))
+        if w is not None and w > 0:
+            return w / 1000.0
+    for entry in _section(resp, "TUNERSTATUS"):
+        w = _num(entry.get("ApproximateMinerPowerConsumption"))
+        if w is not None and w > 0:
+            return w / 1000.0
+    return None
+
+
+# ----------------------------------------------------------------------------------
+# Poller
+# ----------------------------------------------------------------------------------
+class MinerTelemetry:
+    def __init__(self, *, interval_s: float = 10.0, timeout_s: float = 2.0, max_workers: int = 4,
+                 underperf_ratio: float = 0.85, warmup_s: float = 900.0, backoff_max_s: float = 300.0):
+        self.interval_s = max(1.0, float(interval_s))
+        self.timeout_s = max(0.2, float(timeout_s))
+        self.max_workers = max(1, int(max_workers))
+        self.underperf_ratio = max(0.0, float(underperf_ratio))
+        self.warmup_s = max(0.0, float(warmup_s))
+        self.backoff_max_s = max(self.interval_s, float(backoff_max_s))
+        self.stale_s = max(30.0, 3.0 * self.interval_s)
+        self._samples: Dict[str, dict] = {}
+        self._offline: Dict[str, Tuple[int, float]] = {}     # mid -> (Fehler in Folge, nächster Versuch)
+        self._power_cmd: Dict[str, str] = {}                 # mid -> funktionierendes Leistungs-Kommando ("" = keins)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.cycles = 0
+        self.last_cycle_s = 0.0
+        self.last_error = ""
+
+    @staticmethod
+    def targets() -> List[dict]:
+        """Abfrageziele nur aus der Konfiguration (kein Runtime-Store, keine HA-Reads)."""
+        out = []
+        for m in list_miner_configs():
+            host = str(m.get("api_host") or "").strip()
+            if not host or not _truthy(m.get("enabled"), False):
+                continue
+            if ":" in host:
+                host, _, port = host.rpartition(":")
+            else:
+                port = m.get("api_port") or DEFAULT_PORT
+            out.append({
+                "id": str(m.get("id")),
+                "host": host,
+                "port": int(_num(port, DEFAULT_PORT)),
+                "nominal_ths": _num(m.get("hashrate_ths"), 0.0),
+            })
+        return out
+
+    def poll_miner(self, target: dict) -> dict:
+        mid, host, port = target["id"], target["host"], target["port"]
+        sample = parse_summary(query(host, port, "summary", self.timeout_s))
+        try:
+            for k, v in parse_stats(query(host, port, "stats", self.timeout_s)).items():
+                sample.setdefault(k, v)
+        except MinerApiError:
+            pass
+        if "power_kw" not in sample:
+            known = self._power_cmd.get(mid)
+            cmds = POWER_COMMANDS if known is None else ((known,) if known else ())
+            for cmd in cmds:
+                try:
+                    kw = parse_power(query(host, port, cmd, self.timeout_s))
+                except MinerApiError:
+                    kw = None
+                if kw is not None:
+                    sample["power_kw"] = kw
+                    self._power_cmd[mid] = cmd
+                    break
+            if known is None and "power_kw" not in sample:
+                self._power_cmd[mid] = ""             # nur einmal proben
+
+        nominal = target.get("nominal_ths") or 0.0
+        ths = sample.get("hashrate_ths")
+        sample["ratio"] = (ths / nominal) if (ths is not None and nominal > 0) else None
+        warm = sample.get("uptime_s") is None or sample["uptime_s"] >= self.warmup_s
+        sample["underperforming"] = bool(
+            warm and sample["ratio"] is not None and 0.0 < ths and sample["ratio"] < self.underperf_ratio
+        )
+        if sample.get("power_kw") and ths:
+            sample["j_per_th"] = sample["power_kw"] * 1000.0 / ths
+        return sample
+
+    def _poll_target(self, target: dict, now: float) -> None:
+        mid = target["id"]
+        try:
+            sample = self.poll_miner(target)
+        except MinerApiError as e:
+            fails = self._offline.get(mid, (0, 0.0))[0] + 1
+            delay = min(self.interval_s * (2 ** fails), self.backoff_max_s)
+            self._offline[mid] = (fails, now + delay)
+            if fails == 1:
+                print(f"[miner_api] {mid} unreachable: {e}; retry with backoff", flush=True)
+            return
+        if mid in self._offline:
+            print(f"[miner_api] {mid} reachable again", flush=True)
+            self._offline.pop(mid, None)
+        sample["ts"] = time.time()
+        with self._lock:
+            prev = self._samples.get(mid) or {}
+            self._samples[mid] = sample
+        if sample["underperforming"] and not prev.get("underperforming"):
+            print(
+                f"[miner_api] {mid} underperforming: {sample.get('hashrate_ths', 0.0):.1f} TH/s "
+                f"= {sample['ratio'] * 100:.0f}% of nominal",
+                flush=True,
+            )
+
+    def poll_once(self, targets: Optional[List[dict]] = None, now: Optional[float] = None) -> Dict[str, dict]:
+        t0 = time.perf_counter()
+        now = time.time() if now is None else now
+        targets = self.targets() if targets is None else targets
+        due = [t for t in targets if self._offline.get(t["id"], (0, 0.0))[1] <= now]
+        if due:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(due)),
+                                    thread_name_prefix="miner-api") as pool:
+                list(pool.map(lambda t: self._poll_target(t, now), due))
+        self.cycles += 1
+        self.last_cycle_s = time.perf_counter() - t0
+        return self.snapshot()
+
+    def get(self, mid: str, max_age_s: Optional[float] = None) -> Optional[dict]:
+        entry = self._samples.get(str(mid))
+        limit = self.stale_s if max_age_s is None else max_age_s
+        if not entry or (time.time() - entry["ts"]) > limit:
+            return None
+        return entry
+
+    def snapshot(self) -> Dict[str, dict]:
+        with self._lock:
+            return {mid: dict(s) for mid, s in self._samples.items()}
+
+    def offline(self) -> Dict[str, int]:
+        return {mid: fails for mid, (fails, _ts) in self._offline.items()}
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            started = time.monotonic()
+            try:
+                self.poll_once()
+                self.last_error = ""
+            except Exception as e:
+                if str(e) != self.last_error:
+                    print(f"[miner_api] poll failed: {e}", flush=True)
+                self.last_error = str(e)
+            self._stop.wait(max(0.0, self.interval_s - (time.monotonic() - started)))
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="miner-api", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+
+# ----------------------------------------------------------------------------------
+# Modul-Instanz (aus Settings konfiguriert)
+# ----------------------------------------------------------------------------------
+_TELEMETRY: Optional[MinerTelemetry] = None
+_START_LOCK = threading.Lock()   # Start beim Boot und aus dem Miner-Dialog
+
+
+def is_enabled() -> bool:
+    return _truthy(set_get("miner_api_enabled", True), True)
+
+
+def start_from_settings() -> Optional[MinerTelemetry]:
+    """Starts the poller unless miner_api_enabled is false or no enabled miner has an api_host."""
+    with _START_LOCK:
+        return _start_locked()
+
+
+def _start_locked() -> Optional[MinerTelemetry]:
+    global _TELEMETRY
+    if _TELEMETRY is not None or not is_enabled():
+        return _TELEMETRY
+    if not MinerTelemetry.targets():
+        print("[miner_api] no miner with api_host -> poller not started", flush=True)
+        return None
+    _TELEMETRY = MinerTelemetry(
+        interval_s=_num(set_get("miner_api_interval_s", 10.0), 10.0),
+        timeout_s=_num(set_get("miner_api_timeout_s", 2.0), 2.0),
+        max_workers=int(_num(set_get("miner_api_max_workers", 4), 4)),
+        underperf_ratio=_num(set_get("miner_api_underperf_ratio", 0.85), 0.85),
+        warmup_s=_num(set_get("miner_api_warmup_s", 900.0), 900.0),
+        backoff_max_s=_num(set_get("miner_api_backoff_max_s", 300.0), 300.0),
+    )
+    _TELEMETRY.start()
+    print(f"[miner_api] polling every {_TELEMETRY.interval_s:.0f}s", flush=True)
+    return _TELEMETRY
+
+
+def get_sample(mid: str) -> Optional[dict]:
+    """Frischer Messwert für mid oder None."""
+    return _TELEMETRY.get(mid) if _TELEMETRY is not None else None
+
+
+def effective_rating(miner: dict) -> Tuple[float, float]:
+    """
+    (hashrate_ths, power_kw): gemessen, solange der Miner frisch messbar hasht;
+    sonst bei variablen Minern das zuletzt gesetzte Leistungsziel, sonst nominal.
+    """
+    ths = _num(miner.get("hashrate_ths"), 0.0)
+    pkw = _num(miner.get("power_kw"), 0.0)
+    sample = get_sample(str(miner.get("id")))
+    if sample and (sample.get("hashrate_ths") or 0.0) > 0.0:
+        ths = sample["hashrate_ths"]
+        if (sample.get("power_kw") or 0.0) > 0.0:
+            pkw = sample["power_kw"]
+        return ths, pkw
+    target = _num(miner.get("power_target_kw"), 0.0)
+    if str(miner.get("power_mode") or "").strip().lower() == "variable" and target > 0.0 and pkw > 0.0:
+        # J/TH als konstant angenommen
+        return ths * target / pkw, target
+    return ths, pkw
+
+
+def effective_power_kw(miner: dict) -> float:
+    return effective_rating(miner)[1]
@@ -0,0 +1,125 @@
+import json
+import socket
+import socketserver
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from bitcoin_pv_mining.services import miner_api
+from bitcoin_pv_mining.services.miner_api import MinerTelemetry
+
+
+def _ok(key, items):
+    return {"STATUS": [{"STATUS": "S", "Msg": key}], key: items, "id": 1}
+
+
+class _CgminerStandIn(socketserver.BaseRequestHandler):
+    """Antwortet wie cgminer: ein JSON-Objekt + NUL, danach Verbindung zu."""
+    replies = {}
+    commands = []
+    delay_s = 0.0
+
+    def handle(self):
+        cmd = json.loads(self.request.recv(4096).decode())["command"]
+        self.commands.append(cmd)
+        time.sleep(self.delay_s)
+        reply = self.replies.get(cmd, {"STATUS": [{"STATUS": "E", "Msg": "Invalid command"}]})
+        self.request.sendall(json.dumps(reply).encode() + b"\x00")
+
+
+class MinerTelemetryTests(unittest.TestCase):
+    def setUp(self):
+        _CgminerStandIn.replies = {
+            "summary": _ok("SUMMARY", [{"Elapsed": 3600, "MHS 1m": 180.0e6, "GHS av": 199.0e3}]),
+            "stats": _ok("STATS", [{"Type": "Antminer"}, {"temp2_1": 61, "temp2_2": 74, "temp_num": 3}]),
+            "power": _ok("POWER", [{"Watts": 3420}]),
+        }
+        _CgminerStandIn.commands = []
+        _CgminerStandIn.delay_s = 0.0
+        self.server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), _CgminerStandIn)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.port = self.server.server_address[1]
+        self.tm = MinerTelemetry(interval_s=10.0, timeout_s=1.0, max_workers=4, underperf_ratio=0.95, warmup_s=600.0)
+
+    def _target(self, mid="m1", nominal=200.0, port=None):
+        return {"id": mid, "host": "127.0.0.1", "port": port or self.port, "nominal_ths": nominal}
+
+    def test_collects_power_hashrate_temperature_and_uptime(self):
+        sample = self.tm.poll_once([self._target()])["m1"]
+        self.assertAlmostEqual(sample["hashrate_ths"], 180.0)
+        self.assertAlmostEqual(sample["power_kw"], 3.42)
+        self.assertEqual(sample["temp_max_c"], 74)
+        self.assertEqual(sample["uptime_s"], 3600)
+        self.assertAlmostEqual(sample["j_per_th"], 19.0)
+        self.assertTrue(sample["underperforming"])                 # 90 % < 95 %
+
+    def test_power_command_is_probed_once(self):
+        del _CgminerStandIn.replies["power"]
+        _CgminerStandIn.replies["tunerstatus"] = _ok(
+            "TUNERSTATUS", [{"ApproximateMinerPowerConsumption": 3300}])
+        self.tm.poll_once([self._target()])
+        self.tm.poll_once([self._target()])
+        self.assertEqual(_CgminerStandIn.commands.count("power"), 1)
+        self.assertEqual(_CgminerStandIn.commands.count("tunerstatus"), 2)
+        self.assertAlmostEqual(self.tm.get("m1")["power_kw"], 3.3)
+
+    def test_parallel_polling_and_backoff_for_dead_hosts(self):
+        _CgminerStandIn.delay_s = 0.2
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            dead_port = s.getsockname()[1]                          # nichts lauscht dort
+        targets = [self._target(f"m{i}") for i in range(4)] + [self._target("dead", port=dead_port)]
+
+        t0 = time.perf_counter()
+        snap = self.tm.poll_once(targets, now=1000.0)
+        self.assertLess(time.perf_counter() - t0, 4 * 3 * 0.2)       # nicht seriell
+        self.assertEqual(sorted(snap), ["m0", "m1", "m2", "m3"])
+        self.assertEqual(self.tm.offline(), {"dead": 1})
+
+        _CgminerStandIn.delay_s = 0.0
+        with patch.object(self.tm, "poll_miner", wraps=self.tm.poll_miner) as polled:
+            self.tm.poll_once(targets, now=1005.0)                   # dead noch im Backoff
+            self.assertNotIn("dead", [c.args[0]["id"] for c in polled.call_args_list])
+
+    def test_effective_rating_prefers_fresh_measurements(self):
+        record = {"id": "m1", "hashrate_ths": 200.0, "power_kw": 3.5}
+        with patch.object(miner_api, "_TELEMETRY", self.tm):
+            self.assertEqual(miner_api.effective_rating(record), (200.0, 3.5))
+            self.tm.poll_once([self._target()])
+            ths, pkw = miner_api.effective_rating(record)
+            self.assertAlmostEqual(ths, 180.0)
+            self.assertAlmostEqual(pkw, 3.42)
+            self.tm.stale_s = -1.0
+            self.assertEqual(miner_api.effective_rating(record), (200.0, 3.5))
+
+            # variable Miner ohne frische Messung: zuletzt gesetztes Leistungsziel
+            throttled = {**record, "power_mode": "variable", "power_target_kw": 2.1}
+            ths, pkw = miner_api.effective_rating(throttled)
+            self.assertAlmostEqual(pkw, 2.1)
+            self.assertAlmostEqual(ths, 120.0)
+            self.assertAlmostEqual(miner_api.effective_power_kw({**throttled, "power_target_kw": 0.0}), 3.5)
+
+    def test_targets_come_from_configuration_only(self):
+        configs = [
+            {"id": "a", "enabled": True, "api_host": "10.0.0.5:4029", "hashrate_ths": 200},
+            {"id": "b", "enabled": True, "api_host": ""},
+            {"id": "c", "enabled": False, "api_host": "10.0.0.7"},
+        ]
+        with patch.object(miner_api, "list_miner_configs", lambda: configs):
+            self.assertEqual(miner_api.MinerTelemetry.targets(),
+                             [{"id": "a", "host": "10.0.0.5", "port": 4029, "nominal_ths": 200.0}])
+
+    def test_poller_is_not_started_without_api_hosts(self):
+        with patch.object(miner_api, "_TELEMETRY", None), \
+                patch.object(miner_api, "set_get", lambda k, d=None: d), \
+                patch.object(miner_api, "list_miner_configs", lambda: [{"id": "a", "enabled": True}]):
+            self.assertIsNone(miner_api.start_from_settings())
+            self.assertIsNone(miner_api._TELEMETRY)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,13 +1,27 @@
 
-import os, uuid, time
-from services.utils import load_yaml, save_yaml
+import os, uuid, time, threading
+from services.utils import load_yaml, save_yaml, ADDON_CONFIG_DIR
 from services.settings_store import get_var as set_get
-from services.ha_entities import call_action, get_entity_state, is_on_like
+from services.ha_entities import batch_actions, call_action, get_entity_state, is_on_like
+from services import runtime_store, runtime_db
 
-CONFIG_DIR = "/config/pv_mining_addon"
+CONFIG_DIR = ADDON_CONFIG_DIR
 MIN_DEF = os.path.join(CONFIG_DIR, "miners.yaml")
 MIN_OVR = os.path.join(CONFIG_DIR, "miners.local.yaml")
 
+# Transition state lives in the runtime store, not in miners.local.yaml.
+RUNTIME_KEYS = ("on", "pending_on", "pending_off", "startup_grace_until", "last_flip_ts", "power_target_kw")
+RUNTIME_DEFAULTS = {
+    "on": False,
+    "pending_on": False,
+    "pending_off": False,
+    "startup_grace_until": 0.0,
+    "last_flip_ts": 0.0,
+    "power_target_kw": 0.0,   # zuletzt geschriebenes Leistungsziel (variable Miner), 0 = unbekannt
+}
+
+_YAML_LOCK = threading.RLock()
+
 def _ensure(data: dict, path: str) -> dict:
     cur = data
     for k in path.split("."):
@@ -32,11 +46,38 @@ def _load_all():
     return {"miners": {"list": lst}}
 
 
-def _list_miners_raw() -> list[dict]:
+def _runtime_id(mid: str) -> str:
+    return f"miner:{mid}"
+
+
+def _with_runtime_fields(miner: dict) -> dict:
+    out = dict(miner or {})
+    mid = out.get("id")
+    if not mid:
+        return out
+    rt = runtime_store.get_device(_runtime_id(mid))
+    if not rt:
+        # Migration: older miners.local.yaml files still carry the runtime keys.
+        rt = {k: out.get(k, v) for k, v in RUNTIME_DEFAULTS.items()}
+        rt = runtime_store.update_device(_runtime_id(mid), **rt)
+    out.update({k: rt[k] for k in RUNTIME_KEYS if k in rt})
+    return out
+
+
+def _list_config_raw() -> list[dict]:
     return _load_all()["miners"]["list"]
 
+
+def _list_miners_raw() -> list[dict]:
+    return [_with_runtime_fields(m) for m in _list_config_raw()]
+
 def _save_all(data: dict):
-    save_yaml(MIN_OVR, data or {"miners": {"list": []}})
+    lst = _get(data or {}, "miners.list", []) or []
+    for m in lst:
+        if isinstance(m, dict) and m.get("id") and not runtime_store.has_device(_runtime_id(m["id"])):
+            _with_runtime_fields(m)
+    clean = [{k: v for k, v in m.items() if k not in RUNTIME_KEYS} for m in lst if isinstance(m, dict)]
+    save_yaml(MIN_OVR, {"miners": {"list": clean}})
 
 def _state_entity_id(miner: dict) -> str:
     explicit = (
@@ -128,6 +169,16 @@ def list_miners() -> list[dict]:
     return [_with_runtime(m) for m in _list_miners_raw()]
 
 
+def miner_ids() -> list[str]:
+    """Configured miner ids only – no runtime store, no HA round trips."""
+    return [str(m["id"]) for m in _list_config_raw() if isinstance(m, dict) and m.get("id")]
+
+
+def list_miner_configs() -> list[dict]:
+    """Configured miner records (copies) – no runtime store, no HA round trips."""
+    return [dict(m) for m in _list_config_raw() if isinstance(m, dict) and m.get("id")]
+
+
 def get_miner(mid: str) -> dict | None:
     for miner in list_miners():
         if miner.get("id") == mid:
@@ -138,36 +189,63 @@ def _new_id() -> str:
     return "m_" + uuid.uuid4().hex[:10]
 
 def add_miner(name: str = "") -> dict:
-    miners = _list_miners_raw()
-    item = {
-        "id": _new_id(),
-        "name": name or f"Miner {len(miners)+1}",
-        "enabled": True,
-        "mode": "manual",     # "manual" | "auto"
-        "on": False,          # gewünschter Zustand (manual) / angezeigter Zustand (auto)
-        "state_entity": "",
-        "state_timeout_s": 10,
-        "pending_on": False,
-        "pending_off": False,
-        "startup_grace_until": 0.0,
-        "hashrate_ths": 100.0,
-        "power_kw": 3.0,
-        "require_cooling": False,
-        "action_on_entity": "",
-        "action_off_entity": "",
-        "created_at": int(time.time()),
-    }
-    miners.append(item)
-    _save_all({"miners": {"list": miners}})
-    return item
+    with _YAML_LOCK:
+        miners = _list_config_raw()
+        item = {
+            "id": _new_id(),
+            "name": name or f"Miner {len(miners)+1}",
+            "enabled": True,
+            "mode": "manual",     # "manual" | "auto"
+            "state_entity": "",
+            "state_timeout_s": 10,
+            "hashrate_ths": 100.0,
+            "power_kw": 3.0,
+            "require_cooling": False,
+            "action_on_entity": "",
+            "action_off_entity": "",
+            "api_host": "",
+            "power_mode": "fixed",    # "fixed" | "variable"
+            "min_kw": 0.0,
+            "max_kw": 0.0,            # 0 = power_kw
+            "step_kw": 0.1,
+            "power_target_entity": "",
+            "created_at": int(time.time()),
+        }
+        miners.append(item)
+        _save_all({"miners": {"list": miners}})
+    # "on" = gewünschter Zustand (manual) / angezeigter Zustand (auto)
+    runtime_store.update_device(_runtime_id(item["id"]), **RUNTIME_DEFAULTS)
+    return {**item, **RUNTIME_DEFAULTS}
 
 def update_miner(mid: str, **changes):
-    miners = _list_miners_raw()
-    for m in miners:
-        if m.get("id") == mid:
-            m.update({k: v for k, v in changes.items() if v is not None})
-            break
-    _save_all({"miners": {"list": miners}})
+    changes = {k: v for k, v in changes.items() if v is not None}
+    runtime = {k: v for k, v in changes.items() if k in RUNTIME_KEYS}
+    config = {k: v for k, v in changes.items() if k not in RUNTIME_KEYS}
+
+    if runtime:
+        prev_on = runtime_store.get_device(_runtime_id(mid)).get("on")
+        runtime_store.update_device(_runtime_id(mid), **runtime)
+        if "on" in runtime and prev_on is not None and bool(prev_on) != bool(runtime["on"]):
+            runtime_db.record_transition(
+                _runtime_id(mid),
+                bool(runtime["on"]),
+                ts=runtime.get("last_flip_ts"),
+            )
+    if not config:
+        return
+
+    # YAML is only rewritten for real configuration edits.
+    with _YAML_LOCK:
+        miners = _list_config_raw()
+        dirty = False
+        for m in miners:
+            if m.get("id") == mid:
+                if any(m.get(k) != v for k, v in config.items()):
+                    m.update(config)
+                    dirty = True
+                break
+        if dirty:
+            _save_all({"miners": {"list": miners}})
 
 
 def _num(value, default=0.0) -> float:
@@ -177,8 +255,8 @@ def _num(value, default=0.0) -> float:
         return default
 
 
-def miner_runtime_lock(mid: str, target_on: bool, now_ts: float | None = None) -> tuple[bool, str]:
-    miner = get_miner(mid)
+def miner_runtime_lock(mid: str, target_on: bool, now_ts: float | None = None, *, miner: dict | None = None) -> tuple[bool, str]:
+    miner = miner if miner is not None else get_miner(mid)
     if not miner:
         return True, "not found"
 
@@ -206,11 +284,9 @@ def miner_runtime_lock(mid: str, target_on: bool, now_ts: float | None = None) -
     return False, ""
 
 
-def request_miner_state(mid: str, target_on: bool, *, now_ts: float | None = None, enforce_runtime: bool = True) -> tuple[bool, str]:
-    miner = get_miner(mid)
-    if not miner:
-        return False, "not found"
-
+def _request_state(miner: dict, target_on: bool, now_ts: float | None, enforce_runtime: bool,
+                   on_failed=None) -> tuple[bool, str]:
+    mid = miner.get("id")
     target_on = bool(target_on)
     ha_on = miner.get("ha_on")
     pending_on = bool(miner.get("pending_on"))
@@ -238,15 +314,10 @@ def request_miner_state(mid: str, target_on: bool, *, now_ts: float | None = Non
 
     now_eff = float(now_ts if now_ts is not None else time.time())
     if enforce_runtime:
-        locked, reason = miner_runtime_lock(mid, target_on, now_eff)
+        locked, reason = miner_runtime_lock(mid, target_on, now_eff, miner=miner)
         if locked:
             return False, reason
 
-    action_key = "action_on_entity" if target_on else "action_off_entity"
-    action_entity = (miner.get(action_key) or "").strip()
-    if action_entity:
-        call_action(action_entity, target_on)
-
     has_feedback = bool(_state_entity_id(miner))
     timeout_s = _state_timeout_s(miner, 10)
     update_miner(
@@ -257,10 +328,65 @@ def request_miner_state(mid: str, target_on: bool, *, now_ts: float | None = Non
         startup_grace_until=(now_eff + timeout_s) if has_feedback else 0.0,
         last_flip_ts=now_eff,
     )
+
+    action_key = "action_on_entity" if target_on else "action_off_entity"
+    action_entity = (miner.get(action_key) or "").strip()
+    if action_entity:
+        previous = {
+            "on": desired_on,
+            "pending_on": pending_on,
+            "pending_off": pending_off,
+            "startup_grace_until": _num(miner.get("startup_grace_until"), 0.0),
+            "last_flip_ts": _num(miner.get("last_flip_ts"), 0.0),
+        }
+
+        def _on_result(ok: bool) -> None:
+            # gesammelter Call fehlgeschlagen -> Pending-Zustand zurücknehmen; direkt im
+            # runtime_store, damit runtime_db keinen Schaltvorgang verbucht, der nie stattfand
+            if not ok:
+                print(f"[miners_store] {mid}: {action_entity} failed -> state restored", flush=True)
+                runtime_store.update_device(_runtime_id(mid), **previous)
+                if on_failed is not None:
+                    on_failed()
+
+        if not call_action(action_entity, target_on, on_result=_on_result):
+            return False, "action failed"
     return True, "switched"
 
+
+def request_miner_state(mid: str, target_on: bool, *, now_ts: float | None = None, enforce_runtime: bool = True) -> tuple[bool, str]:
+    miner = get_miner(mid)
+    if not miner:
+        return False, "not found"
+    return _request_state(miner, target_on, now_ts, enforce_runtime)
+
+
+def request_miners_state(mids, target_on: bool, *, now_ts: float | None = None,
+                         enforce_runtime: bool = True, miners: list[dict] | None = None) -> dict[str, tuple[bool, str]]:
+    """
+    request_miner_state() für viele Miner: ein list_miners() (oder die übergebenen
+    Datensätze), und die Aktionen gleicher domain/service gehen als ein HA-Call mit
+    entity_id-Liste raus. Fehlgeschlagene Calls werden je Miner zurückgemeldet.
+    """
+    by_id = {m.get("id"): m for m in (miners if miners is not None else list_miners())}
+    results: dict[str, tuple[bool, str]] = {}
+    with batch_actions():
+        for mid in mids:
+            miner = by_id.get(mid)
+            if not miner:
+                results[mid] = (False, "not found")
+                continue
+            results[mid] = _request_state(
+                miner, target_on, now_ts, enforce_runtime,
+                on_failed=lambda mid=mid: results.__setitem__(mid, (False, "action failed")),
+            )
+    return results
+
+
 def delete_miner(mid: str):
-    miners = [m for m in _list_miners_raw() if m.get("id") != mid]
-    _save_all({"miners": {"list": miners}})
+    with _YAML_LOCK:
+        miners = [m for m in _list_config_raw() if m.get("id") != mid]
+        _save_all({"miners": {"list": miners}})
+    runtime_store.delete_device(_runtime_id(mid))
 
 
@@ -0,0 +1,408 @@
+# services/modbus_source.py
+"""
+Native Modbus/TCP sensor source for Fronius (SunSpec) inverters and meters.
+
+One persistent connection; the SunSpec model map is walked once per connect,
+afterwards each cycle reads only the models of interest in batched requests
+(<= 125 registers each). Decoded values (kW) are published in an in-memory
+snapshot and exposed to the planner as virtual entity ids "modbus:<kind>":
+
+  modbus:pv_production      PV power (model 160 PV modules, else inverter DCW)
+  modbus:grid_consumption   grid import (meter model 201-204)
+  modbus:grid_feed_in       grid export (meter model 201-204)
+  modbus:battery_discharge  >0 discharge, <0 charge (model 160 StCha/StDisCha modules)
+  modbus:ac_power           inverter AC output (model 101-103)
+
+Model 124 (storage) is only read for WChaMax: storage_present() tells callers
+whether a battery is actually installed, since Fronius reports the StCha/
+StDisCha modules in model 160 either way.
+
+sensor_mapping only hands these ids out while the snapshot is fresh, so the HA
+mapping stays the fallback when the poller is off or the inverter is offline.
+"""
+from __future__ import annotations
+
+import socket
+import struct
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from services import sunspec
+from services.settings_store import get_var as set_get
+
+ENTITY_PREFIX = "modbus:"
+KINDS = ("pv_production", "grid_consumption", "grid_feed_in", "battery_discharge", "ac_power")
+
+MAX_REGISTERS_PER_READ = 125
+# Lücken bis zu so vielen Registern werden mitgelesen statt eine Extra-Anfrage zu senden
+MERGE_GAP = 16
+SUNSPEC_BASES = sunspec.BASES
+INVERTER_MODELS = sunspec.INVERTER_MODELS
+MPPT_MODEL = sunspec.MPPT_MODEL
+STORAGE_MODEL = sunspec.STORAGE_MODEL
+METER_MODELS = sunspec.METER_MODELS
+
+# Werte älter als das gelten als "nicht verfügbar" (-> HA-Mapping greift)
+STALE_AFTER_S = 5.0
+RECONNECT_MIN_S = 2.0
+RECONNECT_MAX_S = 30.0
+
+
+class ModbusError(Exception):
+    pass
+
+
+def _num(x, d=0.0) -> float:
+    try:
+        return float(x)
+    except (TypeError, ValueError):
+        return d
+
+
+def _truthy(x, default=False) -> bool:
+    if x is None:
+        return default
+    if isinstance(x, bool):
+        return x
+    return str(x).strip().lower() in ("1", "true", "on", "yes", "y", "enabled")
+
+
+class ModbusTcpClient:
+    """Minimal persistent Modbus/TCP client (function code 3, holding registers)."""
+
+    def __init__(self, host: str, port: int = 502, timeout: float = 2.0):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self._tx_id = 0
+        self._sock: Optional[socket.socket] = None
+        self._lock = threading.Lock()
+
+    def connect(self) -> None:
+        self.close()
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        sock.settimeout(self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._sock = sock
+
+    def close(self) -> None:
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            except OSError:
+                pass
+            self._sock = None
+
+    @property
+    def connected(self) -> bool:
+        return self._sock is not None
+
+    def _recv_exact(self, size: int) -> bytes:
+        assert self._sock is not None
+        buf = bytearray()
+        while len(buf) < size:
+            chunk = self._sock.recv(size - len(buf))
+            if not chunk:
+                raise ModbusError("connection closed while receiving")
+            buf += chunk
+        return bytes(buf)
+
+    def read_holding(self, unit: int, address: int, quantity: int) -> List[int]:
+        if quantity <= 0 or quantity > MAX_REGISTERS_PER_READ:
+            raise ValueError(f"quantity must be 1..{MAX_REGISTERS_PER_READ}")
+        with self._lock:
+            if self._sock is None:
+                self.connect()
+            self._tx_id = (self._tx_id + 1) & 0xFFFF
+            tx_id = self._tx_id
+            pdu = struct.pack(">BHH", 3, address, quantity)
+            try:
+                self._sock.sendall(struct.pack(">HHHB", tx_id, 0, len(pdu) + 1, unit) + pdu)
+                rx_tx_id, proto_id, length, rx_unit = struct.unpack(">HHHB", self._recv_exact(7))
+                payload = self._recv_exact(length - 1)
+            except (OSError, ModbusError) as exc:
+                self.close()
+                raise ModbusError(str(exc)) from exc
+        if rx_tx_id != tx_id or proto_id != 0 or rx_unit != unit:
+            self.close()
+            raise ModbusError(f"unexpected response header tx={rx_tx_id} unit={rx_unit}")
+        if payload[0] == 0x83:
+            raise ModbusError(f"modbus exception code={payload[1] if len(payload) > 1 else -1}")
+        if payload[0] != 3 or payload[1] != quantity * 2 or len(payload) != 2 + quantity * 2:
+            raise ModbusError("malformed read response")
+        return list(struct.unpack(f">{quantity}H", payload[2:]))
+
+
+def walk_sunspec(client: ModbusTcpClient, unit: int) -> Dict[int, Tuple[int, int]]:
+    """{model_id: (body_start, body_len)} for the first occurrence of each model."""
+
+    def read(addr: int, qty: int) -> Optional[List[int]]:
+        try:
+            return client.read_holding(unit, addr, qty)
+        except ModbusError:
+            # Exception-Antwort = Adresse nicht belegt; Verbindungsfehler dagegen weiterreichen
+            if not client.connected:
+                raise
+            return None
+
+    return sunspec.walk(read, SUNSPEC_BASES)
+
+
+def plan_reads(spans: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Merges (start, length) spans (small gaps included) and splits them into <=125 register requests."""
+    merged: List[List[int]] = []
+    for start, length in sorted(spans):
+        end = start + length
+        if merged and start - merged[-1][1] <= MERGE_GAP:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    reads = []
+    for start, end in merged:
+        pos = start
+        while pos < end:
+            qty = min(MAX_REGISTERS_PER_READ, end - pos)
+            reads.append((pos, qty))
+            pos += qty
+    return reads
+
+
+def read_spans(client: ModbusTcpClient, unit: int, spans: List[Tuple[int, int]]) -> Dict[int, int]:
+    regs: Dict[int, int] = {}
+    for start, qty in plan_reads(spans):
+        for i, v in enumerate(client.read_holding(unit, start, qty)):
+            regs[start + i] = v
+    return regs
+
+
+def _block(regs: Dict[int, int], start: int, length: int) -> List[int]:
+    return [regs.get(start + i, 0) for i in range(length)]
+
+
+def decode_inverter(body: List[int], model_id: int = 103) -> dict:
+    """Models 101-103 / 111-113: AC W and DC W."""
+    data = sunspec.decode(model_id, body) or {}
+    out = {}
+    if data.get("W") is not None:
+        out["ac_power"] = data["W"] / 1000.0
+    if data.get("DCW") is not None:
+        out["dc_power"] = data["DCW"] / 1000.0
+    return out
+
+
+def decode_mppt(body: List[int]) -> dict:
+    """Model 160: PV modules summed; Fronius storage modules (StCha/StDisCha) as battery."""
+    data = sunspec.decode(MPPT_MODEL, body)
+    if not data:
+        return {}
+    pv = 0.0
+    charge = discharge = 0.0
+    have_pv = have_bat = False
+    for mod in data.get("modules") or []:
+        w = mod.get("DCW")
+        if w is None:
+            continue
+        name = mod.get("IDStr") or ""
+        if name.startswith("StDisCha"):
+            discharge += w
+            have_bat = True
+        elif name.startswith("StCha"):
+            charge += w
+            have_bat = True
+        else:
+            pv += w
+            have_pv = True
+    out = {}
+    if have_pv:
+        out["pv_production"] = pv / 1000.0
+    if have_bat:
+        out["battery_discharge"] = (discharge - charge) / 1000.0
+    return out
+
+
+def decode_storage(body: List[int]) -> dict:
+    """Model 124: WChaMax as storage capacity indicator (0 = no battery)."""
+    w = (sunspec.decode(STORAGE_MODEL, body) or {}).get("WChaMax")
+    return {"storage_max_charge_w": float(w or 0.0)}
+
+
+def decode_meter(body: List[int], model_id: int = 203, *, import_positive: bool = True) -> dict:
+    """Models 201-204 / 211-214: total W."""
+    w = (sunspec.decode(model_id, body) or {}).get("W")
+    if w is None:
+        return {}
+    kw = w / 1000.0
+    if not import_positive:
+        kw = -kw
+    return {"grid_consumption": max(kw, 0.0), "grid_feed_in": max(-kw, 0.0)}
+
+
+class ModbusSource:
+    def __init__(self, host: str, port: int = 502, *, inverter_unit: int = 1, meter_unit: Optional[int] = 200,
+                 interval_s: float = 1.0, timeout_s: float = 2.0, meter_import_positive: bool = True):
+        self.client = ModbusTcpClient(host, port, timeout_s)
+        self.inverter_unit = int(inverter_unit)
+        self.meter_unit = int(meter_unit) if meter_unit not in (None, "", 0) else None
+        self.interval_s = max(0.2, float(interval_s))
+        self.meter_import_positive = meter_import_positive
+        self._models: Dict[int, Dict[int, Tuple[int, int]]] = {}
+        self._snapshot: dict = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.cycles = 0
+        self.last_cycle_s = 0.0
+        self.last_error = ""
+
+    def _discover(self) -> None:
+        self._models = {self.inverter_unit: walk_sunspec(self.client, self.inverter_unit)}
+        if self.meter_unit is not None:
+            try:
+                self._models[self.meter_unit] = walk_sunspec(self.client, self.meter_unit)
+            except ModbusError:
+                if not self.client.connected:
+                    raise
+                self._models[self.meter_unit] = {}
+        print(
+            "[modbus_source] models "
+            + " ".join(f"unit{u}={sorted(m)}" for u, m in self._models.items()),
+            flush=True,
+        )
+
+    def poll_once(self) -> dict:
+        t0 = time.perf_counter()
+        if not self._models or not self.client.connected:
+            self._discover()
+        values: dict = {}
+
+        inv = self._models.get(self.inverter_unit, {})
+        inv_models = [m for m in INVERTER_MODELS if m in inv][:1] + [m for m in (MPPT_MODEL, STORAGE_MODEL) if m in inv]
+        if inv_models:
+            regs = read_spans(self.client, self.inverter_unit, [inv[m] for m in inv_models])
+            for m in inv_models:
+                body = _block(regs, *inv[m])
+                if m == MPPT_MODEL:
+                    values.update(decode_mppt(body))
+                elif m == STORAGE_MODEL:
+                    values.update(decode_storage(body))
+                else:
+                    values.update(decode_inverter(body, m))
+            if "pv_production" not in values and "dc_power" in values:
+                values["pv_production"] = values["dc_power"]
+            values.pop("dc_power", None)
+
+        if self.meter_unit is not None:
+            met = self._models.get(self.meter_unit, {})
+            meter_model = next((m for m in METER_MODELS if m in met), None)
+            if meter_model is not None:
+                regs = read_spans(self.client, self.meter_unit, [met[meter_model]])
+                values.update(decode_meter(
+                    _block(regs, *met[meter_model]), meter_model, import_positive=self.meter_import_positive
+                ))
+
+        now = time.time()
+        with self._lock:
+            snap = dict(self._snapshot)
+            for k, v in values.items():
+                snap[k] = (v, now)
+            self._snapshot = snap
+        self.cycles += 1
+        self.last_cycle_s = time.perf_counter() - t0
+        return values
+
+    def get(self, kind: str, max_age_s: float = STALE_AFTER_S) -> Optional[float]:
+        entry = self._snapshot.get(kind)
+        if not entry or (time.time() - entry[1]) > max_age_s:
+            return None
+        return entry[0]
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {k: v for k, (v, _ts) in self._snapshot.items()}
+
+    def _loop(self) -> None:
+        backoff = RECONNECT_MIN_S
+        while not self._stop.is_set():
+            started = time.monotonic()
+            try:
+                self.poll_once()
+                backoff = RECONNECT_MIN_S
+                self.last_error = ""
+                wait = self.interval_s - (time.monotonic() - started)
+            except (ModbusError, OSError) as e:
+                if str(e) != self.last_error:
+                    print(f"[modbus_source] poll failed: {e}; retry in {backoff:.0f}s", flush=True)
+                self.last_error = str(e)
+                self.client.close()
+                self._models = {}
+                wait = backoff
+                backoff = min(backoff * 2, RECONNECT_MAX_S)
+            self._stop.wait(max(0.0, wait))
+        self.client.close()
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="modbus-source", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+
+# ----------------------------------------------------------------------------------
+# Modul-Instanz (aus Settings konfiguriert)
+# ----------------------------------------------------------------------------------
+_SOURCE: Optional[ModbusSource] = None
+
+
+def is_enabled() -> bool:
+    return _truthy(set_get("modbus_source_enabled", False), False) and bool(str(set_get("modbus_source_host", "") or "").strip())
+
+
+def start_from_settings() -> Optional[ModbusSource]:
+    """Starts the poller if modbus_source_enabled + modbus_source_host are set; no-op otherwise."""
+    global _SOURCE
+    if _SOURCE is not None or not is_enabled():
+        return _SOURCE
+    meter_unit = set_get("modbus_source_meter_unit", 200)
+    _SOURCE = ModbusSource(
+        str(set_get("modbus_source_host", "")).strip(),
+        int(_num(set_get("modbus_source_port", 502), 502)),
+        inverter_unit=int(_num(set_get("modbus_source_inverter_unit", 1), 1)),
+        meter_unit=None if meter_unit in (None, "") else int(_num(meter_unit, 200)),
+        interval_s=_num(set_get("modbus_source_interval_s", 1.0), 1.0),
+        meter_import_positive=_truthy(set_get("modbus_source_meter_import_positive", True), True),
+    )
+    _SOURCE.start()
+    print(f"[modbus_source] polling {_SOURCE.client.host}:{_SOURCE.client.port}", flush=True)
+    return _SOURCE
+
+
+def entity_id(kind: str) -> str:
+    return ENTITY_PREFIX + kind
+
+
+def get_value(kind: str) -> Optional[float]:
+    return _SOURCE.get(kind) if _SOURCE is not None else None
+
+
+def storage_present() -> bool:
+    """True if the inverter's model 124 currently reports a non-zero WChaMax."""
+    return (get_value("storage_max_charge_w") or 0.0) > 0.0
+
+
+def get_entity_value(entity_id_: str) -> Optional[float]:
+    """Value for a "modbus:<kind>" id, or None when unknown/stale."""
+    if not entity_id_.startswith(ENTITY_PREFIX):
+        return None
+    return get_value(entity_id_[len(ENTITY_PREFIX):])
+
+
+def fresh_entity_id(kind: str) -> str:
+    """"modbus:<kind>" if the poller currently has a fresh value for kind, else ""."""
+    return entity_id(kind) if get_value(kind) is not None else ""
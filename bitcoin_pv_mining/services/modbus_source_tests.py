@@ -0,0 +1,131 @@
+import socketserver
+import struct
+import threading
+import unittest
+from unittest.mock import patch
+
+from bitcoin_pv_mining.services import modbus_source
+
+
+def _ascii_regs(text, n):
+    raw = text.encode("ascii").ljust(n * 2, b"\x00")
+    return list(struct.unpack(f">{n}H", raw))
+
+
+def _sunspec_map(models):
+    """[(model_id, body)] -> {address: value} starting at 40000."""
+    regs = [0x5375, 0x6E53]
+    for model_id, body in models:
+        regs += [model_id, len(body)] + body
+    regs += [0xFFFF, 0]
+    return {40000 + i: v for i, v in enumerate(regs)}
+
+
+def _inverter_map(storage_w=None):
+    m103 = [0] * 50
+    m103[12], m103[13] = 5000, 0          # AC W
+    m103[29], m103[30] = 5200, 0          # DC W
+    m160 = [0] * (8 + 3 * 20)
+    m160[2] = 0                            # DCW_SF
+    m160[6] = 3                            # N modules
+    for i, (name, w) in enumerate((("String 1", 3000), ("StCha 3", 500), ("StDisCha 4", 0))):
+        off = 8 + i * 20
+        m160[off] = i + 1
+        m160[off + 1:off + 9] = _ascii_regs(name, 8)
+        m160[off + 11] = w
+    models = [(1, [0] * 66), (103, m103), (160, m160)]
+    if storage_w is not None:
+        m124 = [0] * 24
+        m124[0] = storage_w                # WChaMax (SF 0)
+        models.append((124, m124))
+    return _sunspec_map(models)
+
+
+def _meter_map(watts):
+    m203 = [0] * 105
+    m203[16] = watts & 0xFFFF              # total W (int16)
+    m203[20] = 0                           # W_SF
+    return _sunspec_map([(1, [0] * 65), (203, m203)])
+
+
+class _ModbusStandIn(socketserver.BaseRequestHandler):
+    units = {}
+    requests = []
+
+    def handle(self):
+        sock = self.request
+        while True:
+            header = sock.recv(7)
+            if len(header) < 7:
+                return
+            tx_id, _proto, length, unit = struct.unpack(">HHHB", header)
+            fc, addr, qty = struct.unpack(">BHH", sock.recv(length - 1))
+            self.requests.append((unit, addr, qty))
+            regs = self.units.get(unit, {})
+            if fc != 3 or qty > 125 or unit not in self.units or addr not in regs:
+                pdu = struct.pack(">BB", fc | 0x80, 2)
+            else:
+                values = [regs.get(addr + i, 0) for i in range(qty)]
+                pdu = struct.pack(f">BB{qty}H", fc, qty * 2, *values)
+            sock.sendall(struct.pack(">HHHB", tx_id, 0, len(pdu) + 1, unit) + pdu)
+
+
+class ModbusSourceTests(unittest.TestCase):
+    def setUp(self):
+        _ModbusStandIn.units = {1: _inverter_map(), 200: _meter_map(-1500)}
+        _ModbusStandIn.requests = []
+        self.server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), _ModbusStandIn)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.source = modbus_source.ModbusSource("127.0.0.1", self.server.server_address[1])
+        self.addCleanup(self.source.client.close)
+
+    def test_decodes_inverter_mppt_and_meter(self):
+        values = self.source.poll_once()
+        self.assertAlmostEqual(values["ac_power"], 5.0)
+        self.assertAlmostEqual(values["pv_production"], 3.0)
+        self.assertAlmostEqual(values["battery_discharge"], -0.5)
+        self.assertAlmostEqual(values["grid_feed_in"], 1.5)
+        self.assertEqual(values["grid_consumption"], 0.0)
+
+    def test_cycle_uses_batched_reads_over_one_connection(self):
+        self.source.poll_once()
+        _ModbusStandIn.requests.clear()
+        _ModbusStandIn.units[200] = _meter_map(2500)
+
+        values = self.source.poll_once()
+
+        self.assertEqual([(u, q <= 125) for u, _a, q in _ModbusStandIn.requests], [(1, True), (200, True)])
+        self.assertAlmostEqual(values["grid_consumption"], 2.5)
+        self.assertEqual(values["grid_feed_in"], 0.0)
+
+    def test_storage_model_tells_whether_a_battery_is_installed(self):
+        self.assertNotIn("storage_max_charge_w", self.source.poll_once())
+        with patch.object(modbus_source, "_SOURCE", self.source):
+            self.assertFalse(modbus_source.storage_present())
+
+            _ModbusStandIn.units[1] = _inverter_map(storage_w=0)
+            self.source._models = {}
+            self.assertEqual(self.source.poll_once()["storage_max_charge_w"], 0.0)
+            self.assertFalse(modbus_source.storage_present())
+
+            _ModbusStandIn.units[1] = _inverter_map(storage_w=5000)
+            self.source._models = {}
+            self.assertEqual(self.source.poll_once()["storage_max_charge_w"], 5000.0)
+            self.assertTrue(modbus_source.storage_present())
+
+    def test_stale_values_are_not_served(self):
+        self.source.poll_once()
+        self.assertIsNotNone(self.source.get("pv_production"))
+        self.assertIsNone(self.source.get("pv_production", max_age_s=-1))
+
+    def test_plan_reads_merges_gaps_and_splits(self):
+        self.assertEqual(modbus_source.plan_reads([(100, 50), (152, 68)]), [(100, 120)])
+        self.assertEqual(modbus_source.plan_reads([(0, 200)]), [(0, 125), (125, 75)])
+        self.assertEqual(modbus_source.plan_reads([(0, 10), (100, 10)]), [(0, 10), (100, 10)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -4,17 +4,23 @@ from __future__ import annotations
 from typing import Callable, Dict, List, Optional, Tuple
 
 from services.consumers.base import Ctx, Desire, BaseConsumer, now
-from services.consumers.registry import get_consumer_for_id
+from services.consumers import registry as consumer_registry
 
 import os
-from services.utils import load_yaml
+from services.utils import load_yaml, ADDON_CONFIG_DIR
 from services.ha_sensors import get_sensor_value
+from services.ha_entities import batch_actions
 from services.settings_store import get_var as set_get
 from services.electricity_store import current_price as elec_price, get_var as elec_get
 from services.energy_mix import surplus_strict_kw as _surplus_strict_kw, incremental_mix_for, read_energy_flows
 from services.export_cap_boost import try_export_cap_boost
 from services.pv_ramp_up import evaluate_pv_ramp_up
 from services.sensor_mapping import resolve_sensor_id as resolve_runtime_sensor_id
+from services import runtime_db
+from services import fast_loop
+from services import safety_watchdog
+from services import start_sequencer
+from services import economic_order
 
 # stdout logger -> Add-on-Log
 def _stdout_logger(msg: str):
@@ -25,7 +31,7 @@ def _stdout_logger(msg: str):
 
 Number = float
 
-CONFIG_DIR = "/config/pv_mining_addon"
+CONFIG_DIR = ADDON_CONFIG_DIR
 SENS_DEF = os.path.join(CONFIG_DIR, "sensors.yaml")
 SENS_OVR = os.path.join(CONFIG_DIR, "sensors.local.yaml")
 
@@ -154,9 +160,10 @@ def _controllable_now_kw() -> float:
     # Miner (diskret)
     try:
         from services.miners_store import list_miners
+        from services.miner_api import effective_power_kw
         for m in (list_miners() or []):
             if bool(m.get("effective_on", m.get("on"))):
-                now_kw += _f(m.get("power_kw"), 0.0)
+                now_kw += effective_power_kw(m)   # gemessen, sonst nominal
     except Exception:
         pass
 
@@ -246,7 +253,8 @@ def _cooling_has_dependent_miner(
         if bool(miner.get("effective_on", miner.get("on"))):
             return True
 
-        req = desire.exact_kw if getattr(desire, "exact_kw", None) is not None else max(desire.min_kw or 0.0, desire.max_kw or 0.0)
+        # variable Miner starten ab min_kw
+        req = desire.exact_kw if desire.exact_kw is not None else (desire.min_kw or desire.max_kw)
         req = max(0.0, float(req or 0.0))
         if not bool(desire.wants) or req <= 0.0:
             continue
@@ -266,11 +274,23 @@ def _allocate_discrete_load(
     grid_free: bool,
     battery_block: bool,
     now_ts: float,
+    grid_cap_left: float = float("inf"),
 ) -> tuple[float, float, float, str]:
     meta = _discrete_runtime_meta(cid) or {}
     req = desire.exact_kw if desire.exact_kw is not None else max(desire.min_kw or 0.0, desire.max_kw or 0.0)
     req = max(0.0, float(req or 0.0))
 
+    # Variable Leistung (min..max ohne exact): schalten ab min_kw, darüber stufenlos bis max_kw
+    min_kw = max(0.0, float(desire.min_kw or 0.0))
+    variable = desire.exact_kw is None and 0.0 < min_kw < req
+
+    max_kw = req
+    if variable:
+        req = min_kw
+
+    def _span(budget: float) -> float:
+        return min(max_kw, max(min_kw, budget)) if variable else req
+
     actual_on = bool(meta.get("actual_on"))
     last_flip_ts = _f(meta.get("last_flip_ts"), 0.0)
     nominal_kw = max(0.0, _f(meta.get("nominal_kw"), 0.0))
@@ -286,13 +306,13 @@ def _allocate_discrete_load(
     if battery_block:
         if locked_on:
             decision_reason = f"battery-backed min-run lock {max(0, int(min_run_s - elapsed))}s"
-            alloc_total = max(req, nominal_kw)
+            alloc_total = req if variable else max(req, nominal_kw)
         else:
             decision_reason = "battery discharge block"
             alloc_total = 0.0
     elif locked_on:
         decision_reason = f"min-run lock {max(0, int(min_run_s - elapsed))}s"
-        alloc_total = max(req, nominal_kw)
+        alloc_total = _span(pv_left) if variable else max(req, nominal_kw)
     elif locked_off:
         decision_reason = f"min-off lock {max(0, int(min_off_s - elapsed))}s"
         alloc_total = 0.0
@@ -301,10 +321,10 @@ def _allocate_discrete_load(
         alloc_total = 0.0
     elif grid_free:
         decision_reason = "negative grid price"
-        alloc_total = req
+        alloc_total = _span(pv_left + grid_cap_left)
     elif pv_left + 1e-9 >= req:
         decision_reason = "pv budget available"
-        alloc_total = req
+        alloc_total = _span(pv_left)
     else:
         decision_reason = "insufficient pv budget"
         alloc_total = 0.0
@@ -354,6 +374,40 @@ def _cooling_active_need_now() -> bool:
         return False
 
 
+def _record_tick(
+    ts: float,
+    facts: dict,
+    collected: List[Tuple[str, BaseConsumer, Desire]],
+    allocations: List[Tuple[str, BaseConsumer, float]],
+    log_fn: Callable[[str], None],
+) -> None:
+    """Persists one applied tick (facts + per-consumer decisions) into runtime_db."""
+    try:
+        desires = {cid: de for cid, _cons, de in collected}
+        decisions = []
+        for cid, _cons, alloc in allocations:
+            de = desires.get(cid) or Desire(False, 0.0, 0.0)
+            decisions.append({
+                "device_id": cid,
+                "wants": bool(de.wants),
+                "min_kw": de.min_kw,
+                "max_kw": de.max_kw,
+                "alloc_kw": alloc,
+                "reason": de.reason,
+            })
+        runtime_db.record_tick(facts, decisions, ts=ts)
+        runtime_db.add_energy_samples({
+            "pv_kw": facts.get("pv_kw"),
+            "import_kw": facts.get("import_kw"),
+            "feed_kw": facts.get("feed_kw"),
+            "surplus_kw": facts.get("surplus_kw"),
+            "battery_discharge_kw": facts.get("battery_discharge_kw"),
+        }, ts=ts)
+        runtime_db.purge_if_due(_f(set_get("runtime_db_retention_days", 90), 90.0), now=ts)
+    except Exception as e:
+        log_fn(f"[plan] runtime_db record failed: {e}")
+
+
 def _sanitize_priority_order(order: List[str]) -> List[str]:
     """
     Cooling is no longer a standalone planner item. It is handled implicitly
@@ -383,15 +437,27 @@ def plan_and_allocate(
     log_fn = (logger or _stdout_logger) if log else (lambda *_: None)
     order = _sanitize_priority_order(order)
 
-    # Consumer-Map
+    # Consumer-Map: übergebene Consumer, sonst die langlebigen Instanzen der Registry
     cons_map: Dict[str, BaseConsumer] = consumers.copy() if consumers else {}
+    started: List[BaseConsumer] = []
+    try:
+        consumer_registry.refresh()
+    except Exception as e:
+        log_fn(f"[plan] consumer registry refresh failed: {e}")
 
     def _get_cons(cid: str) -> Optional[BaseConsumer]:
-        if cid in cons_map:
-            return cons_map[cid]
-        c = get_consumer_for_id(cid)
-        if c:
+        c = cons_map.get(cid)
+        if c is None:
+            c = consumer_registry.get_consumer(cid)
+            if c is None:
+                return None
             cons_map[cid] = c
+        if not any(c is s for s in started):
+            started.append(c)
+            try:
+                c.on_tick_start(ctx)
+            except Exception as e:
+                log_fn(f"[plan] error: on_tick_start({cid}) -> {e}")
         return c
 
     # Strikter Überschuss + Guard anwenden
@@ -444,8 +510,11 @@ def plan_and_allocate(
     pv_left: float = max(0.0, measured_surplus_kw + _f(pv_ramp.get("stable_bonus_kw"), 0.0))
     grid_draw: float = 0.0
     allocations: List[Tuple[str, BaseConsumer, float]] = []
+    fast_budgets: Dict[str, Tuple[float, float, float]] = {}   # Fenster für services.fast_loop
 
-    eff_grid_cost = _f(elec_price(), 0.0) + _f(elec_get("network_fee_down_value", 0.0), 0.0)
+    grid_price = _f(elec_price(), 0.0)
+    fee_down = _f(elec_get("network_fee_down_value", 0.0), 0.0)
+    eff_grid_cost = grid_price + fee_down
     grid_free = (eff_grid_cost <= 0.0)
     max_grid_import_kw = max(0.0, _f(set_get("max_grid_import_kw", 14.0), 14.0))
     pv_supply_for_cap_kw = max(0.0, pv_kw + _f(pv_ramp.get("stable_bonus_kw"), 0.0))
@@ -454,51 +523,41 @@ def plan_and_allocate(
     grid_cap_for_controls_kw = max(0.0, max_grid_import_kw - measured_import_kw)
     grid_import_emergency = (not grid_free) and (measured_import_kw >= max(0.0, max_grid_import_kw - 0.05))
 
-    # expose planner facts to consumers
-    for k, v in (
-            ("surplus_kw", pv_left),  # PV-Überschuss nach Guard / Ramp-Up
-            ("surplus_measured_kw", measured_surplus_kw),
-            ("surplus_effective_kw", pv_left),
-            ("grid_cost_eur_kwh", eff_grid_cost),  # effektiver Grid-preis (incl. fee_down)
-            ("pv_kw_raw", pv_kw),  # (optional) aktuelle PV-Produktion
-            ("surplus_raw_kw", surplus_raw),  # (optional) Überschuss vor Guard
-            ("pv_ramp_bonus_kw", _f(pv_ramp.get("stable_bonus_kw"), 0.0)),
-            ("pv_ramp_probe_offset_kw", _f(pv_ramp.get("probe_offset_kw"), 0.0)),
-            ("pv_ramp_candidate_kw", _f(pv_ramp.get("candidate_bonus_kw"), 0.0)),
-            ("battery_discharge_kw", battery_discharge_kw),
-            ("battery_support_kw", battery_support_kw),
-            ("battery_block", battery_block),
-            ("grid_import_measured_kw", measured_import_kw),
-            ("grid_import_cap_kw", max_grid_import_kw),
-            ("grid_import_emergency_off", grid_import_emergency),
-    ):
-        # robust für Ctx als Objekt ODER Mapping
-        try:
-            setattr(ctx, k, v)
-        except Exception:
-            pass
+    # Planner-Fakten für die Consumer
+    ctx.surplus_kw = pv_left                      # PV-Überschuss nach Guard / Ramp-Up
+    ctx.surplus_measured_kw = measured_surplus_kw
+    ctx.surplus_effective_kw = pv_left
+    ctx.surplus_raw_kw = surplus_raw              # Überschuss vor Guard
+    ctx.guard_kw = guard_kw
+    ctx.pv_kw_raw = pv_kw
+    ctx.grid_price_eur_kwh = grid_price
+    ctx.fee_down_eur_kwh = fee_down
+    ctx.grid_cost_eur_kwh = eff_grid_cost         # effektiver Grid-Preis (incl. fee_down)
+    ctx.pv_ramp_bonus_kw = _f(pv_ramp.get("stable_bonus_kw"), 0.0)
+    ctx.pv_ramp_probe_offset_kw = _f(pv_ramp.get("probe_offset_kw"), 0.0)
+    ctx.pv_ramp_candidate_kw = _f(pv_ramp.get("candidate_bonus_kw"), 0.0)
+    ctx.battery_discharge_kw = battery_discharge_kw
+    ctx.battery_support_kw = battery_support_kw
+    ctx.battery_block = battery_block
+    ctx.grid_import_measured_kw = measured_import_kw
+    ctx.grid_import_cap_kw = max_grid_import_kw
+    ctx.grid_import_emergency_off = grid_import_emergency
+
+    # Optional: Reihenfolge nach Grenzwert (EUR/kWh) statt manueller Liste
+    priority = {"mode": "manual", "order": list(order), "values": {}}
+    if economic_order.is_enabled():
         try:
-            ctx[k] = v
-        except Exception:
-            pass
-
-    # Ctx anreichern, damit Consumer zugreifen können
-    try:
-        ctx["surplus_kw"] = pv_left  # strikter PV-Überschuss nach Guard / Ramp-Up
-        ctx["surplus_measured_kw"] = measured_surplus_kw
-        ctx["surplus_effective_kw"] = pv_left
-        ctx["grid_cost_eur_kwh"] = eff_grid_cost
-        ctx["pv_ramp_bonus_kw"] = _f(pv_ramp.get("stable_bonus_kw"), 0.0)
-        ctx["pv_ramp_probe_offset_kw"] = _f(pv_ramp.get("probe_offset_kw"), 0.0)
-        ctx["pv_ramp_candidate_kw"] = _f(pv_ramp.get("candidate_bonus_kw"), 0.0)
-        ctx["battery_discharge_kw"] = battery_discharge_kw
-        ctx["battery_support_kw"] = battery_support_kw
-        ctx["battery_block"] = battery_block
-        ctx["grid_import_measured_kw"] = measured_import_kw
-        ctx["grid_import_cap_kw"] = max_grid_import_kw
-        ctx["grid_import_emergency_off"] = grid_import_emergency
-    except Exception:
-        pass
+            values = economic_order.marginal_values(order, eff_grid_cost)
+            order = economic_order.sort_order(order, values)
+            priority = {
+                "mode": "economic",
+                "order": list(order),
+                "values": {cid: {"eur_kwh": v, "source": src} for cid, (v, src) in values.items()},
+            }
+            log_fn("[plan:economic] " + "  ".join(f"{cid}={v:.3f}({src})" for cid, (v, src) in
+                                                   sorted(values.items(), key=lambda kv: -kv[1][0])))
+        except Exception as e:
+            log_fn(f"[plan:economic] failed, keeping manual order: {e}")
 
     log_fn(f"[plan] grid_cost={eff_grid_cost:.4f} €/kWh -> grid_free={grid_free}")
     log_fn(
@@ -560,9 +619,9 @@ def plan_and_allocate(
         wants = bool(desire.wants)
         min_kw = max(desire.min_kw or 0.0, 0.0)
         max_kw = max(desire.max_kw or 0.0, 0.0)
-        exact = getattr(desire, "exact_kw", None)
-        must = bool(getattr(desire, "must_run", False))
-        reason = getattr(desire, "reason", "")
+        exact = desire.exact_kw
+        must = bool(desire.must_run)
+        reason = desire.reason
 
         log_fn(f"[plan:desire] {cid}: wants={wants} min={min_kw:.2f} max={max_kw:.2f} must={must} reason={reason}")
         collected.append((cid, cons, desire))
@@ -571,7 +630,7 @@ def plan_and_allocate(
         for cid, _cons, de in collected:
             if cid != "battery" or not bool(de.wants):
                 continue
-            desired_kw = de.exact_kw if getattr(de, "exact_kw", None) is not None else max(de.min_kw or 0.0, de.max_kw or 0.0)
+            desired_kw = de.exact_kw if de.exact_kw is not None else max(de.min_kw or 0.0, de.max_kw or 0.0)
             battery_grid_reserve_kw = max(0.0, float(desired_kw or 0.0))
             break
     grid_cap_for_controls_kw = max(0.0, max_grid_import_kw - measured_import_kw - battery_grid_reserve_kw)
@@ -580,9 +639,31 @@ def plan_and_allocate(
         f"(battery reserve applied={battery_grid_reserve_kw:.3f} kW)"
     )
 
-    now_ts = _f(getattr(ctx, "ts", 0.0), 0.0) or now()
-    hard_must_runs = [(cid, cons, de) for (cid, cons, de) in collected if cid == "house" and bool(getattr(de, "must_run", False))]
-    remaining = [(cid, cons, de) for (cid, cons, de) in collected if not (cid == "house" and bool(getattr(de, "must_run", False)))]
+    now_ts = _f(ctx.ts, 0.0) or now()
+
+    # Soft-Start: Miner-Starts in Wellen; unbestätigte Wellenleistung gegen den Cap reservieren
+    soft_start = None
+    soft_start_planned: set = set()       # Wellenmitglieder, die in diesem Tick schon im grid_draw stehen
+    if apply and not dry_run and start_sequencer.is_enabled():
+        soft_start = start_sequencer.get_sequencer()
+        feedback = {}
+        if soft_start.members():
+            from services.miners_store import list_miners
+            feedback = {f"miner:{m.get('id')}": m.get("ha_on") for m in (list_miners() or [])}
+        released = soft_start.begin_tick(now_ts, import_kw - feed_kw, feedback)
+        if released and released != "waiting":
+            log_fn(f"[plan:soft_start] released {soft_start.last_release}")
+        pending_start_kw = soft_start.pending_kw()
+        if pending_start_kw > 0.0:
+            log_fn(f"[plan:soft_start] wave pending {pending_start_kw:.3f} kW reserved against controls_cap")
+
+    def _soft_start_reserve_kw(cid: str) -> float:
+        if soft_start is None:
+            return 0.0
+        return soft_start.pending_kw(exclude=soft_start_planned | {cid})
+
+    hard_must_runs = [(cid, cons, de) for (cid, cons, de) in collected if cid == "house" and bool(de.must_run)]
+    remaining = [(cid, cons, de) for (cid, cons, de) in collected if not (cid == "house" and bool(de.must_run))]
     locked_running = []
     priority_remaining = []
     for cid, cons, de in remaining:
@@ -595,7 +676,7 @@ def plan_and_allocate(
 
     # ---------- 1) HARTE MUST-RUNS (nur Hauslast) ----------
     for cid, cons, de in hard_must_runs:
-        req = de.exact_kw if (getattr(de, "exact_kw", None) is not None) else max(de.min_kw or 0.0, de.max_kw or 0.0)
+        req = de.exact_kw if (de.exact_kw is not None) else max(de.min_kw or 0.0, de.max_kw or 0.0)
         req = max(0.0, float(req or 0.0))
 
         if req <= 0.0 or not bool(de.wants):
@@ -611,7 +692,7 @@ def plan_and_allocate(
         pv_alloc = min(pv_left, req)
         pv_left = max(0.0, pv_left - pv_alloc)
         grid_part = max(0.0, req - pv_alloc)
-        grid_cap_left = max(0.0, grid_cap_for_controls_kw - grid_draw)
+        grid_cap_left = max(0.0, grid_cap_for_controls_kw - grid_draw - _soft_start_reserve_kw(cid))
         if grid_part > grid_cap_left + 1e-9:
             pv_left += pv_alloc
             allocations.append((cid, cons, 0.0))
@@ -638,16 +719,16 @@ def plan_and_allocate(
                 log_fn(f"[plan] must_run apply error for {cid}: {e}")
 
         log_fn(
-            f"[DRY] {cid:12s} wants={bool(de.wants)} min={_fmt(de.min_kw)} max={_fmt(de.max_kw)} exact={_fmt(getattr(de, 'exact_kw', None))} must=True -> alloc={req:.3f} (pv={pv_alloc:.3f}, grid={grid_part:.3f}) | {getattr(de, 'reason', '')}")
+            f"[DRY] {cid:12s} wants={bool(de.wants)} min={_fmt(de.min_kw)} max={_fmt(de.max_kw)} exact={_fmt(de.exact_kw)} must=True -> alloc={req:.3f} (pv={pv_alloc:.3f}, grid={grid_part:.3f}) | {de.reason}")
 
     # ---------- 2) ÜBRIGE LASTEN PRIORISIERT ----------
     for cid, cons, de in remaining:
         wants = bool(de.wants)
         min_kw = max(de.min_kw or 0.0, 0.0)
         max_kw = max(de.max_kw or 0.0, 0.0)
-        exact = getattr(de, "exact_kw", None)
-        must = bool(getattr(de, "must_run", False))  # hier idR False
-        reason = getattr(de, "reason", "")
+        exact = de.exact_kw
+        must = bool(de.must_run)  # hier idR False
+        reason = de.reason
 
         pv_alloc = 0.0
         grid_alloc = 0.0
@@ -684,7 +765,7 @@ def plan_and_allocate(
         discrete_meta = _discrete_runtime_meta(cid)
 
         if discrete_meta:
-            grid_cap_left = max(0.0, grid_cap_for_controls_kw - grid_draw)
+            grid_cap_left = max(0.0, grid_cap_for_controls_kw - grid_draw - _soft_start_reserve_kw(cid))
             if grid_import_emergency and cid.startswith("miner:"):
                 alloc_total = 0.0
                 pv_alloc = 0.0
@@ -698,18 +779,29 @@ def plan_and_allocate(
                     grid_free=grid_free,
                     battery_block=battery_block and cid != "house",
                     now_ts=now_ts,
+                    grid_cap_left=grid_cap_left,
                 )
             if grid_alloc > grid_cap_left + 1e-9:
                 alloc_total = 0.0
                 pv_alloc = 0.0
                 grid_alloc = 0.0
                 policy_reason = f"{policy_reason} | grid import cap"
+            if (soft_start is not None and alloc_total > 0.0 and cid.startswith("miner:")
+                    and not bool(discrete_meta.get("actual_on"))):
+                admitted, start_reason = soft_start.admit(cid, alloc_total)
+                if not admitted:
+                    alloc_total = 0.0
+                    pv_alloc = 0.0
+                    grid_alloc = 0.0
+                policy_reason = f"{policy_reason} | {start_reason}"
+            if soft_start is not None and alloc_total > 0.0 and cid in soft_start.members():
+                soft_start_planned.add(cid)
             pv_left = max(0.0, pv_left - pv_alloc)
             if grid_alloc > 0.0:
                 grid_draw += grid_alloc
             reason = f"{reason} | {policy_reason}" if reason else policy_reason
         else:
-            grid_cap_left = max(0.0, grid_cap_for_controls_kw - grid_draw)
+            grid_cap_left = max(0.0, grid_cap_for_controls_kw - grid_draw - _soft_start_reserve_kw(cid))
             if battery_block and cid != "house":
                 alloc_total = 0.0
                 reason = f"{reason} | battery discharge block" if reason else "battery discharge block"
@@ -739,6 +831,8 @@ def plan_and_allocate(
                     pv_left -= pv_alloc
                     grid_alloc = 0.0
                     alloc_total = pv_alloc
+            if alloc_total > 0.0 and hasattr(cons, "apply_fast"):
+                fast_budgets[cid] = (alloc_total, min_kw, max_kw)
 
         log_fn(
             f"[plan:alloc]  {cid}: pv={pv_alloc:.2f} grid={grid_alloc:.2f} total={alloc_total:.2f} pv_left={pv_left:.2f}")
@@ -766,8 +860,37 @@ def plan_and_allocate(
                 except Exception as e:
                     log_fn(f"[plan] error: cooling cleanup OFF -> {e}")
 
+    if apply and not dry_run:
+        fast_loop.set_budgets(fast_budgets, planned_import_kw=grid_draw)
+        safety_watchdog.invalidate()
+
+    for c in started:
+        try:
+            c.on_tick_end(ctx)
+        except Exception as e:
+            log_fn(f"[plan] error: on_tick_end({getattr(c, 'id', '?')}) -> {e}")
+
+    if apply and not dry_run:
+        _record_tick(
+            now_ts,
+            {
+                "pv_kw": pv_kw,
+                "surplus_kw": measured_surplus_kw,
+                "pv_left_kw": pv_left,
+                "grid_draw_kw": grid_draw,
+                "import_kw": measured_import_kw,
+                "feed_kw": feed_kw,
+                "grid_cap_kw": max_grid_import_kw,
+                "grid_emergency": grid_import_emergency,
+                "battery_block": battery_block,
+                "battery_discharge_kw": battery_discharge_kw,
+            },
+            collected,
+            allocations,
+            log_fn,
+        )
 
-    return {"pv_left": pv_left, "grid_draw": grid_draw, "allocations": allocations}
+    return {"pv_left": pv_left, "grid_draw": grid_draw, "allocations": allocations, "priority": priority}
 
 
 # ----------------------------------------------------------------------------------
@@ -799,4 +922,6 @@ def plan_and_allocate_auto(
 ) -> dict:
     ctx = Ctx(ts=now())
     order_eff = order or _discover_priority_order()
-    return plan_and_allocate(ctx=ctx, order=order_eff, consumers=consumers, apply=apply, dry_run=dry_run, log=log, logger=logger)
+    # Einschaltbefehle eines Ticks gehen gebündelt je domain/service raus, Abschaltungen sofort
+    with batch_actions(defer_off=False):
+        return plan_and_allocate(ctx=ctx, order=order_eff, consumers=consumers, apply=apply, dry_run=dry_run, log=log, logger=logger)
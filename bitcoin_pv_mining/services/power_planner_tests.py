@@ -0,0 +1,41 @@
+import unittest
+from unittest.mock import patch
+
+from bitcoin_pv_mining.services import power_planner
+from bitcoin_pv_mining.services.consumers.base import Desire
+
+
+class DiscreteAllocationTests(unittest.TestCase):
+    def setUp(self):
+        self.meta = {"kind": "miner", "actual_on": False, "last_flip_ts": 0.0,
+                     "nominal_kw": 3.4, "min_run_s": 600, "min_off_s": 20}
+        p = patch.object(power_planner, "_discrete_runtime_meta", lambda cid: dict(self.meta))
+        p.start()
+        self.addCleanup(p.stop)
+
+    def _alloc(self, desire, pv_left, *, grid_free=False, grid_cap_left=float("inf")):
+        return power_planner._allocate_discrete_load(
+            cid="miner:m1", desire=desire, pv_left=pv_left, grid_free=grid_free,
+            battery_block=False, now_ts=1000.0, grid_cap_left=grid_cap_left,
+        )
+
+    def test_fixed_miner_needs_its_full_power(self):
+        self.assertEqual(self._alloc(Desire(True, 0.0, 3.4, exact_kw=3.4), 3.0)[0], 0.0)
+
+    def test_variable_miner_takes_what_the_surplus_allows(self):
+        desire = Desire(True, 2.0, 3.4)
+        total, pv, grid, reason = self._alloc(desire, 3.0)
+        self.assertEqual((total, pv, grid, reason), (3.0, 3.0, 0.0, "pv budget available"))
+        self.assertAlmostEqual(self._alloc(desire, 5.0)[0], 3.4)
+        self.assertEqual(self._alloc(desire, 1.5)[0], 0.0)
+        self.assertAlmostEqual(self._alloc(desire, 1.0, grid_free=True, grid_cap_left=1.5)[0], 2.5)
+
+    def test_variable_miner_under_min_run_lock_keeps_at_least_min(self):
+        self.meta.update(actual_on=True, last_flip_ts=900.0)
+        total, pv, grid, reason = self._alloc(Desire(True, 2.0, 3.4), 0.5)
+        self.assertEqual(total, 2.0)
+        self.assertTrue(reason.startswith("min-run lock"))
+
+
+if __name__ == "__main__":
+    unittest.main()
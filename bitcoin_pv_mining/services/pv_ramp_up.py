@@ -5,7 +5,7 @@ from typing import Callable, Dict
 
 from services.ha_sensors import get_sensor_value
 from services.heater_store import get_var as heat_get, resolve_entity_id as heat_resolve
-from services.settings_store import get_var as set_get
+from services.settings_store import get_many as set_get_many
 from services.utils import load_state, update_state
 
 STATE_KEY = "pv_ramp_up"
@@ -182,13 +182,22 @@ def evaluate_pv_ramp_up(
     log_fn = logger or (lambda *_: None)
     now_ts = time.time()
 
-    allow = _truthy(set_get("allow_pv_ramp_up", True), True)
-    cap_kw = max(0.0, _f(set_get("grid_export_cap_kw", 0.0), 0.0))
-    settle_s = max(0, int(_f(set_get("pv_ramp_settle_s", 60), 60)))
-    hysteresis_kw = max(0.0, _f(set_get("pv_ramp_hysteresis_w", 200.0), 200.0) / 1000.0)
-    step_up_kw = max(0.0, _f(set_get("pv_ramp_step_up_kw", 0.40), 0.40))
-    step_down_kw = max(0.0, _f(set_get("pv_ramp_step_down_kw", 0.60), 0.60))
-    eps_kw = max(0.0, _f(set_get("pv_ramp_cap_epsilon_kw", 0.05), 0.05))
+    cfg = set_get_many((
+        "allow_pv_ramp_up",
+        "grid_export_cap_kw",
+        "pv_ramp_settle_s",
+        "pv_ramp_hysteresis_w",
+        "pv_ramp_step_up_kw",
+        "pv_ramp_step_down_kw",
+        "pv_ramp_cap_epsilon_kw",
+    ))
+    allow = _truthy(cfg["allow_pv_ramp_up"], True)
+    cap_kw = max(0.0, _f(cfg["grid_export_cap_kw"], 0.0))
+    settle_s = max(0, int(_f(cfg["pv_ramp_settle_s"], 60)))
+    hysteresis_kw = max(0.0, _f(cfg["pv_ramp_hysteresis_w"], 200.0) / 1000.0)
+    step_up_kw = max(0.0, _f(cfg["pv_ramp_step_up_kw"], 0.40))
+    step_down_kw = max(0.0, _f(cfg["pv_ramp_step_down_kw"], 0.60))
+    eps_kw = max(0.0, _f(cfg["pv_ramp_cap_epsilon_kw"], 0.05))
 
     state, block = _load_block()
     heater = _heater_status()
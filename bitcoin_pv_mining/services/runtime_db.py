@@ -0,0 +1,344 @@
+# services/runtime_db.py
+"""
+Embedded SQLite history for device transitions, planner ticks/decisions and
+the energy time series.
+
+Single connection in WAL mode, guarded by a lock. Writes go through a small
+queue that is flushed with executemany() in one transaction; transitions and
+ticks flush immediately, energy samples are batched (and flushed at exit).
+Rows older than runtime_db_retention_days are purged at most once a day via
+purge_if_due() from the planner tick.
+"""
+from __future__ import annotations
+
+import atexit
+import os
+import sqlite3
+import threading
+import time
+from typing import Iterable, List, Optional, Sequence
+from services.utils import ADDON_CONFIG_DIR
+
+CONFIG_DIR = ADDON_CONFIG_DIR
+DB_PATH = os.path.join(CONFIG_DIR, "runtime.db")
+
+# Energy-Samples werden gesammelt und spätestens nach N Zeilen / T Sekunden geschrieben
+SAMPLE_BATCH_ROWS = 200
+SAMPLE_BATCH_MAX_AGE_S = 60.0
+# Aufräumen alter Zeilen höchstens so oft
+PURGE_INTERVAL_S = 86400.0
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS transitions (
+        id        INTEGER PRIMARY KEY,
+        ts        REAL NOT NULL,
+        device_id TEXT NOT NULL,
+        target_on INTEGER NOT NULL,
+        source    TEXT NOT NULL DEFAULT '',
+        reason    TEXT NOT NULL DEFAULT ''
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_transitions_device_ts ON transitions(device_id, ts)",
+    "CREATE INDEX IF NOT EXISTS ix_transitions_ts ON transitions(ts)",
+    """
+    CREATE TABLE IF NOT EXISTS ticks (
+        id                INTEGER PRIMARY KEY,
+        ts                REAL NOT NULL,
+        pv_kw             REAL,
+        surplus_kw        REAL,
+        pv_left_kw        REAL,
+        grid_draw_kw      REAL,
+        import_kw         REAL,
+        feed_kw           REAL,
+        grid_cap_kw       REAL,
+        grid_emergency    INTEGER NOT NULL DEFAULT 0,
+        battery_block     INTEGER NOT NULL DEFAULT 0
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_ticks_ts ON ticks(ts)",
+    "CREATE INDEX IF NOT EXISTS ix_ticks_emergency ON ticks(grid_emergency, ts)",
+    """
+    CREATE TABLE IF NOT EXISTS decisions (
+        tick_id   INTEGER NOT NULL REFERENCES ticks(id) ON DELETE CASCADE,
+        device_id TEXT NOT NULL,
+        wants     INTEGER NOT NULL DEFAULT 0,
+        min_kw    REAL,
+        max_kw    REAL,
+        alloc_kw  REAL NOT NULL,
+        reason    TEXT NOT NULL DEFAULT ''
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_decisions_tick ON decisions(tick_id)",
+    "CREATE INDEX IF NOT EXISTS ix_decisions_device ON decisions(device_id, tick_id)",
+    """
+    CREATE TABLE IF NOT EXISTS energy_samples (
+        ts     REAL NOT NULL,
+        series TEXT NOT NULL,
+        value  REAL NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_energy_series_ts ON energy_samples(series, ts)",
+)
+
+_SQL_TRANSITION = "INSERT INTO transitions(ts, device_id, target_on, source, reason) VALUES (?, ?, ?, ?, ?)"
+_SQL_TICK = (
+    "INSERT INTO ticks(ts, pv_kw, surplus_kw, pv_left_kw, grid_draw_kw, import_kw, feed_kw, "
+    "grid_cap_kw, grid_emergency, battery_block) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+_SQL_DECISION = (
+    "INSERT INTO decisions(tick_id, device_id, wants, min_kw, max_kw, alloc_kw, reason) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?)"
+)
+_SQL_SAMPLE = "INSERT INTO energy_samples(ts, series, value) VALUES (?, ?, ?)"
+
+_LOCK = threading.RLock()
+_CONN: Optional[sqlite3.Connection] = None
+_SAMPLES: List[tuple] = []
+_SAMPLES_SINCE = 0.0
+_LAST_PURGE = 0.0
+
+
+def _conn() -> sqlite3.Connection:
+    global _CONN
+    if _CONN is None:
+        os.makedirs(os.path.dirname(DB_PATH) or ".", exist_ok=True)
+        conn = sqlite3.connect(DB_PATH, timeout=5.0, check_same_thread=False, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        for stmt in _SCHEMA:
+            conn.execute(stmt)
+        _CONN = conn
+    return _CONN
+
+
+def _f(x) -> Optional[float]:
+    try:
+        return None if x is None else float(x)
+    except (TypeError, ValueError):
+        return None
+
+
+def _flush_samples_locked() -> None:
+    global _SAMPLES_SINCE
+    if not _SAMPLES:
+        return
+    rows = list(_SAMPLES)
+    conn = _conn()
+    conn.execute("BEGIN")
+    try:
+        conn.executemany(_SQL_SAMPLE, rows)
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    _SAMPLES.clear()
+    _SAMPLES_SINCE = 0.0
+
+
+# ----------------------------------------------------------------------------------
+# Writes
+# ----------------------------------------------------------------------------------
+def record_transition(device_id: str, target_on: bool, *, ts: float | None = None, source: str = "", reason: str = "") -> None:
+    row = (float(ts if ts is not None else time.time()), str(device_id), int(bool(target_on)), source or "", reason or "")
+    try:
+        with _LOCK:
+            _conn().execute(_SQL_TRANSITION, row)
+    except Exception as e:
+        print(f"[runtime_db] transition write failed: {e}", flush=True)
+
+
+def record_tick(tick: dict, decisions: Iterable[dict] = (), *, ts: float | None = None) -> Optional[int]:
+    """Stores one planner tick plus its per-device decisions in one transaction."""
+    ts_eff = float(ts if ts is not None else tick.get("ts") or time.time())
+    tick_row = (
+        ts_eff,
+        _f(tick.get("pv_kw")),
+        _f(tick.get("surplus_kw")),
+        _f(tick.get("pv_left_kw")),
+        _f(tick.get("grid_draw_kw")),
+        _f(tick.get("import_kw")),
+        _f(tick.get("feed_kw")),
+        _f(tick.get("grid_cap_kw")),
+        int(bool(tick.get("grid_emergency"))),
+        int(bool(tick.get("battery_block"))),
+    )
+    try:
+        with _LOCK:
+            conn = _conn()
+            conn.execute("BEGIN")
+            try:
+                tick_id = conn.execute(_SQL_TICK, tick_row).lastrowid
+                conn.executemany(
+                    _SQL_DECISION,
+                    [
+                        (
+                            tick_id,
+                            str(d.get("device_id") or ""),
+                            int(bool(d.get("wants"))),
+                            _f(d.get("min_kw")),
+                            _f(d.get("max_kw")),
+                            _f(d.get("alloc_kw")) or 0.0,
+                            str(d.get("reason") or ""),
+                        )
+                        for d in decisions
+                    ],
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            return tick_id
+    except Exception as e:
+        print(f"[runtime_db] tick write failed: {e}", flush=True)
+        return None
+
+
+def add_energy_samples(values: dict, *, ts: float | None = None) -> None:
+    """Queues {series: value}; flushed in batches."""
+    global _SAMPLES_SINCE
+    ts_eff = float(ts if ts is not None else time.time())
+    rows = [(ts_eff, str(k), float(v)) for k, v in (values or {}).items() if _f(v) is not None]
+    if not rows:
+        return
+    try:
+        with _LOCK:
+            if not _SAMPLES:
+                _SAMPLES_SINCE = time.time()
+            _SAMPLES.extend(rows)
+            if len(_SAMPLES) >= SAMPLE_BATCH_ROWS or (time.time() - _SAMPLES_SINCE) >= SAMPLE_BATCH_MAX_AGE_S:
+                _flush_samples_locked()
+    except Exception as e:
+        print(f"[runtime_db] sample write failed: {e}", flush=True)
+
+
+def flush() -> None:
+    try:
+        with _LOCK:
+            _flush_samples_locked()
+    except Exception as e:
+        print(f"[runtime_db] flush failed: {e}", flush=True)
+
+
+def purge_older_than(days: float, *, now: float | None = None) -> None:
+    cutoff = (time.time() if now is None else now) - max(0.0, float(days)) * 86400.0
+    try:
+        with _LOCK:
+            _flush_samples_locked()
+            conn = _conn()
+            conn.execute("BEGIN")
+            try:
+                conn.execute("DELETE FROM transitions WHERE ts < ?", (cutoff,))
+                conn.execute("DELETE FROM ticks WHERE ts < ?", (cutoff,))
+                conn.execute("DELETE FROM energy_samples WHERE ts < ?", (cutoff,))
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+    except Exception as e:
+        print(f"[runtime_db] purge failed: {e}", flush=True)
+
+
+def purge_if_due(retention_days: float, *, now: float | None = None) -> bool:
+    """purge_older_than() at most once per PURGE_INTERVAL_S; retention <= 0 keeps everything."""
+    global _LAST_PURGE
+    if retention_days <= 0.0:
+        return False
+    now = time.time() if now is None else now
+    with _LOCK:
+        if _LAST_PURGE and now - _LAST_PURGE < PURGE_INTERVAL_S:
+            return False
+        _LAST_PURGE = now
+    purge_older_than(retention_days, now=now)
+    return True
+
+
+# ----------------------------------------------------------------------------------
+# Queries
+# ----------------------------------------------------------------------------------
+def _where(clauses: Sequence[tuple]) -> tuple:
+    parts = [c for c, _ in clauses]
+    params = [p for _, p in clauses]
+    return (" WHERE " + " AND ".join(parts)) if parts else "", params
+
+
+def transitions(device_id: str | None = None, *, since: float | None = None, until: float | None = None,
+                prefix: str | None = None, limit: int = 1000) -> List[dict]:
+    """Device flips, newest first; prefix="miner:" selects all miners."""
+    clauses = []
+    if device_id:
+        clauses.append(("device_id = ?", device_id))
+    if prefix:
+        clauses.append(("device_id LIKE ?", prefix.replace("%", "") + "%"))
+    if since is not None:
+        clauses.append(("ts >= ?", float(since)))
+    if until is not None:
+        clauses.append(("ts < ?", float(until)))
+    where, params = _where(clauses)
+    with _LOCK:
+        rows = _conn().execute(
+            f"SELECT ts, device_id, target_on, source, reason FROM transitions{where} ORDER BY ts DESC LIMIT ?",
+            (*params, int(limit)),
+        ).fetchall()
+    return [dict(r) for r in rows]
+
+
+def ticks(*, since: float | None = None, until: float | None = None, grid_emergency: bool | None = None,
+          limit: int = 1000) -> List[dict]:
+    clauses = []
+    if since is not None:
+        clauses.append(("ts >= ?", float(since)))
+    if until is not None:
+        clauses.append(("ts < ?", float(until)))
+    if grid_emergency is not None:
+        clauses.append(("grid_emergency = ?", int(bool(grid_emergency))))
+    where, params = _where(clauses)
+    with _LOCK:
+        rows = _conn().execute(
+            f"SELECT * FROM ticks{where} ORDER BY ts DESC LIMIT ?",
+            (*params, int(limit)),
+        ).fetchall()
+    return [dict(r) for r in rows]
+
+
+def decisions(tick_id: int) -> List[dict]:
+    with _LOCK:
+        rows = _conn().execute(
+            "SELECT device_id, wants, min_kw, max_kw, alloc_kw, reason FROM decisions WHERE tick_id = ? ORDER BY rowid",
+            (int(tick_id),),
+        ).fetchall()
+    return [dict(r) for r in rows]
+
+
+def energy_series(series: str, *, since: float | None = None, until: float | None = None) -> List[tuple]:
+    """[(ts, value), ...] ascending; pending samples are flushed first."""
+    clauses = [("series = ?", series)]
+    if since is not None:
+        clauses.append(("ts >= ?", float(since)))
+    if until is not None:
+        clauses.append(("ts < ?", float(until)))
+    where, params = _where(clauses)
+    with _LOCK:
+        _flush_samples_locked()
+        rows = _conn().execute(f"SELECT ts, value FROM energy_samples{where} ORDER BY ts", params).fetchall()
+    return [(r["ts"], r["value"]) for r in rows]
+
+
+def close() -> None:
+    global _CONN
+    with _LOCK:
+        try:
+            _flush_samples_locked()
+        except Exception as e:
+            print(f"[runtime_db] flush on close failed: {e}", flush=True)
+        if _CONN is not None:
+            try:
+                _CONN.close()
+            finally:
+                _CONN = None
+
+
+# gepufferte Samples beim Beenden des Add-ons nicht verlieren
+atexit.register(close)
@@ -0,0 +1,62 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from bitcoin_pv_mining.services import runtime_db
+
+
+class RuntimeDbTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        runtime_db.close()
+        p = patch.object(runtime_db, "DB_PATH", os.path.join(self.tmp.name, "runtime.db"))
+        p.start()
+        self.addCleanup(p.stop)
+        self.addCleanup(runtime_db.close)
+
+    def test_transitions_filter_by_prefix_and_time(self):
+        runtime_db.record_transition("miner:a", True, ts=100.0)
+        runtime_db.record_transition("miner:b", True, ts=200.0)
+        runtime_db.record_transition("cooling", True, ts=210.0)
+        runtime_db.record_transition("miner:a", False, ts=300.0)
+
+        rows = runtime_db.transitions(prefix="miner:", since=150.0)
+        self.assertEqual([(r["device_id"], r["target_on"]) for r in rows], [("miner:a", 0), ("miner:b", 1)])
+
+    def test_tick_with_decisions_and_emergency_query(self):
+        tid = runtime_db.record_tick(
+            {"pv_kw": 5.0, "grid_emergency": True},
+            [{"device_id": "miner:a", "wants": True, "min_kw": 3.0, "max_kw": 3.0, "alloc_kw": 0.0, "reason": "cap"}],
+            ts=10.0,
+        )
+        runtime_db.record_tick({"pv_kw": 6.0}, [], ts=20.0)
+
+        hits = runtime_db.ticks(grid_emergency=True)
+        self.assertEqual([h["id"] for h in hits], [tid])
+        self.assertEqual(runtime_db.decisions(tid)[0]["reason"], "cap")
+
+    def test_energy_samples_are_batched(self):
+        with patch.object(runtime_db, "SAMPLE_BATCH_ROWS", 4):
+            runtime_db.add_energy_samples({"pv_kw": 1.0, "feed_kw": 0.5}, ts=1.0)
+            self.assertEqual(len(runtime_db._SAMPLES), 2)
+            runtime_db.add_energy_samples({"pv_kw": 2.0, "feed_kw": None, "x": 0.0}, ts=2.0)
+            self.assertEqual(len(runtime_db._SAMPLES), 0)
+        self.assertEqual(runtime_db.energy_series("pv_kw"), [(1.0, 1.0), (2.0, 2.0)])
+
+    def test_purge_runs_at_most_once_per_interval(self):
+        day = 86400.0
+        runtime_db.record_transition("miner:a", True, ts=1 * day)
+        runtime_db.record_transition("miner:a", False, ts=9 * day)
+        with patch.object(runtime_db, "_LAST_PURGE", 0.0):
+            self.assertTrue(runtime_db.purge_if_due(5, now=10 * day))
+            self.assertEqual([r["ts"] for r in runtime_db.transitions()], [9 * day])
+            self.assertFalse(runtime_db.purge_if_due(5, now=10.5 * day))
+            self.assertTrue(runtime_db.purge_if_due(5, now=11 * day))
+            self.assertFalse(runtime_db.purge_if_due(0, now=20 * day))
+            self.assertEqual(len(runtime_db.transitions()), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
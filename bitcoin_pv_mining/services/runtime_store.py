@@ -0,0 +1,146 @@
+# services/runtime_store.py
+"""
+Fast store for hot runtime fields (pending flags, flip timestamps, desired on/off).
+
+State lives in memory, keyed by device id ("miner:<id>", "cooling", ...).
+Every change is appended as one JSON line to a journal; the journal is folded
+into a snapshot file once it grows. The YAML config files are not touched.
+"""
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from services.utils import ADDON_CONFIG_DIR
+
+CONFIG_DIR = ADDON_CONFIG_DIR
+SNAPSHOT_PATH = os.path.join(CONFIG_DIR, "runtime_state.json")
+JOURNAL_PATH = os.path.join(CONFIG_DIR, "runtime_state.journal")
+
+# Journal-Zeilen bis zur Kompaktierung in den Snapshot
+COMPACT_AFTER_LINES = 500
+
+_LOCK = threading.RLock()
+_DEVICES: dict[str, dict] | None = None
+_JOURNAL_LINES = 0
+
+
+def _read_snapshot() -> dict[str, dict]:
+    try:
+        with open(SNAPSHOT_PATH, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except Exception:
+        return {}
+    devices = data.get("devices") if isinstance(data, dict) else None
+    if not isinstance(devices, dict):
+        return {}
+    return {str(k): dict(v) for k, v in devices.items() if isinstance(v, dict)}
+
+
+def _replay_journal(devices: dict[str, dict]) -> int:
+    lines = 0
+    try:
+        with open(JOURNAL_PATH, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # half-written last line after a crash
+                    continue
+                dev_id = str(entry.get("id") or "")
+                if not dev_id:
+                    continue
+                lines += 1
+                if entry.get("del"):
+                    devices.pop(dev_id, None)
+                    continue
+                fields = entry.get("set")
+                if isinstance(fields, dict):
+                    devices.setdefault(dev_id, {}).update(fields)
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"[runtime_store] journal replay failed: {e}", flush=True)
+    return lines
+
+
+def _devices() -> dict[str, dict]:
+    global _DEVICES, _JOURNAL_LINES
+    if _DEVICES is None:
+        devices = _read_snapshot()
+        _JOURNAL_LINES = _replay_journal(devices)
+        _DEVICES = devices
+    return _DEVICES
+
+
+def _append(entry: dict) -> None:
+    global _JOURNAL_LINES
+    try:
+        os.makedirs(os.path.dirname(JOURNAL_PATH), exist_ok=True)
+        with open(JOURNAL_PATH, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n")
+        _JOURNAL_LINES += 1
+    except Exception as e:
+        print(f"[runtime_store] journal write failed: {e}", flush=True)
+        return
+    if _JOURNAL_LINES >= COMPACT_AFTER_LINES:
+        compact()
+
+
+def compact() -> None:
+    """Writes the in-memory state as snapshot and truncates the journal."""
+    global _JOURNAL_LINES
+    with _LOCK:
+        devices = _devices()
+        tmp = SNAPSHOT_PATH + ".tmp"
+        try:
+            os.makedirs(os.path.dirname(SNAPSHOT_PATH), exist_ok=True)
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"ts": time.time(), "devices": devices}, f, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, SNAPSHOT_PATH)
+            with open(JOURNAL_PATH, "w", encoding="utf-8"):
+                pass
+            _JOURNAL_LINES = 0
+        except Exception as e:
+            print(f"[runtime_store] compaction failed: {e}", flush=True)
+
+
+def get_device(device_id: str) -> dict:
+    with _LOCK:
+        return dict(_devices().get(device_id) or {})
+
+
+def has_device(device_id: str) -> bool:
+    with _LOCK:
+        return device_id in _devices()
+
+
+def update_device(device_id: str, **fields) -> dict:
+    """Merges fields into the device entry; only real changes hit the journal."""
+    with _LOCK:
+        cur = _devices().setdefault(device_id, {})
+        changed = {k: v for k, v in fields.items() if k not in cur or cur.get(k) != v}
+        if changed:
+            cur.update(changed)
+            _append({"id": device_id, "set": changed})
+        return dict(cur)
+
+
+def delete_device(device_id: str) -> None:
+    with _LOCK:
+        if _devices().pop(device_id, None) is not None:
+            _append({"id": device_id, "del": True})
+
+
+def reset_cache() -> None:
+    """Drops the in-memory copy; the next access reloads from disk."""
+    global _DEVICES, _JOURNAL_LINES
+    with _LOCK:
+        _DEVICES = None
+        _JOURNAL_LINES = 0
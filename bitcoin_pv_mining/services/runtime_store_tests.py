@@ -0,0 +1,64 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from bitcoin_pv_mining.services import runtime_store
+
+
+class RuntimeStoreTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        snap = os.path.join(self.tmp.name, "runtime_state.json")
+        journal = os.path.join(self.tmp.name, "runtime_state.journal")
+        for name, value in (("SNAPSHOT_PATH", snap), ("JOURNAL_PATH", journal)):
+            p = patch.object(runtime_store, name, value)
+            p.start()
+            self.addCleanup(p.stop)
+        runtime_store.reset_cache()
+        self.addCleanup(runtime_store.reset_cache)
+        self.journal = journal
+
+    def _journal_lines(self):
+        try:
+            with open(self.journal, "r", encoding="utf-8") as f:
+                return [l for l in f.read().splitlines() if l.strip()]
+        except FileNotFoundError:
+            return []
+
+    def test_journal_replay_restores_state(self):
+        runtime_store.update_device("miner:a", on=True, pending_on=True)
+        runtime_store.update_device("miner:a", pending_on=False)
+        runtime_store.update_device("cooling", on=False)
+        runtime_store.delete_device("cooling")
+
+        runtime_store.reset_cache()
+
+        self.assertEqual(runtime_store.get_device("miner:a"), {"on": True, "pending_on": False})
+        self.assertFalse(runtime_store.has_device("cooling"))
+
+    def test_unchanged_update_is_not_journaled(self):
+        runtime_store.update_device("miner:a", on=True)
+        runtime_store.update_device("miner:a", on=True)
+        self.assertEqual(len(self._journal_lines()), 1)
+
+    def test_compaction_truncates_journal(self):
+        with patch.object(runtime_store, "COMPACT_AFTER_LINES", 3):
+            for i in range(3):
+                runtime_store.update_device("miner:a", last_flip_ts=float(i))
+        self.assertEqual(self._journal_lines(), [])
+
+        runtime_store.reset_cache()
+        self.assertEqual(runtime_store.get_device("miner:a"), {"last_flip_ts": 2.0})
+
+    def test_half_written_line_is_ignored(self):
+        runtime_store.update_device("miner:a", on=True)
+        with open(self.journal, "a", encoding="utf-8") as f:
+            f.write('{"id": "miner:a", "set": {"on": fal')
+        runtime_store.reset_cache()
+        self.assertEqual(runtime_store.get_device("miner:a"), {"on": True})
+
+
+if __name__ == "__main__":
+    unittest.main()
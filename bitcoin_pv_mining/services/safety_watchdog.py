@@ -0,0 +1,265 @@
+# services/safety_watchdog.py
+"""
+Leichter Sicherheits-Watchdog neben dem 15-s-Planner.
+
+Pollt im Sub-Sekunden-Takt nur Netzbezug und den Kühlungs-Status und schaltet
+laufende Auto-Miner über request_miners_state(..., enforce_runtime=False) ab
+(ein HA-Call je domain/service):
+  - Netzbezug >= max_grid_import_kw: so viele Miner (größte zuerst), bis der
+    Überhang gedeckt ist; danach Pause, bis der Zähler nachgezogen hat.
+  - Kühlung aus, obwohl kühlungspflichtige Miner laufen: diese sofort aus.
+Die Miner-/Preis-Sicht wird nur alle refresh_s (oder nach invalidate()) neu
+geladen, damit der schnelle Pfad mit 1–2 HA-Reads auskommt.
+Wie der Planner greift er nur ein, solange orchestrator_enabled gesetzt ist.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from typing import Dict, List, Optional
+
+from services.cooling_store import get_cooling, _state_entity_id as cooling_state_entity_id
+from services.electricity_store import current_price as elec_price, get_var as elec_get
+from services.energy_mix import read_grid_net_kw
+from services.ha_entities import is_on_like
+from services.ha_sensors import get_sensor_value
+from services.miner_api import effective_power_kw
+from services.miners_store import list_miners, request_miners_state
+from services.settings_store import get_var as set_get, is_orchestrator_enabled
+
+CAP_MARGIN_KW = 0.05   # wie im Planner
+
+
+def _num(x, d=0.0) -> float:
+    try:
+        if x in (None, ""):
+            return d
+        return float(x)
+    except (TypeError, ValueError):
+        return d
+
+
+def _truthy(x, default=False) -> bool:
+    if x is None:
+        return default
+    s = str(x).strip().lower()
+    if s in ("1", "true", "on", "yes", "y"):
+        return True
+    if s in ("0", "false", "off", "no", "n", ""):
+        return False
+    return default
+
+
+def _cooling_required(m: dict) -> bool:
+    cooling = m.get("cooling")
+    flags = [
+        m.get("require_cooling"),
+        m.get("cooling_required"),
+        m.get("needs_cooling"),
+        cooling.get("required") if isinstance(cooling, dict) else None,
+    ]
+    return any(_truthy(flag) for flag in flags)
+
+
+class SafetyWatchdog:
+    def __init__(self, *, interval_s: float = 0.5, refresh_s: float = 15.0, settle_s: float = 5.0):
+        self.interval_s = max(0.1, float(interval_s))
+        self.refresh_s = max(1.0, float(refresh_s))
+        self.settle_s = max(0.0, float(settle_s))
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._view: Optional[dict] = None
+        self._view_ts = 0.0
+        self._hold_until = 0.0
+        self.cycles = 0
+        self.trips: Dict[str, int] = {"grid_import": 0, "cooling_lost": 0}
+        self.last_cycle_ms = 0.0
+        self.max_cycle_ms = 0.0
+        self.last_latency_ms: Optional[float] = None
+        self.max_latency_ms = 0.0
+        self.last_trip: Optional[dict] = None
+        self.last_error = ""
+
+    # --- Sicht auf Miner / Limits (langsam) ---
+    def invalidate(self) -> None:
+        with self._lock:
+            self._view = None
+
+    def _load_view(self) -> dict:
+        running = []
+        for m in list_miners():
+            if str(m.get("mode") or "manual").lower() != "auto":
+                continue
+            if not bool(m.get("effective_on", m.get("on"))):
+                continue
+            running.append({
+                "id": m.get("id"),
+                "power_kw": effective_power_kw(m),   # gemessen bzw. Leistungsziel, wie im Planner
+                "need_cool": _cooling_required(m),
+                "record": m,
+            })
+        running.sort(key=lambda r: r["power_kw"], reverse=True)
+
+        cooling_entity = ""
+        if _truthy(set_get("cooling_feature_enabled", False), False) and any(r["need_cool"] for r in running):
+            cooling_entity = cooling_state_entity_id(get_cooling() or {})
+
+        grid_cost = _num(elec_price(), 0.0) + _num(elec_get("network_fee_down_value", 0.0), 0.0)
+        return {
+            "running": running,
+            "cooling_entity": cooling_entity,
+            "cap_kw": max(0.0, _num(set_get("max_grid_import_kw", 14.0), 14.0)),
+            "grid_free": grid_cost <= 0.0,
+        }
+
+    def _current_view(self, now: float) -> dict:
+        with self._lock:
+            if self._view is not None and (now - self._view_ts) < self.refresh_s:
+                return self._view
+        view = self._load_view()
+        with self._lock:
+            self._view = view
+            self._view_ts = now
+        return view
+
+    def _drop_running(self, ids: List[str]) -> None:
+        with self._lock:
+            if self._view is not None:
+                self._view["running"] = [r for r in self._view["running"] if r["id"] not in ids]
+
+    # --- schneller Pfad ---
+    def _shutdown(self, kind: str, victims: List[dict], detected_ts: float, detail: str) -> None:
+        ids = [r["id"] for r in victims]
+        try:
+            # Datensätze aus der Sicht wiederverwenden: kein list_miners() im Notfallpfad
+            results = request_miners_state(ids, False, now_ts=time.time(), enforce_runtime=False,
+                                           miners=[r["record"] for r in victims])
+        except Exception as e:
+            results = {mid: (False, str(e)) for mid in ids}
+        done = []
+        for mid in ids:
+            ok, reason = results.get(mid, (False, "no result"))
+            print(f"[watchdog] EMERGENCY OFF ({kind}) miner {mid} -> ok={ok} reason={reason} | {detail}", flush=True)
+            if ok:
+                done.append(mid)
+        latency_ms = (time.perf_counter() - detected_ts) * 1000.0
+        self.trips[kind] = self.trips.get(kind, 0) + 1
+        self.last_latency_ms = latency_ms
+        self.max_latency_ms = max(self.max_latency_ms, latency_ms)
+        self.last_trip = {"kind": kind, "ts": time.time(), "miners": done, "latency_ms": latency_ms, "detail": detail}
+        self._drop_running(done)
+
+    def check_once(self, now: Optional[float] = None) -> Optional[dict]:
+        """Ein Prüfzyklus; gibt den ausgelösten Trip zurück (sonst None)."""
+        t0 = time.perf_counter()
+        now = time.time() if now is None else now
+        tripped = None
+        try:
+            if not is_orchestrator_enabled():
+                return None
+            view = self._current_view(now)
+            running = view["running"]
+            if not running:
+                return None
+
+            cool_eid = view["cooling_entity"]
+            if cool_eid:
+                state = get_sensor_value(cool_eid)
+                if state is not None and not is_on_like(state):
+                    victims = [r for r in running if r["need_cool"]]
+                    if victims:
+                        self._shutdown("cooling_lost", victims, t0, f"{cool_eid}={state}")
+                        tripped = self.last_trip
+                        running = [r for r in running if not r["need_cool"]]
+
+            if running and not view["grid_free"] and now >= self._hold_until:
+                net = read_grid_net_kw()
+                limit = max(0.0, view["cap_kw"] - CAP_MARGIN_KW)
+                if net is not None and net >= limit:
+                    excess = net - limit
+                    victims, shed = [], 0.0
+                    for r in running:
+                        victims.append(r)
+                        shed += r["power_kw"]
+                        if shed > excess:
+                            break
+                    self._shutdown("grid_import", victims, t0, f"import={net:.2f} kW cap={view['cap_kw']:.2f} kW")
+                    self._hold_until = now + self.settle_s
+                    tripped = self.last_trip
+            return tripped
+        finally:
+            self.cycles += 1
+            self.last_cycle_ms = (time.perf_counter() - t0) * 1000.0
+            self.max_cycle_ms = max(self.max_cycle_ms, self.last_cycle_ms)
+
+    def metrics(self) -> dict:
+        return {
+            "cycles": self.cycles,
+            "trips": dict(self.trips),
+            "last_cycle_ms": self.last_cycle_ms,
+            "max_cycle_ms": self.max_cycle_ms,
+            "last_latency_ms": self.last_latency_ms,
+            "max_latency_ms": self.max_latency_ms,
+            "last_trip": dict(self.last_trip) if self.last_trip else None,
+            "last_error": self.last_error,
+        }
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            started = time.monotonic()
+            try:
+                self.check_once()
+                self.last_error = ""
+            except Exception as e:
+                if str(e) != self.last_error:
+                    print(f"[watchdog] check failed: {e}", flush=True)
+                self.last_error = str(e)
+            self._stop.wait(max(0.0, self.interval_s - (time.monotonic() - started)))
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="safety-watchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+
+# ----------------------------------------------------------------------------------
+# Modul-Instanz (aus Settings konfiguriert)
+# ----------------------------------------------------------------------------------
+_WATCHDOG: Optional[SafetyWatchdog] = None
+
+
+def is_enabled() -> bool:
+    return _truthy(set_get("safety_watchdog_enabled", False), False)
+
+
+def start_from_settings() -> Optional[SafetyWatchdog]:
+    """Starts the watchdog if safety_watchdog_enabled is set (off by default)."""
+    global _WATCHDOG
+    if _WATCHDOG is not None or not is_enabled():
+        return _WATCHDOG
+    _WATCHDOG = SafetyWatchdog(
+        interval_s=_num(set_get("safety_watchdog_interval_s", 0.5), 0.5),
+        refresh_s=_num(set_get("safety_watchdog_refresh_s", 15.0), 15.0),
+        settle_s=_num(set_get("safety_watchdog_settle_s", 5.0), 5.0),
+    )
+    _WATCHDOG.start()
+    print(f"[watchdog] running every {_WATCHDOG.interval_s:.2f}s", flush=True)
+    return _WATCHDOG
+
+
+def invalidate() -> None:
+    """Vom Planner nach jedem Tick: Miner-Sicht beim nächsten Zyklus neu laden."""
+    if _WATCHDOG is not None:
+        _WATCHDOG.invalidate()
+
+
+def metrics() -> dict:
+    return _WATCHDOG.metrics() if _WATCHDOG is not None else {}
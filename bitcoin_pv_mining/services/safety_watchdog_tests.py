@@ -0,0 +1,91 @@
+import unittest
+from unittest.mock import patch
+
+from bitcoin_pv_mining.services import safety_watchdog
+from bitcoin_pv_mining.services.safety_watchdog import SafetyWatchdog
+
+
+class SafetyWatchdogTests(unittest.TestCase):
+    def setUp(self):
+        self.miners = [
+            {"id": "small", "mode": "auto", "on": True, "power_kw": 1.0},
+            {"id": "big", "mode": "auto", "on": True, "power_kw": 3.0},
+            {"id": "cool", "mode": "auto", "on": True, "power_kw": 2.0, "require_cooling": True},
+            {"id": "manual", "mode": "manual", "on": True, "power_kw": 5.0},
+        ]
+        self.settings = {"max_grid_import_kw": 10.0, "cooling_feature_enabled": True}
+        self.grid_kw = 0.0
+        self.cooling_state = "on"
+        self.switched = []
+        self.orchestrator = True
+
+        def _request(mids, target_on, *, now_ts=None, enforce_runtime=True, miners=None):
+            self.switched.extend((mid, target_on, enforce_runtime) for mid in mids)
+            return {mid: (True, "switched") for mid in mids}
+
+        for p in (
+            patch.object(safety_watchdog, "list_miners", lambda: [dict(m) for m in self.miners]),
+            patch.object(safety_watchdog, "set_get", lambda k, d=None: self.settings.get(k, d)),
+            patch.object(safety_watchdog, "elec_price", lambda: 0.30),
+            patch.object(safety_watchdog, "elec_get", lambda k, d=None: 0.0),
+            patch.object(safety_watchdog, "get_cooling", lambda: {"state_entity": "switch.cooling"}),
+            patch.object(safety_watchdog, "get_sensor_value", lambda eid: self.cooling_state),
+            patch.object(safety_watchdog, "read_grid_net_kw", lambda: self.grid_kw),
+            patch.object(safety_watchdog, "request_miners_state", _request),
+            patch.object(safety_watchdog, "is_orchestrator_enabled", lambda: self.orchestrator),
+        ):
+            p.start()
+            self.addCleanup(p.stop)
+        self.wd = SafetyWatchdog(interval_s=0.2, refresh_s=60.0, settle_s=5.0)
+
+    def test_quiet_cycle_does_nothing(self):
+        self.grid_kw = 9.0
+        self.assertIsNone(self.wd.check_once(now=100.0))
+        self.assertEqual(self.switched, [])
+        self.assertEqual(self.wd.metrics()["cycles"], 1)
+
+    def test_grid_import_sheds_largest_miners_until_excess_is_covered(self):
+        self.grid_kw = 13.0                                   # 3.05 kW über dem Limit
+        trip = self.wd.check_once(now=100.0)
+        self.assertEqual(trip["kind"], "grid_import")
+        self.assertEqual(self.switched, [("big", False, False), ("cool", False, False)])
+        self.assertGreaterEqual(self.wd.metrics()["last_latency_ms"], 0.0)
+
+        # Zähler hat noch nicht nachgezogen -> Pause statt weiterer Abschaltungen
+        self.assertIsNone(self.wd.check_once(now=101.0))
+        self.wd.check_once(now=106.0)
+        self.assertEqual(self.switched[-1], ("small", False, False))
+        self.assertEqual(self.wd.metrics()["trips"]["grid_import"], 2)
+
+    def test_throttled_variable_miner_counts_at_its_target(self):
+        # big läuft gedrosselt auf 1 kW -> Reihenfolge cool (2.0), small (1.5), big (1.0)
+        self.miners[1].update(power_mode="variable", power_target_kw=1.0)
+        self.miners[0]["power_kw"] = 1.5
+        self.grid_kw = 11.95                                  # 2.0 kW über dem Limit
+        self.wd.check_once(now=100.0)
+        self.assertEqual(self.switched, [("cool", False, False), ("small", False, False)])
+
+    def test_disabled_orchestrator_never_sheds(self):
+        self.orchestrator = False
+        self.grid_kw = 13.0
+        self.cooling_state = "off"
+        self.assertIsNone(self.wd.check_once(now=100.0))
+        self.assertEqual(self.switched, [])
+
+    def test_cooling_loss_stops_only_cooling_dependent_miners(self):
+        self.cooling_state = "off"
+        trip = self.wd.check_once(now=100.0)
+        self.assertEqual(trip["kind"], "cooling_lost")
+        self.assertEqual(self.switched, [("cool", False, False)])
+        self.assertIsNone(self.wd.check_once(now=100.5))      # bereits abgeschaltet
+
+    def test_free_grid_and_invalidate(self):
+        self.grid_kw = 20.0
+        with patch.object(safety_watchdog, "elec_price", lambda: -0.05):
+            self.assertIsNone(self.wd.check_once(now=100.0))
+        self.wd.invalidate()
+        self.assertEqual(self.wd.check_once(now=100.5)["kind"], "grid_import")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,8 +1,9 @@
 import os
 
-from services.utils import load_yaml
+from services.utils import load_yaml, ADDON_CONFIG_DIR
+from services.modbus_source import fresh_entity_id as modbus_fresh_entity_id
 
-CONFIG_DIR = "/config/pv_mining_addon"
+CONFIG_DIR = ADDON_CONFIG_DIR
 SENS_DEF = os.path.join(CONFIG_DIR, "sensors.yaml")
 SENS_OVR = os.path.join(CONFIG_DIR, "sensors.local.yaml")
 MAIN_CFG = os.path.join(CONFIG_DIR, "pv_mining_local_config.yaml")
@@ -54,7 +55,13 @@ def _legacy_value(key: str) -> str:
 
 
 def resolve_sensor_id(kind: str, *, allow_mock: bool = True) -> str:
-    real = _mapping_value(SENS_OVR, kind) or _mapping_value(SENS_DEF, kind) or _legacy_value(kind)
+    # Modbus-Poller (falls aktiv und frisch) vor dem HA-Mapping
+    real = (
+        modbus_fresh_entity_id(kind)
+        or _mapping_value(SENS_OVR, kind)
+        or _mapping_value(SENS_DEF, kind)
+        or _legacy_value(kind)
+    )
     if allow_mock:
         fallback = MOCK_ENTITY_KEYS.get(kind, "")
         if fallback:
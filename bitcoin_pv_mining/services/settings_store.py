@@ -1,8 +1,11 @@
 # services/settings_store.py
+import copy
 import os
-from services.utils import load_yaml, save_yaml
+import threading
+import time
+from services.utils import load_yaml, save_yaml, ADDON_CONFIG_DIR
 
-CONFIG_DIR = "/config/pv_mining_addon"
+CONFIG_DIR = ADDON_CONFIG_DIR
 SET_DEF = os.path.join(CONFIG_DIR, "settings.yaml")
 SET_OVR = os.path.join(CONFIG_DIR, "settings.local.yaml")
 
@@ -29,11 +32,102 @@ def _ensure(data: dict, path: str):
         cur = cur.setdefault(k, {})
     return cur
 
+# ---------------------------------------------------------------------------
+# Kompilierter Index: flaches dict {key: value} über Override + Default,
+# neu gebaut nur wenn sich eine der Dateien ändert (mtime/size).
+# ---------------------------------------------------------------------------
+# Wie oft höchstens per stat() auf Dateiänderungen geprüft wird
+STAT_INTERVAL_S = 1.0
+
+_INDEX_LOCK = threading.RLock()
+_INDEX: dict = {}
+_INDEX_VERSION = None
+_INDEX_CHECKED = 0.0
+_INDEX_GEN = 0
+
+
+def _file_version(path: str):
+    try:
+        st = os.stat(path)
+        return (path, st.st_mtime_ns, st.st_size)
+    except OSError:
+        return (path, None, None)
+
+
+def _flatten(block, prefix: str, depth: int, out: dict) -> None:
+    """
+    Mirrors _get(): at every level the joined remaining key wins over the
+    nested walk, and only plain (dot-free) keys are descended into.
+    `out` maps key -> (depth, value); the shallowest match wins.
+    """
+    if not isinstance(block, dict):
+        return
+    for k, v in block.items():
+        k = str(k)
+        full = f"{prefix}.{k}" if prefix else k
+        prev = out.get(full)
+        if prev is None or depth < prev[0]:
+            out[full] = (depth, v)
+        if "." not in k and isinstance(v, dict):
+            _flatten(v, full, depth + 1, out)
+
+
+def _compile(path: str) -> dict:
+    data = load_yaml(path, {}) or {}
+    if not isinstance(data, dict):
+        return {}
+    flat: dict = {}
+    _flatten(data.get("settings"), "", 0, flat)
+    return {k: v for k, (_d, v) in flat.items() if v is not None}
+
+
+def _index() -> dict:
+    global _INDEX, _INDEX_VERSION, _INDEX_CHECKED, _INDEX_GEN
+    now_ts = time.monotonic()
+    if _INDEX_VERSION is not None and (now_ts - _INDEX_CHECKED) < STAT_INTERVAL_S:
+        return _INDEX
+    with _INDEX_LOCK:
+        version = (_file_version(SET_OVR), _file_version(SET_DEF))
+        if version != _INDEX_VERSION:
+            merged = _compile(SET_DEF)
+            merged.update(_compile(SET_OVR))
+            _INDEX = merged
+            _INDEX_VERSION = version
+            _INDEX_GEN += 1
+        _INDEX_CHECKED = now_ts
+        return _INDEX
+
+
+def index_version() -> int:
+    """Increments whenever the compiled index is rebuilt; lets callers cache derived data."""
+    _index()
+    return _INDEX_GEN
+
+
+def invalidate_cache() -> None:
+    global _INDEX_VERSION
+    with _INDEX_LOCK:
+        _INDEX_VERSION = None
+
+
+def _copy(v):
+    # Verschachtelte Blöcke nicht als Referenz aus dem Index herausgeben
+    return copy.deepcopy(v) if isinstance(v, (dict, list)) else v
+
+
 def get_var(key: str, default=None):
-    v = _get(load_yaml(SET_OVR, {}) or {}, f"settings.{key}", None)
-    if v is None:
-        v = _get(load_yaml(SET_DEF, {}) or {}, f"settings.{key}", None)
-    return default if v is None else v
+    v = _index().get(key)
+    return default if v is None else _copy(v)
+
+
+def get_many(keys, default=None) -> dict:
+    """Bulk lookup: {key: value-or-default} from one index snapshot."""
+    idx = _index()
+    out = {}
+    for k in keys:
+        v = idx.get(k)
+        out[k] = default if v is None else _copy(v)
+    return out
 
 
 def get_bool(key: str, default: bool = False) -> bool:
@@ -66,3 +160,4 @@ def set_vars(**pairs):
         if v is not None:
             blk[k] = v
     save_yaml(SET_OVR, ovr)
+    invalidate_cache()
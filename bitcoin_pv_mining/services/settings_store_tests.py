@@ -0,0 +1,70 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import yaml
+
+from bitcoin_pv_mining.services import settings_store
+
+
+class SettingsIndexTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.def_path = os.path.join(self.tmp.name, "settings.yaml")
+        self.ovr_path = os.path.join(self.tmp.name, "settings.local.yaml")
+        for name, value in (("SET_DEF", self.def_path), ("SET_OVR", self.ovr_path)):
+            p = patch.object(settings_store, name, value)
+            p.start()
+            self.addCleanup(p.stop)
+        settings_store.invalidate_cache()
+        self.addCleanup(settings_store.invalidate_cache)
+
+    def _write(self, path, block):
+        with open(path, "w", encoding="utf-8") as f:
+            yaml.safe_dump({"settings": block}, f)
+
+    def _legacy(self, key, default=None):
+        v = settings_store._get(settings_store.load_yaml(self.ovr_path, {}) or {}, f"settings.{key}", None)
+        if v is None:
+            v = settings_store._get(settings_store.load_yaml(self.def_path, {}) or {}, f"settings.{key}", None)
+        return default if v is None else v
+
+    def test_index_matches_dotted_path_walk(self):
+        self._write(self.def_path, {
+            "surplus_guard_w": 150.0,
+            "miner.m1.min_run_min": 5,
+            "miner": {"m1": {"min_run_min": 9, "label": "Rack"}, "on_fraction": 0.9},
+            "a.b": 1,
+            "a": {"b": 2, "c": 3},
+            "x.y": {"z": 1},
+        })
+        self._write(self.ovr_path, {
+            "surplus_guard_w": 300.0,
+            "miner": {"m2": {"min_run_min": 2}},
+            "a": {"c": None},
+            "pv_ramp_settle_s": None,
+        })
+        keys = [
+            "surplus_guard_w", "miner.m1.min_run_min", "miner.m1.label", "miner.m2.min_run_min",
+            "miner.on_fraction", "miner", "miner.m1", "a.b", "a.c", "a", "x.y", "x.y.z",
+            "pv_ramp_settle_s", "missing", "miner.m3.min_run_min",
+        ]
+        for key in keys:
+            self.assertEqual(settings_store.get_var(key, "dflt"), self._legacy(key, "dflt"), key)
+        self.assertEqual(settings_store.get_many(keys, "dflt"), {k: self._legacy(k, "dflt") for k in keys})
+
+    def test_set_vars_invalidates_and_returned_blocks_are_copies(self):
+        self._write(self.def_path, {"miner": {"m1": {"label": "A"}}})
+        self.assertEqual(settings_store.get_var("miner.m1.label"), "A")
+
+        settings_store.get_var("miner")["m1"]["label"] = "mutated"
+        self.assertEqual(settings_store.get_var("miner.m1.label"), "A")
+
+        settings_store.set_vars(surplus_guard_w=250.0)
+        self.assertEqual(settings_store.get_var("surplus_guard_w"), 250.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,152 @@
+# services/start_sequencer.py
+"""
+Soft-Start in Wellen für diskrete Lasten (Miner).
+
+Statt in einem Tick alle Miner einzuschalten, lässt der Planner Starts nur über
+admit() zu: eine Welle sammelt im selben Tick Miner bis zum kW-Budget
+(soft_start_wave_kw; der erste Kandidat passt immer). Die nächste Welle öffnet
+erst, wenn die laufende bestätigt ist – per state_entity-Rückmeldung aller
+Mitglieder oder weil der gemessene Netto-Netzbezug um confirm_fraction der
+Wellenleistung gestiegen ist – oder nach soft_start_wave_timeout_s.
+Solange eine Welle unbestätigt ist, reserviert pending_kw() ihren noch nicht
+gemessenen Anteil gegen max_grid_import_kw – aber nur für Mitglieder, die im
+laufenden Tick nicht ohnehin eingeplant (und damit im grid_draw) sind.
+"""
+from __future__ import annotations
+
+import threading
+from typing import Dict, Optional
+
+from services.settings_store import get_var as set_get
+
+
+def _f(x, d=0.0) -> float:
+    try:
+        if x in (None, ""):
+            return d
+        return float(x)
+    except (TypeError, ValueError):
+        return d
+
+
+def _truthy(x, default=False) -> bool:
+    if x is None:
+        return default
+    s = str(x).strip().lower()
+    if s in ("1", "true", "on", "yes", "y"):
+        return True
+    if s in ("0", "false", "off", "no", "n", ""):
+        return False
+    return default
+
+
+class StartSequencer:
+    def __init__(self, *, wave_kw: float = 5.0, timeout_s: float = 45.0, confirm_fraction: float = 0.6):
+        self.wave_kw = max(0.0, float(wave_kw))
+        self.timeout_s = max(0.0, float(timeout_s))
+        self.confirm_fraction = max(0.0, min(1.0, float(confirm_fraction)))
+        self._lock = threading.RLock()
+        self._wave: Optional[dict] = None
+        self._tick_ts = 0.0
+        self._net_kw: Optional[float] = None
+        self.waves = 0
+        self.last_release = ""
+
+    def configure(self, *, wave_kw: float, timeout_s: float, confirm_fraction: float) -> None:
+        self.wave_kw = max(0.0, float(wave_kw))
+        self.timeout_s = max(0.0, float(timeout_s))
+        self.confirm_fraction = max(0.0, min(1.0, float(confirm_fraction)))
+
+    def _wave_kw(self) -> float:
+        return sum(self._wave["members"].values()) if self._wave else 0.0
+
+    def begin_tick(self, now_ts: float, net_import_kw: Optional[float],
+                   feedback: Optional[Dict[str, Optional[bool]]] = None) -> str:
+        """
+        Prüft die offene Welle. feedback: cid -> ha_on (None = keine Rückmeldung).
+        Rückgabe: "" (keine Welle), "waiting", oder der Freigabegrund.
+        """
+        with self._lock:
+            self._tick_ts = float(now_ts)
+            self._net_kw = net_import_kw
+            wave = self._wave
+            if wave is None:
+                return ""
+            members = wave["members"]
+            reason = ""
+            fb = {cid: (feedback or {}).get(cid) for cid in members}
+            if members and all(v is True for v in fb.values()):
+                reason = "state feedback"
+            elif net_import_kw is not None and wave["baseline_net_kw"] is not None:
+                rise = net_import_kw - wave["baseline_net_kw"]
+                if rise + 1e-9 >= self.confirm_fraction * self._wave_kw():
+                    reason = f"measured +{rise:.2f} kW"
+            if not reason and (now_ts - wave["opened_ts"]) >= self.timeout_s:
+                reason = "timeout"
+            if reason:
+                self.last_release = f"wave {wave['n']} ({', '.join(members)}): {reason}"
+                self._wave = None
+                return reason
+            return "waiting"
+
+    def admit(self, cid: str, kw: float) -> tuple[bool, str]:
+        """Darf cid in diesem Tick starten? Öffnet bei Bedarf eine neue Welle."""
+        kw = max(0.0, float(kw))
+        with self._lock:
+            wave = self._wave
+            if wave is None:
+                self.waves += 1
+                self._wave = wave = {
+                    "n": self.waves,
+                    "opened_ts": self._tick_ts,
+                    "baseline_net_kw": self._net_kw,
+                    "members": {},
+                }
+            if cid in wave["members"]:
+                return True, f"soft-start wave {wave['n']}"
+            if wave["opened_ts"] != self._tick_ts:
+                return False, f"soft-start: wave {wave['n']} not confirmed yet"
+            used = self._wave_kw()
+            if wave["members"] and used + kw > self.wave_kw + 1e-9:
+                return False, f"soft-start: wave {wave['n']} budget {self.wave_kw:.1f} kW full"
+            wave["members"][cid] = kw
+            return True, f"soft-start wave {wave['n']} ({used + kw:.1f}/{self.wave_kw:.1f} kW)"
+
+    def pending_kw(self, exclude=()) -> float:
+        """Noch nicht gemessener Anteil der offenen Welle (kW), ohne die Mitglieder in exclude."""
+        with self._lock:
+            wave = self._wave
+            if wave is None:
+                return 0.0
+            total = self._wave_kw()
+            rest = sum(kw for cid, kw in wave["members"].items() if cid not in exclude)
+            if self._net_kw is None or wave["baseline_net_kw"] is None:
+                return rest
+            return min(rest, max(0.0, total - max(0.0, self._net_kw - wave["baseline_net_kw"])))
+
+    def members(self) -> Dict[str, float]:
+        with self._lock:
+            return dict(self._wave["members"]) if self._wave else {}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._wave = None
+
+
+# ----------------------------------------------------------------------------------
+# Modul-Instanz (Settings werden je Tick übernommen)
+# ----------------------------------------------------------------------------------
+_SEQ = StartSequencer()
+
+
+def is_enabled() -> bool:
+    return _truthy(set_get("soft_start_enabled", False), False)
+
+
+def get_sequencer() -> StartSequencer:
+    _SEQ.configure(
+        wave_kw=_f(set_get("soft_start_wave_kw", 5.0), 5.0),
+        timeout_s=_f(set_get("soft_start_wave_timeout_s", 45.0), 45.0),
+        confirm_fraction=_f(set_get("soft_start_confirm_fraction", 0.6), 0.6),
+    )
+    return _SEQ
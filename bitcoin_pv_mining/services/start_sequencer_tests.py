@@ -0,0 +1,64 @@
+import unittest
+
+from bitcoin_pv_mining.services.start_sequencer import StartSequencer
+
+
+class StartSequencerTests(unittest.TestCase):
+    def setUp(self):
+        self.seq = StartSequencer(wave_kw=5.0, timeout_s=45.0, confirm_fraction=0.6)
+
+    def test_wave_fills_up_to_budget_within_one_tick(self):
+        self.assertEqual(self.seq.begin_tick(100.0, 0.0), "")
+        self.assertTrue(self.seq.admit("miner:a", 3.0)[0])
+        self.assertTrue(self.seq.admit("miner:b", 2.0)[0])
+        ok, reason = self.seq.admit("miner:c", 2.0)
+        self.assertFalse(ok)
+        self.assertIn("budget", reason)
+        self.assertAlmostEqual(self.seq.pending_kw(), 5.0)
+
+    def test_first_candidate_always_fits(self):
+        self.seq.begin_tick(100.0, 0.0)
+        self.assertTrue(self.seq.admit("miner:big", 8.0)[0])
+        self.assertFalse(self.seq.admit("miner:a", 1.0)[0])
+
+    def test_next_wave_waits_for_measured_confirmation(self):
+        self.seq.begin_tick(100.0, -6.0)
+        self.seq.admit("miner:a", 3.0)
+        self.seq.admit("miner:b", 2.0)
+
+        self.assertEqual(self.seq.begin_tick(115.0, -4.0), "waiting")      # +2 kW < 3 kW
+        self.assertAlmostEqual(self.seq.pending_kw(), 3.0)
+        self.assertFalse(self.seq.admit("miner:c", 2.0)[0])
+        self.assertTrue(self.seq.admit("miner:a", 3.0)[0])                 # Mitglied bleibt zugelassen
+
+        self.assertTrue(self.seq.begin_tick(130.0, -2.5).startswith("measured"))
+        self.assertEqual(self.seq.pending_kw(), 0.0)
+        self.assertTrue(self.seq.admit("miner:c", 2.0)[0])
+
+    def test_members_planned_this_tick_are_not_reserved_twice(self):
+        self.seq.begin_tick(100.0, -6.0)
+        self.seq.admit("miner:a", 3.0)
+        self.seq.admit("miner:b", 2.0)
+
+        self.seq.begin_tick(115.0, -5.0)                                    # +1 kW gemessen
+        self.assertAlmostEqual(self.seq.pending_kw(), 4.0)
+        self.assertAlmostEqual(self.seq.pending_kw(exclude={"miner:a"}), 2.0)
+        self.assertEqual(self.seq.pending_kw(exclude={"miner:a", "miner:b"}), 0.0)
+
+    def test_state_feedback_or_timeout_releases_wave(self):
+        self.seq.begin_tick(100.0, None)
+        self.seq.admit("miner:a", 3.0)
+        self.seq.admit("miner:b", 2.0)
+        fb = {"miner:a": True, "miner:b": None}
+        self.assertEqual(self.seq.begin_tick(115.0, None, fb), "waiting")
+        fb["miner:b"] = True
+        self.assertEqual(self.seq.begin_tick(130.0, None, fb), "state feedback")
+
+        self.seq.admit("miner:c", 2.0)
+        self.assertEqual(self.seq.begin_tick(160.0, None, {"miner:c": False}), "waiting")
+        self.assertEqual(self.seq.begin_tick(175.0, None, {"miner:c": False}), "timeout")
+        self.assertEqual(self.seq.members(), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,292 @@
+# services/sunspec.py
+"""
+SunSpec model index and block decoder (stdlib only).
+
+walk() follows the model chain from the "SunS" marker and returns
+{model_id: (body_start, body_len)}. decode() turns one model body (list of
+16-bit registers) into a dict in a single Struct.unpack_from – repeating
+blocks such as the model 160 MPPT modules via Struct.iter_unpack – and
+applies the scale-factor registers. "Not implemented" values are left out.
+
+Supported: inverter 101-103 (int+SF) / 111-113 (float), MPPT 160,
+storage 124, meter 201-204 (int+SF) / 211-214 (float).
+
+Also imported by tools/fronius_modbus_dump.py, so no add-on imports here.
+"""
+from __future__ import annotations
+
+import math
+import struct
+import sys
+from array import array
+from typing import Callable, Dict, List, Mapping, Optional, Sequence, Tuple, TypedDict
+
+MARKER = (0x5375, 0x6E53)  # "SunS"
+END_ID = 0xFFFF
+BASES = (40000, 50000, 0)
+MAX_MODELS = 64
+
+INVERTER_INT_MODELS = (101, 102, 103)
+INVERTER_FLOAT_MODELS = (111, 112, 113)
+INVERTER_MODELS = INVERTER_INT_MODELS + INVERTER_FLOAT_MODELS
+MPPT_MODEL = 160
+STORAGE_MODEL = 124
+METER_INT_MODELS = (201, 202, 203, 204)
+METER_FLOAT_MODELS = (211, 212, 213, 214)
+METER_MODELS = METER_INT_MODELS + METER_FLOAT_MODELS
+DECODABLE_MODELS = INVERTER_MODELS + (MPPT_MODEL, STORAGE_MODEL) + METER_MODELS
+
+# Registertyp -> (struct-Code, "not implemented"-Wert)
+_TYPES = {
+    "u16": ("H", 0xFFFF),
+    "enum16": ("H", 0xFFFF),
+    "bits16": ("H", 0xFFFF),
+    "s16": ("h", -0x8000),
+    "sf": ("h", -0x8000),
+    "acc32": ("I", 0),
+    "u32": ("I", 0xFFFFFFFF),
+    "bits32": ("I", 0xFFFFFFFF),
+    "str16": ("16s", b""),
+    "f32": ("f", None),  # NaN
+}
+
+Field = Tuple[str, str, Optional[str]]  # (name, type, scale factor field)
+
+
+def _phases(name: str, typ: str, sf: Optional[str], suffixes: Sequence[str] = ("phA", "phB", "phC")) -> List[Field]:
+    return [(name, typ, sf)] + [(f"{name}{s}", typ, sf) for s in suffixes]
+
+
+class Layout:
+    """Fixed register layout of one model (or of one repeating block)."""
+
+    def __init__(self, fields: Sequence[Field]):
+        self.fields = tuple(fields)
+        self.struct = struct.Struct(">" + "".join(_TYPES[t][0] for _, t, _ in self.fields))
+        self.length = self.struct.size // 2
+
+    def decode(self, raw: bytes, offset: int = 0, sfs: Optional[Mapping[str, int]] = None) -> dict:
+        return self._apply(self.struct.unpack_from(raw, offset), sfs)
+
+    def iter_decode(self, raw: bytes, sfs: Optional[Mapping[str, int]] = None):
+        for values in self.struct.iter_unpack(raw):
+            yield self._apply(values, sfs)
+
+    def _apply(self, values: tuple, sfs: Optional[Mapping[str, int]]) -> dict:
+        scales = dict(sfs or {})
+        for (name, typ, _), value in zip(self.fields, values):
+            if typ == "sf" and value != -0x8000:
+                scales[name] = value
+        out: dict = {}
+        for (name, typ, sf), value in zip(self.fields, values):
+            if typ == "sf" or name.startswith("_"):
+                continue
+            if typ == "str16":
+                out[name] = value.split(b"\x00", 1)[0].decode("ascii", "ignore").strip()
+                continue
+            if typ == "f32":
+                if not math.isnan(value):
+                    out[name] = value
+                continue
+            if value == _TYPES[typ][1] and typ != "acc32":
+                continue
+            if sf is None:
+                out[name] = value
+                continue
+            scale = scales.get(sf)
+            if scale is None:
+                continue
+            out[name] = round(value * 10.0 ** scale, max(0, -scale)) if scale < 0 else value * 10 ** scale
+        return out
+
+
+INVERTER_INT = Layout(
+    _phases("A", "u16", "A_SF") + [("A_SF", "sf", None)]
+    + [("PPVphAB", "u16", "V_SF"), ("PPVphBC", "u16", "V_SF"), ("PPVphCA", "u16", "V_SF")]
+    + [("PhVphA", "u16", "V_SF"), ("PhVphB", "u16", "V_SF"), ("PhVphC", "u16", "V_SF"), ("V_SF", "sf", None)]
+    + [("W", "s16", "W_SF"), ("W_SF", "sf", None), ("Hz", "u16", "Hz_SF"), ("Hz_SF", "sf", None)]
+    + [("VA", "s16", "VA_SF"), ("VA_SF", "sf", None), ("VAr", "s16", "VAr_SF"), ("VAr_SF", "sf", None)]
+    + [("PF", "s16", "PF_SF"), ("PF_SF", "sf", None), ("WH", "acc32", "WH_SF"), ("WH_SF", "sf", None)]
+    + [("DCA", "u16", "DCA_SF"), ("DCA_SF", "sf", None), ("DCV", "u16", "DCV_SF"), ("DCV_SF", "sf", None)]
+    + [("DCW", "s16", "DCW_SF"), ("DCW_SF", "sf", None)]
+    + [("TmpCab", "s16", "Tmp_SF"), ("TmpSnk", "s16", "Tmp_SF"), ("TmpTrns", "s16", "Tmp_SF"),
+       ("TmpOt", "s16", "Tmp_SF"), ("Tmp_SF", "sf", None)]
+    + [("St", "enum16", None), ("StVnd", "enum16", None), ("Evt1", "bits32", None), ("Evt2", "bits32", None)]
+    + [("EvtVnd1", "bits32", None), ("EvtVnd2", "bits32", None), ("EvtVnd3", "bits32", None),
+       ("EvtVnd4", "bits32", None)]
+)
+
+INVERTER_FLOAT = Layout(
+    [(name, "f32", None) for name in (
+        "A", "AphA", "AphB", "AphC", "PPVphAB", "PPVphBC", "PPVphCA", "PhVphA", "PhVphB", "PhVphC",
+        "W", "Hz", "VA", "VAr", "PF", "WH", "DCA", "DCV", "DCW", "TmpCab", "TmpSnk", "TmpTrns", "TmpOt",
+    )]
+    + [("St", "enum16", None), ("StVnd", "enum16", None), ("Evt1", "bits32", None), ("Evt2", "bits32", None)]
+    + [("EvtVnd1", "bits32", None), ("EvtVnd2", "bits32", None), ("EvtVnd3", "bits32", None),
+       ("EvtVnd4", "bits32", None)]
+)
+
+MPPT_FIXED = Layout([
+    ("DCA_SF", "sf", None), ("DCV_SF", "sf", None), ("DCW_SF", "sf", None), ("DCWH_SF", "sf", None),
+    ("Evt", "bits32", None), ("N", "u16", None), ("TmsPer", "u16", None),
+])
+MPPT_MODULE = Layout([
+    ("ID", "u16", None), ("IDStr", "str16", None), ("DCA", "u16", "DCA_SF"), ("DCV", "u16", "DCV_SF"),
+    ("DCW", "u16", "DCW_SF"), ("DCWH", "acc32", "DCWH_SF"), ("Tms", "u32", None), ("Tmp", "s16", None),
+    ("DCSt", "enum16", None), ("DCEvt", "bits32", None),
+])
+
+STORAGE = Layout([
+    ("WChaMax", "u16", "WChaMax_SF"), ("WChaGra", "u16", "WChaDisChaGra_SF"),
+    ("WDisChaGra", "u16", "WChaDisChaGra_SF"), ("StorCtl_Mod", "bits16", None),
+    ("VAChaMax", "u16", "VAChaMax_SF"), ("MinRsvPct", "u16", "MinRsvPct_SF"),
+    ("ChaState", "u16", "ChaState_SF"), ("StorAval", "u16", "StorAval_SF"), ("InBatV", "u16", "InBatV_SF"),
+    ("ChaSt", "enum16", None), ("OutWRte", "s16", "InOutWRte_SF"), ("InWRte", "s16", "InOutWRte_SF"),
+    ("InOutWRte_WinTms", "u16", None), ("InOutWRte_RvrtTms", "u16", None), ("InOutWRte_RmpTms", "u16", None),
+    ("ChaGriSet", "enum16", None),
+    ("WChaMax_SF", "sf", None), ("WChaDisChaGra_SF", "sf", None), ("VAChaMax_SF", "sf", None),
+    ("MinRsvPct_SF", "sf", None), ("ChaState_SF", "sf", None), ("StorAval_SF", "sf", None),
+    ("InBatV_SF", "sf", None), ("InOutWRte_SF", "sf", None),
+])
+
+_METER_ENERGY = (
+    ("TotWhExp", "TotWh_SF"), ("TotWhImp", "TotWh_SF"), ("TotVAhExp", "TotVAh_SF"), ("TotVAhImp", "TotVAh_SF"),
+)
+_METER_VARH = ("TotVArhImpQ1", "TotVArhImpQ2", "TotVArhExpQ3", "TotVArhExpQ4")
+
+METER_INT = Layout(
+    _phases("A", "s16", "A_SF") + [("A_SF", "sf", None)]
+    + _phases("PhV", "s16", "V_SF") + _phases("PPV", "s16", "V_SF", ("phAB", "phBC", "phCA")) + [("V_SF", "sf", None)]
+    + [("Hz", "s16", "Hz_SF"), ("Hz_SF", "sf", None)]
+    + _phases("W", "s16", "W_SF") + [("W_SF", "sf", None)]
+    + _phases("VA", "s16", "VA_SF") + [("VA_SF", "sf", None)]
+    + _phases("VAR", "s16", "VAR_SF") + [("VAR_SF", "sf", None)]
+    + _phases("PF", "s16", "PF_SF") + [("PF_SF", "sf", None)]
+    + _phases("TotWhExp", "acc32", "TotWh_SF") + _phases("TotWhImp", "acc32", "TotWh_SF") + [("TotWh_SF", "sf", None)]
+    + _phases("TotVAhExp", "acc32", "TotVAh_SF") + _phases("TotVAhImp", "acc32", "TotVAh_SF")
+    + [("TotVAh_SF", "sf", None)]
+    + [f for name in _METER_VARH for f in _phases(name, "acc32", "TotVArh_SF")] + [("TotVArh_SF", "sf", None)]
+    + [("Evt", "bits32", None)]
+)
+
+METER_FLOAT = Layout(
+    [
+        (name, "f32", None)
+        for base, sufs in (
+            ("A", ("phA", "phB", "phC")), ("PhV", ("phA", "phB", "phC")), ("PPV", ("phAB", "phBC", "phCA")),
+            ("Hz", ()), ("W", ("phA", "phB", "phC")), ("VA", ("phA", "phB", "phC")), ("VAR", ("phA", "phB", "phC")),
+            ("PF", ("phA", "phB", "phC")),
+        )
+        for name in [base] + [base + s for s in sufs]
+    ]
+    + [(name, "f32", None) for base, _ in _METER_ENERGY for name in [base] + [base + s for s in ("phA", "phB", "phC")]]
+    + [(name, "f32", None) for base in _METER_VARH for name in [base] + [base + s for s in ("phA", "phB", "phC")]]
+    + [("Evt", "bits32", None)]
+)
+
+_LAYOUTS: Dict[int, Layout] = {
+    **{m: INVERTER_INT for m in INVERTER_INT_MODELS},
+    **{m: INVERTER_FLOAT for m in INVERTER_FLOAT_MODELS},
+    STORAGE_MODEL: STORAGE,
+    **{m: METER_INT for m in METER_INT_MODELS},
+    **{m: METER_FLOAT for m in METER_FLOAT_MODELS},
+}
+
+
+def _typed(name: str, layout: Layout) -> type:
+    kinds = {"str16": str, "f32": float}
+    return TypedDict(
+        name,
+        {n: kinds.get(t, float if sf else int) for n, t, sf in layout.fields if t != "sf"},
+        total=False,
+    )
+
+
+InverterData = _typed("InverterData", INVERTER_INT)
+MpptModuleData = _typed("MpptModuleData", MPPT_MODULE)
+StorageData = _typed("StorageData", STORAGE)
+MeterData = _typed("MeterData", METER_INT)
+
+
+class MpptData(TypedDict, total=False):
+    Evt: int
+    N: int
+    TmsPer: int
+    modules: List[dict]
+
+
+def regs_to_bytes(regs: Sequence[int]) -> bytes:
+    buf = array("H", regs)
+    if sys.byteorder == "little":
+        buf.byteswap()
+    return buf.tobytes()
+
+
+def decode(model_id: int, body: Sequence[int]) -> Optional[dict]:
+    """Decoded model body, or None for models without a layout / too short bodies."""
+    raw = body if isinstance(body, (bytes, bytearray)) else regs_to_bytes(body)
+    if model_id == MPPT_MODEL:
+        return _decode_mppt(raw)
+    layout = _LAYOUTS.get(model_id)
+    if layout is None or len(raw) < layout.struct.size:
+        return None
+    return layout.decode(raw)
+
+
+def _decode_mppt(raw: bytes) -> Optional[MpptData]:
+    if len(raw) < MPPT_FIXED.struct.size:
+        return None
+    fixed_values = MPPT_FIXED.struct.unpack_from(raw)
+    sfs = {name: v for (name, t, _), v in zip(MPPT_FIXED.fields, fixed_values) if t == "sf" and v != -0x8000}
+    out: MpptData = MPPT_FIXED.decode(raw)
+    n = int(out.get("N") or 0)
+    size = MPPT_MODULE.struct.size
+    start = MPPT_FIXED.struct.size
+    end = start + min(n, (len(raw) - start) // size) * size
+    out["modules"] = list(MPPT_MODULE.iter_decode(raw[start:end], sfs))
+    return out
+
+
+# ----------------------------------------------------------------------------------
+# Model chain
+# ----------------------------------------------------------------------------------
+Reader = Callable[[int, int], Optional[Sequence[int]]]
+
+
+def walk(read: Reader, bases: Sequence[int] = BASES) -> Dict[int, Tuple[int, int]]:
+    """Follows the chain from the SunS marker; read(addr, qty) returns None if unreadable.
+
+    {model_id: (body_start, body_len)} for the first occurrence of each model.
+    """
+    for base in bases:
+        marker = read(base, 2)
+        if marker is None or tuple(marker) != MARKER:
+            continue
+        index: Dict[int, Tuple[int, int]] = {}
+        addr = base + 2
+        for _ in range(MAX_MODELS):
+            header = read(addr, 2)
+            if header is None or len(header) < 2:
+                break
+            model_id, length = header[0], header[1]
+            if model_id == END_ID or length == 0:
+                break
+            index.setdefault(model_id, (addr + 2, length))
+            addr += 2 + length
+        return index
+    return {}
+
+
+def index_from_values(values: Mapping[int, int], bases: Sequence[int] = BASES) -> Dict[int, Tuple[int, int]]:
+    """walk() over already-read registers, e.g. a dump."""
+
+    def read(addr: int, qty: int) -> Optional[List[int]]:
+        regs = [values.get(addr + i) for i in range(qty)]
+        return None if any(r is None for r in regs) else regs
+
+    return walk(read, bases)
+
+
+def body(values: Mapping[int, int], span: Tuple[int, int]) -> List[int]:
+    start, length = span
+    return [values.get(start + i, 0) for i in range(length)]
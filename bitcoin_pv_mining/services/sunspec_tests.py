@@ -0,0 +1,71 @@
+import struct
+import unittest
+
+from bitcoin_pv_mining.services import sunspec
+
+
+def _f32(value):
+    return list(struct.unpack(">HH", struct.pack(">f", value)))
+
+
+def _chain(models, base=40000):
+    regs = list(sunspec.MARKER)
+    for model_id, body in models:
+        regs += [model_id, len(body)] + body
+    regs += [sunspec.END_ID, 0]
+    return {base + i: v for i, v in enumerate(regs)}
+
+
+class SunSpecTests(unittest.TestCase):
+    def test_int_inverter_applies_scale_factors_and_skips_not_implemented(self):
+        body = [0] * 50
+        body[12], body[13] = 51234, 0xFFFF        # W (int16 -> -14302), W_SF = -1
+        body[14], body[15] = 5001, 0xFFFE         # Hz = 50.01
+        body[29], body[30] = 5200, 0              # DCW
+        body[31] = 0x8000                         # TmpCab not implemented
+        data = sunspec.decode(103, body)
+        self.assertEqual(data["W"], -1430.2)
+        self.assertEqual(data["Hz"], 50.01)
+        self.assertEqual(data["DCW"], 5200)
+        self.assertNotIn("TmpCab", data)
+        self.assertNotIn("W_SF", data)
+
+    def test_float_meter(self):
+        body = [0] * 124
+        body[26:28] = _f32(-1500.0)              # W
+        body[24:26] = [0x7FC0, 0]                 # Hz NaN -> not implemented
+        data = sunspec.decode(213, body)
+        self.assertEqual(data["W"], -1500.0)
+        self.assertNotIn("Hz", data)
+
+    def test_storage_model(self):
+        body = [0] * 24
+        body[0], body[16] = 520, 1                # WChaMax = 5200 W
+        body[5], body[19] = 1000, 0xFFFE          # MinRsvPct = 10.00 %
+        body[3] = 0b10                            # StorCtl_Mod
+        data = sunspec.decode(124, body)
+        self.assertEqual(data["WChaMax"], 5200)
+        self.assertEqual(data["MinRsvPct"], 10.0)
+        self.assertEqual(data["StorCtl_Mod"], 2)
+
+    def test_mppt_modules_via_iter_unpack(self):
+        body = [0] * (8 + 2 * 20)
+        body[2], body[6] = 0xFFFF, 2              # DCW_SF = -1, N = 2
+        for i, (name, w) in enumerate((("String 1", 30000), ("StCha 3", 5000))):
+            off = 8 + i * 20
+            body[off] = i + 1
+            body[off + 1:off + 9] = struct.unpack(">8H", name.encode().ljust(16, b"\x00"))
+            body[off + 11] = w
+        data = sunspec.decode(160, body)
+        self.assertEqual([(m["IDStr"], m["DCW"]) for m in data["modules"]], [("String 1", 3000.0), ("StCha 3", 500.0)])
+
+    def test_walk_builds_index_from_marker(self):
+        values = _chain([(1, [0] * 66), (103, [0] * 50), (160, [0] * 48)])
+        index = sunspec.index_from_values(values)
+        self.assertEqual(index, {1: (40004, 66), 103: (40072, 50), 160: (40124, 48)})
+        self.assertEqual(sunspec.decode(999, [0] * 4), None)
+        self.assertEqual(sunspec.index_from_values({}), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
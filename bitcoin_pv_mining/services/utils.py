@@ -13,7 +13,7 @@ def _normalize_config_dir(path: str) -> str:
     return os.path.join(raw, "pv_mining_addon")
 
 
-def _resolve_config_dir() -> str:
+def _env_config_dir() -> str:
     env_candidates = [
         _normalize_config_dir(os.getenv("PV_MINING_CONFIG_DIR", "")),
         _normalize_config_dir(os.getenv("CONFIG_DIR", "")),
@@ -21,6 +21,13 @@ def _resolve_config_dir() -> str:
     for path in env_candidates:
         if path:
             return path
+    return ""
+
+
+def _resolve_config_dir() -> str:
+    env_dir = _env_config_dir()
+    if env_dir:
+        return env_dir
 
     if os.path.isdir("/config"):
         return "/config/pv_mining_addon"
@@ -33,6 +40,9 @@ def _resolve_config_dir() -> str:
 
 
 CONFIG_DIR = _resolve_config_dir()
+# Add-on-Pfad der Store-Module; nur per PV_MINING_CONFIG_DIR / CONFIG_DIR umlenkbar (Tests, Benchmarks)
+CONFIG_DIR_OVERRIDE = _env_config_dir()
+ADDON_CONFIG_DIR = CONFIG_DIR_OVERRIDE or "/config/pv_mining_addon"
 SENSORS_PATH = os.path.join(CONFIG_DIR, "sensors.yaml")
 STATE_PATH = os.path.join(CONFIG_DIR, "state.json")
 _STATE_LOCK = threading.RLock()
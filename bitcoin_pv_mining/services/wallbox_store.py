@@ -1,7 +1,8 @@
 # services/wallbox_store.py
 import os, yaml
+from services.utils import ADDON_CONFIG_DIR
 
-CONFIG_DIR = "/config/pv_mining_addon"
+CONFIG_DIR = ADDON_CONFIG_DIR
 FILE = os.path.join(CONFIG_DIR, "wallbox_store.yaml")
 
 DEFAULTS = {
@@ -10,12 +11,15 @@ DEFAULTS = {
     "max_charge_kw": 11.0,         # 11kW oder 22kW
     "phases": 3,                   # 1 oder 3
     "max_current_a": 16,           # 16A bei 11kW; 32A bei 22kW
+    "min_current_a": 6,            # kleinster Ladestrom (IEC 61851)
 
     # Entities
     "connected_entity": "",        # bool: EV connected?
     "power_entity": "",            # kW: aktuelle Ladeleistung
     "energy_session_entity": "",   # kWh: geladene Energie aktuelle Session
     "ready_entity": "",            # bool: True = charging/running
+    "current_entity": "",          # number/input_number: Ladestrom-Sollwert (A)
+    "phase_switch_entity": "",     # optional: switch (on = 3p) oder number (1/3)
 
     # Actions
     "action_on_entity": "",        # start charging
@@ -25,6 +29,8 @@ DEFAULTS = {
     "target_energy_kwh": 10.0,     # Wunschladung für Session (optional)
     "solar_only": True,            # nur PV-Überschuss laden (Auto)
     "min_surplus_kw": 1.0,         # Mindest-Überschuss zum Start (Auto)
+    "phase_switch_hysteresis_kw": 0.5,   # 1p -> 3p erst ab 3p-Minimum + Hysterese
+    "phase_switch_min_interval_s": 300,  # Mindestabstand zwischen Umschaltungen
 }
 
 def _load():
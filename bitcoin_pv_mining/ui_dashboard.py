@@ -8,7 +8,7 @@ from dash import html, dcc
 from dash.dependencies import Input, Output
 
 from services.ha_sensors import get_sensor_value
-from services.utils import load_yaml
+from services.utils import load_yaml, ADDON_CONFIG_DIR
 from services.battery_store import get_var as bat_get
 from services.electricity_store import current_price, currency_symbol, get_var as elec_get
 from services.heater_store import resolve_entity_id as heater_resolve_entity, get_var as heat_get_var
@@ -20,6 +20,7 @@ from services.pv_ramp_up import get_pv_ramp_snapshot
 from services.settings_store import get_var as set_get, is_orchestrator_enabled
 from services.wallbox_store import get_var as wb_get
 from services.sensor_mapping import resolve_sensor_id as resolve_runtime_sensor_id
+from services import market_data
 try:
     from services.dev_mock import (
         get_virtual_value,
@@ -59,7 +60,7 @@ except Exception:
 from ui_pages.common import footer_license, page_wrap
 
 
-CONFIG_DIR = "/config/pv_mining_addon"
+CONFIG_DIR = ADDON_CONFIG_DIR
 DASHB_DEF = os.path.join(CONFIG_DIR, "sensors.yaml")
 DASHB_OVR = os.path.join(CONFIG_DIR, "sensors.local.yaml")
 MAIN_CFG = os.path.join(CONFIG_DIR, "pv_mining_local_config.yaml")
@@ -940,10 +941,15 @@ def register_callbacks(app):
         Input("btc-refresh", "n_intervals")
     )
     def update_btc_display(_):
-        config = load_yaml(os.path.join(CONFIG_DIR, "pv_mining_local_config.yaml"), {})
-        entities = config.get("entities", {})
-        price = get_virtual_value(VIRTUAL_BTC_PRICE, entities.get("sensor_btc_price"))
-        hashrate = get_virtual_value(VIRTUAL_BTC_HASHRATE, entities.get("sensor_btc_hashrate"))
+        price = market_data.get_fresh(market_data.PRICE)
+        hashrate = market_data.get_fresh(market_data.HASHRATE)
+        if price is None or hashrate is None:
+            config = load_yaml(os.path.join(CONFIG_DIR, "pv_mining_local_config.yaml"), {})
+            entities = config.get("entities", {})
+            price = entities.get("sensor_btc_price") if price is None else price
+            hashrate = entities.get("sensor_btc_hashrate") if hashrate is None else hashrate
+        price = get_virtual_value(VIRTUAL_BTC_PRICE, price)
+        hashrate = get_virtual_value(VIRTUAL_BTC_HASHRATE, hashrate)
 
         if isinstance(price, (int, float)):
             price_str = f"BTC Price: ${price:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
@@ -4,9 +4,9 @@ import yaml
 import dash
 from dash import html, dcc
 
-from services.utils import load_yaml
+from services.utils import load_yaml, ADDON_CONFIG_DIR
 
-CONFIG_DIR = "/config/pv_mining_addon"
+CONFIG_DIR = ADDON_CONFIG_DIR
 MAIN_CFG = os.path.join(CONFIG_DIR, "pv_mining_local_config.yaml")
 
 ADDON_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -5,8 +5,9 @@ from dash.dependencies import Input, Output, State
 from services.ha_sensors import list_all_sensors
 from services.electricity_store import resolve_sensor_id, set_mapping, get_var as elec_get_var, set_vars as elec_set_vars
 from ui_pages.common import footer_license
+from services.utils import ADDON_CONFIG_DIR
 
-CONFIG_DIR = "/config/pv_mining_addon"
+CONFIG_DIR = ADDON_CONFIG_DIR
 ELEC_DEF = os.path.join(CONFIG_DIR, "electricity.yaml")
 ELEC_OVR = os.path.join(CONFIG_DIR, "electricity.local.yaml")
 MAIN_CFG = os.path.join(CONFIG_DIR, "pv_mining_local_config.yaml")
@@ -12,7 +12,7 @@ from services.miners_store import list_miners, add_miner, update_miner, delete_m
 from services.settings_store import get_var as set_get, set_vars as set_set
 from services.electricity_store import current_price as elec_price, get_var as elec_get, currency_symbol
 from services.license import is_premium_enabled
-from services.utils import load_yaml
+from services.utils import load_yaml, ADDON_CONFIG_DIR, CONFIG_DIR_OVERRIDE
 from services.ha_sensors import get_sensor_value
 from services.cooling_store import get_cooling, set_cooling
 from services.ha_entities import list_actions, call_action, list_ready_entities
@@ -24,7 +24,7 @@ from services.power_planner import incremental_mix_for
 from services.consumers.orchestrator import log_dry_run_plan
 from services.log import dry
 
-CONFIG_DIR = "/config/pv_mining_addon"
+CONFIG_DIR = ADDON_CONFIG_DIR
 SENS_DEF = os.path.join(CONFIG_DIR, "sensors.yaml")
 SENS_OVR = os.path.join(CONFIG_DIR, "sensors.local.yaml")
 UI_BORDER = "rgba(191, 205, 229, 0.18)"
@@ -33,9 +33,9 @@ UI_TEXT = "#f4f7ff"
 UI_TEXT_SOFT = "#c9d4e8"
 
 def _resolve_log_path(filename: str) -> str:
-    # HA Add-on: /config ist vorhanden
-    if os.path.isdir("/config"):
-        base = "/config/pv_mining_addon"
+    # HA Add-on: /config ist vorhanden (oder Config-Dir explizit umgelenkt)
+    if CONFIG_DIR_OVERRIDE or os.path.isdir("/config"):
+        base = CONFIG_DIR
     else:
         # Lokal: neben diesem File
         base = os.path.join(os.path.dirname(__file__), "..", "logs")
@@ -437,6 +437,41 @@ def _miner_card(m: dict, idx: int, premium_on: bool, sym: str, ha_actions: list[
             ], style={"flex":"1","marginLeft":"10px"}),
         ], style={"display":"flex","gap":"10px","marginTop":"8px"}),
 
+        html.Div([
+            html.Label("Miner API host (optional, port 4028)"),
+            dcc.Input(id={"type": "m-api-host", "mid": mid}, type="text", value=m.get("api_host", "") or "",
+                      placeholder="192.168.1.50 or 192.168.1.50:4028", style={"width": "100%"},
+                      persistence=True, persistence_type="memory"),
+        ], style={"marginTop": "8px"}),
+
+        # Variable Leistung: Planner verteilt stufenlos zwischen min und max
+        html.Div([
+            html.Div([
+                html.Label("Variable power"),
+                dcc.Checklist(id={"type": "m-var", "mid": mid}, options=[{"label": " on", "value": "on"}],
+                              value=(["on"] if str(m.get("power_mode") or "") == "variable" else []),
+                              persistence=True, persistence_type="memory"),
+            ], style={"flex": "1"}),
+            html.Div([
+                html.Label("Min (kW)"),
+                number_stepper({"type": "m-var-min", "mid": mid}, _num(m.get("min_kw", 0)), step=0.1, min=0, width_px=140, persistence=True, persistence_type="memory"),
+            ], style={"flex": "1", "marginLeft": "10px"}),
+            html.Div([
+                html.Label("Max (kW)"),
+                number_stepper({"type": "m-var-max", "mid": mid}, _num(m.get("max_kw", m.get("power_kw", 0))), step=0.1, min=0, width_px=140, persistence=True, persistence_type="memory"),
+            ], style={"flex": "1", "marginLeft": "10px"}),
+            html.Div([
+                html.Label("Step (kW)"),
+                number_stepper({"type": "m-var-step", "mid": mid}, _num(m.get("step_kw", 0.1)), step=0.05, min=0.01, width_px=140, persistence=True, persistence_type="memory"),
+            ], style={"flex": "1", "marginLeft": "10px"}),
+        ], style={"display": "flex", "gap": "10px", "marginTop": "8px", "flexWrap": "wrap"}),
+        html.Div([
+            html.Label("Power target entity (number, W)"),
+            dcc.Input(id={"type": "m-var-entity", "mid": mid}, type="text", value=m.get("power_target_entity", "") or "",
+                      placeholder="number.miner_power_limit", style={"width": "100%"},
+                      persistence=True, persistence_type="memory"),
+        ], style={"marginTop": "8px"}),
+
         html.Div([
             html.Div([
                 html.Label("Power ON action"),
@@ -738,10 +773,17 @@ def register_callbacks(app):
         State({"type": "m-state-timeout", "mid": ALL}, "value"),
         State({"type": "m-minrun", "mid": ALL}, "value"),
         State({"type": "m-kind", "mid": ALL}, "value"),
+        State({"type": "m-api-host", "mid": ALL}, "value"),
+        State({"type": "m-var", "mid": ALL}, "value"),
+        State({"type": "m-var-min", "mid": ALL}, "value"),
+        State({"type": "m-var-max", "mid": ALL}, "value"),
+        State({"type": "m-var-step", "mid": ALL}, "value"),
+        State({"type": "m-var-entity", "mid": ALL}, "value"),
         prevent_initial_call=True
     )
     def _save_miner(nclicks_list, save_ids, names, enabled_vals, mode_vals, on_vals,
-                    ths_vals, pkw_vals, reqcool_vals, act_on_vals, act_off_vals, state_vals, state_timeout_vals, minrun_vals, kinds_vals):
+                    ths_vals, pkw_vals, reqcool_vals, act_on_vals, act_off_vals, state_vals, state_timeout_vals, minrun_vals, kinds_vals,
+                    api_host_vals, var_vals, var_min_vals, var_max_vals, var_step_vals, var_entity_vals):
         trg = callback_context.triggered_id
         if not trg:
             raise dash.exceptions.PreventUpdate
@@ -773,6 +815,12 @@ def register_callbacks(app):
         act_off = (act_off_vals[idx] if idx < len(act_off_vals) else None) or ""
         state_ent = (state_vals[idx] if idx < len(state_vals) else None) or ""
         state_timeout_s = int(_num(state_timeout_vals[idx] if idx < len(state_timeout_vals) else 10, 10) or 10)
+        api_host = str((api_host_vals[idx] if idx < len(api_host_vals) else None) or "").strip()
+        variable = bool(var_vals[idx] and "on" in var_vals[idx]) if idx < len(var_vals) else False
+        var_min = _num(var_min_vals[idx] if idx < len(var_min_vals) else 0.0, 0.0)
+        var_max = _num(var_max_vals[idx] if idx < len(var_max_vals) else pkw, pkw)
+        var_step = _num(var_step_vals[idx] if idx < len(var_step_vals) else 0.1, 0.1)
+        var_entity = str((var_entity_vals[idx] if idx < len(var_entity_vals) else None) or "").strip()
 
         # Vor dem Schreiben alten Zustand für Vergleich holen
         from services.miners_store import list_miners, update_miner
@@ -796,7 +844,17 @@ def register_callbacks(app):
             state_entity=state_ent,
             state_timeout_s=max(1, state_timeout_s),
             is_miner=is_miner,
+            api_host=api_host,
+            power_mode="variable" if variable else "fixed",
+            min_kw=max(0.0, var_min),
+            max_kw=max(0.0, var_max),
+            step_kw=max(0.01, var_step),
+            power_target_entity=var_entity,
         )
+        if api_host and enable:
+            # Telemetrie-Poller startet erst, wenn ein Miner eine API-Adresse hat
+            from services import miner_api
+            miner_api.start_from_settings()
 
         # HA-Aktion NUR bei Save ausführen – und nur im Manual-Mode
         if enable and mode == "manual" and (want_on != old_on):
@@ -2,10 +2,10 @@ import os
 from dash import html, dcc
 from dash.dependencies import Input, Output, State
 from services.ha_sensors import list_all_sensors
-from services.utils import load_yaml, save_yaml
+from services.utils import load_yaml, save_yaml, ADDON_CONFIG_DIR
 from ui_pages.common import footer_license
 
-CONFIG_DIR = "/config/pv_mining_addon"
+CONFIG_DIR = ADDON_CONFIG_DIR
 SENS_DEF = os.path.join(CONFIG_DIR, "sensors.yaml")
 SENS_OVR = os.path.join(CONFIG_DIR, "sensors.local.yaml")
 MAIN_CFG = os.path.join(CONFIG_DIR, "pv_mining_local_config.yaml")
@@ -9,18 +9,17 @@ from dash.exceptions import PreventUpdate
 from services.settings_store import get_var as set_get, set_vars as set_set
 from services.electricity_store import resolve_sensor_id as elec_resolve, set_mapping as elec_set_mapping, get_var as elec_get, set_vars as elec_set_vars
 from services.ha_sensors import list_all_sensors, get_sensor_value
-from services.forex import usd_to_eur_rate
 from services.miners_store import list_miners
 from services.cooling_store import get_cooling
 from services.battery_store import get_var as bat_get
 from services.wallbox_store import get_var as wb_get
 from services.heater_store import resolve_entity_id as heat_resolve, get_var as heat_get
 from ui_pages.common import footer_license, number_stepper
-from services.utils import load_yaml, save_yaml
+from services.utils import load_yaml, save_yaml, ADDON_CONFIG_DIR
 
 PRIO_KEY = "priority_order"
 PRIO_KEY_JSON = "priority_order_json"
-CONFIG_DIR = "/config/pv_mining_addon"
+CONFIG_DIR = ADDON_CONFIG_DIR
 SENS_DEF = os.path.join(CONFIG_DIR, "sensors.yaml")
 SENS_OVR = os.path.join(CONFIG_DIR, "sensors.local.yaml")
 MAIN_CFG = os.path.join(CONFIG_DIR, "pv_mining_local_config.yaml")
@@ -19,6 +19,7 @@ def layout():
     data = {k: wb_get(k) for k in [
         "enabled","mode","max_charge_kw","phases","max_current_a",
         "connected_entity","power_entity","energy_session_entity","ready_entity",
+        "current_entity","phase_switch_entity",
         "action_on_entity","action_off_entity",
         "target_energy_kwh","solar_only","min_surplus_kw"
     ]}
@@ -88,6 +89,17 @@ def layout():
             ], style={"flex":"1","marginLeft":"10px"}),
         ], style={"display":"flex","flexWrap":"wrap","gap":"10px","marginTop":"8px"}),
 
+        html.Div([
+            html.Div([
+                html.Label("Charge current setpoint (A) entity"),
+                dcc.Input(id="wb-current", type="text", value=data["current_entity"], placeholder="number.wallbox_charge_current", style={"minWidth":"300px"})
+            ], style={"flex":"1"}),
+            html.Div([
+                html.Label("1p/3p switch entity (optional, on = 3p)"),
+                dcc.Input(id="wb-phase-switch", type="text", value=data["phase_switch_entity"], placeholder="switch.wallbox_3_phases", style={"minWidth":"300px"})
+            ], style={"flex":"1","marginLeft":"10px"}),
+        ], style={"display":"flex","flexWrap":"wrap","gap":"10px","marginTop":"8px"}),
+
         html.Div([
             html.Div([
                 html.Label("Target energy this session (kWh)"),
@@ -128,6 +140,8 @@ def register_callbacks(app):
         State("wb-power","value"),
         State("wb-energy","value"),
         State("wb-ready","value"),
+        State("wb-current","value"),
+        State("wb-phase-switch","value"),
         State("wb-act-on","value"),
         State("wb-act-off","value"),
         State("wb-target-kwh","value"),
@@ -135,7 +149,7 @@ def register_callbacks(app):
         State("wb-min-surplus","value"),
         prevent_initial_call=True
     )
-    def _save(n, en, mode, maxkw, ph, maxa, conn_e, pwr_e, ene_e, ready_e, aon, aoff, tgt_kwh, solar_only, min_surp):
+    def _save(n, en, mode, maxkw, ph, maxa, conn_e, pwr_e, ene_e, ready_e, cur_e, phase_e, aon, aoff, tgt_kwh, solar_only, min_surp):
         if not n:
             raise dash.exceptions.PreventUpdate
         wb_set(
@@ -148,6 +162,8 @@ def register_callbacks(app):
             power_entity=(pwr_e or "").strip(),
             energy_session_entity=(ene_e or "").strip(),
             ready_entity=(ready_e or "").strip(),
+            current_entity=(cur_e or "").strip(),
+            phase_switch_entity=(phase_e or "").strip(),
             action_on_entity=(aon or ""),
             action_off_entity=(aoff or ""),
             target_energy_kwh=_num(tgt_kwh, 10.0),
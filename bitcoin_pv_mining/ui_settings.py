@@ -3,8 +3,9 @@ import os
 import requests
 from dash import html, dcc, Input, Output, State
 import dash
+from services.utils import ADDON_CONFIG_DIR
 
-CONFIG_DIR = "/config/pv_mining_addon"
+CONFIG_DIR = ADDON_CONFIG_DIR
 CONFIG_PATH = os.path.join(CONFIG_DIR, "pv_mining_local_config.yaml")
 
 def recreate_config_file():
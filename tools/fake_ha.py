@@ -0,0 +1,624 @@
+from __future__ import annotations
+
+import argparse
+import base64
+import csv
+import hashlib
+import json
+import random
+import socket
+import struct
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlsplit
+
+# Das Add-on spricht fest http://supervisor/... an; Clients werden per HTTP_PROXY
+# auf diesen Server umgelenkt (absolute URI im Request), direkte Pfade gehen auch.
+API_PREFIXES = ("/core/api", "/api")
+WEBSOCKET_PATHS = ("/core/websocket", "/api/websocket")
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+_TOGGLE_DOMAINS = ("switch", "input_boolean", "light", "fan")
+
+# Fehlerinjektion: Status 0 = Verbindung ohne Antwort schließen
+DROP = 0
+
+
+def _now_iso() -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%S+00:00", time.gmtime())
+
+
+# ----------------------------------------------------------------------------------
+# Sensor-Traces
+# ----------------------------------------------------------------------------------
+@dataclass
+class TraceStep:
+    t: float
+    states: dict                       # entity_id -> state | {"state": ..., "attributes": {...}}
+
+
+@dataclass
+class Trace:
+    steps: list[TraceStep] = field(default_factory=list)
+
+    def __post_init__(self):
+        self.steps.sort(key=lambda s: s.t)
+
+    @property
+    def duration(self) -> float:
+        return self.steps[-1].t if self.steps else 0.0
+
+    @classmethod
+    def load(cls, path: str | Path) -> "Trace":
+        """
+        .json: [{"t": 0, "states": {"sensor.pv": 3.2, ...}}, ...]
+        .csv:  t,entity_id,state   (eine Zeile je Wert, gleiche t werden zusammengefasst)
+        """
+        path = Path(path)
+        if path.suffix.lower() == ".csv":
+            by_t: dict[float, dict] = {}
+            with path.open("r", encoding="utf-8", newline="") as f:
+                for row in csv.DictReader(f):
+                    by_t.setdefault(float(row["t"]), {})[row["entity_id"]] = row["state"]
+            return cls([TraceStep(t, states) for t, states in by_t.items()])
+        raw = json.loads(path.read_text(encoding="utf-8"))
+        return cls([TraceStep(float(s["t"]), dict(s.get("states") or {})) for s in raw])
+
+
+@dataclass
+class FailureRule:
+    route: str                         # Präfix des Routen-Schlüssels, z. B. "POST /services/switch"
+    status: int = 500
+    times: int | None = None           # None = dauerhaft
+
+
+# ----------------------------------------------------------------------------------
+# WebSocket (RFC 6455, nur Textframes, ohne Extensions)
+# ----------------------------------------------------------------------------------
+def _ws_accept_key(key: str) -> str:
+    return base64.b64encode(hashlib.sha1((key + WS_GUID).encode("ascii")).digest()).decode("ascii")
+
+
+def _ws_read_frame(rfile) -> tuple[int, bytes] | None:
+    head = rfile.read(2)
+    if len(head) < 2:
+        return None
+    opcode = head[0] & 0x0F
+    masked = head[1] & 0x80
+    length = head[1] & 0x7F
+    if length == 126:
+        length = struct.unpack(">H", rfile.read(2))[0]
+    elif length == 127:
+        length = struct.unpack(">Q", rfile.read(8))[0]
+    mask = rfile.read(4) if masked else b""
+    payload = rfile.read(length)
+    if masked:
+        payload = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+    return opcode, payload
+
+
+def _ws_frame(payload: bytes, opcode: int = 0x1) -> bytes:
+    n = len(payload)
+    if n < 126:
+        head = struct.pack(">BB", 0x80 | opcode, n)
+    elif n < 1 << 16:
+        head = struct.pack(">BBH", 0x80 | opcode, 126, n)
+    else:
+        head = struct.pack(">BBQ", 0x80 | opcode, 127, n)
+    return head + payload
+
+
+class _WsClient:
+    def __init__(self, wfile):
+        self._wfile = wfile
+        self._lock = threading.Lock()
+        self.subscriptions: dict[int, str | None] = {}    # msg id -> event_type (None = alle)
+
+    def send(self, msg: dict) -> None:
+        raw = _ws_frame(json.dumps(msg).encode("utf-8"))
+        with self._lock:
+            self._wfile.write(raw)
+            self._wfile.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            try:
+                self._wfile.write(_ws_frame(b"", opcode=0x8))
+                self._wfile.flush()
+            except OSError:
+                pass
+
+
+# ----------------------------------------------------------------------------------
+# Server
+# ----------------------------------------------------------------------------------
+class FakeHA:
+    def __init__(self, states: dict | None = None, host: str = "127.0.0.1", port: int = 0, *,
+                 latency_s: float = 0.0, jitter_s: float = 0.0, failure_rate: float = 0.0,
+                 websocket: bool = False, call_log: str | Path | None = None, seed: int | None = None):
+        self._lock = threading.Lock()
+        self._states: dict[str, dict] = {}
+        self.counts: Counter = Counter()
+        self.service_calls: list[dict] = []
+        self.latency_s = float(latency_s)
+        self.jitter_s = float(jitter_s)
+        self.failure_rate = float(failure_rate)
+        self.failure_rules: list[FailureRule] = []
+        self.websocket = bool(websocket)
+        self.call_log = Path(call_log) if call_log else None
+        self._rng = random.Random(seed)
+        self._ws_clients: set[_WsClient] = set()
+        self._trace: Trace | None = None
+        self._trace_pos = 0
+        self._player: threading.Thread | None = None
+        self._player_stop = threading.Event()
+        for entity_id, value in (states or {}).items():
+            self.set_state(entity_id, value)
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    # ------------------------------------------------------------------
+    @property
+    def address(self) -> tuple[str, int]:
+        host, port = self._server.server_address[:2]
+        return host, port
+
+    @property
+    def url(self) -> str:
+        host, port = self.address
+        return f"http://{host}:{port}"
+
+    def proxy_env(self) -> dict:
+        """Env für Prozesse/Threads, deren http://supervisor-Aufrufe hier landen sollen."""
+        return {
+            "HTTP_PROXY": self.url,
+            "http_proxy": self.url,
+            # HTTPS endet hier mit 501 – hält Benchmarks/Tests offline
+            "HTTPS_PROXY": self.url,
+            "https_proxy": self.url,
+            "NO_PROXY": "127.0.0.1,localhost",
+            "no_proxy": "127.0.0.1,localhost",
+            "SUPERVISOR_TOKEN": "fake-ha",
+        }
+
+    def start(self) -> "FakeHA":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._server.serve_forever, name="fake-ha", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.stop_trace()
+        with self._lock:
+            clients = list(self._ws_clients)
+        for client in clients:
+            client.close()
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread = None
+
+    def __enter__(self) -> "FakeHA":
+        return self.start()
+
+    def __exit__(self, *_exc) -> None:
+        self.stop()
+
+    # ------------------------------------------------------------------
+    # Zustände
+    # ------------------------------------------------------------------
+    def set_state(self, entity_id: str, state, attributes: dict | None = None) -> None:
+        with self._lock:
+            prev = self._states.get(entity_id)
+            attrs = dict((prev or {}).get("attributes") or {})
+            attrs.update(attributes or {})
+            new = {
+                "entity_id": entity_id,
+                "state": str(state),
+                "attributes": attrs,
+                "last_changed": _now_iso() if not prev or prev["state"] != str(state) else prev["last_changed"],
+                "last_updated": _now_iso(),
+            }
+            self._states[entity_id] = new
+            clients = list(self._ws_clients)
+        if clients:
+            event = {
+                "event_type": "state_changed",
+                "data": {"entity_id": entity_id, "old_state": prev, "new_state": new},
+                "origin": "LOCAL",
+                "time_fired": new["last_updated"],
+            }
+            self._publish(clients, event)
+
+    def set_states(self, states: dict) -> None:
+        for entity_id, value in (states or {}).items():
+            if isinstance(value, dict):
+                self.set_state(entity_id, value.get("state"), value.get("attributes"))
+            else:
+                self.set_state(entity_id, value)
+
+    def get_state(self, entity_id: str) -> dict | None:
+        with self._lock:
+            st = self._states.get(entity_id)
+            return dict(st) if st else None
+
+    # ------------------------------------------------------------------
+    # Traces: deterministisch per advance_to(t) oder in Echtzeit per play()
+    # ------------------------------------------------------------------
+    def load_trace(self, trace: Trace | str | Path) -> Trace:
+        self.stop_trace()
+        self._trace = trace if isinstance(trace, Trace) else Trace.load(trace)
+        self._trace_pos = 0
+        return self._trace
+
+    def advance_to(self, t: float) -> int:
+        """Wendet alle noch offenen Trace-Schritte mit step.t <= t an; gibt deren Anzahl zurück."""
+        if self._trace is None:
+            return 0
+        applied = 0
+        steps = self._trace.steps
+        while self._trace_pos < len(steps) and steps[self._trace_pos].t <= t:
+            self.set_states(steps[self._trace_pos].states)
+            self._trace_pos += 1
+            applied += 1
+        return applied
+
+    def play(self, speed: float = 1.0, loop: bool = False) -> None:
+        if self._trace is None:
+            raise RuntimeError("no trace loaded")
+        self.stop_trace()
+        self._player_stop.clear()
+        speed = max(1e-6, float(speed))
+
+        def run():
+            while not self._player_stop.is_set():
+                self._trace_pos = 0
+                t0 = time.monotonic()
+                while self._trace_pos < len(self._trace.steps):
+                    wait = self._trace.steps[self._trace_pos].t / speed - (time.monotonic() - t0)
+                    if wait > 0 and self._player_stop.wait(wait):
+                        return
+                    self.advance_to((time.monotonic() - t0) * speed)
+                if not loop:
+                    return
+
+        self._player = threading.Thread(target=run, name="fake-ha-trace", daemon=True)
+        self._player.start()
+
+    def stop_trace(self) -> None:
+        self._player_stop.set()
+        if self._player is not None:
+            self._player.join(timeout=2.0)
+            self._player = None
+
+    # ------------------------------------------------------------------
+    # Statistik / Fehlerinjektion
+    # ------------------------------------------------------------------
+    def request_count(self) -> int:
+        with self._lock:
+            return sum(self.counts.values())
+
+    def calls(self, domain: str | None = None, service: str | None = None) -> list[dict]:
+        with self._lock:
+            return [c for c in self.service_calls
+                    if (domain is None or c["domain"] == domain) and (service is None or c["service"] == service)]
+
+    def reset_counts(self) -> None:
+        with self._lock:
+            self.counts.clear()
+            self.service_calls.clear()
+
+    def fail(self, route: str, status: int = 500, times: int | None = None) -> FailureRule:
+        """route = Präfix des Routen-Schlüssels (siehe counts), status=DROP schließt die Verbindung."""
+        rule = FailureRule(route, int(status), times)
+        with self._lock:
+            self.failure_rules.append(rule)
+        return rule
+
+    def clear_failures(self) -> None:
+        with self._lock:
+            self.failure_rules.clear()
+
+    def _injected_failure(self, route_key: str) -> int | None:
+        with self._lock:
+            for rule in self.failure_rules:
+                if not route_key.startswith(rule.route):
+                    continue
+                if rule.times is not None:
+                    if rule.times <= 0:
+                        continue
+                    rule.times -= 1
+                return rule.status
+            if self.failure_rate > 0 and self._rng.random() < self.failure_rate:
+                return 500
+        return None
+
+    def _delay(self) -> None:
+        if self.latency_s <= 0 and self.jitter_s <= 0:
+            return
+        with self._lock:
+            jitter = self._rng.uniform(0.0, self.jitter_s) if self.jitter_s > 0 else 0.0
+        time.sleep(max(0.0, self.latency_s + jitter))
+
+    def _log_call(self, entry: dict) -> None:
+        with self._lock:
+            self.service_calls.append(entry)
+            if self.call_log is not None:
+                with self.call_log.open("a", encoding="utf-8") as f:
+                    f.write(json.dumps(entry) + "\n")
+
+    # ------------------------------------------------------------------
+    # REST
+    # ------------------------------------------------------------------
+    def _apply_service(self, domain: str, service: str, data: dict) -> list[dict]:
+        ids = data.get("entity_id") or []
+        ids = [ids] if isinstance(ids, str) else list(ids)
+        changed = []
+        for entity_id in ids:
+            ent_domain = entity_id.split(".", 1)[0]
+            if ent_domain in _TOGGLE_DOMAINS and service in ("turn_on", "turn_off", "toggle"):
+                cur = (self.get_state(entity_id) or {}).get("state")
+                on = (cur != "on") if service == "toggle" else (service == "turn_on")
+                self.set_state(entity_id, "on" if on else "off")
+            elif service == "set_value" and "value" in data:
+                self.set_state(entity_id, data["value"])
+            else:
+                continue
+            changed.append(self.get_state(entity_id))
+        return changed
+
+    def _call_service(self, domain: str, service: str, data: dict, via: str) -> list[dict]:
+        self._log_call({"ts": time.time(), "via": via, "domain": domain, "service": service, "data": data})
+        return self._apply_service(domain, service, data)
+
+    @staticmethod
+    def _route_key(method: str, path: str) -> tuple[str, str]:
+        """(Routen-Schlüssel für counts/Fehlerregeln, API-Pfad ohne Präfix)."""
+        if path == "/addons/self/info":
+            return f"{method} /addons/self/info", path
+        for prefix in API_PREFIXES:
+            if path.startswith(prefix + "/") or path == prefix:
+                api = path[len(prefix):] or "/"
+                break
+        else:
+            return f"{method} {path}", ""
+        if api.startswith("/states/"):
+            return f"{method} /states/<id>", api
+        return f"{method} {api}", api
+
+    def _route(self, method: str, raw_path: str, body: bytes) -> tuple[int, object]:
+        path = urlsplit(raw_path).path
+        api = self._route_key(method, path)[1]
+        if path == "/addons/self/info":
+            return 200, {"result": "ok", "data": {
+                "slug": "pv_mining",
+                "state": "started",
+                "version": "dev",
+                "ingress_entry": "/api/hassio_ingress/fake",
+                "ingress_url": "/api/hassio_ingress/fake/",
+            }}
+        if not api:
+            return 404, {"message": f"unknown path {path}"}
+
+        if method == "GET" and api == "/":
+            return 200, {"message": "API running."}
+        if method == "GET" and api == "/states":
+            with self._lock:
+                return 200, [dict(s) for s in self._states.values()]
+        if method == "GET" and api.startswith("/states/"):
+            st = self.get_state(api[len("/states/"):])
+            return (200, st) if st else (404, {"message": "Entity not found."})
+        if method == "POST" and api.startswith("/states/"):
+            try:
+                data = json.loads(body or b"{}") or {}
+            except ValueError:
+                return 400, {"message": "invalid JSON"}
+            entity_id = api[len("/states/"):]
+            self.set_state(entity_id, data.get("state"), data.get("attributes"))
+            return 200, self.get_state(entity_id)
+        if method == "POST" and api.startswith("/services/"):
+            parts = api[len("/services/"):].split("/")
+            if len(parts) != 2:
+                return 400, {"message": "invalid service path"}
+            try:
+                data = json.loads(body or b"{}") or {}
+            except ValueError:
+                return 400, {"message": "invalid JSON"}
+            return 200, self._call_service(parts[0], parts[1], data, "rest")
+        return 404, {"message": f"unknown path {path}"}
+
+    # ------------------------------------------------------------------
+    # WebSocket-API (auth, get_states, subscribe_events, call_service, ping)
+    # ------------------------------------------------------------------
+    def _publish(self, clients: list[_WsClient], event: dict) -> None:
+        for client in clients:
+            for sub_id, event_type in list(client.subscriptions.items()):
+                if event_type in (None, event["event_type"]):
+                    try:
+                        client.send({"id": sub_id, "type": "event", "event": event})
+                    except OSError:
+                        pass
+
+    def _ws_command(self, client: _WsClient, msg: dict) -> dict:
+        msg_id = msg.get("id")
+        kind = msg.get("type")
+        with self._lock:
+            self.counts[f"WS {kind}"] += 1
+        status = self._injected_failure(f"WS {kind}")
+        if status is not None:
+            return {"id": msg_id, "type": "result", "success": False,
+                    "error": {"code": "injected_failure", "message": f"status {status}"}}
+        if kind == "ping":
+            return {"id": msg_id, "type": "pong"}
+        if kind == "get_states":
+            with self._lock:
+                states = [dict(s) for s in self._states.values()]
+            return {"id": msg_id, "type": "result", "success": True, "result": states}
+        if kind == "subscribe_events":
+            client.subscriptions[msg_id] = msg.get("event_type")
+            return {"id": msg_id, "type": "result", "success": True, "result": None}
+        if kind == "unsubscribe_events":
+            client.subscriptions.pop(msg.get("subscription"), None)
+            return {"id": msg_id, "type": "result", "success": True, "result": None}
+        if kind == "call_service":
+            data = dict(msg.get("service_data") or {})
+            target = msg.get("target") or {}
+            if "entity_id" in target:
+                data.setdefault("entity_id", target["entity_id"])
+            self._call_service(str(msg.get("domain")), str(msg.get("service")), data, "ws")
+            return {"id": msg_id, "type": "result", "success": True, "result": {"context": {}}}
+        return {"id": msg_id, "type": "result", "success": False,
+                "error": {"code": "unknown_command", "message": f"unknown command {kind}"}}
+
+    def _serve_websocket(self, handler: BaseHTTPRequestHandler) -> None:
+        handler.send_response(101, "Switching Protocols")
+        handler.send_header("Upgrade", "websocket")
+        handler.send_header("Connection", "Upgrade")
+        handler.send_header("Sec-WebSocket-Accept", _ws_accept_key(handler.headers.get("Sec-WebSocket-Key", "")))
+        handler.end_headers()
+        handler.wfile.flush()
+
+        client = _WsClient(handler.wfile)
+        client.send({"type": "auth_required", "ha_version": "dev"})
+        authed = False
+        with self._lock:
+            self._ws_clients.add(client)
+        try:
+            while True:
+                frame = _ws_read_frame(handler.rfile)
+                if frame is None or frame[0] == 0x8:
+                    return
+                opcode, payload = frame
+                if opcode == 0x9:
+                    with client._lock:
+                        handler.wfile.write(_ws_frame(payload, opcode=0xA))
+                    continue
+                if opcode != 0x1:
+                    continue
+                try:
+                    msg = json.loads(payload.decode("utf-8"))
+                except ValueError:
+                    continue
+                if not authed:
+                    if msg.get("type") == "auth":
+                        authed = True
+                        client.send({"type": "auth_ok", "ha_version": "dev"})
+                    else:
+                        client.send({"type": "auth_invalid", "message": "auth required"})
+                        return
+                    continue
+                self._delay()
+                client.send(self._ws_command(client, msg))
+        except OSError:
+            return
+        finally:
+            with self._lock:
+                self._ws_clients.discard(client)
+            handler.close_connection = True
+
+    def _handler_class(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _serve(self, method: str) -> None:
+                path = urlsplit(self.path).path
+                if (method == "GET" and path in WEBSOCKET_PATHS
+                        and self.headers.get("Upgrade", "").lower() == "websocket"):
+                    if fake.websocket:
+                        fake._serve_websocket(self)
+                        return
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                fake._delay()
+                key = fake._route_key(method, path)[0]
+                with fake._lock:
+                    fake.counts[key] += 1
+                status = fake._injected_failure(key)
+                if status == DROP:
+                    self.close_connection = True
+                    try:
+                        self.connection.shutdown(socket.SHUT_RDWR)
+                    except OSError:
+                        pass
+                    return
+                if status is not None:
+                    payload = {"message": f"injected failure {status}"}
+                else:
+                    status, payload = fake._route(method, self.path, body)
+                raw = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(raw)))
+                self.end_headers()
+                self.wfile.write(raw)
+
+            def do_GET(self):
+                self._serve("GET")
+
+            def do_POST(self):
+                self._serve("POST")
+
+            def log_message(self, *_args):
+                pass
+
+        return Handler
+
+
+def _parse_fail(spec: str) -> tuple[str, int, int | None]:
+    """ROUTE=STATUS[:N], z. B. POST /services/switch=500:3 oder GET /states/<id>=drop."""
+    route, _, rest = spec.rpartition("=")
+    status, _, times = rest.partition(":")
+    status_code = DROP if status.strip().lower() == "drop" else int(status)
+    return route.strip(), status_code, (int(times) if times else None)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Fake Home Assistant / Supervisor API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8123)
+    parser.add_argument("--state", action="append", default=[], metavar="ENTITY=VALUE",
+                        help="initial state, repeatable")
+    parser.add_argument("--trace", help="sensor trace (.json or .csv) played in real time")
+    parser.add_argument("--speed", type=float, default=1.0, help="trace playback speed factor")
+    parser.add_argument("--loop", action="store_true", help="restart the trace when it ends")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="share of requests answered with 500")
+    parser.add_argument("--fail", action="append", default=[], metavar="ROUTE=STATUS[:N]",
+                        help='e.g. "POST /services/switch=500:3" or "GET /states/<id>=drop"')
+    parser.add_argument("--websocket", action="store_true", help="serve /core/websocket and /api/websocket")
+    parser.add_argument("--call-log", help="append every service call as JSON line to this file")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args(argv)
+
+    states = dict(s.split("=", 1) for s in args.state if "=" in s)
+    fake = FakeHA(states, host=args.host, port=args.port,
+                  latency_s=args.latency_ms / 1000.0, jitter_s=args.jitter_ms / 1000.0,
+                  failure_rate=args.failure_rate, websocket=args.websocket,
+                  call_log=args.call_log, seed=args.seed)
+    for spec in args.fail:
+        fake.fail(*_parse_fail(spec))
+    if args.trace:
+        fake.load_trace(args.trace)
+        fake.play(speed=args.speed, loop=args.loop)
+    fake.start()
+    print(f"fake HA on {fake.url} (HTTP_PROXY={fake.url} SUPERVISOR_TOKEN=fake-ha)", flush=True)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        fake.stop()
+        print(f"requests: {dict(fake.counts)}", flush=True)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -2,13 +2,23 @@ from __future__ import annotations
 
 import argparse
 import csv
+import json
+import mmap
+import re
 import socket
 import struct
 import sys
+import threading
 import time
+from array import array
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
 
+# SunSpec-Decoder liegt im Add-on (nur stdlib), damit Tool und Sensorquelle denselben Code nutzen
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "bitcoin_pv_mining"))
+from services import sunspec  # noqa: E402
+
 
 DEFAULT_RANGES = (
     ("holding", 40000, 41050),
@@ -16,7 +26,13 @@ DEFAULT_RANGES = (
 )
 
 MAX_REGISTERS_PER_READ = 125
+# Nur diese Exception-Codes beschreiben die Registerbelegung (illegal function/address/value);
+# 4/5/6 (device failure/acknowledge/busy) sind vorübergehend und werden wie Transportfehler behandelt.
+PERSISTENT_EXCEPTION_CODES = frozenset({1, 2, 3})
+TRANSIENT_RETRIES = 2
+TRANSIENT_RETRY_S = 0.05
 MODEL_HEADER_LEN = 2
+ERROR_MAP_DIR = Path.home() / ".cache" / "fronius_modbus_dump"
 
 
 @dataclass
@@ -27,6 +43,7 @@ class ReadResult:
     value: int | None
     status: str
     detail: str = ""
+    exception_code: int | None = None
 
 
 class ModbusError(Exception):
@@ -40,6 +57,104 @@ class ModbusExceptionResponse(ModbusError):
         super().__init__(f"modbus exception fc={function_code} code={exception_code}")
 
 
+class ErrorMap:
+    """Per-device map of addresses that answered with a Modbus exception.
+
+    Stored as JSON {"kinds": {"holding": [[start, end, code], ...]}} with
+    inclusive spans. Scans plan their reads around known-invalid spans and
+    only bisect where the map has no entry; every scan writes back what it
+    observed for its range (ok -> valid, illegal function/address/value ->
+    invalid; busy/device-failure replies, timeouts and other transport errors
+    leave the map untouched).
+    """
+
+    def __init__(self, path: Path | None):
+        self.path = path
+        self._spans: dict[str, list[tuple[int, int, int]]] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        if path is not None and path.exists():
+            try:
+                data = json.loads(path.read_text(encoding="utf-8"))
+                for kind, spans in (data.get("kinds") or {}).items():
+                    self._spans[str(kind)] = sorted((int(a), int(b), int(c)) for a, b, c in spans)
+            except (OSError, ValueError, TypeError) as exc:
+                print(f"[error-map] ignoring unreadable {path}: {exc}", flush=True)
+                self._spans = {}
+
+    @classmethod
+    def for_device(cls, host: str, port: int, unit: int) -> "ErrorMap":
+        safe_host = re.sub(r"[^A-Za-z0-9_.-]", "_", host)
+        return cls(ERROR_MAP_DIR / f"{safe_host}_{port}_u{unit}.json")
+
+    def invalid_spans(self, kind: str, start: int, end: int) -> list[tuple[int, int, int]]:
+        with self._lock:
+            return [
+                (max(a, start), min(b, end), code)
+                for a, b, code in self._spans.get(kind, [])
+                if b >= start and a <= end
+            ]
+
+    def plan(self, kind: str, start: int, end: int, chunk_size: int) -> list[tuple[int, int, int | None]]:
+        """(raw_address, quantity, exception_code) blocks; code is set for known-invalid spans."""
+        blocks: list[tuple[int, int, int | None]] = []
+        pos = start
+        for a, b, code in self.invalid_spans(kind, start, end):
+            blocks.extend((addr, qty, None) for addr, qty in _range_blocks(pos, a - 1, chunk_size))
+            blocks.append((a, b - a + 1, code))
+            pos = b + 1
+        blocks.extend((addr, qty, None) for addr, qty in _range_blocks(pos, end, chunk_size))
+        return blocks
+
+    def record(self, kind: str, start: int, end: int, rows: list[ReadResult]) -> None:
+        with self._lock:
+            codes = {
+                addr: code
+                for a, b, code in self._spans.get(kind, [])
+                for addr in range(max(a, start), min(b, end) + 1)
+            }
+            for row in rows:
+                if row.kind != kind or not (start <= row.raw_address <= end):
+                    continue
+                if row.status == "ok":
+                    codes.pop(row.raw_address, None)
+                elif row.exception_code in PERSISTENT_EXCEPTION_CODES:
+                    codes[row.raw_address] = row.exception_code
+            outside = [(a, b, c) for a, b, c in self._spans.get(kind, []) if b < start or a > end]
+            outside += [(max(a, end + 1), b, c) for a, b, c in self._spans.get(kind, []) if a <= end < b]
+            outside += [(a, min(b, start - 1), c) for a, b, c in self._spans.get(kind, []) if a < start <= b]
+            merged = _merge_code_spans(outside + [(addr, addr, code) for addr, code in codes.items()])
+            if merged != self._spans.get(kind, []):
+                self._spans[kind] = merged
+                self._dirty = True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._dirty = bool(self._spans)
+            self._spans = {}
+
+    def save(self) -> None:
+        with self._lock:
+            if self.path is None or not self._dirty:
+                return
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+            payload = {"kinds": {kind: [list(span) for span in spans] for kind, spans in self._spans.items() if spans}}
+            tmp.write_text(json.dumps(payload), encoding="utf-8")
+            tmp.replace(self.path)
+            self._dirty = False
+
+
+def _merge_code_spans(spans: list[tuple[int, int, int]]) -> list[tuple[int, int, int]]:
+    merged: list[tuple[int, int, int]] = []
+    for a, b, code in sorted(spans):
+        if merged and merged[-1][2] == code and a <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], b), code)
+        else:
+            merged.append((a, b, code))
+    return merged
+
+
 class ModbusTcpClient:
     def __init__(self, host: str, port: int, unit: int, timeout: float):
         self.host = host
@@ -93,30 +208,86 @@ class ModbusTcpClient:
         return b"".join(chunks)
 
     def read_registers(self, kind: str, raw_address: int, quantity: int) -> list[int]:
-        if quantity <= 0 or quantity > MAX_REGISTERS_PER_READ:
-            raise ValueError(f"quantity must be 1..{MAX_REGISTERS_PER_READ}")
-        fc = 3 if kind == "holding" else 4 if kind == "input" else None
-        if fc is None:
-            raise ValueError(f"unsupported register kind: {kind}")
+        fc = _function_code(kind, quantity)
+        tx_id = self._send_read(fc, raw_address, quantity)
+        try:
+            rx_tx_id, unit, payload = self._recv_response()
+        except ModbusError:
+            self.close()
+            raise
+        if rx_tx_id != tx_id:
+            raise ModbusError(f"transaction mismatch {rx_tx_id} != {tx_id}")
+        return self._decode_payload(fc, quantity, unit, payload)
+
+    def read_pipelined(
+        self,
+        kind: str,
+        blocks: list[tuple[int, int]],
+        in_flight: int,
+        pause_s: float = 0.0,
+    ) -> dict[int, list[int] | ModbusError]:
+        """Reads (raw_address, quantity) blocks with up to in_flight outstanding transactions.
+
+        Responses are matched by MBAP transaction id, so out-of-order answers are fine.
+        Returns {raw_address: values or the ModbusError of that block}. When the
+        connection breaks, every unanswered block gets the error and the socket is
+        closed; the caller decides how to retry.
+        """
+        fc = _function_code(kind, 1)
+        for _addr, qty in blocks:
+            _function_code(kind, qty)
+        in_flight = max(1, int(in_flight))
+        results: dict[int, list[int] | ModbusError] = {}
+        pending: dict[int, tuple[int, int]] = {}
+        queue = list(blocks)
+        next_idx = 0
+        try:
+            while next_idx < len(queue) or pending:
+                while next_idx < len(queue) and len(pending) < in_flight:
+                    raw_address, quantity = queue[next_idx]
+                    next_idx += 1
+                    pending[self._send_read(fc, raw_address, quantity)] = (raw_address, quantity)
+                    if pause_s > 0:
+                        time.sleep(pause_s)
+                rx_tx_id, unit, payload = self._recv_response()
+                block = pending.pop(rx_tx_id, None)
+                if block is None:
+                    raise ModbusError(f"unknown transaction id {rx_tx_id}")
+                raw_address, quantity = block
+                try:
+                    results[raw_address] = self._decode_payload(fc, quantity, unit, payload)
+                except ModbusError as exc:
+                    results[raw_address] = exc
+        except ModbusError as exc:
+            self.close()
+            for raw_address, _qty in list(pending.values()) + queue[next_idx:]:
+                results[raw_address] = ModbusError(f"pipeline aborted: {exc}")
+        return results
 
+    def _send_read(self, fc: int, raw_address: int, quantity: int) -> int:
         tx_id = self._next_tx_id()
         pdu = struct.pack(">BHH", fc, raw_address, quantity)
         mbap = struct.pack(">HHHB", tx_id, 0, len(pdu) + 1, self.unit)
-        packet = mbap + pdu
+        try:
+            self._ensure_socket().sendall(mbap + pdu)
+        except (OSError, TimeoutError) as exc:
+            self.close()
+            raise ModbusError(str(exc)) from exc
+        return tx_id
 
+    def _recv_response(self) -> tuple[int, int, bytes]:
         try:
-            self._ensure_socket().sendall(packet)
             header = self._recv_exact(7)
             rx_tx_id, proto_id, length, unit = struct.unpack(">HHHB", header)
-            if rx_tx_id != tx_id:
-                raise ModbusError(f"transaction mismatch {rx_tx_id} != {tx_id}")
             if proto_id != 0:
                 raise ModbusError(f"unexpected protocol id {proto_id}")
             payload = self._recv_exact(length - 1)
         except (OSError, TimeoutError) as exc:
             self.close()
             raise ModbusError(str(exc)) from exc
+        return rx_tx_id, unit, payload
 
+    def _decode_payload(self, fc: int, quantity: int, unit: int, payload: bytes) -> list[int]:
         if unit != self.unit:
             raise ModbusError(f"unexpected unit id {unit}")
         if len(payload) < 2:
@@ -138,6 +309,15 @@ class ModbusTcpClient:
         return [struct.unpack(">H", data[i : i + 2])[0] for i in range(0, len(data), 2)]
 
 
+def _function_code(kind: str, quantity: int) -> int:
+    if quantity <= 0 or quantity > MAX_REGISTERS_PER_READ:
+        raise ValueError(f"quantity must be 1..{MAX_REGISTERS_PER_READ}")
+    fc = 3 if kind == "holding" else 4 if kind == "input" else None
+    if fc is None:
+        raise ValueError(f"unsupported register kind: {kind}")
+    return fc
+
+
 def parse_range_spec(spec: str) -> tuple[str, int, int]:
     try:
         kind_part, addr_part = spec.split(":", 1)
@@ -167,18 +347,165 @@ def scan_range(
     end: int,
     chunk_size: int,
     pause_s: float,
+    error_map: ErrorMap | None = None,
 ) -> list[ReadResult]:
     results: list[ReadResult] = []
+    for raw_address, qty, known_code in _plan_blocks(kind, start, end, chunk_size, error_map):
+        if known_code is not None:
+            results.extend(_known_invalid_rows(kind, raw_address, qty, known_code))
+            continue
+        results.extend(_scan_block(client, kind, raw_address, qty))
+        if pause_s > 0:
+            time.sleep(pause_s)
+    if error_map is not None:
+        error_map.record(kind, start, end, results)
+    return results
+
+
+def _range_blocks(start: int, end: int, chunk_size: int) -> list[tuple[int, int]]:
+    blocks: list[tuple[int, int]] = []
     pos = start
     while pos <= end:
         qty = min(chunk_size, end - pos + 1, MAX_REGISTERS_PER_READ)
-        results.extend(_scan_block(client, kind, pos, qty))
+        blocks.append((pos, qty))
         pos += qty
+    return blocks
+
+
+def _plan_blocks(
+    kind: str,
+    start: int,
+    end: int,
+    chunk_size: int,
+    error_map: ErrorMap | None,
+) -> list[tuple[int, int, int | None]]:
+    if error_map is None:
+        return [(addr, qty, None) for addr, qty in _range_blocks(start, end, chunk_size)]
+    return error_map.plan(kind, start, end, chunk_size)
+
+
+def _known_invalid_rows(kind: str, raw_address: int, quantity: int, code: int) -> list[ReadResult]:
+    # gleiche Zeilen wie ein echter Fehl-Read, damit diff/stable-diff nichts Falsches melden
+    fc = 3 if kind == "holding" else 4
+    return [
+        ReadResult(
+            kind=kind,
+            raw_address=raw_address + idx,
+            register_number=raw_address + idx + 1,
+            value=None,
+            status="error",
+            detail=f"fc={fc} code={code}",
+            exception_code=code,
+        )
+        for idx in range(quantity)
+    ]
+
+
+def scan_range_pipelined(
+    client: ModbusTcpClient,
+    kind: str,
+    start: int,
+    end: int,
+    chunk_size: int,
+    pause_s: float,
+    in_flight: int,
+    error_map: ErrorMap | None = None,
+) -> list[ReadResult]:
+    """Like scan_range, but keeps up to in_flight requests outstanding on the connection.
+
+    Blocks that fail are re-read one by one with the usual bisection. If the
+    pipeline itself breaks (device drops queued requests, timeout), the rest
+    of the range continues strictly sequentially.
+    """
+    if in_flight <= 1:
+        return scan_range(client, kind, start, end, chunk_size, pause_s, error_map)
+    plan = _plan_blocks(kind, start, end, chunk_size, error_map)
+    answers = client.read_pipelined(kind, [(addr, qty) for addr, qty, code in plan if code is None], in_flight, pause_s)
+    results: list[ReadResult] = []
+    for raw_address, quantity, known_code in plan:
+        if known_code is not None:
+            results.extend(_known_invalid_rows(kind, raw_address, quantity, known_code))
+            continue
+        values = answers.get(raw_address)
+        if isinstance(values, list):
+            results.extend(
+                ReadResult(
+                    kind=kind,
+                    raw_address=(raw_address + idx),
+                    register_number=(raw_address + idx + 1),
+                    value=val,
+                    status="ok",
+                )
+                for idx, val in enumerate(values)
+            )
+            continue
+        results.extend(_scan_block(client, kind, raw_address, quantity))
         if pause_s > 0:
             time.sleep(pause_s)
+    if error_map is not None:
+        error_map.record(kind, start, end, results)
     return results
 
 
+def _split_range(start: int, end: int, parts: int, chunk_size: int) -> list[tuple[int, int]]:
+    # Teilbereiche an Chunk-Grenzen, damit die Requests identisch zum sequentiellen Scan bleiben
+    blocks = _range_blocks(start, end, chunk_size)
+    parts = max(1, min(parts, len(blocks)))
+    per_part, extra = divmod(len(blocks), parts)
+    spans: list[tuple[int, int]] = []
+    idx = 0
+    for part in range(parts):
+        count = per_part + (1 if part < extra else 0)
+        first, last = blocks[idx], blocks[idx + count - 1]
+        spans.append((first[0], last[0] + last[1] - 1))
+        idx += count
+    return spans
+
+
+def scan_ranges(
+    host: str,
+    port: int,
+    unit: int,
+    timeout: float,
+    ranges: list[tuple[str, int, int]],
+    chunk_size: int,
+    pause_s: float,
+    in_flight: int = 1,
+    connections: int = 1,
+    error_map: ErrorMap | None = None,
+) -> list[ReadResult]:
+    """Scans all ranges over `connections` sockets with at most `in_flight` requests outstanding in total.
+
+    Each range is cut into one contiguous part per connection; each connection
+    pipelines in_flight // connections requests. Rows come back in range order.
+    """
+    connections = max(1, int(connections))
+    in_flight = max(connections, int(in_flight))
+    per_conn = max(1, in_flight // connections)
+    jobs = [(kind, s, e) for kind, start, end in ranges for s, e in _split_range(start, end, connections, chunk_size)]
+
+    def worker(shard: list[tuple[int, str, int, int]]) -> list[tuple[int, list[ReadResult]]]:
+        out = []
+        with ModbusTcpClient(host, port, unit, timeout) as client:
+            for job_idx, kind, s, e in shard:
+                out.append((job_idx, scan_range_pipelined(client, kind, s, e, chunk_size, pause_s, per_conn, error_map)))
+        return out
+
+    shards: list[list[tuple[int, str, int, int]]] = [[] for _ in range(connections)]
+    for job_idx, (kind, s, e) in enumerate(jobs):
+        shards[job_idx % connections].append((job_idx, kind, s, e))
+    shards = [shard for shard in shards if shard]
+
+    by_job: dict[int, list[ReadResult]] = {}
+    if len(shards) == 1:
+        by_job.update(worker(shards[0]))
+    else:
+        with ThreadPoolExecutor(max_workers=len(shards), thread_name_prefix="modbus-scan") as pool:
+            for part in pool.map(worker, shards):
+                by_job.update(part)
+    return [row for job_idx in range(len(jobs)) for row in by_job[job_idx]]
+
+
 def read_range_values(
     client: ModbusTcpClient,
     kind: str,
@@ -186,8 +513,10 @@ def read_range_values(
     end: int,
     chunk_size: int,
     pause_s: float,
+    in_flight: int = 1,
+    error_map: ErrorMap | None = None,
 ) -> dict[int, int]:
-    rows = scan_range(client, kind, start, end, chunk_size, pause_s)
+    rows = scan_range_pipelined(client, kind, start, end, chunk_size, pause_s, in_flight, error_map)
     return {row.raw_address: int(row.value) for row in rows if row.status == "ok" and row.value is not None}
 
 
@@ -209,9 +538,59 @@ def find_model_headers(
     return hits
 
 
+def walk_models(client: ModbusTcpClient, kind: str = "holding") -> dict[int, tuple[int, int]]:
+    """SunSpec index {model_id: (data_raw, model_len)} by following the chain from the SunS marker."""
+
+    def read(raw_address: int, quantity: int) -> list[int] | None:
+        try:
+            return client.read_registers(kind, raw_address, quantity)
+        except ModbusExceptionResponse:
+            return None
+
+    return sunspec.walk(read)
+
+
+def read_models(
+    client: ModbusTcpClient,
+    index: dict[int, tuple[int, int]],
+    model_ids: list[int],
+    kind: str = "holding",
+    in_flight: int = 1,
+) -> dict[int, dict]:
+    """Reads and decodes the given models; models without a decoder are returned as raw registers."""
+    decoded: dict[int, dict] = {}
+    for model_id in model_ids:
+        if model_id not in index:
+            continue
+        start, length = index[model_id]
+        rows = scan_range_pipelined(client, kind, start, start + length - 1, MAX_REGISTERS_PER_READ, 0.0, in_flight)
+        values = {row.raw_address: int(row.value) for row in rows if row.status == "ok" and row.value is not None}
+        decoded[model_id] = _decode_model(model_id, values, (start, length))
+    return decoded
+
+
+def _decode_model(model_id: int, values: dict[int, int], span: tuple[int, int]) -> dict:
+    body = sunspec.body(values, span)
+    data = sunspec.decode(model_id, body)
+    return data if data is not None else {"raw": body}
+
+
+def _read_with_retry(client: ModbusTcpClient, kind: str, raw_address: int, quantity: int) -> list[int]:
+    """read_registers, but transient exception replies (busy etc.) are retried a few times."""
+    attempt = 0
+    while True:
+        try:
+            return client.read_registers(kind, raw_address, quantity)
+        except ModbusExceptionResponse as exc:
+            if exc.exception_code in PERSISTENT_EXCEPTION_CODES or attempt >= TRANSIENT_RETRIES:
+                raise
+            attempt += 1
+            time.sleep(TRANSIENT_RETRY_S * attempt)
+
+
 def _scan_block(client: ModbusTcpClient, kind: str, raw_address: int, quantity: int) -> list[ReadResult]:
     try:
-        values = client.read_registers(kind, raw_address, quantity)
+        values = _read_with_retry(client, kind, raw_address, quantity)
         return [
             ReadResult(
                 kind=kind,
@@ -224,8 +603,10 @@ def _scan_block(client: ModbusTcpClient, kind: str, raw_address: int, quantity:
         ]
     except ModbusExceptionResponse as exc:
         detail = f"fc={exc.function_code} code={exc.exception_code}"
+        exception_code: int | None = exc.exception_code
     except ModbusError as exc:
         detail = str(exc)
+        exception_code = None
 
     if quantity == 1:
         return [
@@ -236,6 +617,7 @@ def _scan_block(client: ModbusTcpClient, kind: str, raw_address: int, quantity:
                 value=None,
                 status="error",
                 detail=detail,
+                exception_code=exception_code,
             )
         ]
 
@@ -282,28 +664,578 @@ def load_dump_csv(path: Path) -> dict[tuple[str, int], dict[str, str]]:
         return result
 
 
+# ----------------------------------------------------------------------------------
+# Binary dump format (.mbd)
+#
+#   header   "<4sHHd"  magic b"FMBD", version, section count, capture timestamp
+#   section  "<BxxxII" function code (3/4), start raw address, register count
+#            followed by count x uint16 values and count x uint16 status (little endian)
+#
+# Status: 0 = not in dump, 1 = ok, 2 = transport error, 0x100 + code = Modbus exception.
+# Values are 0 wherever the status is not ok, so comparing both arrays is enough.
+# Sections are 2-byte aligned, so loaded arrays are memoryviews straight into the mmap.
+# ----------------------------------------------------------------------------------
+BIN_MAGIC = b"FMBD"
+BIN_VERSION = 1
+BIN_SUFFIXES = (".mbd", ".bin")
+_BIN_HEADER = struct.Struct("<4sHHd")
+_BIN_SECTION = struct.Struct("<BxxxII")
+STATUS_MISSING = 0
+STATUS_OK = 1
+STATUS_TRANSPORT_ERROR = 2
+STATUS_EXCEPTION = 0x100
+_KIND_BY_FC = {3: "holding", 4: "input"}
+_FC_BY_KIND = {kind: fc for fc, kind in _KIND_BY_FC.items()}
+# Register pro Vergleichsblock; gleiche Blöcke werden per memcmp übersprungen
+_DIFF_BLOCK = 512
+
+
+def is_binary_dump(path: Path) -> bool:
+    return path.suffix.lower() in BIN_SUFFIXES
+
+
+def _row_status(row: ReadResult) -> int:
+    if row.status == "ok":
+        return STATUS_OK
+    if row.exception_code is not None:
+        return STATUS_EXCEPTION + (row.exception_code & 0xFF)
+    return STATUS_TRANSPORT_ERROR
+
+
+def _le(values: array) -> array:
+    if sys.byteorder != "little":
+        values = array("H", values)
+        values.byteswap()
+    return values
+
+
+def write_dump_bin(path: Path, rows: list[ReadResult], captured_ts: float | None = None) -> None:
+    """Writes rows as contiguous per-kind sections; error rows are always kept (as status)."""
+    sections: list[tuple[str, int, array, array]] = []
+    for row in sorted(rows, key=lambda r: (r.kind, r.raw_address)):
+        last = sections[-1] if sections else None
+        if last is None or last[0] != row.kind or last[1] + len(last[2]) != row.raw_address:
+            last = (row.kind, row.raw_address, array("H"), array("H"))
+            sections.append(last)
+        last[2].append(0 if row.value is None else int(row.value) & 0xFFFF)
+        last[3].append(_row_status(row))
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("wb") as fh:
+        fh.write(_BIN_HEADER.pack(BIN_MAGIC, BIN_VERSION, len(sections), time.time() if captured_ts is None else captured_ts))
+        for kind, start, values, status in sections:
+            fh.write(_BIN_SECTION.pack(_FC_BY_KIND[kind], start, len(values)))
+            _le(values).tofile(fh)
+            _le(status).tofile(fh)
+
+
+@dataclass
+class BinarySection:
+    kind: str
+    start: int
+    values: memoryview
+    status: memoryview
+
+    @property
+    def end(self) -> int:
+        return self.start + len(self.values) - 1
+
+
+class BinaryDump:
+    """Memory-mapped .mbd file; sections reference the mapping until close()."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.sections: list[BinarySection] = []
+        self._views: list[memoryview] = []
+        self._fh = path.open("rb")
+        try:
+            self._mm = mmap.mmap(self._fh.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # leere Datei
+            self._fh.close()
+            raise ModbusError(f"{path}: empty binary dump")
+        buf = memoryview(self._mm)
+        self._views.append(buf)
+        try:
+            magic, version, count, self.captured_ts = _BIN_HEADER.unpack_from(buf, 0)
+        except struct.error:
+            self.close()
+            raise ModbusError(f"{path}: truncated binary dump") from None
+        if magic != BIN_MAGIC or version != BIN_VERSION:
+            self.close()
+            raise ModbusError(f"{path}: not a v{BIN_VERSION} binary dump")
+        try:
+            self._parse_sections(buf, count)
+        except (struct.error, ValueError):
+            self.close()
+            raise ModbusError(f"{path}: truncated binary dump") from None
+
+    def _parse_sections(self, buf: memoryview, count: int) -> None:
+        offset = _BIN_HEADER.size
+        for _ in range(count):
+            fc, start, n = _BIN_SECTION.unpack_from(buf, offset)
+            offset += _BIN_SECTION.size
+            if offset + 4 * n > len(buf):
+                raise ValueError("section past end of file")
+            values = buf[offset : offset + 2 * n]
+            status = buf[offset + 2 * n : offset + 4 * n]
+            offset += 4 * n
+            self._views += (values, status)
+            if sys.byteorder == "little":
+                vals_h, stat_h = values.cast("H"), status.cast("H")
+            else:
+                vals_h, stat_h = (memoryview(_le(array("H", bytes(part)))) for part in (values, status))
+            self._views += (vals_h, stat_h)
+            self.sections.append(BinarySection(_KIND_BY_FC.get(fc, f"fc{fc}"), start, vals_h, stat_h))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self) -> None:
+        """Releases the section views, then the mapping.
+
+        Views handed out via sections are invalid afterwards. A BufferError
+        means something still holds a view derived from the mapping.
+        """
+        self.sections = []
+        views, self._views = self._views, []
+        try:
+            for view in reversed(views):
+                view.release()
+            mm = getattr(self, "_mm", None)
+            if mm is not None and not mm.closed:
+                mm.close()
+        finally:
+            self._fh.close()
+
+    def kinds(self) -> list[str]:
+        return sorted({sec.kind for sec in self.sections})
+
+    def rows(self) -> dict[tuple[str, int], dict[str, str]]:
+        """Same shape as load_dump_csv (transport error details are not stored)."""
+        result: dict[tuple[str, int], dict[str, str]] = {}
+        for sec in self.sections:
+            for idx in range(len(sec.values)):
+                row = _bin_row(sec.kind, sec.start + idx, sec.values[idx], sec.status[idx])
+                if row is not None:
+                    result[(sec.kind, sec.start + idx)] = row
+        return result
+
+
+def _bin_row(kind: str, raw_address: int, value: int, status: int) -> dict[str, str] | None:
+    if status == STATUS_MISSING:
+        return None
+    if status == STATUS_OK:
+        value_s, status_s, detail = str(value), "ok", ""
+    elif status >= STATUS_EXCEPTION:
+        value_s, status_s, detail = "", "error", f"fc={_FC_BY_KIND.get(kind, 0)} code={status - STATUS_EXCEPTION}"
+    else:
+        value_s, status_s, detail = "", "error", "transport error"
+    return {
+        "kind": kind,
+        "raw_address": str(raw_address),
+        "register_number": str(raw_address + 1),
+        "value": value_s,
+        "status": status_s,
+        "detail": detail,
+    }
+
+
+def write_dump(path: Path, rows: list[ReadResult], include_errors: bool) -> None:
+    if is_binary_dump(path):
+        write_dump_bin(path, rows)
+    else:
+        write_dump_csv(path, rows, include_errors)
+
+
+def load_dump(path: Path) -> dict[tuple[str, int], dict[str, str]]:
+    if is_binary_dump(path):
+        with BinaryDump(path) as dump:
+            return dump.rows()
+    return load_dump_csv(path)
+
+
+def convert_csv_to_bin(csv_path: Path, out_path: Path) -> int:
+    rows = []
+    for (kind, raw_address), row in load_dump_csv(csv_path).items():
+        detail = row.get("detail") or ""
+        match = re.fullmatch(r"fc=\d+ code=(\d+)", detail)
+        value = row.get("value") or ""
+        rows.append(
+            ReadResult(
+                kind=kind,
+                raw_address=raw_address,
+                register_number=raw_address + 1,
+                value=int(value) if value.strip().isdigit() else None,
+                status=row.get("status") or "error",
+                detail=detail,
+                exception_code=int(match.group(1)) if match else None,
+            )
+        )
+    write_dump_bin(out_path, rows, captured_ts=csv_path.stat().st_mtime)
+    return len(rows)
+
+
+def _aligned(dumps: list[BinaryDump], kind: str) -> tuple[int, list[tuple[memoryview, memoryview]]]:
+    """Lays every dump's sections of one kind onto a common address grid.
+
+    If a dump consists of exactly the grid (the usual case for repeated
+    captures of the same ranges) its mmap views are used without copying.
+    """
+    secs = [[sec for sec in dump.sections if sec.kind == kind] for dump in dumps]
+    present = [sec for group in secs for sec in group]
+    if not present:
+        return 0, []
+    start = min(sec.start for sec in present)
+    end = max(sec.end for sec in present)
+    count = end - start + 1
+    out = []
+    for group in secs:
+        if len(group) == 1 and group[0].start == start and len(group[0].values) == count:
+            out.append((group[0].values, group[0].status))
+            continue
+        values = array("H", bytes(2 * count))
+        status = array("H", bytes(2 * count))
+        for sec in group:
+            off = sec.start - start
+            values[off : off + len(sec.values)] = array("H", sec.values.tobytes())
+            status[off : off + len(sec.status)] = array("H", sec.status.tobytes())
+        out.append((memoryview(values), memoryview(status)))
+    return start, out
+
+
+def _present_count(statuses: list[memoryview]) -> int:
+    """Registers with a status in at least one capture: OR the status arrays, count zero words in C."""
+    if not statuses:
+        return 0
+    merged = 0
+    for status in statuses:
+        merged |= int.from_bytes(status.cast("B"), "little")
+    count = len(statuses[0])
+    return count - array("H", merged.to_bytes(2 * count, "little")).count(STATUS_MISSING)
+
+
+def _changed_indices(a: tuple[memoryview, memoryview], b: tuple[memoryview, memoryview]) -> list[int]:
+    """Indices where value or status differ; equal blocks are skipped with one memcmp each."""
+    (va, sa), (vb, sb) = a, b
+    va_b, sa_b, vb_b, sb_b = va.cast("B"), sa.cast("B"), vb.cast("B"), sb.cast("B")
+    changed: list[int] = []
+    for lo in range(0, len(va), _DIFF_BLOCK):
+        hi = min(lo + _DIFF_BLOCK, len(va))
+        if va_b[2 * lo : 2 * hi] == vb_b[2 * lo : 2 * hi] and sa_b[2 * lo : 2 * hi] == sb_b[2 * lo : 2 * hi]:
+            continue
+        changed.extend(idx for idx in range(lo, hi) if va[idx] != vb[idx] or sa[idx] != sb[idx])
+    return changed
+
+
+def _bin_diff_rows(kind: str, raw_address: int, prefixed: list[tuple[str, memoryview, memoryview, int]]) -> dict[str, str]:
+    row: dict[str, str] = {"kind": kind, "raw_address": str(raw_address), "register_number": str(raw_address + 1)}
+    for prefix, values, status, idx in prefixed:
+        rendered = _bin_row(kind, raw_address, values[idx], status[idx]) or {}
+        row[f"{prefix}_value"] = rendered.get("value", "")
+        row[f"{prefix}_status"] = rendered.get("status", "")
+        row[f"{prefix}_detail"] = rendered.get("detail", "")
+    return row
+
+
+def _diff_binary(before_path: Path, after_path: Path, out_path: Path, fieldnames: list[str]) -> tuple[int, int]:
+    with BinaryDump(before_path) as before, BinaryDump(after_path) as after:
+        total = 0
+        changed_rows: list[dict[str, str]] = []
+        for kind in sorted(set(before.kinds()) | set(after.kinds())):
+            start, (b, a) = _aligned([before, after], kind)
+            total += _present_count([b[1], a[1]])
+            for idx in _changed_indices(b, a):
+                changed_rows.append(_bin_diff_rows(kind, start + idx, [("before", *b, idx), ("after", *a, idx)]))
+    _write_rows(out_path, fieldnames, changed_rows)
+    return total, len(changed_rows)
+
+
+def _stable_diff_binary(
+    baseline_path: Path, before_path: Path, after_path: Path, out_path: Path, fieldnames: list[str]
+) -> tuple[int, int, int]:
+    with BinaryDump(baseline_path) as baseline, BinaryDump(before_path) as before, BinaryDump(after_path) as after:
+        total = stable = 0
+        changed_rows: list[dict[str, str]] = []
+        for kind in sorted(set(baseline.kinds()) | set(before.kinds()) | set(after.kinds())):
+            start, (b0, b1, a) = _aligned([baseline, before, after], kind)
+            present = _present_count([b0[1], b1[1], a[1]])
+            noisy = set(_changed_indices(b0, b1))
+            total += present
+            stable += present - len(noisy)
+            for idx in _changed_indices(b1, a):
+                if idx in noisy:
+                    continue
+                changed_rows.append(
+                    _bin_diff_rows(
+                        kind, start + idx, [("baseline", *b0, idx), ("before", *b1, idx), ("after", *a, idx)]
+                    )
+                )
+    _write_rows(out_path, fieldnames, changed_rows)
+    return total, stable, len(changed_rows)
+
+
+def _write_rows(out_path: Path, fieldnames: list[str], rows: list[dict[str, str]]) -> None:
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    with out_path.open("w", newline="", encoding="utf-8") as fh:
+        writer = csv.DictWriter(fh, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def change_report(paths: list[Path], out_path: Path) -> tuple[int, int]:
+    """N-way report: every register whose value or status differs between any two captures.
+
+    Writes one row per changed register with the value of every capture
+    (ok -> value, error -> "err"/"exc<code>", missing -> "") plus how many
+    distinct states and how many capture-to-capture transitions it had.
+    """
+    dumps = [BinaryDump(path) for path in paths]
+    try:
+        labels = [path.stem for path in paths]
+        rows: list[dict[str, str]] = []
+        total = 0
+        for kind in sorted({kind for dump in dumps for kind in dump.kinds()}):
+            start, grids = _aligned(dumps, kind)
+            total += _present_count([status for _, status in grids])
+            changed: set[int] = set()
+            for prev, cur in zip(grids, grids[1:]):
+                changed.update(_changed_indices(prev, cur))
+            for idx in sorted(changed):
+                states = [(values[idx], status[idx]) for values, status in grids]
+                row = {
+                    "kind": kind,
+                    "raw_address": str(start + idx),
+                    "register_number": str(start + idx + 1),
+                    "distinct": str(len(set(states))),
+                    "transitions": str(sum(1 for x, y in zip(states, states[1:]) if x != y)),
+                }
+                for label, (value, status) in zip(labels, states):
+                    if status == STATUS_OK:
+                        row[label] = str(value)
+                    elif status == STATUS_MISSING:
+                        row[label] = ""
+                    elif status >= STATUS_EXCEPTION:
+                        row[label] = f"exc{status - STATUS_EXCEPTION}"
+                    else:
+                        row[label] = "err"
+                rows.append(row)
+    finally:
+        for dump in dumps:
+            dump.close()
+    _write_rows(out_path, ["kind", "raw_address", "register_number", "distinct", "transitions", *labels], rows)
+    return total, len(rows)
+
+
+# ----------------------------------------------------------------------------------
+# Watch mode
+# ----------------------------------------------------------------------------------
+# Ab so vielen Änderungen pro Minute gilt ein Register als Messwert ("noisy")
+NOISY_CHANGES_PER_MIN = 6.0
+# ... und mindestens so viele Änderungen hatte (ein einzelner Umschalter bleibt "occasional")
+NOISY_MIN_CHANGES = 3
+_DISTINCT_CAP = 64
+
+
+class RangeWatch:
+    """Last value/status per register of one range plus change statistics."""
+
+    def __init__(self, kind: str, start: int, end: int):
+        self.kind = kind
+        self.start = start
+        self.end = end
+        count = end - start + 1
+        self.values = array("H", bytes(2 * count))
+        self.status = array("H", bytes(2 * count))
+        self.changes = array("I", bytes(4 * count))
+        self.first_change = [0.0] * count
+        self.last_change = [0.0] * count
+        self.distinct: list[set[int] | None] = [None] * count
+        self.primed = False
+
+    def poll(
+        self,
+        client: ModbusTcpClient,
+        chunk_size: int,
+        in_flight: int,
+        error_map: ErrorMap | None,
+        now: float,
+    ) -> list[tuple[float, str, int, str, str]]:
+        """Reads the range once and returns (ts, kind, raw_address, old, new) for every change.
+
+        Blocks that fail with a transport error keep their previous values for
+        this round; the first successful poll only sets the baseline.
+        """
+        values = array("H", self.values)
+        status = array("H", self.status)
+        plan = _plan_blocks(self.kind, self.start, self.end, chunk_size, error_map)
+        answers = client.read_pipelined(self.kind, [(a, q) for a, q, code in plan if code is None], in_flight)
+        for raw_address, quantity, known_code in plan:
+            off = raw_address - self.start
+            if known_code is not None:
+                rows = _known_invalid_rows(self.kind, raw_address, quantity, known_code)
+            else:
+                answer = answers.get(raw_address)
+                if isinstance(answer, list):
+                    values[off : off + quantity] = array("H", answer)
+                    status[off : off + quantity] = array("H", [STATUS_OK] * quantity)
+                    continue
+                if not isinstance(answer, ModbusExceptionResponse):
+                    continue
+                rows = _scan_block(client, self.kind, raw_address, quantity)
+                if error_map is not None:
+                    error_map.record(self.kind, raw_address, raw_address + quantity - 1, rows)
+            for row in rows:
+                idx = row.raw_address - self.start
+                values[idx] = 0 if row.value is None else row.value
+                status[idx] = _row_status(row)
+
+        events: list[tuple[float, str, int, str, str]] = []
+        if self.primed:
+            for idx in _changed_indices((memoryview(self.values), memoryview(self.status)), (memoryview(values), memoryview(status))):
+                old = _watch_label(self.values[idx], self.status[idx])
+                new = _watch_label(values[idx], status[idx])
+                events.append((now, self.kind, self.start + idx, old, new))
+                self.changes[idx] += 1
+                if not self.first_change[idx]:
+                    self.first_change[idx] = now
+                self.last_change[idx] = now
+                seen = self.distinct[idx]
+                if seen is None:
+                    seen = self.distinct[idx] = {self.values[idx]}
+                if len(seen) < _DISTINCT_CAP:
+                    seen.add(values[idx])
+        self.primed = self.primed or any(status)
+        self.values, self.status = values, status
+        return events
+
+    def stats(self, elapsed_s: float, noisy_per_min: float = NOISY_CHANGES_PER_MIN) -> list[dict[str, str]]:
+        minutes = max(elapsed_s / 60.0, 1e-9)
+        rows = []
+        for idx in range(len(self.values)):
+            changes = self.changes[idx]
+            rate = changes / minutes
+            if changes == 0:
+                klass = "static"
+            elif changes >= NOISY_MIN_CHANGES and rate >= noisy_per_min:
+                klass = "noisy"
+            else:
+                klass = "occasional"
+            seen = self.distinct[idx]
+            rows.append(
+                {
+                    "kind": self.kind,
+                    "raw_address": str(self.start + idx),
+                    "register_number": str(self.start + idx + 1),
+                    "class": klass,
+                    "changes": str(changes),
+                    "changes_per_min": f"{rate:.2f}",
+                    "distinct": "" if seen is None else (f">={_DISTINCT_CAP}" if len(seen) >= _DISTINCT_CAP else str(len(seen))),
+                    "first_change": _fmt_ts(self.first_change[idx]),
+                    "last_change": _fmt_ts(self.last_change[idx]),
+                    "last_value": _watch_label(self.values[idx], self.status[idx]),
+                }
+            )
+        return rows
+
+
+def _watch_label(value: int, status: int) -> str:
+    if status == STATUS_OK:
+        return str(value)
+    if status >= STATUS_EXCEPTION:
+        return f"exc{status - STATUS_EXCEPTION}"
+    return "err" if status else ""
+
+
+def _fmt_ts(ts: float) -> str:
+    if not ts:
+        return ""
+    return time.strftime("%H:%M:%S", time.localtime(ts)) + f".{int((ts % 1) * 1000):03d}"
+
+
+def watch_ranges(
+    client: ModbusTcpClient,
+    watches: list[RangeWatch],
+    interval_s: float,
+    chunk_size: int,
+    in_flight: int = 1,
+    error_map: ErrorMap | None = None,
+    duration_s: float | None = None,
+    max_polls: int | None = None,
+    on_change=None,
+) -> tuple[int, float]:
+    """Polls all ranges at a fixed rate until duration/max_polls or Ctrl+C; returns (polls, elapsed_s).
+
+    Without an error map (--no-error-map) an in-memory one is kept for the
+    lifetime of the watch, so exception blocks are bisected only once.
+    """
+    if error_map is None:
+        error_map = ErrorMap(None)
+    started = time.time()
+    next_due = started
+    polls = 0
+    try:
+        while (max_polls is None or polls < max_polls) and (duration_s is None or time.time() - started < duration_s):
+            now = time.time()
+            for watch in watches:
+                for event in watch.poll(client, chunk_size, in_flight, error_map, now):
+                    if on_change is not None:
+                        on_change(event)
+            polls += 1
+            next_due += interval_s
+            delay = next_due - time.time()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                # zu langsam für das Intervall -> nicht aufholen, sondern neu takten
+                next_due = time.time()
+    except KeyboardInterrupt:
+        pass
+    return polls, time.time() - started
+
+
+_DIFF_FIELDS = [
+    "kind",
+    "raw_address",
+    "register_number",
+    "before_value",
+    "after_value",
+    "before_status",
+    "after_status",
+    "before_detail",
+    "after_detail",
+]
+_STABLE_DIFF_FIELDS = [
+    "kind",
+    "raw_address",
+    "register_number",
+    "baseline_value",
+    "before_value",
+    "after_value",
+    "baseline_status",
+    "before_status",
+    "after_status",
+    "baseline_detail",
+    "before_detail",
+    "after_detail",
+]
+
+
 def diff_dumps(before_path: Path, after_path: Path, out_path: Path) -> tuple[int, int]:
-    before = load_dump_csv(before_path)
-    after = load_dump_csv(after_path)
+    if is_binary_dump(before_path) and is_binary_dump(after_path):
+        return _diff_binary(before_path, after_path, out_path, _DIFF_FIELDS)
+    before = load_dump(before_path)
+    after = load_dump(after_path)
     keys = sorted(set(before) | set(after))
     changed = 0
 
     out_path.parent.mkdir(parents=True, exist_ok=True)
     with out_path.open("w", newline="", encoding="utf-8") as fh:
-        writer = csv.DictWriter(
-            fh,
-            fieldnames=[
-                "kind",
-                "raw_address",
-                "register_number",
-                "before_value",
-                "after_value",
-                "before_status",
-                "after_status",
-                "before_detail",
-                "after_detail",
-            ],
-        )
+        writer = csv.DictWriter(fh, fieldnames=_DIFF_FIELDS)
         writer.writeheader()
         for key in keys:
             b = before.get(key)
@@ -338,32 +1270,18 @@ def stable_diff_dumps(
     after_path: Path,
     out_path: Path,
 ) -> tuple[int, int, int]:
-    baseline = load_dump_csv(baseline_path)
-    before = load_dump_csv(before_path)
-    after = load_dump_csv(after_path)
+    if all(is_binary_dump(path) for path in (baseline_path, before_path, after_path)):
+        return _stable_diff_binary(baseline_path, before_path, after_path, out_path, _STABLE_DIFF_FIELDS)
+    baseline = load_dump(baseline_path)
+    before = load_dump(before_path)
+    after = load_dump(after_path)
     keys = sorted(set(baseline) | set(before) | set(after))
     stable_candidates = 0
     changed = 0
 
     out_path.parent.mkdir(parents=True, exist_ok=True)
     with out_path.open("w", newline="", encoding="utf-8") as fh:
-        writer = csv.DictWriter(
-            fh,
-            fieldnames=[
-                "kind",
-                "raw_address",
-                "register_number",
-                "baseline_value",
-                "before_value",
-                "after_value",
-                "baseline_status",
-                "before_status",
-                "after_status",
-                "baseline_detail",
-                "before_detail",
-                "after_detail",
-            ],
-        )
+        writer = csv.DictWriter(fh, fieldnames=_STABLE_DIFF_FIELDS)
         writer.writeheader()
         for key in keys:
             b0 = baseline.get(key)
@@ -401,6 +1319,48 @@ def stable_diff_dumps(
     return len(keys), stable_candidates, changed
 
 
+def _add_parallel_args(parser: argparse.ArgumentParser, connections: bool = True) -> None:
+    parser.add_argument(
+        "--in-flight",
+        type=int,
+        default=1,
+        help="max outstanding requests in total (pipelined by transaction id); 1 = strictly sequential",
+    )
+    if connections:
+        parser.add_argument(
+            "--connections",
+            type=int,
+            default=1,
+            help="scan ranges over this many TCP connections concurrently (shares the --in-flight budget)",
+        )
+
+
+def _add_error_map_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--error-map",
+        default=None,
+        help=f"JSON map of known-invalid addresses (default: {ERROR_MAP_DIR}/<host>_<port>_u<unit>.json)",
+    )
+    parser.add_argument("--no-error-map", action="store_true", help="neither use nor update the error map")
+    parser.add_argument(
+        "--refresh-error-map",
+        action="store_true",
+        help="re-read known-invalid addresses and rebuild the map from this scan",
+    )
+
+
+def _error_map_from_args(args: argparse.Namespace) -> ErrorMap | None:
+    if args.no_error_map:
+        return None
+    if args.error_map:
+        error_map = ErrorMap(Path(args.error_map))
+    else:
+        error_map = ErrorMap.for_device(args.host, int(args.port), int(args.unit))
+    if args.refresh_error_map:
+        error_map.clear()
+    return error_map
+
+
 def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(
         description="Scan Fronius Modbus TCP registers and write CSV dumps or diffs."
@@ -426,16 +1386,18 @@ def build_parser() -> argparse.ArgumentParser:
     )
     dump_p.add_argument("--timeout", type=float, default=3.0, help="socket timeout in seconds")
     dump_p.add_argument("--pause-ms", type=int, default=50, help="pause between requests")
+    _add_parallel_args(dump_p)
+    _add_error_map_args(dump_p)
     dump_p.add_argument(
         "--include-errors",
         action="store_true",
         help="also write unreadable addresses into the CSV",
     )
-    dump_p.add_argument("--output", required=True, help="target CSV path")
+    dump_p.add_argument("--output", required=True, help="target CSV path (.mbd/.bin writes the binary format)")
 
     diff_p = sub.add_parser("diff", help="compare two CSV dumps")
-    diff_p.add_argument("--before", required=True, help="older CSV dump")
-    diff_p.add_argument("--after", required=True, help="newer CSV dump")
+    diff_p.add_argument("--before", required=True, help="older CSV or binary dump")
+    diff_p.add_argument("--after", required=True, help="newer CSV or binary dump")
     diff_p.add_argument("--output", required=True, help="target CSV path for changes only")
 
     stable_diff_p = sub.add_parser(
@@ -447,6 +1409,73 @@ def build_parser() -> argparse.ArgumentParser:
     stable_diff_p.add_argument("--after", required=True, help="after-change CSV dump")
     stable_diff_p.add_argument("--output", required=True, help="target CSV path for filtered changes")
 
+    watch_p = sub.add_parser("watch", help="poll ranges at a fixed rate and stream only changing registers")
+    watch_p.add_argument("--host", required=True, help="Modbus TCP host/IP")
+    watch_p.add_argument("--port", type=int, default=502, help="Modbus TCP port")
+    watch_p.add_argument("--unit", type=int, default=1, help="Modbus unit/slave id")
+    watch_p.add_argument(
+        "--range",
+        dest="ranges",
+        action="append",
+        type=parse_range_spec,
+        required=True,
+        help="range spec like holding:40000-40200; repeatable",
+    )
+    watch_p.add_argument("--interval", type=float, default=1.0, help="seconds between polls")
+    watch_p.add_argument("--duration", type=float, default=None, help="stop after this many seconds (default: Ctrl+C)")
+    watch_p.add_argument(
+        "--chunk-size",
+        type=int,
+        default=MAX_REGISTERS_PER_READ,
+        help=f"preferred registers per request, max {MAX_REGISTERS_PER_READ}",
+    )
+    watch_p.add_argument("--timeout", type=float, default=3.0, help="socket timeout in seconds")
+    _add_parallel_args(watch_p, connections=False)
+    _add_error_map_args(watch_p)
+    watch_p.add_argument("--log", default=None, help="append changes as CSV (ts,kind,raw_address,old,new)")
+    watch_p.add_argument("--stats", default=None, help="write per-register change statistics as CSV on exit")
+    watch_p.add_argument(
+        "--noisy-per-min",
+        type=float,
+        default=NOISY_CHANGES_PER_MIN,
+        help="changes per minute from which a register counts as noisy measurement",
+    )
+    watch_p.add_argument("--quiet", action="store_true", help="do not print every change to stdout")
+
+    models_p = sub.add_parser("models", help="follow the SunSpec chain from the SunS marker and list all models")
+    models_p.add_argument("--host", required=True, help="Modbus TCP host/IP")
+    models_p.add_argument("--port", type=int, default=502, help="Modbus TCP port")
+    models_p.add_argument("--unit", type=int, default=1, help="Modbus unit/slave id")
+    models_p.add_argument("--kind", choices=("holding", "input"), default="holding", help="register kind")
+    models_p.add_argument("--timeout", type=float, default=3.0, help="socket timeout in seconds")
+
+    decode_p = sub.add_parser("decode", help="decode SunSpec models (101-103/111-113/124/160/201-214) live or from a dump")
+    decode_p.add_argument("--input", default=None, help="decode from a CSV/binary dump instead of a live device")
+    decode_p.add_argument("--host", default=None, help="Modbus TCP host/IP")
+    decode_p.add_argument("--port", type=int, default=502, help="Modbus TCP port")
+    decode_p.add_argument("--unit", type=int, default=1, help="Modbus unit/slave id")
+    decode_p.add_argument("--kind", choices=("holding", "input"), default="holding", help="register kind")
+    decode_p.add_argument("--timeout", type=float, default=3.0, help="socket timeout in seconds")
+    decode_p.add_argument(
+        "--model-id",
+        dest="model_ids",
+        type=int,
+        action="append",
+        help="model to decode; repeatable (default: all models with a decoder)",
+    )
+    _add_parallel_args(decode_p, connections=False)
+
+    changes_p = sub.add_parser(
+        "changes",
+        help="N-way report of registers that differ between any of several binary dumps",
+    )
+    changes_p.add_argument("--inputs", nargs="+", required=True, help="binary dumps (.mbd) in capture order")
+    changes_p.add_argument("--output", required=True, help="target CSV path, one column per capture")
+
+    convert_p = sub.add_parser("convert", help="convert a CSV dump into the binary format")
+    convert_p.add_argument("--input", required=True, help="CSV dump")
+    convert_p.add_argument("--output", required=True, help="target .mbd path")
+
     locate_p = sub.add_parser("locate-model", help="scan a range and find SunSpec model headers")
     locate_p.add_argument("--host", required=True, help="Modbus TCP host/IP")
     locate_p.add_argument("--port", type=int, default=502, help="Modbus TCP port")
@@ -464,6 +1493,8 @@ def build_parser() -> argparse.ArgumentParser:
     )
     locate_p.add_argument("--timeout", type=float, default=3.0, help="socket timeout in seconds")
     locate_p.add_argument("--pause-ms", type=int, default=50, help="pause between requests")
+    _add_parallel_args(locate_p, connections=False)
+    _add_error_map_args(locate_p)
 
     dump_model_p = sub.add_parser("dump-model", help="locate a SunSpec model header and dump that exact block")
     dump_model_p.add_argument("--host", required=True, help="Modbus TCP host/IP")
@@ -482,8 +1513,15 @@ def build_parser() -> argparse.ArgumentParser:
     )
     dump_model_p.add_argument("--timeout", type=float, default=3.0, help="socket timeout in seconds")
     dump_model_p.add_argument("--pause-ms", type=int, default=50, help="pause between requests")
+    _add_parallel_args(dump_model_p, connections=False)
+    _add_error_map_args(dump_model_p)
     dump_model_p.add_argument("--include-errors", action="store_true", help="also write unreadable addresses into the CSV")
-    dump_model_p.add_argument("--output", required=True, help="target CSV path")
+    dump_model_p.add_argument("--output", required=True, help="target CSV path (.mbd/.bin writes the binary format)")
+    dump_model_p.add_argument(
+        "--walk",
+        action="store_true",
+        help="follow the SunSpec chain from the SunS marker instead of scanning --start..--end",
+    )
     dump_model_p.add_argument(
         "--hit-index",
         type=int,
@@ -497,18 +1535,39 @@ def build_parser() -> argparse.ArgumentParser:
 def run_dump(args: argparse.Namespace) -> int:
     chunk_size = max(1, min(int(args.chunk_size), MAX_REGISTERS_PER_READ))
     ranges = args.ranges or list(DEFAULT_RANGES)
+    pause_s = max(0.0, args.pause_ms / 1000.0)
+    in_flight = max(1, int(args.in_flight))
+    connections = max(1, int(args.connections))
+    error_map = _error_map_from_args(args)
     all_rows: list[ReadResult] = []
     start_ts = time.time()
-    with ModbusTcpClient(args.host, int(args.port), int(args.unit), float(args.timeout)) as client:
-        for kind, start, end in ranges:
-            print(f"[dump] {kind} {start}-{end}", flush=True)
-            rows = scan_range(client, kind, start, end, chunk_size, max(0.0, args.pause_ms / 1000.0))
-            ok_count = sum(1 for row in rows if row.status == "ok")
-            err_count = len(rows) - ok_count
-            print(f"[dump] {kind} {start}-{end} -> ok={ok_count} err={err_count}", flush=True)
-            all_rows.extend(rows)
-
-    write_dump_csv(Path(args.output), all_rows, include_errors=bool(args.include_errors))
+    if in_flight == 1 and connections == 1:
+        with ModbusTcpClient(args.host, int(args.port), int(args.unit), float(args.timeout)) as client:
+            for kind, start, end in ranges:
+                print(f"[dump] {kind} {start}-{end}", flush=True)
+                rows = scan_range(client, kind, start, end, chunk_size, pause_s, error_map)
+                ok_count = sum(1 for row in rows if row.status == "ok")
+                err_count = len(rows) - ok_count
+                print(f"[dump] {kind} {start}-{end} -> ok={ok_count} err={err_count}", flush=True)
+                all_rows.extend(rows)
+    else:
+        print(f"[dump] {len(ranges)} range(s) in_flight={in_flight} connections={connections}", flush=True)
+        all_rows = scan_ranges(
+            args.host,
+            int(args.port),
+            int(args.unit),
+            float(args.timeout),
+            ranges,
+            chunk_size,
+            pause_s,
+            in_flight=in_flight,
+            connections=connections,
+            error_map=error_map,
+        )
+    if error_map is not None:
+        error_map.save()
+
+    write_dump(Path(args.output), all_rows, include_errors=bool(args.include_errors))
     elapsed = time.time() - start_ts
     ok_count = sum(1 for row in all_rows if row.status == "ok")
     err_count = len(all_rows) - ok_count
@@ -539,11 +1598,140 @@ def run_stable_diff(args: argparse.Namespace) -> int:
     return 0
 
 
+def run_watch(args: argparse.Namespace) -> int:
+    chunk_size = max(1, min(int(args.chunk_size), MAX_REGISTERS_PER_READ))
+    error_map = _error_map_from_args(args)
+    watches = [RangeWatch(kind, start, end) for kind, start, end in args.ranges]
+    log_fh = None
+    log_writer = None
+    if args.log:
+        log_path = Path(args.log)
+        log_path.parent.mkdir(parents=True, exist_ok=True)
+        new_file = not log_path.exists()
+        log_fh = log_path.open("a", newline="", encoding="utf-8")
+        log_writer = csv.writer(log_fh)
+        if new_file:
+            log_writer.writerow(["ts", "kind", "raw_address", "old", "new"])
+
+    def on_change(event: tuple[float, str, int, str, str]) -> None:
+        ts, kind, raw_address, old, new = event
+        if not args.quiet:
+            print(f"{_fmt_ts(ts)} {kind} {raw_address} (reg {raw_address + 1}) {old} -> {new}", flush=True)
+        if log_writer is not None:
+            log_writer.writerow([f"{ts:.3f}", kind, raw_address, old, new])
+
+    print(
+        f"[watch] {len(watches)} range(s) every {args.interval:.2f}s, Ctrl+C to stop",
+        flush=True,
+    )
+    try:
+        with ModbusTcpClient(args.host, int(args.port), int(args.unit), float(args.timeout)) as client:
+            polls, elapsed = watch_ranges(
+                client,
+                watches,
+                max(0.0, float(args.interval)),
+                chunk_size,
+                in_flight=max(1, int(args.in_flight)),
+                error_map=error_map,
+                duration_s=args.duration,
+                on_change=on_change,
+            )
+    finally:
+        if log_fh is not None:
+            log_fh.close()
+        if error_map is not None:
+            error_map.save()
+
+    stats = [row for watch in watches for row in watch.stats(elapsed, float(args.noisy_per_min))]
+    counts = {klass: sum(1 for row in stats if row["class"] == klass) for klass in ("static", "occasional", "noisy")}
+    print(
+        f"[watch] polls={polls} elapsed={elapsed:.1f}s static={counts['static']} "
+        f"occasional={counts['occasional']} noisy={counts['noisy']}",
+        flush=True,
+    )
+    for row in stats:
+        if row["class"] == "occasional":
+            print(
+                f"[watch] occasional {row['kind']} {row['raw_address']} (reg {row['register_number']}) "
+                f"changes={row['changes']} last={row['last_value']}",
+                flush=True,
+            )
+    if args.stats:
+        _write_rows(Path(args.stats), list(stats[0].keys()) if stats else ["kind"], stats)
+        print(f"[watch] wrote {args.stats}", flush=True)
+    return 0
+
+
+def run_models(args: argparse.Namespace) -> int:
+    with ModbusTcpClient(args.host, int(args.port), int(args.unit), float(args.timeout)) as client:
+        index = walk_models(client, args.kind)
+    if not index:
+        print("[models] no SunS marker found at 40000/50000/0", flush=True)
+        return 1
+    for model_id, (data_raw, model_len) in index.items():
+        print(
+            f"[models] model_id={model_id} header_raw={data_raw - MODEL_HEADER_LEN} data_raw={data_raw} "
+            f"data_reg={data_raw + 1} model_len={model_len} end_raw={data_raw + model_len - 1}",
+            flush=True,
+        )
+    return 0
+
+
+def run_decode(args: argparse.Namespace) -> int:
+    if args.input:
+        values = {
+            raw_address: int(row["value"])
+            for (kind, raw_address), row in load_dump(Path(args.input)).items()
+            if kind == args.kind and row.get("status") == "ok" and str(row.get("value", "")).strip().isdigit()
+        }
+        index = sunspec.index_from_values(values)
+        wanted = args.model_ids or [m for m in index if m in sunspec.DECODABLE_MODELS]
+        decoded = {m: _decode_model(m, values, index[m]) for m in wanted if m in index}
+    else:
+        if not args.host:
+            print("[decode] --host or --input is required", flush=True)
+            return 2
+        with ModbusTcpClient(args.host, int(args.port), int(args.unit), float(args.timeout)) as client:
+            index = walk_models(client, args.kind)
+            wanted = args.model_ids or [m for m in index if m in sunspec.DECODABLE_MODELS]
+            decoded = read_models(client, index, wanted, args.kind, max(1, int(args.in_flight)))
+    if not index:
+        print("[decode] no SunS marker found", flush=True)
+        return 1
+    missing = [m for m in (args.model_ids or []) if m not in index]
+    if missing:
+        print(f"[decode] models not present: {missing}", flush=True)
+    print(json.dumps({str(m): data for m, data in decoded.items()}, indent=2), flush=True)
+    return 0
+
+
+def run_changes(args: argparse.Namespace) -> int:
+    paths = [Path(path) for path in args.inputs]
+    not_binary = [str(path) for path in paths if not is_binary_dump(path)]
+    if not_binary:
+        print(f"[changes] binary dumps required, convert first: {', '.join(not_binary)}", flush=True)
+        return 2
+    total, changed = change_report(paths, Path(args.output))
+    print(f"[changes] captures={len(paths)} compared={total} changed={changed} wrote={args.output}", flush=True)
+    return 0
+
+
+def run_convert(args: argparse.Namespace) -> int:
+    count = convert_csv_to_bin(Path(args.input), Path(args.output))
+    print(f"[convert] rows={count} wrote={args.output}", flush=True)
+    return 0
+
+
 def run_locate_model(args: argparse.Namespace) -> int:
     chunk_size = max(1, min(int(args.chunk_size), MAX_REGISTERS_PER_READ))
     pause_s = max(0.0, args.pause_ms / 1000.0)
+    error_map = _error_map_from_args(args)
     with ModbusTcpClient(args.host, int(args.port), int(args.unit), float(args.timeout)) as client:
-        values = read_range_values(client, args.kind, int(args.start), int(args.end), chunk_size, pause_s)
+        values = read_range_values(
+            client, args.kind, int(args.start), int(args.end), chunk_size, pause_s, int(args.in_flight), error_map
+        )
+    if error_map is not None:
+        error_map.save()
     hits = find_model_headers(values, int(args.model_id), args.model_len)
     if not hits:
         print(
@@ -564,9 +1752,20 @@ def run_locate_model(args: argparse.Namespace) -> int:
 def run_dump_model(args: argparse.Namespace) -> int:
     chunk_size = max(1, min(int(args.chunk_size), MAX_REGISTERS_PER_READ))
     pause_s = max(0.0, args.pause_ms / 1000.0)
+    error_map = _error_map_from_args(args)
     with ModbusTcpClient(args.host, int(args.port), int(args.unit), float(args.timeout)) as client:
-        values = read_range_values(client, args.kind, int(args.start), int(args.end), chunk_size, pause_s)
-        hits = find_model_headers(values, int(args.model_id), args.model_len)
+        if args.walk:
+            span = walk_models(client, args.kind).get(int(args.model_id))
+            hits = []
+            if span is not None and (args.model_len is None or span[1] == args.model_len):
+                hits = [(span[0] - MODEL_HEADER_LEN, span[1])]
+        else:
+            values = read_range_values(
+                client, args.kind, int(args.start), int(args.end), chunk_size, pause_s, int(args.in_flight), error_map
+            )
+            if error_map is not None:
+                error_map.save()
+            hits = find_model_headers(values, int(args.model_id), args.model_len)
         if not hits:
             print(
                 f"[dump-model] no hits for model_id={args.model_id} len={args.model_len} in {args.kind} {args.start}-{args.end}",
@@ -584,8 +1783,12 @@ def run_dump_model(args: argparse.Namespace) -> int:
             f"data_raw={raw_address + MODEL_HEADER_LEN} model_len={model_len} end_raw={model_end}",
             flush=True,
         )
-        rows = scan_range(client, args.kind, raw_address, model_end, chunk_size, pause_s)
-    write_dump_csv(Path(args.output), rows, include_errors=bool(args.include_errors))
+        rows = scan_range_pipelined(
+            client, args.kind, raw_address, model_end, chunk_size, pause_s, int(args.in_flight), error_map
+        )
+    if error_map is not None:
+        error_map.save()
+    write_dump(Path(args.output), rows, include_errors=bool(args.include_errors))
     ok_count = sum(1 for row in rows if row.status == "ok")
     err_count = len(rows) - ok_count
     print(f"[dump-model] wrote {args.output} rows={len(rows)} ok={ok_count} err={err_count}", flush=True)
@@ -601,6 +1804,16 @@ def main(argv: list[str] | None = None) -> int:
         return run_diff(args)
     if args.command == "stable-diff":
         return run_stable_diff(args)
+    if args.command == "models":
+        return run_models(args)
+    if args.command == "decode":
+        return run_decode(args)
+    if args.command == "watch":
+        return run_watch(args)
+    if args.command == "changes":
+        return run_changes(args)
+    if args.command == "convert":
+        return run_convert(args)
     if args.command == "locate-model":
         return run_locate_model(args)
     if args.command == "dump-model":
@@ -0,0 +1,138 @@
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+import fronius_modbus_dump as dump  # noqa: E402
+
+
+def _error_row(addr, code):
+    return dump.ReadResult("holding", addr, addr + 1, None, "error", f"code={code}", code)
+
+
+class _FlakyClient:
+    """Antwortet die ersten `busy` Male mit Exception-Code `code`, danach mit Werten."""
+
+    def __init__(self, busy, code=6):
+        self.busy = busy
+        self.code = code
+        self.calls = 0
+
+    def read_registers(self, kind, raw_address, quantity):
+        self.calls += 1
+        if self.calls <= self.busy:
+            raise dump.ModbusExceptionResponse(3, self.code)
+        return list(range(raw_address, raw_address + quantity))
+
+
+class ErrorMapTests(unittest.TestCase):
+    def test_only_persistent_exception_codes_are_recorded(self):
+        em = dump.ErrorMap(None)
+        rows = [_error_row(10, 2), _error_row(11, 6), _error_row(12, 4), _error_row(13, 3)]
+        em.record("holding", 10, 13, rows)
+        self.assertEqual(em.invalid_spans("holding", 0, 100), [(10, 10, 2), (13, 13, 3)])
+
+    def test_busy_replies_are_retried_instead_of_bisected(self):
+        client = _FlakyClient(busy=dump.TRANSIENT_RETRIES)
+        with patch.object(dump.time, "sleep"):
+            rows = dump._scan_block(client, "holding", 100, 8)
+        self.assertEqual([r.status for r in rows], ["ok"] * 8)
+        self.assertEqual(client.calls, dump.TRANSIENT_RETRIES + 1)
+
+    def test_illegal_address_is_not_retried(self):
+        client = _FlakyClient(busy=1, code=2)
+        rows = dump._scan_block(client, "holding", 0, 1)
+        self.assertEqual(client.calls, 1)
+        self.assertEqual(rows[0].exception_code, 2)
+
+
+class _GapDevice:
+    """Register 4..7 fehlen (illegal address), der Rest liefert seine Adresse."""
+
+    def __init__(self):
+        self.single_reads = 0
+
+    def read_registers(self, kind, raw_address, quantity):
+        self.single_reads += 1
+        if raw_address <= 7 and raw_address + quantity - 1 >= 4:
+            raise dump.ModbusExceptionResponse(3, 2)
+        return list(range(raw_address, raw_address + quantity))
+
+    def read_pipelined(self, kind, blocks, in_flight, pause_s=0.0):
+        answers = {}
+        for addr, qty in blocks:
+            try:
+                answers[addr] = self.read_registers(kind, addr, qty)
+            except dump.ModbusError as exc:
+                answers[addr] = exc
+        return answers
+
+
+class RangeWatchTests(unittest.TestCase):
+    def test_exception_blocks_are_bisected_once_without_error_map(self):
+        once, device = _GapDevice(), _GapDevice()
+        dump.watch_ranges(once, [dump.RangeWatch("holding", 0, 15)], 0.0, 16, max_polls=1)
+        watch = dump.RangeWatch("holding", 0, 15)
+        dump.watch_ranges(device, [watch], 0.0, 16, max_polls=3)
+        self.assertEqual(list(watch.values[8:]), list(range(8, 16)))
+        # Runde 2 und 3 lesen nur noch die gültigen Blöcke um die bekannte Lücke
+        self.assertEqual(device.single_reads, once.single_reads + 2 * 2)
+
+
+def _ok_row(addr, value):
+    return dump.ReadResult("holding", addr, addr + 1, value, "ok")
+
+
+class BinaryDumpTests(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = Path(tmp.name)
+
+    def _write(self, name, rows):
+        path = self.dir / name
+        dump.write_dump_bin(path, rows, captured_ts=0.0)
+        return path
+
+    def test_close_releases_the_mapping(self):
+        path = self._write("a.mbd", [_ok_row(i, i) for i in range(4)])
+        bd = dump.BinaryDump(path)
+        values = bd.sections[0].values
+        bd.close()
+        self.assertTrue(bd._mm.closed)
+        with self.assertRaises(ValueError):
+            values[0]
+
+    def test_close_reports_views_still_held_elsewhere(self):
+        path = self._write("a.mbd", [_ok_row(i, i) for i in range(4)])
+        bd = dump.BinaryDump(path)
+        held = memoryview(bd._mm)
+        with self.assertRaises(BufferError):
+            bd.close()
+        held.release()
+        bd.close()
+        self.assertTrue(bd._mm.closed)
+
+    def test_truncated_file_raises_modbus_error(self):
+        path = self._write("a.mbd", [_ok_row(i, i) for i in range(4)])
+        data = path.read_bytes()
+        for cut in (8, len(data) - 3):
+            path.write_bytes(data[:cut])
+            with self.assertRaisesRegex(dump.ModbusError, "truncated"):
+                dump.BinaryDump(path)
+
+    def test_binary_and_csv_diff_count_the_same_registers(self):
+        before = [_ok_row(0, 1), _ok_row(1, 2), _error_row(3, 2)]
+        after = [_ok_row(0, 1), _ok_row(1, 5), _ok_row(2, 7)]
+        bin_result = dump.diff_dumps(self._write("b.mbd", before), self._write("a.mbd", after), self.dir / "bin.csv")
+        dump.write_dump_csv(self.dir / "b.csv", before, include_errors=True)
+        dump.write_dump_csv(self.dir / "a.csv", after, include_errors=True)
+        csv_result = dump.diff_dumps(self.dir / "b.csv", self.dir / "a.csv", self.dir / "csv.csv")
+        self.assertEqual(bin_result, csv_result)
+        self.assertEqual(bin_result[0], 4)
+
+
+if __name__ == "__main__":
+    unittest.main()